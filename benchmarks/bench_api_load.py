@@ -0,0 +1,330 @@
+"""
+API 压测：合成数据集 + 进程内并发请求
+
+1. 用 server/database/init_sqlite.sql 初始化一个新的 SQLite 数据库，按规模生成合成数据
+   （默认约为明朝规模的数倍：朝代、皇帝、10万+事件、人物、作品及各类关联）
+2. 通过 httpx.ASGITransport 在进程内驱动真实的 FastAPI 应用（含全部中间件），
+   多个并发客户端按权重请求各个路由
+3. 输出每个接口的请求数、错误数、RPS 和 p50/p95/p99，结果保存为 JSON，可与之前的结果对比
+
+用法:
+    python benchmarks/bench_api_load.py [--scale 4] [--concurrency 16] [--duration 20]
+    python benchmarks/bench_api_load.py --no-cache --compare benchmarks/results/api_load_xxx.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from server.config.settings import settings
+from server.database.sqlite_manager import SQLiteManager
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+
+EVENT_TYPES = ['政治', '军事', '经济', '文化', '外交', '战争']
+PERSON_TYPES = ['文臣', '武将', '诗人', '画家', '思想家', '宦官']
+PLACES = ['南京', '北京', '西安', '杭州', '苏州', '广州', None]
+SURNAMES = '王李张刘陈杨黄赵周吴徐孙朱马胡郭林何高罗郑梁谢宋唐许韩冯邓曹彭曾萧田董潘袁蔡蒋余于杜叶程魏苏吕丁任沈姚卢姜崔钟谭陆汪范金石廖贾夏韦付方白邹孟熊秦邱江尹薛闫段雷侯龙史陶黎贺顾毛郝龚邵万钱严覃武戴莫孔向汤'
+GIVEN = '文武德明成安仁义礼智信忠孝贤良方正清和平康宁泰昌盛隆兴世宗光华英杰俊秀雄伟'
+
+
+# ---------------------------------------------------------------------------
+# 合成数据
+# ---------------------------------------------------------------------------
+
+class Dataset:
+    """生成的数据中可用于构造请求的ID"""
+
+    def __init__(self):
+        self.dynasty_ids: List[str] = []
+        self.emperor_ids: List[str] = []
+        self.event_ids: List[str] = []
+        self.person_ids: List[str] = []
+        self.keywords: List[str] = []
+
+
+def _name(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+
+
+def seed(db_path: str, scale: int, events: int, persons: int, seed_value: int = 42) -> Dataset:
+    """
+    生成合成数据
+
+    Args:
+        scale: 朝代数（每个朝代约为明朝规模：16位皇帝、276年）
+        events: 事件总数
+        persons: 人物总数
+    """
+    rng = random.Random(seed_value)
+    # 日期列按 ISO 格式（YYYY-MM-DD）字符串比较和截取年份，年份统一补零到4位（如 0980-03-01）
+    data = Dataset()
+    db = SQLiteManager(db_path)
+    db.initialize_database()
+    conn = db.connect()
+
+    dynasties, emperors, event_rows, person_rows = [], [], [], []
+    for d in range(scale):
+        dynasty_id = f"bench_dynasty_{d:02d}"
+        start_year = 1000 + d * 300
+        dynasties.append((dynasty_id, f"合成朝{d}", start_year, start_year + 276, '京师', _name(rng), '合成数据'))
+        data.dynasty_ids.append(dynasty_id)
+        for e in range(16):
+            reign_start = start_year + e * 17
+            emperor_id = f"{dynasty_id}_emperor_{e:03d}"
+            emperors.append((emperor_id, dynasty_id, _name(rng), f"{rng.choice(GIVEN)}宗", f"{rng.choice(GIVEN)}{rng.choice(GIVEN)}",
+                             f"{reign_start - 20:04d}-03-01", f"{reign_start + 17:04d}-05-01",
+                             f"{reign_start:04d}-01-01", f"{reign_start + 16:04d}-12-31", 17, e + 1,
+                             '合成传记' * 20, '合成成就' * 10, 'synthetic'))
+            data.emperor_ids.append(emperor_id)
+
+    for i in range(events):
+        d = rng.randrange(scale)
+        year = 1000 + d * 300 + rng.randrange(272)
+        emperor_index = min((year - 1000 - d * 300) // 17, 15)
+        event_id = f"bench_event_{i:06d}"
+        title = f"{rng.choice(PLACES) or '边境'}{rng.choice(['之战', '之变', '改革', '会盟', '迁都', '科举'])}{i}"
+        event_rows.append((event_id, data.dynasty_ids[d], f"{data.dynasty_ids[d]}_emperor_{emperor_index:03d}",
+                           title, rng.choice(EVENT_TYPES), f"{year:04d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                           None, rng.choice(PLACES), '合成事件描述' * 15, '合成历史意义' * 5, 'synthetic'))
+        data.event_ids.append(event_id)
+
+    for i in range(persons):
+        d = rng.randrange(scale)
+        birth = 1000 + d * 300 + rng.randrange(250)
+        person_id = f"bench_person_{i:06d}"
+        name = _name(rng)
+        person_rows.append((person_id, data.dynasty_ids[d], name, json.dumps([_name(rng)], ensure_ascii=False),
+                            f"{birth:04d}-01-01", f"{birth + rng.randint(30, 80):04d}-01-01", rng.choice(PERSON_TYPES),
+                            rng.choice(['尚书', '侍郎', '将军', '学士', None]), '合成人物传记' * 20, 'synthetic'))
+        data.person_ids.append(person_id)
+        if i % 50 == 0:
+            data.keywords.append(name[:1])
+
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO dynasties (dynasty_id, name, start_year, end_year, capital, founder, description) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", dynasties)
+        conn.executemany(
+            "INSERT INTO emperors (emperor_id, dynasty_id, name, temple_name, reign_title, birth_date, death_date, "
+            "reign_start, reign_end, reign_duration, dynasty_order, biography, achievements, data_source) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", emperors)
+        conn.executemany(
+            "INSERT INTO events (event_id, dynasty_id, emperor_id, title, event_type, start_date, end_date, location, "
+            "description, significance, data_source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", event_rows)
+        conn.executemany(
+            "INSERT INTO persons (person_id, dynasty_id, name, alias, birth_date, death_date, person_type, position, "
+            "biography, data_source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", person_rows)
+        conn.executemany(
+            "INSERT INTO works (work_id, person_id, title, work_type) VALUES (?, ?, ?, ?)",
+            [(f"bench_work_{i:06d}", rng.choice(data.person_ids), f"合成作品{i}", rng.choice(['诗', '文', '画']))
+             for i in range(persons // 2)])
+        conn.executemany(
+            "INSERT OR IGNORE INTO event_person_relation (relation_id, event_id, person_id, role) VALUES (?, ?, ?, ?)",
+            [(f"bench_rel_{i:06d}", rng.choice(data.event_ids), rng.choice(data.person_ids), '参与者')
+             for i in range(events)])
+        conn.executemany(
+            "INSERT OR IGNORE INTO person_emperor (person_id, emperor_id, position, source) VALUES (?, ?, ?, 'synthetic')",
+            [(rng.choice(data.person_ids), rng.choice(data.emperor_ids), '大臣') for _ in range(persons)])
+        conn.executemany(
+            "INSERT OR IGNORE INTO person_relations (relation_id, person_id_from, person_id_to, relation_type) "
+            "VALUES (?, ?, ?, ?)",
+            [(f"bench_prel_{i:06d}", rng.choice(data.person_ids), rng.choice(data.person_ids),
+              rng.choice(['FRIEND', 'TEACHER_STUDENT', 'RIVAL'])) for i in range(persons)])
+        conn.commit()
+    finally:
+        db.close()
+    return data
+
+
+def load_dataset(db_path: str) -> Dataset:
+    """从已生成的合成数据库读取ID"""
+    data = Dataset()
+    db = SQLiteManager(db_path)
+    try:
+        data.dynasty_ids = [row[0] for row in db.fetch_all("SELECT dynasty_id FROM dynasties WHERE dynasty_id LIKE 'bench_%'")]
+        data.emperor_ids = [row[0] for row in db.fetch_all("SELECT emperor_id FROM emperors WHERE data_source = 'synthetic'")]
+        data.event_ids = [row[0] for row in db.fetch_all("SELECT event_id FROM events WHERE data_source = 'synthetic'")]
+        persons = db.fetch_all("SELECT person_id, name FROM persons WHERE data_source = 'synthetic'")
+        data.person_ids = [row[0] for row in persons]
+        data.keywords = sorted({row[1][:1] for row in persons[::50]})
+    finally:
+        db.close()
+    return data
+
+
+# ---------------------------------------------------------------------------
+# 请求场景：(名称, 权重, 生成请求的函数 → (方法, URL, JSON 请求体))
+# ---------------------------------------------------------------------------
+
+Request = Tuple[str, str, Optional[dict]]
+
+
+def scenarios(data: Dataset, rng: random.Random) -> List[Tuple[str, int, Callable[[], Request]]]:
+    pick = rng.choice
+    return [
+        ("GET /dynasties", 2, lambda: ("GET", "/api/v1/dynasties/", None)),
+        ("GET /dynasties/{id}", 2, lambda: ("GET", f"/api/v1/dynasties/{pick(data.dynasty_ids)}", None)),
+        ("GET /emperors", 4, lambda: ("GET", f"/api/v1/emperors/?dynasty_id={pick(data.dynasty_ids)}", None)),
+        ("GET /emperors/{id}", 8, lambda: ("GET", f"/api/v1/emperors/{pick(data.emperor_ids)}", None)),
+        ("GET /emperors/{id}/persons", 3, lambda: ("GET", f"/api/v1/emperors/{pick(data.emperor_ids)}/persons", None)),
+        ("GET /events", 8, lambda: ("GET", f"/api/v1/events/?dynasty_id={pick(data.dynasty_ids)}"
+                                           f"&event_type={pick(EVENT_TYPES)}&skip={rng.randrange(0, 200)}&limit=50", None)),
+        ("GET /events/{id}", 10, lambda: ("GET", f"/api/v1/events/{pick(data.event_ids)}", None)),
+        ("GET /persons", 6, lambda: ("GET", f"/api/v1/persons/?dynasty_id={pick(data.dynasty_ids)}"
+                                            f"&person_type={pick(PERSON_TYPES)}&limit=50", None)),
+        ("GET /persons/{id}", 10, lambda: ("GET", f"/api/v1/persons/{pick(data.person_ids)}", None)),
+        ("GET /timeline/{id}", 4, lambda: ("GET", f"/api/v1/timeline/{pick(data.dynasty_ids)}", None)),
+        ("GET /search", 5, lambda: ("GET", f"/api/v1/search/?q={pick(data.keywords)}&limit=20", None)),
+        ("GET /search/suggest", 5, lambda: ("GET", f"/api/v1/search/suggest?q={pick(data.keywords)}", None)),
+        ("GET /statistics/overview", 2, lambda: ("GET", "/api/v1/statistics/overview", None)),
+        ("GET /statistics/dynasty/{id}", 2, lambda: ("GET", f"/api/v1/statistics/dynasty/{pick(data.dynasty_ids)}", None)),
+        ("GET /statistics/trends/timeline", 2, lambda: ("GET", f"/api/v1/statistics/trends/timeline?dynasty_id={pick(data.dynasty_ids)}", None)),
+        ("POST /batch", 4, lambda: ("POST", "/api/v1/batch", {
+            "emperor_ids": rng.sample(data.emperor_ids, 5),
+            "person_ids": rng.sample(data.person_ids, 20),
+            "event_ids": rng.sample(data.event_ids, 20)})),
+        ("GET /sync", 2, lambda: ("GET", f"/api/v1/sync?since={rng.randrange(0, 1000)}&limit=200", None)),
+    ]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(app, data: Dataset, concurrency: int, duration: float, warmup: float, seed_value: int) -> Dict:
+    """并发请求 duration 秒，返回每个接口的统计"""
+    rng = random.Random(seed_value)
+    table = scenarios(data, rng)
+    names = [name for name, _, _ in table]
+    weights = [weight for _, weight, _ in table]
+    builders = {name: builder for name, _, builder in table}
+
+    timings: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(deadline: float, record: bool):
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                method, url, body = builders[name]()
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, json=body)
+                    ok = response.status_code < 400
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                if record:
+                    timings[name].append(elapsed)
+                    if not ok:
+                        errors[name] += 1
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        values = sorted(timings[name])
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        }
+    total = sum(len(values) for values in timings.values())
+    return {"wall_seconds": round(wall, 3), "total_requests": total, "total_rps": round(total / wall, 2),
+            "total_errors": sum(errors.values()), "endpoints": endpoints}
+
+
+def print_report(result: Dict, baseline: Optional[Dict] = None):
+    print(f"\n{'接口':<34}{'请求':>8}{'错误':>6}{'RPS':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+          + (f"{'p95 对比':>12}" if baseline else ""))
+    for name, stats in result["endpoints"].items():
+        line = (f"{name:<34}{stats['requests']:>8}{stats['errors']:>6}{stats['rps']:>9.1f}"
+                f"{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous and previous["p95_ms"]:
+            line += f"{(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:>+11.1f}%"
+        print(line)
+    print(f"\n总计: {result['total_requests']} 次请求, {result['total_rps']:.1f} RPS, {result['total_errors']} 个错误")
+    if baseline:
+        print(f"对比基线: {baseline['total_rps']:.1f} RPS（{(result['total_rps'] / baseline['total_rps'] - 1) * 100:+.1f}%）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 压测（合成数据集，进程内 ASGI）')
+    parser.add_argument('--scale', type=int, default=4, help='朝代数（每个朝代约为明朝规模）')
+    parser.add_argument('--events', type=int, default=100000, help='事件总数')
+    parser.add_argument('--persons', type=int, default=20000, help='人物总数')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=20, help='压测时长（秒）')
+    parser.add_argument('--warmup', type=float, default=3, help='预热时长（秒，不计入结果）')
+    parser.add_argument('--no-cache', action='store_true', help='关闭响应缓存（测量未命中时的性能）')
+    parser.add_argument('--db', help='使用已有的合成数据库（不重新生成）')
+    parser.add_argument('--output', help='结果文件路径（默认 benchmarks/results/api_load_<时间>.json）')
+    parser.add_argument('--compare', help='与之前的结果文件对比')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, 'bench.db')
+        start = time.perf_counter()
+        if args.db and os.path.exists(args.db):
+            data = load_dataset(db_path)
+        else:
+            data = seed(db_path, args.scale, args.events, args.persons, args.seed)
+        print(f"数据: {len(data.dynasty_ids)} 个朝代, {len(data.emperor_ids)} 位皇帝, {len(data.event_ids)} 个事件, "
+              f"{len(data.person_ids)} 个人物（{time.perf_counter() - start:.1f} 秒）")
+
+        # 应用在第一次请求时才构建中间件，此前修改配置即可生效
+        settings.SQLITE_DB_PATH = db_path
+        settings.CACHE_ENABLED = not args.no_cache
+        settings.BUNDLE_DIR = os.path.join(tmp, 'bundles')
+        from server.main import app
+
+        print(f"并发 {args.concurrency}, 时长 {args.duration} 秒, 响应缓存{'关闭' if args.no_cache else '开启'}")
+        result = asyncio.run(run_load(app, data, args.concurrency, args.duration, args.warmup, args.seed))
+
+    result["config"] = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    result["timestamp"] = datetime.now().isoformat(timespec="seconds")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"api_load_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+API 序列化基准测试：response_model 逐行校验（旧）vs 直接 JSON 编码（新）
+
+在临时数据库中生成一个朝代的合成数据（皇帝、事件），
+分别在 FAST_JSON_RESPONSES 关闭/开启时请求 /timeline 和 /events，统计 p50/p99 延迟
+
+用法:
+    python benchmarks/bench_api_serialization.py [--requests 300] [--events 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from server.config.settings import settings
+from server.database.dependencies import get_db
+from server.database.sqlite_manager import SQLiteManager
+from server.main import app
+
+
+DYNASTY_ID = "bench"
+EVENT_TYPES = ["政治", "军事", "经济", "文化", "外交"]
+
+
+def seed(db: SQLiteManager, emperors: int, events: int, seed: int = 42):
+    """生成合成数据：一个朝代、若干皇帝、若干事件"""
+    rng = random.Random(seed)
+    start_year, end_year = 1368, 1644
+    db.execute(
+        "INSERT INTO dynasties (dynasty_id, name, start_year, end_year) VALUES (?, ?, ?, ?)",
+        (DYNASTY_ID, "基准朝", start_year, end_year)
+    )
+
+    span = (end_year - start_year) // emperors
+    db.execute_many(
+        """
+        INSERT INTO emperors (emperor_id, dynasty_id, name, temple_name, reign_title,
+                              reign_start, reign_end, reign_duration, dynasty_order)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (f"bench_emperor_{i:03d}", DYNASTY_ID, f"皇帝{i}", f"庙号{i}", f"年号{i}",
+             f"{start_year + i * span}-01-01", f"{start_year + (i + 1) * span - 1}-12-31", span, i + 1)
+            for i in range(emperors)
+        ]
+    )
+
+    rows = []
+    for i in range(events):
+        year = rng.randint(start_year, end_year - 1)
+        rows.append((
+            f"bench_event_{i:05d}", DYNASTY_ID, f"bench_emperor_{min((year - start_year) // span, emperors - 1):03d}",
+            f"事件{i}", rng.choice(EVENT_TYPES),
+            f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", None, rng.choice(["南京", "北京", None])
+        ))
+    db.execute_many(
+        """
+        INSERT INTO events (event_id, dynasty_id, emperor_id, title, event_type, start_date, end_date, location)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows
+    )
+
+
+def measure(client: TestClient, url: str, count: int):
+    """请求 count 次，返回 (p50, p99, 响应字节数)，单位毫秒"""
+    client.get(url)  # 预热
+    timings = []
+    size = 0
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+        size = len(response.content)
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings), p99, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 序列化基准测试')
+    parser.add_argument('--requests', type=int, default=300, help='每个接口的请求次数')
+    parser.add_argument('--emperors', type=int, default=16, help='皇帝数')
+    parser.add_argument('--events', type=int, default=5000, help='事件数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        db = SQLiteManager(db_path)
+        db.initialize_database()
+        seed(db, args.emperors, args.events)
+        db.close()
+
+        def override_db():
+            manager = SQLiteManager(db_path)
+            try:
+                yield manager
+            finally:
+                manager.close()
+
+        app.dependency_overrides[get_db] = override_db
+        client = TestClient(app)
+        endpoints = [
+            ('/timeline', f"/api/v1/timeline/{DYNASTY_ID}"),
+            ('/events', f"/api/v1/events/?dynasty_id={DYNASTY_ID}&limit=100"),
+        ]
+
+        print(f"数据: {args.emperors} 位皇帝, {args.events} 个事件; 每个接口 {args.requests} 次请求\n")
+        print(f"{'接口':<12}{'模式':<14}{'p50 (ms)':>10}{'p99 (ms)':>10}{'字节':>10}")
+        original = settings.FAST_JSON_RESPONSES
+        try:
+            for label, url in endpoints:
+                results = {}
+                for fast in (False, True):
+                    settings.FAST_JSON_RESPONSES = fast
+                    mode = '直接编码' if fast else 'response_model'
+                    results[fast] = measure(client, url, args.requests)
+                    p50, p99, size = results[fast]
+                    print(f"{label:<12}{mode:<14}{p50:>10.2f}{p99:>10.2f}{size:>10}")
+                print(f"{'':<12}{'加速':<14}{results[False][0] / results[True][0]:>9.1f}x"
+                      f"{results[False][1] / results[True][1]:>9.1f}x\n")
+        finally:
+            settings.FAST_JSON_RESPONSES = original
+            app.dependency_overrides.pop(get_db, None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,600 @@
+"""
+爬虫吞吐基准测试：本地夹具服务器 + 真实的 Scrapy 爬虫与 Pipeline
+
+1. 在本地启动 HTTP 服务器代替 baike.baidu.com / zh.wikipedia.org：
+   - /wiki/<名称>: 已保存的 Wikipedia 页面（crawler/data/html/emperor/*.html，未收录的名称按哈希复用其中一页）
+   - /item/<名称>: 百度百科页面（夹具目录下 baidu/*.html，没有时生成结构相同的合成页面）
+   - POST /api/generate: Ollama 接口桩，按提示词返回固定结构的 JSON（支持流式），延迟可配置
+   可配置每个页面的响应延迟，并按比例注入 429
+2. 依次运行 BaiduBaikeSpider、WikipediaSpider、MingEmperorSpider（请求改写到本地服务器，
+   关闭下载延迟和 HTTP 缓存，SQLite / HTML 写入临时目录，默认不启用 Neo4j）
+3. 输出每个爬虫的 pages/s、items/s、各 Pipeline 阶段耗时和峰值内存，结果保存为 JSON，可与之前的结果对比
+
+注意：crawler.middlewares.RetryMiddleware 收到 429 时会同步 sleep 5~10 秒（阻塞 reactor），
+注入 429 时 crawler 包下两个爬虫的吞吐会明显下降，这正是需要测量的行为
+
+用法:
+    python benchmarks/bench_crawler_throughput.py [--rounds 3] [--latency 50] [--llm-delay 200]
+    python benchmarks/bench_crawler_throughput.py --spiders ming_emperor --error-rate 0.05 --compare benchmarks/results/crawler_xxx.json
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+
+from scrapy import signals
+from scrapy.crawler import CrawlerRunner
+from scrapy.settings import Settings
+from scrapy.utils.log import configure_logging
+from scrapy.utils.misc import load_object
+from scrapy.utils.reactor import install_reactor
+from twisted.internet import defer
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不输出进程峰值内存
+    resource = None
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from crawler.spiders.baidu_baike_spider import BaiduBaikeSpider
+from crawler.spiders.wikipedia_spider import WikipediaSpider
+from crawler_new.spiders.ming_emperor_spider import MingEmperorSpider
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+DEFAULT_FIXTURES = os.path.join(PROJECT_ROOT, 'crawler', 'data', 'html', 'emperor')
+
+EVENT_NAMES = ['靖难之役', '土木之变', '郑和下西洋', '夺门之变', '胡惟庸案', '蓝玉案', '壬寅宫变', '万历三大征',
+               '鄱阳湖之战', '庚戌之变', '张居正改革', '宁王之乱']
+PERSON_NAMES = ['徐达', '常遇春', '刘基', '李善长', '姚广孝', '于谦', '王守仁', '张居正', '戚继光', '海瑞',
+                '郑和', '解缙', '杨士奇', '严嵩', '徐阶', '高拱', '蓝玉', '汤和', '沐英', '胡惟庸']
+
+# 分事迹提取的提示词以顶层数组作为输出格式
+ARRAY_OUTPUT = re.compile(r'\n\[\n\s*\{')
+PAGE_NAME = re.compile(r'皇帝“(.+?)”')
+
+
+# ---------------------------------------------------------------------------
+# 夹具页面
+# ---------------------------------------------------------------------------
+
+def load_fixtures(directory: str) -> Dict[str, bytes]:
+    """读取目录下的 <名称>_*.html，按名称索引"""
+    pages = {}
+    if not os.path.isdir(directory):
+        return pages
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.html'):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                pages[filename[:-5].split('_')[0]] = f.read()
+    return pages
+
+
+def make_baidu_page(name: str) -> bytes:
+    """生成与百度百科词条结构相同的页面（内嵌 JSON、basic-info、正文中的事件与人物链接）"""
+    rng = random.Random(zlib.crc32(name.encode('utf-8')))
+    year = rng.randint(1320, 1620)
+    data = {
+        'lemmaBasicInfo': True,
+        'dateOfBirth': {'text': [{'tag': 'text', 'text': f'{year}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日'}]},
+        'dateOfDeath': {'text': [{'tag': 'text', 'text': f'{year + rng.randint(30, 70)}年{rng.randint(1, 12)}月'}]},
+        'majorAchievement': {'data': [{'text': [{'tag': 'text', 'text': '整顿吏治'}, {'tag': 'text', 'text': '修订律令'}]}]},
+        'description': f'{name}，明代历史人物。',
+    }
+    links = rng.sample(EVENT_NAMES, 6) + rng.sample(PERSON_NAMES, 10)
+    parts = ['<html><head><meta charset="utf-8"><title>', name, '_百度百科</title>',
+             '<script>window.PAGE_DATA=', json.dumps(data, ensure_ascii=False, separators=(',', ':')), '</script>',
+             '</head><body>',
+             f'<div class="lemmaWgt-lemmaTitle-title"><h1>{name}</h1></div>',
+             f'<div class="lemma-summary"><div class="para">{name}，明代历史人物，事迹见于《明史》。</div></div>',
+             '<dl class="basic-info">',
+             f'<dt>出生日期</dt><dd>{year}年</dd><dt>逝世日期</dt><dd>{year + 50}年</dd>',
+             f'<dt>发生时间</dt><dd>{year + 20}年</dd><dt>地点</dt><dd>应天府（今南京市）</dd>',
+             '<dt>职务</dt><dd>大将军</dd><dt>别名</dt><dd>无</dd>',
+             '</dl><div class="main-content">']
+    for i, link in enumerate(links):
+        parts.append(f'<h2>章节{i}</h2><div class="para">{name}与<a href="/item/{link}">{link}</a>相关。'
+                     + '史载其事甚详。' * 40 + '</div>')
+    parts.append('</div></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def stub_llm_output(prompt: str, base_url: str, n_events: int) -> str:
+    """按提示词类型返回大模型桩的输出（完整数据 / 基本信息 / 事迹数组）"""
+    match = PAGE_NAME.search(prompt)
+    name = match.group(1) if match else '未知'
+    info = {'皇帝': name, '庙号': None, '年号': None, '画像url': None,
+            '出生': '1328年10月21日', '去世': '1398年6月24日', '简介': f'{name}，明朝皇帝。'}
+    events = []
+    for i in range(n_events):
+        person = PERSON_NAMES[(zlib.crc32(name.encode('utf-8')) + i) % len(PERSON_NAMES)]
+        event = EVENT_NAMES[i % len(EVENT_NAMES)]
+        events.append({
+            '时间': f'{1368 + i}年', '事件': f'{name}时期的{event}，' + '史载其事甚详。' * 10,
+            '事件影响': '影响深远', '地点': '应天府（今南京市）',
+            '事件链接': f'{base_url}/wiki/{event}',
+            '人物': [{'姓名': person, '关系': '大臣', '链接': f'{base_url}/wiki/{person}'}],
+        })
+    if '"emperor_info"' in prompt:
+        return json.dumps({'emperor_info': info, 'events': events}, ensure_ascii=False)
+    if ARRAY_OUTPUT.search(prompt):
+        return json.dumps(events, ensure_ascii=False)
+    return json.dumps(info, ensure_ascii=False)
+
+
+# ---------------------------------------------------------------------------
+# 夹具服务器
+# ---------------------------------------------------------------------------
+
+class FixtureSite:
+    """本地夹具服务器（线程池处理请求，延迟和 429 对每个页面请求生效，大模型桩只有延迟）"""
+
+    def __init__(self, fixtures_dir: str, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0,
+                 llm_delay_ms: float = 0, llm_events: int = 20, seed_value: int = 42):
+        self.wikipedia = load_fixtures(fixtures_dir)
+        if not self.wikipedia:
+            raise SystemExit(f"夹具目录中没有 HTML 页面: {fixtures_dir}")
+        self.baidu = load_fixtures(os.path.join(fixtures_dir, 'baidu'))
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.llm_delay = llm_delay_ms / 1000
+        self.llm_events = llm_events
+        self._rng = random.Random(seed_value)
+        self._lock = threading.Lock()
+        self.counters = {'pages': 0, 'throttled': 0, 'not_found': 0, 'llm_calls': 0}
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.base_url = ''
+
+    def start(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def reset_counters(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self.counters)
+            for key in self.counters:
+                self.counters[key] = 0
+        return counters
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _page_delay_and_throttle(self) -> bool:
+        """页面请求的延迟；返回是否注入 429"""
+        with self._lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            throttled = self._rng.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return throttled
+
+    def page(self, path: str) -> Optional[bytes]:
+        """/wiki/<名称> 与 /item/<名称> 对应的页面"""
+        prefix, _, name = unquote(path).lstrip('/').partition('/')
+        if not name:
+            return None
+        if prefix == 'wiki':
+            if name in self.wikipedia:
+                return self.wikipedia[name]
+            pages = list(self.wikipedia.values())
+            return pages[zlib.crc32(name.encode('utf-8')) % len(pages)]
+        if prefix == 'item':
+            return self.baidu.get(name) or make_baidu_page(name)
+        return None
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if site._page_delay_and_throttle():
+                    site._count('throttled')
+                    self._send(429, b'Too Many Requests', 'text/plain', extra={'Retry-After': '1'})
+                    return
+                body = site.page(path)
+                if body is None:
+                    site._count('not_found')
+                    self._send(404, b'Not Found', 'text/plain')
+                    return
+                site._count('pages')
+                self._send(200, body, 'text/html; charset=utf-8')
+
+            def do_POST(self):
+                if urlsplit(self.path).path != '/api/generate':
+                    self._send(404, b'Not Found', 'text/plain')
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                site._count('llm_calls')
+                text = stub_llm_output(payload.get('prompt', ''), site.base_url, site.llm_events)
+                if payload.get('stream'):
+                    self._stream_generate(text)
+                    return
+                if site.llm_delay > 0:
+                    time.sleep(site.llm_delay)
+                body = json.dumps({'model': payload.get('model'), 'response': text, 'done': True},
+                                  ensure_ascii=False).encode('utf-8')
+                self._send(200, body, 'application/json')
+
+            def _stream_generate(self, text: str, pieces: int = 20):
+                """按 Ollama 流式格式逐行输出，总延迟均摊到每个片段"""
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                size = max(1, len(text) // pieces + 1)
+                for start in range(0, len(text), size):
+                    if site.llm_delay > 0:
+                        time.sleep(site.llm_delay / pieces)
+                    line = json.dumps({'response': text[start:start + size], 'done': False}, ensure_ascii=False)
+                    self.wfile.write(line.encode('utf-8') + b'\n')
+                self.wfile.write(b'{"response": "", "done": true}\n')
+                self.close_connection = True
+
+            def _send(self, status: int, body: bytes, content_type: str, extra: Dict[str, str] = None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (extra or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+# ---------------------------------------------------------------------------
+# 指向夹具服务器的爬虫
+# ---------------------------------------------------------------------------
+
+class FixtureSiteMixin:
+    """把请求改写到本地夹具服务器，起始请求重复 rounds 轮"""
+
+    allowed_domains = ['127.0.0.1']
+    fixture_base = ''
+    rounds = 1
+
+    def fixture_url(self, url: str) -> str:
+        parts = urlsplit(url)
+        return self.fixture_base + parts.path + (f'?{parts.query}' if parts.query else '')
+
+    def start_requests(self):
+        for _ in range(int(self.rounds)):
+            yield from super().start_requests()
+
+
+class BenchBaiduBaikeSpider(FixtureSiteMixin, BaiduBaikeSpider):
+    def _build_baidu_url(self, keyword: str) -> str:
+        return self.fixture_url(super()._build_baidu_url(keyword))
+
+
+class BenchWikipediaSpider(FixtureSiteMixin, WikipediaSpider):
+    def _build_wiki_url(self, keyword: str) -> str:
+        return self.fixture_url(super()._build_wiki_url(keyword))
+
+
+class BenchMingEmperorSpider(FixtureSiteMixin, MingEmperorSpider):
+    def _create_request(self, url: str, emperor_info: dict, data_source: str):
+        return super()._create_request(self.fixture_url(url), emperor_info, data_source)
+
+
+SPIDERS = {
+    'baidu_baike': (BenchBaiduBaikeSpider, 'crawler.config.settings'),
+    'wikipedia': (BenchWikipediaSpider, 'crawler.config.settings'),
+    'ming_emperor': (BenchMingEmperorSpider, 'crawler_new.config.settings'),
+}
+
+
+# ---------------------------------------------------------------------------
+# 运行与统计
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+@contextmanager
+def timed_pipelines(pipeline_paths: List[str], timings: Dict[str, List[float]]):
+    """在类上包装各 Pipeline 的 process_item，按类名记录每次调用的耗时（退出时恢复）"""
+    originals = []
+    for path in pipeline_paths:
+        cls = load_object(path)
+        original = cls.process_item
+
+        # 保留原方法的签名：Scrapy >= 2.13 按签名判断 process_item 是否接受 spider 参数
+        @functools.wraps(original)
+        def process_item(pipeline, item, *args, _original=original, _name=cls.__name__, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _original(pipeline, item, *args, **kwargs)
+            finally:
+                timings.setdefault(_name, []).append(time.perf_counter() - start)
+
+        cls.process_item = process_item
+        originals.append((cls, original))
+    try:
+        yield
+    finally:
+        for cls, original in originals:
+            cls.process_item = original
+
+
+def peak_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），macOS 的 ru_maxrss 单位为字节，Linux 为 KB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def build_settings(module: str, args, site: FixtureSite, tmp: str) -> Settings:
+    settings = Settings()
+    settings.setmodule(module, priority='project')
+    pipelines = {path: order for path, order in settings.getdict('ITEM_PIPELINES').items()
+                 if args.neo4j or 'neo4j' not in path.lower()}
+    # 命令行优先级，覆盖爬虫 custom_settings 中的下载延迟和并发数
+    settings.setdict({
+        'ITEM_PIPELINES': pipelines,
+        'DOWNLOAD_DELAY': 0,
+        'RANDOMIZE_DOWNLOAD_DELAY': False,
+        'CONCURRENT_REQUESTS': args.concurrency,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': args.concurrency,
+        'HTTPCACHE_ENABLED': False,
+        'TELNETCONSOLE_ENABLED': False,
+        'LOG_FILE': None,
+        'LOG_LEVEL': args.log_level,
+        'CRAWL_MODE': args.mode,
+        'TEST_EMPEROR_COUNT': args.emperors,
+        'SQLITE_DB_PATH': os.path.join(tmp, 'crawler.db'),
+        'HTML_STORAGE_PATH': os.path.join(tmp, 'html'),
+        'PIPELINE_METRICS_REPORT_PATH': os.path.join(tmp, 'pipeline_metrics.json'),
+        'LOG_MODE': args.log_mode,
+        'PARSE_EXECUTOR_WORKERS': args.parse_workers,
+        'FRESHNESS_ENABLED': args.freshness,
+        'FRESHNESS_DB_PATH': os.path.join(tmp, 'freshness.db'),
+        'STRUCTURED_LOG_FILE': os.path.join(tmp, 'events.jsonl'),
+        'USE_LOCAL_LLM': True,
+        'LOCAL_LLM_BASE_URL': site.base_url,
+        'ENABLE_RECURSIVE_CRAWL': args.recursive,
+    }, priority='cmdline')
+    return settings
+
+
+@defer.inlineCallbacks
+def run_spider(name: str, args, site: FixtureSite, tmp: str, results: Dict):
+    spider_cls, settings_module = SPIDERS[name]
+    settings = build_settings(settings_module, args, site, tmp)
+    runner = CrawlerRunner(settings)
+    crawler = runner.create_crawler(spider_cls)
+
+    counts = {'responses': 0, 'pages': 0, 'throttled': 0, 'bytes': 0, 'items': 0, 'dropped': 0, 'errors': 0}
+    timings: Dict[str, List[float]] = {}
+    window = {}
+
+    def on_response(response, request, spider):
+        counts['responses'] += 1
+        if response.status == 200:
+            counts['pages'] += 1
+            counts['bytes'] += len(response.body)
+        elif response.status == 429:
+            counts['throttled'] += 1
+
+    def on_item_scraped(item, response, spider):
+        counts['items'] += 1
+
+    def on_item_dropped(item, response, exception, spider):
+        counts['dropped'] += 1
+
+    def on_spider_error(failure, response, spider):
+        counts['errors'] += 1
+
+    def on_spider_opened(spider):
+        window.setdefault('opened', time.perf_counter())
+
+    def on_spider_closed(spider, reason):
+        window.setdefault('closed', time.perf_counter())
+
+    # 信号处理函数按弱引用保存，需要在爬虫运行期间保持引用（不能使用临时的 lambda）
+    crawler.signals.connect(on_response, signal=signals.response_received)
+    crawler.signals.connect(on_item_scraped, signal=signals.item_scraped)
+    crawler.signals.connect(on_item_dropped, signal=signals.item_dropped)
+    crawler.signals.connect(on_spider_error, signal=signals.spider_error)
+    crawler.signals.connect(on_spider_opened, signal=signals.spider_opened)
+    crawler.signals.connect(on_spider_closed, signal=signals.spider_closed)
+
+    site.reset_counters()
+    if args.tracemalloc:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    with timed_pipelines(list(settings.getdict('ITEM_PIPELINES')), timings):
+        kwargs = {'fixture_base': site.base_url, 'rounds': args.rounds}
+        if name == 'baidu_baike':
+            kwargs.update(crawl_mode=args.mode, test_emperor_count=args.emperors)
+        yield runner.crawl(crawler, **kwargs)
+    cpu = time.process_time() - cpu_start
+    traced_peak = None
+    if args.tracemalloc:
+        traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+
+    wall = max(window.get('closed', 0) - window.get('opened', 0), 1e-9)
+    stages = {}
+    for stage, values in timings.items():
+        values.sort()
+        stages[stage] = {
+            'calls': len(values),
+            'total_ms': round(sum(values) * 1000, 3),
+            'mean_ms': round(sum(values) / len(values) * 1000, 3),
+            'p95_ms': round(percentile(values, 95) * 1000, 3),
+            'share': round(sum(values) / wall, 4),
+        }
+    results[name] = {
+        'wall_seconds': round(wall, 3),
+        'cpu_seconds': round(cpu, 3),
+        **counts,
+        'pages_per_sec': round(counts['pages'] / wall, 2),
+        'items_per_sec': round(counts['items'] / wall, 2),
+        'server': site.reset_counters(),
+        'stages': stages,
+        'peak_rss_mb': peak_rss_mb(),
+        'traced_peak_mb': traced_peak,
+    }
+
+
+@defer.inlineCallbacks
+def run_all(names: List[str], args, site: FixtureSite, tmp: str, results: Dict):
+    """按顺序运行各爬虫（互不重叠，统计才是各自的）"""
+    try:
+        for name in names:
+            print(f"运行 {name} ...")
+            yield run_spider(name, args, site, tmp, results)
+    finally:
+        from twisted.internet import reactor
+        reactor.stop()
+
+
+def print_report(results: Dict, baseline: Optional[Dict] = None):
+    print(f"\n{'爬虫':<16}{'耗时(s)':>9}{'页面':>7}{'Item':>7}{'429':>6}{'pages/s':>10}{'items/s':>10}"
+          f"{'RSS(MB)':>9}" + (f"{'pages/s 对比':>14}" if baseline else ""))
+    for name, stats in results.items():
+        line = (f"{name:<16}{stats['wall_seconds']:>9.2f}{stats['pages']:>7}{stats['items']:>7}"
+                f"{stats['throttled']:>6}{stats['pages_per_sec']:>10.2f}{stats['items_per_sec']:>10.2f}"
+                f"{stats['peak_rss_mb'] or 0:>9.1f}")
+        previous = (baseline or {}).get('spiders', {}).get(name)
+        if previous and previous['pages_per_sec']:
+            line += f"{(stats['pages_per_sec'] / previous['pages_per_sec'] - 1) * 100:>+13.1f}%"
+        print(line)
+
+    for name, stats in results.items():
+        print(f"\n[{name}] Pipeline 阶段耗时（占爬虫总耗时比例）")
+        print(f"  {'阶段':<32}{'调用':>7}{'总计(ms)':>12}{'平均(ms)':>11}{'p95(ms)':>10}{'占比':>8}")
+        for stage, stage_stats in sorted(stats['stages'].items(), key=lambda kv: -kv[1]['total_ms']):
+            print(f"  {stage:<32}{stage_stats['calls']:>7}{stage_stats['total_ms']:>12.1f}"
+                  f"{stage_stats['mean_ms']:>11.2f}{stage_stats['p95_ms']:>10.2f}{stage_stats['share'] * 100:>7.1f}%")
+        if stats['traced_peak_mb'] is not None:
+            print(f"  Python 分配峰值: {stats['traced_peak_mb']} MB")
+        if stats['server']['llm_calls']:
+            print(f"  大模型桩调用: {stats['server']['llm_calls']} 次")
+
+
+def install_requested_reactor(names: List[str]):
+    """
+    安装爬虫设置要求的 reactor（TWISTED_REACTOR，Scrapy >= 2.13 默认为 asyncio reactor）
+
+    必须在首次导入 twisted.internet.reactor 之前调用，否则会装上默认的 reactor，
+    爬虫启动时报 "The installed reactor does not match the requested one"
+    """
+    settings = Settings()
+    for name in names:
+        settings.setmodule(SPIDERS[name][1], priority='project')
+    if settings.get('TWISTED_REACTOR'):
+        install_reactor(settings['TWISTED_REACTOR'], settings.get('ASYNCIO_EVENT_LOOP'))
+    from twisted.internet import reactor
+    return reactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫吞吐基准测试（本地夹具服务器，离线运行）')
+    parser.add_argument('--spiders', default='baidu_baike,wikipedia,ming_emperor',
+                        help='逗号分隔的爬虫名称（baidu_baike, wikipedia, ming_emperor）')
+    parser.add_argument('--mode', choices=['test', 'full'], default='full', help='爬取模式（full 为全部 16 位皇帝）')
+    parser.add_argument('--emperors', type=int, default=3, help='测试模式下的皇帝数量')
+    parser.add_argument('--rounds', type=int, default=3, help='起始请求重复轮数（增加页面数）')
+    parser.add_argument('--concurrency', type=int, default=8, help='CONCURRENT_REQUESTS')
+    parser.add_argument('--latency', type=float, default=50, help='每个页面的响应延迟（毫秒）')
+    parser.add_argument('--jitter', type=float, default=0, help='延迟随机抖动上限（毫秒）')
+    parser.add_argument('--error-rate', type=float, default=0, help='注入 429 的比例（0~1）')
+    parser.add_argument('--llm-delay', type=float, default=200, help='大模型桩每次调用的延迟（毫秒）')
+    parser.add_argument('--llm-events', type=int, default=20, help='大模型桩每次返回的事迹条数')
+    parser.add_argument('--recursive', action='store_true', help='启用 ming_emperor 的递归爬取（跟随事迹中的链接）')
+    parser.add_argument('--neo4j', action='store_true', help='保留 Neo4j Pipeline（需要可用的 Neo4j）')
+    parser.add_argument('--tracemalloc', action='store_true', help='记录每个爬虫的 Python 分配峰值（有额外开销）')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='夹具目录（<名称>_*.html，百度页面放在 baidu/ 子目录）')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='页面解析进程池大小（PARSE_EXECUTOR_WORKERS，0 为在 reactor 线程内解析）')
+    parser.add_argument('--freshness', action='store_true',
+                        help='启用变化检测（重复轮次的未变化页面跳过提取，用于衡量刷新爬取的开销）')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--log-mode', choices=['verbose', 'structured'], default='verbose',
+                        help='日志模式（structured 为抽样的 JSON 事件日志，用于对比日志开销）')
+    parser.add_argument('--output', help='结果文件路径（默认 benchmarks/results/crawler_<时间>.json）')
+    parser.add_argument('--compare', help='与之前的结果文件对比')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.spiders.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SPIDERS]
+    if unknown:
+        parser.error(f"未知的爬虫: {', '.join(unknown)}")
+
+    reactor = install_requested_reactor(names)
+    configure_logging({'LOG_LEVEL': args.log_level}, install_root_handler=True)
+    logging.getLogger('scrapy').setLevel(args.log_level)
+
+    site = FixtureSite(args.fixtures, args.latency, args.jitter, args.error_rate, args.llm_delay,
+                       args.llm_events, args.seed)
+    site.start()
+    print(f"夹具服务器: {site.base_url}（{len(site.wikipedia)} 个 Wikipedia 页面, "
+          f"{len(site.baidu)} 个百度页面，其余百度页面为合成）")
+    print(f"延迟 {args.latency}±{args.jitter} ms, 429 比例 {args.error_rate}, 大模型桩延迟 {args.llm_delay} ms, "
+          f"并发 {args.concurrency}")
+
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        reactor.callWhenRunning(run_all, names, args, site, tmp, results)
+        reactor.run()
+    site.stop()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"crawler_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'spiders': results,
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+        }, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""
+日期解析基准测试：改造前的 DateParser vs 预编译 + 查表 + 缓存的 DateParser
+
+用法:
+    python benchmarks/bench_date_parser.py [--rounds 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import date
+from typing import Optional
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from crawler.utils.date_utils import DateParser, _parse_date_cached
+
+
+# ---------------------------------------------------------------------------
+# 改造前的实现（原样保留，用于对比）
+# ---------------------------------------------------------------------------
+
+class LegacyDateParser:
+    """改造前的 DateParser（逐次 re.search 字符串模式、逐级回退、if 链转换农历日）"""
+    
+    # 年号到年份的映射（明朝）
+    REIGN_YEAR_MAP = {
+        "洪武": (1368, 1398),
+        "建文": (1398, 1402),
+        "永乐": (1402, 1424),
+        "洪熙": (1424, 1425),
+        "宣德": (1425, 1435),
+        "正统": (1435, 1449),
+        "景泰": (1449, 1457),
+        "天顺": (1457, 1464),
+        "成化": (1464, 1487),
+        "弘治": (1487, 1505),
+        "正德": (1505, 1521),
+        "嘉靖": (1521, 1567),
+        "隆庆": (1567, 1572),
+        "万历": (1572, 1620),
+        "泰昌": (1620, 1621),
+        "天启": (1621, 1627),
+        "崇祯": (1627, 1644)
+    }
+    
+    @staticmethod
+    def parse_chinese_date(text: str) -> Optional[date]:
+        """
+        解析中文日期格式
+        例如：洪武元年、永乐三年正月初一
+        """
+        if not text:
+            return None
+        
+        try:
+            # 提取年号和年份（支持数字和中文数字）
+            reign_pattern = r'([洪建永宣正景天成弘德嘉隆万泰启崇][武文乐熙德统泰顺化治靖庆历昌祯]+)(\d+|元|[一二三四五六七八九十]+)年'
+            match = re.search(reign_pattern, text)
+            
+            if match:
+                reign_title = match.group(1)
+                year_num = match.group(2)
+                
+                if reign_title in LegacyDateParser.REIGN_YEAR_MAP:
+                    start_year, _ = LegacyDateParser.REIGN_YEAR_MAP[reign_title]
+                    if year_num == "元":
+                        year = start_year
+                    else:
+                        # 转换中文数字或阿拉伯数字
+                        year_offset = LegacyDateParser._chinese_year_to_int(year_num)
+                        year = start_year + year_offset - 1
+                    
+                    # 尝试提取月日
+                    month = 1
+                    day = 1
+                    
+                    # 提取月份（在年号之后）
+                    month_pattern = r'年.*?(\d+|正|二|三|四|五|六|七|八|九|十|十一|十二)月'
+                    month_match = re.search(month_pattern, text)
+                    if month_match:
+                        month_str = month_match.group(1)
+                        month = LegacyDateParser._chinese_num_to_int(month_str)
+                    
+                    # 提取日期（在月份之后）
+                    day_pattern = r'月.*?(初\d+|初一|初二|初三|初四|初五|初六|初七|初八|初九|廿\d+|二十\d+|三十\d*|\d+)日?'
+                    day_match = re.search(day_pattern, text)
+                    if day_match:
+                        day_str = day_match.group(1)
+                        day = LegacyDateParser._parse_chinese_day(day_str)
+                    
+                    try:
+                        return date(year, month, day)
+                    except ValueError:
+                        return date(year, 1, 1)
+            
+            # 尝试解析公历日期
+            return LegacyDateParser.parse_gregorian_date(text)
+            
+        except Exception:
+            return None
+    
+    @staticmethod
+    def parse_gregorian_date(text: str) -> Optional[date]:
+        """解析公历日期"""
+        if not text:
+            return None
+        
+        try:
+            # 先尝试匹配完整的年月日格式
+            full_date_pattern = r'(\d{3,4})年(\d{1,2})月(\d{1,2})日?'
+            match = re.search(full_date_pattern, text)
+            if match:
+                year = int(match.group(1))
+                month = int(match.group(2))
+                day = int(match.group(3))
+                try:
+                    return date(year, month, day)
+                except ValueError:
+                    return date(year, 1, 1)
+            
+            # 匹配年月格式
+            year_month_pattern = r'(\d{3,4})年(\d{1,2})月'
+            match = re.search(year_month_pattern, text)
+            if match:
+                year = int(match.group(1))
+                month = int(match.group(2))
+                try:
+                    return date(year, month, 1)
+                except ValueError:
+                    return date(year, 1, 1)
+            
+            # 只有年份
+            year_pattern = r'(\d{3,4})年'
+            match = re.search(year_pattern, text)
+            if match:
+                year = int(match.group(1))
+                return date(year, 1, 1)
+            
+            return None
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _chinese_year_to_int(year_str: str) -> int:
+        """将中文年数转换为阿拉伯数字（如：三→3, 十七→17）"""
+        if year_str.isdigit():
+            return int(year_str)
+        
+        # 特殊处理：元年
+        if year_str == "元":
+            return 1
+        
+        num_map = {
+            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
+            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10
+        }
+        
+        # 处理十几、几十等
+        if '十' in year_str:
+            if year_str == '十':
+                return 10
+            elif year_str.startswith('十'):  # 十一、十二等
+                return 10 + num_map.get(year_str[1], 0)
+            elif year_str.endswith('十'):  # 二十、三十等
+                return num_map.get(year_str[0], 0) * 10
+            else:  # 二十三、三十五等
+                tens = num_map.get(year_str[0], 0) * 10
+                ones = num_map.get(year_str[2], 0) if len(year_str) > 2 else 0
+                return tens + ones
+        
+        return num_map.get(year_str, 1)
+    
+    @staticmethod
+    def _chinese_num_to_int(chinese_num: str) -> int:
+        """将中文数字转换为阿拉伯数字（用于月份）"""
+        chinese_map = {
+            '正': 1, '一': 1, '二': 2, '三': 3, '四': 4,
+            '五': 5, '六': 6, '七': 7, '八': 8, '九': 9,
+            '十': 10, '十一': 11, '十二': 12
+        }
+        
+        if chinese_num.isdigit():
+            return int(chinese_num)
+        
+        return chinese_map.get(chinese_num, 1)
+    
+    @staticmethod
+    def _parse_chinese_day(day_str: str) -> int:
+        """解析中文日期（初一、初十、十五等）"""
+        if not day_str:
+            return 1
+            
+        if day_str.isdigit():
+            return int(day_str)
+        
+        # 初一到初九、初十
+        if day_str.startswith('初'):
+            if len(day_str) == 2:
+                if day_str[1] == '一':
+                    return 1
+                elif day_str[1] == '二':
+                    return 2
+                elif day_str[1] == '三':
+                    return 3
+                elif day_str[1] == '四':
+                    return 4
+                elif day_str[1] == '五':
+                    return 5
+                elif day_str[1] == '六':
+                    return 6
+                elif day_str[1] == '七':
+                    return 7
+                elif day_str[1] == '八':
+                    return 8
+                elif day_str[1] == '九':
+                    return 9
+            return int(day_str[1:]) if day_str[1:].isdigit() else 1
+        
+        # 廿一到廿九（20-29日）
+        if day_str.startswith('廿'):
+            if len(day_str) == 2 and day_str[1].isdigit():
+                return 20 + int(day_str[1])
+            return 20
+        
+        # 二十X
+        if day_str.startswith('二十'):
+            if len(day_str) > 2:
+                return 20 + int(day_str[2:]) if day_str[2:].isdigit() else 20
+            return 20
+        
+        # 三十、三十一
+        if day_str.startswith('三十'):
+            if len(day_str) > 2:
+                return 30 + int(day_str[2:]) if day_str[2:].isdigit() else 30
+            return 30
+        
+        # 十X（10-19日）
+        if day_str.startswith('十'):
+            if len(day_str) == 1:
+                return 10
+            return 10 + int(day_str[1:]) if day_str[1:].isdigit() else 10
+        
+        return 1
+
+
+# ---------------------------------------------------------------------------
+# 测试数据
+# ---------------------------------------------------------------------------
+
+def make_corpus(size: int, unique: int, seed: int = 42):
+    """
+    生成日期字符串样本（信息框、事迹时间的常见写法）
+    
+    Args:
+        size: 样本总数
+        unique: 不同字符串的数量（页面之间大量重复）
+    """
+    rng = random.Random(seed)
+    eras = list(DateParser.REIGN_YEAR_MAP)
+    years = ['元', '二', '三', '十', '十七', '二十三', '三十一']
+    months = ['', '正月', '三月', '十月', '十二月', '闰五月']
+    days = ['', '初一', '初九', '十五', '二十', '廿三']
+    pool = []
+    for _ in range(unique):
+        kind = rng.random()
+        if kind < 0.5:
+            pool.append(rng.choice(eras) + rng.choice(years) + '年' + rng.choice(months) + rng.choice(days))
+        elif kind < 0.9:
+            year = rng.randint(1368, 1644)
+            pool.append(f"{year}年{rng.randint(1, 12)}月{rng.randint(1, 28)}日" if rng.random() < 0.7 else f"{year}年")
+        else:
+            pool.append(rng.choice(['不详', '约1400年前后', '明初']))
+    return [rng.choice(pool) for _ in range(size)]
+
+
+def run(label: str, func, corpus, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(corpus)
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<28}{elapsed * 1000:>10.2f} ms{len(corpus) / elapsed:>14,.0f} 条/秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日期解析基准测试')
+    parser.add_argument('--rounds', type=int, default=5, help='重复次数')
+    parser.add_argument('--size', type=int, default=50000, help='样本数')
+    parser.add_argument('--unique', type=int, default=2000, help='不同字符串数')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size, args.unique)
+    print(f"样本: {len(corpus)} 条（{len(set(corpus))} 种不同写法）\n")
+
+    legacy = run('改造前 parse_chinese_date', lambda texts: [LegacyDateParser.parse_chinese_date(t) for t in texts], corpus, args.rounds)
+
+    def cold(texts):
+        _parse_date_cached.cache_clear()
+        return [DateParser.parse_chinese_date(t) for t in texts]
+
+    uncached = run('新版（每条都未命中缓存）', lambda texts: [_parse_date_cached.__wrapped__(t, DateParser.DEFAULT_DYNASTY) for t in texts], corpus, args.rounds)
+    cold_time = run('新版（冷缓存）', cold, corpus, args.rounds)
+    warm = run('新版（热缓存）', lambda texts: [DateParser.parse_chinese_date(t) for t in texts], corpus, args.rounds)
+    many = run('新版 parse_many', DateParser.parse_many, corpus, args.rounds)
+
+    print(f"\n加速: 未缓存 {legacy / uncached:.1f}x, 冷缓存 {legacy / cold_time:.1f}x, "
+          f"热缓存 {legacy / warm:.1f}x, parse_many {legacy / many:.1f}x")
+
+    # 年份一致性检查：年号注册表按元年计年（如永乐元年为 1403 年，改造前按即位年 1402 计），
+    # 按旧表换算后比较；改造前无法解析的天启年号不计入
+    offsets = {name: start - LegacyDateParser.REIGN_YEAR_MAP[name][0] for name, (start, _) in DateParser.REIGN_YEAR_MAP.items()}
+    mismatched = []
+    for t in set(corpus):
+        if '天启' in t:
+            continue
+        legacy_date, new_date = LegacyDateParser.parse_chinese_date(t), DateParser.parse_chinese_date(t)
+        offset = next((value for name, value in offsets.items() if t.startswith(name)), 0)
+        if (legacy_date and legacy_date.year + offset) != (new_date and new_date.year):
+            mismatched.append(t)
+    print(f"年份不一致: {len(mismatched)} 条")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+HTML 解析基准测试：每页多次 BeautifulSoup 解析（旧）vs 单次 lxml 解析复用（新）
+
+旧流程（每个页面）：
+  - 百度百科爬虫：BeautifulSoup(response.text) 后多次 find/select
+  - QwenExtractor._clean_html：再解析一次
+  - WikipediaHTMLCleaner.clean（本地模型降级时）：再解析一次
+新流程：
+  - 页面只由 Scrapy 解析一次（response.selector.root / ParsedDocument），
+    各步骤共用同一棵文档树，选择器在导入时预编译
+
+用法:
+    python benchmarks/bench_html_parsing.py [--rounds 20]
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+from bs4 import BeautifulSoup
+from scrapy.http import HtmlResponse, Request
+
+# 添加项目根目录到路径
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from crawler.spiders.baidu_baike_spider import BaiduBaikeSpider
+from crawler_new.local_llm.html_cleaner import HTMLCleanerFactory
+from crawler_new.utils.html_document import ParsedDocument
+from crawler_new.utils.qwen_extractor import QwenExtractor
+
+
+# ---------------------------------------------------------------------------
+# 旧流程（BeautifulSoup，多次解析），仅保留与解析开销相关的部分
+# ---------------------------------------------------------------------------
+
+def legacy_qwen_clean(html_content: str, data_source: str) -> str:
+    soup = BeautifulSoup(html_content, 'lxml')
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
+        tag.decompose()
+    if data_source == 'wikipedia':
+        main_content = soup.find('div', class_='mw-parser-output')
+    else:
+        main_content = soup.find('div', class_='lemma-summary') or soup.find('div', class_='main-content')
+    if main_content:
+        return main_content.get_text(separator='\n', strip=True)
+    return soup.get_text(separator='\n', strip=True)
+
+
+def legacy_wiki_clean(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, 'lxml')
+    for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
+        tag.decompose()
+    main_content = soup.find('div', class_='mw-parser-output')
+    if not main_content:
+        return soup.get_text(separator=' ', strip=True)
+    toc = [h.find('span', class_='mw-headline') for h in main_content.find_all(['h2', 'h3', 'h4'])]
+    links = [(a.get('href'), a.get_text(strip=True)) for a in main_content.find_all('a', href=True)]
+    for unwanted_class in WIKI_CLEANER.UNWANTED_CLASSES:
+        for element in main_content.find_all(class_=lambda x: x and unwanted_class in x):
+            element.decompose()
+    for sup_tag in main_content.find_all('sup'):
+        sup_tag.decompose()
+    text = re.sub(r'\s+', ' ', main_content.get_text(separator=' ', strip=True))
+    return text, toc, links
+
+
+def legacy_baidu_parse(html_content: str) -> None:
+    soup = BeautifulSoup(html_content, 'lxml')
+    for script in soup.find_all('script'):
+        if script.string and '"lemmaBasicInfo"' in script.string:
+            re.search(r'"dateOfBirth".*?"text":\[\{"tag":"text","text":"([^"]+)"', script.string)
+    info_box = soup.select_one('.basic-info')
+    if info_box:
+        for label in ('出生日期|出生时间', '逝世日期|逝世时间'):
+            elem = info_box.find('dt', string=re.compile(label))
+            if elem and elem.find_next_sibling('dd'):
+                elem.find_next_sibling('dd').get_text(strip=True)
+    for para in soup.find_all('div', class_='para')[:5]:
+        para.get_text()
+    for heading in soup.find_all(['h2', 'h3']):
+        heading.get_text()
+    for selector in ['.basic-info', '.basicInfo-block table', 'table.infobox', '.lemma-table']:
+        if soup.select_one(selector):
+            break
+    # 事件链接、人物链接各遍历一次正文
+    for _ in range(2):
+        content = soup.select_one('.main-content')
+        if content:
+            [link.get_text(strip=True) for link in content.find_all('a', href=True)]
+
+
+# ---------------------------------------------------------------------------
+# 新流程（单次 lxml 解析）
+# ---------------------------------------------------------------------------
+
+WIKI_CLEANER = HTMLCleanerFactory.create_cleaner('wikipedia')
+
+
+class _SilentSpider(BaiduBaikeSpider):
+    """关闭日志输出，避免干扰计时"""
+
+    @property
+    def logger(self):
+        return _NULL_LOGGER
+
+
+class _NullLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+_NULL_LOGGER = _NullLogger()
+
+
+def new_pipeline(response: HtmlResponse, spider: BaiduBaikeSpider, qwen: QwenExtractor) -> None:
+    root = response.selector.root
+    spider._extract_emperor_data(root, {'name': '测试', 'dynasty_order': 1})
+    link_texts = spider._extract_content_link_texts(root)
+    spider._extract_event_links(link_texts)
+    spider._extract_person_links(link_texts)
+
+    document = ParsedDocument.from_response(response)
+    qwen._clean_html(document, 'wikipedia')
+    WIKI_CLEANER.clean(document)
+
+
+def legacy_pipeline(response: HtmlResponse) -> None:
+    html_content = response.text
+    legacy_baidu_parse(html_content)
+    legacy_qwen_clean(html_content, 'wikipedia')
+    legacy_wiki_clean(html_content)
+
+
+def load_pages():
+    """加载测试页面：已保存的皇帝页面 + 合成的长 Wikipedia 页面"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, 'crawler', 'data', 'html', 'emperor', '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+    pages['synthetic_wikipedia.html'] = make_wikipedia_page()
+    return pages
+
+
+def make_wikipedia_page(n_sections: int = 30) -> str:
+    """生成结构与 zh.wikipedia 皇帝条目相近的长页面"""
+    parts = ['<html><head><script>var x = 1;</script><style>.a{}</style></head><body>',
+             '<header>站点头部</header><nav><a href="/wiki/首页">首页</a></nav>',
+             '<div id="content"><div class="mw-parser-output">',
+             '<div class="ambox metadata">本条目需要补充 <a href="/wiki/Help:引用">引用</a></div>',
+             '<p><b>明太祖朱元璋</b>（1328年10月21日－1398年6月24日<sup class="reference">[1]</sup>），'
+             '<a href="/wiki/明朝">明朝</a>开国皇帝。</p>']
+    for i in range(n_sections):
+        title = f'事迹{i}'
+        parts.append(f'<h2><span class="mw-headline" id="{title}">{title}</span></h2>')
+        for j in range(6):
+            parts.append(f'<div class="para"><p>{title}第{j}段，<a href="/wiki/徐达">徐达</a>与'
+                         f'<a href="/wiki/常遇春">常遇春</a>率军北伐<sup>[{j}]</sup>，攻克<a href="/wiki/大都">大都</a>。'
+                         + '史载其事甚详。' * 30 + '</p></div>')
+        parts.append('<div class="navbox"><a href="/wiki/Template:明朝皇帝">模板</a></div>')
+    parts.append('<h2><span class="mw-headline" id="参考文献">参考文献</span></h2><p>文献</p>')
+    parts.append('</div></div><footer>页脚</footer></body></html>')
+    return ''.join(parts)
+
+
+def make_response(html_content: str) -> HtmlResponse:
+    url = 'https://zh.wikipedia.org/wiki/朱元璋'
+    return HtmlResponse(url=url, body=html_content.encode('utf-8'), encoding='utf-8', request=Request(url))
+
+
+def cpu_per_page(func, html_content: str, rounds: int) -> float:
+    """每页 CPU 时间（毫秒）；每轮都构造新的 Response，新流程的解析开销计入其中"""
+    total = 0.0
+    for _ in range(rounds):
+        response = make_response(html_content)
+        start = time.process_time()
+        func(response)
+        total += time.process_time() - start
+    return total / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML 解析基准测试')
+    parser.add_argument('--rounds', type=int, default=20, help='每个页面的重复次数')
+    args = parser.parse_args()
+
+    spider = _SilentSpider()
+    qwen = QwenExtractor.__new__(QwenExtractor)  # 只使用清理方法，不需要 API Key
+
+    print(f"{'页面':<36}{'大小':>10}{'旧(ms)':>12}{'新(ms)':>12}{'加速':>8}")
+    print('-' * 78)
+    total_old = total_new = 0.0
+    for name, html_content in load_pages().items():
+        old_ms = cpu_per_page(legacy_pipeline, html_content, args.rounds)
+        new_ms = cpu_per_page(lambda response: new_pipeline(response, spider, qwen), html_content, args.rounds)
+        total_old += old_ms
+        total_new += new_ms
+        print(f"{name:<36}{len(html_content):>10}{old_ms:>12.2f}{new_ms:>12.2f}{old_ms / new_ms:>7.1f}x")
+    print('-' * 78)
+    print(f"{'合计':<36}{'':>10}{total_old:>12.2f}{total_new:>12.2f}{total_old / total_new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -34,7 +34,7 @@ DOWNLOAD_TIMEOUT = 30
 HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 86400  # 1天
 HTTPCACHE_DIR = 'crawler/data/httpcache'
-HTTPCACHE_IGNORE_HTTP_CODES = [500, 502, 503, 504, 408, 429]
+HTTPCACHE_IGNORE_HTTP_CODES = [500, 502, 503, 504, 408, 429, 304]  # 304 是条件请求的结果，不能缓存
 
 # 配置Item Pipeline
 ITEM_PIPELINES = {
@@ -45,14 +45,42 @@ ITEM_PIPELINES = {
     'crawler.pipelines.neo4j_pipeline.Neo4jPipeline': 400,
 }
 
+# Pipeline 阶段指标（各 process_item 的耗时、Item 数、在途数、错误率），写入 Scrapy stats 和 JSON 报告
+ITEM_PROCESSOR = 'crawler.pipelines.instrumentation.InstrumentedItemPipelineManager'
+PIPELINE_METRICS_REPORT_PATH = 'crawler/data/reports/pipeline_metrics.json'
+PIPELINE_METRICS_INTERVAL = 30  # 报告写入间隔（秒），0 表示只在爬虫结束时写入
+
+# 页面解析进程池：爬虫回调中的 HTML 解析交给独立进程执行，
+# reactor 线程只负责下载和调度；0 表示在 reactor 线程内直接解析
+PARSE_EXECUTOR_WORKERS = 2
+
 # 配置日志
 LOG_LEVEL = 'INFO'
 LOG_FILE = 'crawler/data/logs/crawler.log'
 
+# 日志模式：'verbose' 为逐条详细日志；'structured' 为抽样的 JSON 事件日志（后台线程写入）
+LOG_MODE = 'verbose'
+STRUCTURED_LOG_FILE = 'crawler/data/logs/events.jsonl'
+STRUCTURED_LOG_SAMPLE_RATE = 0.1  # 逐页面 / 逐 Item 明细的抽样比例，丢弃、错误和爬虫级事件始终记录
+STRUCTURED_LOG_QUIET_LOGGERS = []  # 结构化模式下提升到 WARNING 的 logger
+
+EXTENSIONS = {
+    'crawler.extensions.StructuredLogging': 100,
+}
+
+# 刷新爬取的变化检测：按 URL 记录 ETag / Last-Modified / 正文哈希，发送条件请求，
+# 未变化的页面（304 或正文哈希相同）跳过回调、提取和入库
+FRESHNESS_ENABLED = True
+FRESHNESS_DB_PATH = 'crawler/data/freshness.db'
+FRESHNESS_FORCE_REFRESH = False  # True 时照常处理所有页面（如修改了提取逻辑后重新提取）
+FRESHNESS_CONFIRM_ITEMS = []  # 表示页面已处理完成的 Item 类型（为空时任意 Item 入库完成即确认）
+
 # 配置下载中间件
 DOWNLOADER_MIDDLEWARES = {
     'crawler.middlewares.RandomUserAgentMiddleware': 400,
     'crawler.middlewares.RetryMiddleware': 500,
+    # 放在 HTTP 缓存（900）之前，缓存命中的响应同样做变化检测
+    'crawler.middlewares.ConditionalRequestMiddleware': 580,
 }
 
 # 请求头配置
@@ -64,6 +92,11 @@ DEFAULT_REQUEST_HEADERS = {
 # SQLite数据库配置
 SQLITE_DB_PATH = 'server/database/historygogo.db'
 
+# 年号表：日期解析识别的年号（年号 → 公历起止年份）
+# 自带的 crawler/config/reign_eras.json 目前只收录宋、元、明、清四朝，其他朝代的年号纪年不会被解析；
+# 需要其他朝代时补充该文件，或指向另一份同格式的年号表
+REIGN_ERA_FILE = 'crawler/config/reign_eras.json'
+
 # Neo4j数据库配置
 NEO4J_URI = 'bolt://localhost:7687'
 NEO4J_USER = 'neo4j'
@@ -0,0 +1,115 @@
+"""
+Scrapy 扩展
+"""
+
+import logging
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.log import LogCounterHandler
+
+from crawler.utils.structured_logging import JsonFormatter, QueuedLogging, events
+
+logger = logging.getLogger(__name__)
+
+
+class StructuredLogging:
+    """
+    结构化日志模式（LOG_MODE = 'structured'）
+
+    - 爬虫自身的 logger（Pipeline 也通过 spider.logger 输出）和 STRUCTURED_LOG_QUIET_LOGGERS
+      提升到 WARNING，逐条的分隔线和详细日志不再格式化、不再写盘
+    - 每个页面、每个 Item 的每个 Pipeline 阶段输出一条 JSON 记录到 STRUCTURED_LOG_FILE，
+      明细按 STRUCTURED_LOG_SAMPLE_RATE 抽样，丢弃、错误和爬虫级事件始终记录
+    - 结构化记录和 Scrapy 原有日志处理器都移到后台线程写入，爬虫结束时恢复
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.stats = crawler.stats
+        self.path = settings.get('STRUCTURED_LOG_FILE', 'crawler_new/data/logs/events.jsonl')
+        self.sample_rate = settings.getfloat('STRUCTURED_LOG_SAMPLE_RATE', 0.1)
+        self.quiet_loggers = settings.getlist('STRUCTURED_LOG_QUIET_LOGGERS')
+        self._levels = {}
+        self._root_handlers = []
+        self._queues = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if crawler.settings.get('LOG_MODE', 'verbose') != 'structured':
+            raise NotConfigured
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_received, signal=signals.response_received)
+        crawler.signals.connect(extension.spider_error, signal=signals.spider_error)
+        return extension
+
+    def spider_opened(self, spider):
+        for name in [spider.name] + self.quiet_loggers:
+            quiet = logging.getLogger(name)
+            self._levels[name] = quiet.level
+            quiet.setLevel(logging.WARNING)
+
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        event_handler = logging.FileHandler(self.path, encoding='utf-8')
+        event_handler.setFormatter(JsonFormatter())
+        self._queues.append(QueuedLogging(events.logger, [event_handler]))
+
+        # Scrapy 的根处理器（控制台 / LOG_FILE）也改为后台写入；LogCounterHandler 只计数，保留在原处
+        root = logging.getLogger()
+        self._root_handlers = [handler for handler in root.handlers if not isinstance(handler, LogCounterHandler)]
+        for handler in self._root_handlers:
+            root.removeHandler(handler)
+        if self._root_handlers:
+            self._queues.append(QueuedLogging(root, self._root_handlers))
+
+        for queued in self._queues:
+            queued.start()
+        events.configure(self.sample_rate)
+        events.emit('spider_opened', spider=spider.name, sample_rate=self.sample_rate)
+        logger.warning(f"结构化日志已启用: {self.path}（明细抽样比例 {self.sample_rate}）")
+
+    def spider_closed(self, spider, reason):
+        stats = self.stats.get_stats()
+        events.emit('spider_closed', lambda: {
+            'spider': spider.name,
+            'reason': reason,
+            'items': stats.get('item_scraped_count', 0),
+            'dropped': stats.get('item_dropped_count', 0),
+            'responses': stats.get('response_received_count', 0),
+            'errors': stats.get('log_count/ERROR', 0),
+            'elapsed_seconds': stats.get('elapsed_time_seconds'),
+        })
+        events.disable()
+
+        for queued in reversed(self._queues):
+            queued.stop()
+        self._queues = []
+        root = logging.getLogger()
+        for handler in self._root_handlers:
+            root.addHandler(handler)
+        self._root_handlers = []
+        for name, level in self._levels.items():
+            logging.getLogger(name).setLevel(level)
+        self._levels = {}
+
+    def response_received(self, response, request, spider):
+        if not events.sampled():
+            return
+        events.emit('page', lambda: {
+            'spider': spider.name,
+            'url': response.url,
+            'status': response.status,
+            'bytes': len(response.body),
+            'latency_ms': round(request.meta.get('download_latency', 0) * 1000, 1),
+        })
+
+    def spider_error(self, failure, response, spider):
+        events.emit('spider_error', lambda: {
+            'spider': spider.name,
+            'url': response.url,
+            'error': failure.getErrorMessage(),
+            'type': failure.type.__name__,
+        }, level=logging.ERROR)
@@ -1,12 +1,18 @@
 """
 Scrapy中间件
-包括User-Agent轮换、重试策略等
+包括User-Agent轮换、重试策略、条件请求与变化检测等
 """
 
 from fake_useragent import UserAgent
 import random
 import time
 
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.misc import load_object
+
+from crawler.utils.freshness import FreshnessStore, content_hash
+
 
 class RandomUserAgentMiddleware:
     """随机User-Agent中间件"""
@@ -54,6 +60,114 @@ class RetryMiddleware:
         return response
 
 
+class PageUnchanged(IgnoreRequest):
+    """页面内容自上次处理后未变化"""
+
+
+class ConditionalRequestMiddleware:
+    """
+    条件请求与变化检测中间件（FRESHNESS_ENABLED）
+
+    - 已处理过的页面带上 If-None-Match / If-Modified-Since
+    - 服务器返回 304，或返回 200 但正文哈希与上次相同时抛出 PageUnchanged：
+      回调不执行，提取和入库 Pipeline 也不会执行（未变化页面中的链接不再展开）
+    - 内容变化的页面正常处理，页面的 Item 处理完成（item_scraped）后才确认新的校验信息；
+      FRESHNESS_CONFIRM_ITEMS 指定哪些 Item 类型表示页面已处理完成（为空时任意 Item 均可），
+      页面的任一 Item 被丢弃或出错（item_dropped / item_error）时本次不再确认，下次仍会重新处理
+    - 记录以最初请求的 URL（重定向前）为键，与下次发出请求时的 URL 一致
+
+    FRESHNESS_FORCE_REFRESH 或请求 meta 中的 'force_refresh' 为 True 时照常处理所有页面（仍更新校验信息）
+    """
+
+    def __init__(self, store: FreshnessStore, stats, force_refresh: bool = False, confirm_items: tuple = ()):
+        self.store = store
+        self.stats = stats
+        self.force_refresh = force_refresh
+        self.confirm_items = confirm_items
+        # 本次运行中有 Item 处理失败的页面
+        self.failed = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('FRESHNESS_ENABLED', False):
+            raise NotConfigured
+        store = FreshnessStore(settings.get('FRESHNESS_DB_PATH', 'crawler/data/freshness.db'))
+        confirm_items = tuple(load_object(path) for path in settings.getlist('FRESHNESS_CONFIRM_ITEMS'))
+        middleware = cls(store, crawler.stats, settings.getbool('FRESHNESS_FORCE_REFRESH', False), confirm_items)
+        crawler.signals.connect(middleware.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(middleware.item_failed, signal=signals.item_dropped)
+        crawler.signals.connect(middleware.item_failed, signal=signals.item_error)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def _forced(self, request) -> bool:
+        return self.force_refresh or request.meta.get('force_refresh', False)
+
+    @staticmethod
+    def _key(request) -> str:
+        """新鲜度记录的键：最初请求的 URL（重定向后的请求同样对应到重定向前的 URL）"""
+        return request.meta.get('redirect_urls', [request.url])[0]
+
+    def process_request(self, request, spider):
+        if self._forced(request):
+            return None
+        validators = self.store.validators(self._key(request))
+        if validators:
+            if validators['etag']:
+                request.headers.setdefault('If-None-Match', validators['etag'])
+            if validators['last_modified']:
+                request.headers.setdefault('If-Modified-Since', validators['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        key = self._key(request)
+        if response.status == 304:
+            self.store.not_modified(key)
+            self.stats.inc_value('freshness/not_modified', spider=spider)
+            raise PageUnchanged(f"页面未变化（304）: {request.url}")
+        if response.status != 200:
+            return response
+
+        changed = self.store.observe(
+            key,
+            content_hash(response.body),
+            etag=self._header(response, 'ETag'),
+            last_modified=self._header(response, 'Last-Modified'),
+        )
+        if not changed and not self._forced(request):
+            self.stats.inc_value('freshness/unchanged', spider=spider)
+            raise PageUnchanged(f"页面内容未变化: {response.url}")
+        self.stats.inc_value('freshness/changed' if changed else 'freshness/forced', spider=spider)
+        return response
+
+    @staticmethod
+    def _header(response, name: str):
+        value = response.headers.get(name)
+        return value.decode('latin-1') if value else None
+
+    def item_scraped(self, item, response, spider):
+        # 流式提取的单条事迹等不属于某个响应的 Item 不参与确认
+        if response is None or response.request is None:
+            return
+        if self.confirm_items and not isinstance(item, self.confirm_items):
+            return
+        key = self._key(response.request)
+        if key not in self.failed:
+            self.store.mark_processed(key)
+
+    def item_failed(self, item, response, spider, **kwargs):
+        """页面的 Item 被丢弃或出错：撤销已确认的校验信息，本次运行中不再确认"""
+        if response is None or response.request is None:
+            return
+        key = self._key(response.request)
+        self.failed.add(key)
+        self.store.mark_failed(key)
+
+    def spider_closed(self, spider):
+        self.store.close()
+
+
 class DataMergeMiddleware:
     """数据合并中间件
     
@@ -0,0 +1,185 @@
+"""
+带指标的 Item Pipeline 管理器
+通过 ITEM_PROCESSOR 设置替换 Scrapy 默认的 ItemPipelineManager，对每个 Pipeline 的 process_item
+记录耗时、Item 数、丢弃数、错误数和在途数，Pipeline 本身不需要修改
+
+指标写入 Scrapy stats（pipeline/<类名>/time_ms 等），并按 PIPELINE_METRICS_INTERVAL 定期
+（以及爬虫结束时）写入 PIPELINE_METRICS_REPORT_PATH 的 JSON 报告；
+结构化日志模式下每个 Item 的每个阶段输出一条 pipeline_stage 事件（按 Item 抽样）
+
+配置：
+    ITEM_PROCESSOR = 'crawler.pipelines.instrumentation.InstrumentedItemPipelineManager'
+    PIPELINE_METRICS_REPORT_PATH = 'crawler_new/data/reports/pipeline_metrics.json'
+    PIPELINE_METRICS_INTERVAL = 30
+"""
+
+import functools
+import inspect
+import logging
+
+from scrapy.exceptions import DropItem
+from scrapy.pipelines import ItemPipelineManager
+from twisted.internet.defer import Deferred
+from twisted.internet.task import LoopingCall
+from twisted.python.failure import Failure
+
+from crawler.utils.pipeline_metrics import PipelineMetrics
+from crawler.utils.structured_logging import events
+
+logger = logging.getLogger(__name__)
+
+
+# 用作 Item 标识的字段（crawler_new 的 Item / crawler 的实体）
+ITEM_ID_FIELDS = ('page_id', 'emperor_id', 'event_id', 'person_id', 'work_id')
+
+
+def _outcome(result) -> str:
+    if isinstance(result, Failure):
+        return 'dropped' if result.check(DropItem) else 'error'
+    return 'ok'
+
+
+def item_key(item) -> str:
+    """Item 标识（ExtractedDataItem 使用其 HTML 页面的 page_id，与提取前的 HtmlPageItem 一致）"""
+    if hasattr(item, 'get'):
+        html_item = item.get('html_item')
+        source = html_item if html_item is not None else item
+        for field in ITEM_ID_FIELDS:
+            if source.get(field):
+                return str(source.get(field))
+    for field in ITEM_ID_FIELDS:
+        value = getattr(item, field, None)
+        if value:
+            return str(value)
+    return str(id(item))
+
+
+def log_stage(spider_name: str, stage: str, item, seconds: float, outcome: str):
+    """结构化日志：一个 Item 经过一个阶段（正常完成的按抽样记录，丢弃和错误始终记录）"""
+    if not events.enabled:
+        return
+    key = item_key(item)
+    if outcome == 'ok' and not events.sampled(key):
+        return
+    events.emit('pipeline_stage', lambda: {
+        'spider': spider_name,
+        'stage': stage,
+        'item_type': type(item).__name__,
+        'item': key,
+        'duration_ms': round(seconds * 1000, 3),
+        'outcome': outcome,
+    }, level=logging.WARNING if outcome == 'error' else logging.INFO)
+
+
+class InstrumentedItemPipelineManager(ItemPipelineManager):
+    """记录各 Pipeline 阶段指标的 ItemPipelineManager"""
+
+    stats = None
+    report_path = None
+    report_interval = 0.0
+
+    def __init__(self, *middlewares, **kwargs):
+        # 父类构造时逐个调用 _add_middleware，指标对象需要先创建
+        self.metrics = PipelineMetrics()
+        self.spider_name = None
+        self._report_task = None
+        super().__init__(*middlewares, **kwargs)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        manager = super().from_crawler(crawler)
+        manager.stats = crawler.stats
+        manager.report_path = crawler.settings.get('PIPELINE_METRICS_REPORT_PATH')
+        manager.report_interval = crawler.settings.getfloat('PIPELINE_METRICS_INTERVAL', 30)
+        return manager
+
+    def _add_middleware(self, pipe):
+        if hasattr(pipe, 'process_item'):
+            # 实例属性覆盖类方法，父类登记的就是带计时的版本
+            pipe.process_item = self._instrument(type(pipe).__name__, pipe.process_item)
+        super()._add_middleware(pipe)
+
+    def _instrument(self, name: str, process_item):
+        metrics = self.metrics
+        metrics.add_stage(name)
+
+        def done(item, started: float, outcome: str = 'ok'):
+            seconds = metrics.finish(name, started, outcome)
+            log_stage(self.spider_name, name, item, seconds, outcome)
+
+        def failed(e: BaseException) -> str:
+            return 'dropped' if isinstance(e, DropItem) else 'error'
+
+        @functools.wraps(process_item)
+        def instrumented(item, *args, **kwargs):
+            started = metrics.start(name)
+            try:
+                result = process_item(item, *args, **kwargs)
+            except BaseException as e:
+                done(item, started, failed(e))
+                raise
+
+            if isinstance(result, Deferred):
+                # 异步 Pipeline：计时到 Deferred 完成
+                def finished(value):
+                    done(item, started, _outcome(value))
+                    return value
+                return result.addBoth(finished)
+
+            if inspect.isawaitable(result):
+                async def awaited():
+                    try:
+                        value = await result
+                    except BaseException as e:
+                        done(item, started, failed(e))
+                        raise
+                    done(item, started)
+                    return value
+                return awaited()
+
+            done(item, started)
+            return result
+
+        return instrumented
+
+    def process_item(self, item, *args, **kwargs):
+        """整条 Pipeline 链的在途 Item 数"""
+        self.metrics.item_entered()
+        result = super().process_item(item, *args, **kwargs)
+
+        def left(value):
+            self.metrics.item_left()
+            return value
+        return result.addBoth(left)
+
+    def open_spider(self, spider):
+        self.spider_name = spider.name
+        if self.report_path and self.report_interval > 0:
+            self._report_task = LoopingCall(self.publish)
+            self._report_task.start(self.report_interval, now=False)
+        return super().open_spider(spider)
+
+    def close_spider(self, spider):
+        if self._report_task is not None and self._report_task.running:
+            self._report_task.stop()
+        report = self.publish()
+        slowest = report['slowest_stage']
+        if slowest:
+            stage = report['stages'][slowest]
+            logger.info(f"⏱️ Pipeline 最慢阶段: {slowest}（{stage['items']} 个 Item，"
+                        f"总计 {stage['total_ms']:.0f} ms，平均 {stage['mean_ms']:.1f} ms，"
+                        f"占运行时间 {stage['share'] * 100:.1f}%）")
+        return super().close_spider(spider)
+
+    def publish(self):
+        """把当前指标写入 Scrapy stats 和 JSON 报告"""
+        if self.stats is not None:
+            for key, value in self.metrics.stats_values().items():
+                self.stats.set_value(key, value)
+        if not self.report_path:
+            return self.metrics.report(self.spider_name)
+        try:
+            return self.metrics.write_report(self.report_path, self.spider_name)
+        except OSError as e:
+            logger.warning(f"Pipeline 指标报告写入失败: {e}")
+            return self.metrics.report(self.spider_name)
@@ -8,11 +8,13 @@ from typing import Any
 from pathlib import Path
 import sys
 
+from scrapy.exceptions import DropItem
+
 # 添加项目根目录到路径
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from crawler.models.entities import Emperor, Event, Person, Work
-from server.database.sqlite_manager import SQLiteManager
+from server.database.sqlite_manager import SQLiteManager, upsert_sql
 
 
 class SQLitePipeline:
@@ -28,18 +30,18 @@ class SQLitePipeline:
             'errors': 0
         }
     
+    @classmethod
+    def from_crawler(cls, crawler):
+        """数据库路径取自 SQLITE_DB_PATH（未配置时使用 SQLiteManager 的默认路径）"""
+        return cls(crawler.settings.get('SQLITE_DB_PATH'))
+    
     def open_spider(self, spider):
         """爬虫启动时初始化数据库"""
         try:
-            # 确保数据库已初始化
-            if not self.db_manager.db_path.exists():
-                spider.logger.info("💾 数据库不存在，正在初始化...")
-                self.db_manager.initialize_database()
+            # 连接数据库；新数据库或表结构版本落后时执行初始化脚本（不改写已有数据）
+            if self.db_manager.ensure_schema():
                 spider.logger.info("✅ 数据库初始化成功")
-            else:
-                # 连接现有数据库
-                self.db_manager.connect()
-                spider.logger.info(f"💾 SQLite管道已连接: {self.db_manager.db_path}")
+            spider.logger.info(f"💾 SQLite管道已连接: {self.db_manager.db_path}")
         except Exception as e:
             spider.logger.error(f"❌ 数据库初始化失败: {str(e)}")
             raise
@@ -68,6 +70,12 @@ class SQLitePipeline:
         spider.logger.info(f"数据库位置: {self.db_manager.db_path}")
         spider.logger.info("="*80 + "\n")
         
+        # 同一实体只保留最新一条变更日志，日志条数不随重复爬取增长
+        try:
+            self.db_manager.compact_change_log()
+        except Exception as e:
+            spider.logger.warning(f"变更日志压缩失败: {str(e)}")
+        
         self.db_manager.close()
     
     def process_item(self, item: Any, spider):
@@ -93,17 +101,16 @@ class SQLitePipeline:
         except Exception as e:
             self.stats['errors'] += 1
             spider.logger.error(f"数据保存失败: {str(e)}")
-            return item
+            # 丢弃 Item（item_dropped），页面的新鲜度记录不会被确认，下次刷新时重新处理
+            raise DropItem(f"数据保存失败: {str(e)}")
     
     def _save_emperor(self, emperor: Emperor, spider):
         """保存皇帝数据"""
-        sql = """
-        INSERT OR REPLACE INTO emperors (
-            emperor_id, dynasty_id, name, temple_name, reign_title,
-            birth_date, death_date, reign_start, reign_end, reign_duration,
-            dynasty_order, biography, achievements, portrait_url, data_source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        sql = upsert_sql('emperors', 'emperor_id', [
+            'emperor_id', 'dynasty_id', 'name', 'temple_name', 'reign_title', 'birth_date',
+            'death_date', 'reign_start', 'reign_end', 'reign_duration', 'dynasty_order',
+            'biography', 'achievements', 'portrait_url', 'data_source'
+        ])
         
         params = (
             emperor.emperor_id,
@@ -128,13 +135,11 @@ class SQLitePipeline:
     
     def _save_event(self, event: Event, spider):
         """保存事件数据"""
-        sql = """
-        INSERT OR REPLACE INTO events (
-            event_id, dynasty_id, emperor_id, title, event_type,
-            start_date, end_date, location, description, significance,
-            casualty, result, data_source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        sql = upsert_sql('events', 'event_id', [
+            'event_id', 'dynasty_id', 'emperor_id', 'title', 'event_type', 'start_date',
+            'end_date', 'location', 'description', 'significance', 'casualty', 'result',
+            'data_source'
+        ])
         
         params = (
             event.event_id,
@@ -178,13 +183,10 @@ class SQLitePipeline:
     
     def _save_person(self, person: Person, spider):
         """保存人物数据"""
-        sql = """
-        INSERT OR REPLACE INTO persons (
-            person_id, dynasty_id, name, alias, birth_date, death_date,
-            person_type, position, biography, style, contributions,
-            portrait_url, data_source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        sql = upsert_sql('persons', 'person_id', [
+            'person_id', 'dynasty_id', 'name', 'alias', 'birth_date', 'death_date', 'person_type',
+            'position', 'biography', 'style', 'contributions', 'portrait_url', 'data_source'
+        ])
         
         # 将列表转换为JSON字符串
         alias_json = json.dumps(person.alias, ensure_ascii=False) if person.alias else None
@@ -211,6 +213,19 @@ class SQLitePipeline:
         # 保存作品
         if person.works:
             self._save_person_works(person, spider)
+        
+        # 保存人物-皇帝关联
+        if person.related_emperors:
+            self._save_person_emperor_relations(person, spider)
+    
+    def _save_person_emperor_relations(self, person: Person, spider):
+        """保存人物-皇帝关联关系（person_emperor）"""
+        relations = [(person.person_id, emperor_id, person.position) for emperor_id in person.related_emperors]
+        try:
+            saved = self.db_manager.save_person_emperor_relations(relations, source='crawler')
+            spider.logger.debug(f"💾 已保存人物-皇帝关联: {person.name} ({saved}/{len(relations)})")
+        except Exception as e:
+            spider.logger.debug(f"保存人物-皇帝关联失败: {str(e)}")
     
     def _save_person_works(self, person: Person, spider):
         """保存人物作品"""
@@ -231,12 +246,10 @@ class SQLitePipeline:
     
     def _save_work(self, work: Work, spider):
         """保存作品数据"""
-        sql = """
-        INSERT OR REPLACE INTO works (
-            work_id, person_id, title, work_type, creation_date,
-            description, content, image_url
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """
+        sql = upsert_sql('works', 'work_id', [
+            'work_id', 'person_id', 'title', 'work_type', 'creation_date', 'description',
+            'content', 'image_url'
+        ], touch=False)
         
         params = (
             work.work_id,
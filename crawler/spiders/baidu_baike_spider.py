@@ -4,14 +4,61 @@
 """
 
 import scrapy
-from bs4 import BeautifulSoup
+from scrapy.utils.defer import maybe_deferred_to_future
+from lxml.html import HtmlElement
 from typing import Dict, Any, Optional, List
 import re
 from datetime import date
 
 from crawler.models.entities import Emperor, Event, Person, EventType, PersonType
 from crawler.utils.date_utils import DateParser, clean_text, generate_id
+from crawler.utils.html_utils import (
+    compile_xpath, definition_value, first, get_text, has_class, next_sibling_element
+)
+from crawler.utils.parse_executor import PageSource, ParseExecutor
+from crawler.utils.reign_eras import use_era_file
 from crawler.config.ming_data import MING_EMPERORS, MING_DYNASTY
+from crawler.middlewares import PageUnchanged
+
+
+# 预编译的选择器（页面直接复用 Scrapy 已解析的 lxml 文档树，不再用 BeautifulSoup 重复解析）
+XPATH_SCRIPTS = compile_xpath('//script')
+XPATH_BASIC_INFO = compile_xpath(f"(//*[{has_class('basic-info')}])[1]")
+XPATH_DT = compile_xpath('.//dt')
+XPATH_LEMMA_SUMMARY = compile_xpath(f"(//*[{has_class('lemma-summary')}])[1]")
+XPATH_PARAS = compile_xpath(f".//div[{has_class('para')}]")
+XPATH_ACHIEVEMENT_SECTION = compile_xpath("(//div[@data-title='主要成就'])[1]")
+XPATH_HEADINGS = compile_xpath('//h2 | //h3')
+XPATH_SUMMARY_PIC_IMG = compile_xpath(f"(//*[{has_class('summary-pic')}]//img)[1]")
+XPATH_LEMMA_TITLE = compile_xpath(f"(//*[{has_class('lemmaWgt-lemmaTitle-title')}]//h1)[1]")
+XPATH_CONTENT_LINKS = compile_xpath(f"(//*[{has_class('main-content')}])[1]//a[@href]")
+XPATH_ROWS = compile_xpath('.//tr')
+XPATH_ROW_HEADER = compile_xpath('(.//*[self::th or self::dt])[1]')
+XPATH_ROW_VALUE = compile_xpath('(.//*[self::td or self::dd])[1]')
+XPATH_IMG = compile_xpath('(.//img)[1]')
+
+# infobox 表格的候选选择器（按顺序尝试）
+INFOBOX_TABLE_SELECTORS = [
+    ('.basic-info', XPATH_BASIC_INFO),
+    ('.basicInfo-block table', compile_xpath(f"(//*[{has_class('basicInfo-block')}]//table)[1]")),
+    ('table.infobox', compile_xpath(f"(//table[{has_class('infobox')}])[1]")),
+    ('.lemma-table', compile_xpath(f"(//*[{has_class('lemma-table')}])[1]")),
+]
+
+# 信息框字段标签
+LABEL_BIRTH = re.compile('出生日期|出生时间')
+LABEL_DEATH = re.compile('逝世日期|逝世时间')
+LABEL_EVENT_TIME = re.compile('时间|发生时间|年代')
+LABEL_LOCATION = re.compile('地点|发生地点')
+LABEL_ALIAS = re.compile('别名|字号|本名')
+LABEL_POSITION = re.compile('职业|主要成就|职务')
+
+# 页面内嵌 JSON 的字段
+JSON_BIRTH = re.compile(r'"dateOfBirth".*?"text":\[\{"tag":"text","text":"([^"]+)"')
+JSON_DEATH = re.compile(r'"dateOfDeath".*?"text":\[\{"tag":"text","text":"([^"]+)"')
+JSON_ACHIEVEMENT = re.compile(r'"majorAchievement".*?"data":\[(.*?)\]\}')
+JSON_TEXT = re.compile(r'"text":"([^"]+)"')
+JSON_DESCRIPTION = re.compile(r'"description":"([^"]+)"')
 
 
 class BaiduBaikeSpider(scrapy.Spider):
@@ -30,6 +77,7 @@ class BaiduBaikeSpider(scrapy.Spider):
         super().__init__(*args, **kwargs)
         self.date_parser = DateParser()
         self.emperor_data = {}  # 存储已爬取的皇帝数据
+        self.parse_executor = ParseExecutor()  # 由 from_crawler 按 PARSE_EXECUTOR_WORKERS 替换
         
         # 获取爬取模式配置
         self.crawl_mode = crawl_mode
@@ -52,6 +100,18 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.info(f"   爬取数量: 前 {test_emperor_count} 位皇帝")
         self.logger.info("=" * 80)
     
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parse_executor = ParseExecutor.from_settings(crawler.settings)
+        use_era_file(crawler.settings.get('REIGN_ERA_FILE'))
+        return spider
+    
+    async def start(self):
+        """起始请求（Scrapy >= 2.13 只调用 start()，不再回退到 start_requests()）"""
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
         """生成起始请求"""
         # 根据爬取模式决定爬取多少位皇帝
@@ -83,8 +143,8 @@ class BaiduBaikeSpider(scrapy.Spider):
         """构建百度百科URL"""
         return f"https://baike.baidu.com/item/{keyword}"
     
-    def parse_emperor(self, response):
-        """解析皇帝页面"""
+    async def parse_emperor(self, response):
+        """解析皇帝页面（页面解析在解析进程池中执行）"""
         emperor_info = response.meta['emperor_info']
 
 
@@ -98,11 +158,11 @@ class BaiduBaikeSpider(scrapy.Spider):
         self.logger.info(f"{'='*80}")
         
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # 提取皇帝信息
+            # 提取皇帝信息和正文链接（正文链接只遍历一次，事件和人物共用）
             self.logger.info(f"📊 正在提取 {emperor_name} 的详细信息...")
-            emperor_data = self._extract_emperor_data(soup, emperor_info)
+            emperor_data, link_texts = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_emperor_page', PageSource.from_response(response), emperor_info
+            ))
             
             if emperor_data:
                 self.stats['emperors'] += 1
@@ -122,7 +182,7 @@ class BaiduBaikeSpider(scrapy.Spider):
                 yield emperor
                 
                 # 提取该皇帝时期的重大事件链接
-                event_links = self._extract_event_links(soup)
+                event_links = self._extract_event_links(link_texts)
                 self.logger.info(f"🔍 发现 {len(event_links)} 个相关事件链接")
                 
                 event_count = 0
@@ -140,7 +200,7 @@ class BaiduBaikeSpider(scrapy.Spider):
                     )
                 
                 # 提取相关人物链接
-                person_links = self._extract_person_links(soup)
+                person_links = self._extract_person_links(link_texts)
                 self.logger.info(f"🔍 发现 {len(person_links)} 个相关人物链接")
                 
                 person_count = 0
@@ -168,7 +228,12 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.error(f"   错误信息: {str(e)}")
             self.logger.error(f"   错误类型: {type(e).__name__}\n")
     
-    def _extract_emperor_data(self, soup: BeautifulSoup, emperor_info: Dict) -> Optional[Dict[str, Any]]:
+    def _parse_emperor_page(self, source: PageSource, emperor_info: Dict) -> tuple:
+        """解析皇帝页面，返回 (皇帝数据, 正文链接文本)"""
+        root = source.root()
+        return self._extract_emperor_data(root, emperor_info), self._extract_content_link_texts(root)
+    
+    def _extract_emperor_data(self, root: HtmlElement, emperor_info: Dict) -> Optional[Dict[str, Any]]:
         """从页面中提取皇帝数据
         
         百度百科已升级为动态加载，数据以JSON形式嵌入在script标签中
@@ -190,18 +255,18 @@ class BaiduBaikeSpider(scrapy.Spider):
             
             # 方法1: 尝试从script标签中提取JSON数据（百度百科新版）
             self.logger.info("  🔍 尝试从JSON提取数据...")
-            json_data_extracted = self._extract_from_json(soup, data)
+            json_data_extracted = self._extract_from_json(root, data)
             
             # 方法2: 传统DOM解析（作为备用）
             if not json_data_extracted:
                 self.logger.info("  → JSON提取未成功，使用传统DOM解析方式")
-                self._extract_from_dom(soup, data)
+                self._extract_from_dom(root, data)
             else:
                 self.logger.info("  ✓ 成功从JSON提取数据")
             
             # 方法3: 提取infobox中的<tr>标签信息
             self.logger.info("  🔍 提取infobox表格数据...")
-            self._extract_infobox_table(soup, data)
+            self._extract_infobox_table(root, data)
             
             # 记录提取结果
             self.logger.info(f"  📊 提取结果统计:")
@@ -219,47 +284,44 @@ class BaiduBaikeSpider(scrapy.Spider):
         
         return data
     
-    def _extract_from_json(self, soup: BeautifulSoup, data: Dict) -> bool:
+    def _extract_from_json(self, root: HtmlElement, data: Dict) -> bool:
         """从页面中的JSON数据提取信息（百度百科新版）"""
         try:
-            import json
-            
             # 查找包含lemmaBasicInfo的script标签
-            for script in soup.find_all('script'):
-                if not script.string:
+            for script in XPATH_SCRIPTS(root):
+                script_text = script.text
+                if not script_text:
                     continue
-                    
-                script_text = script.string
                 
                 # 查找基础信息JSON
                 if '"lemmaBasicInfo"' in script_text or '"basicInfo"' in script_text:
                     # 提取出生日期
-                    birth_match = re.search(r'"dateOfBirth".*?"text":\[\{"tag":"text","text":"([^"]+)"', script_text)
+                    birth_match = JSON_BIRTH.search(script_text)
                     if birth_match:
                         birth_text = birth_match.group(1)
                         data['birth_date'] = self.date_parser.parse_chinese_date(birth_text)
                         self.logger.debug(f"    提取到出生日期: {birth_text}")
                     
                     # 提取逝世日期
-                    death_match = re.search(r'"dateOfDeath".*?"text":\[\{"tag":"text","text":"([^"]+)"', script_text)
+                    death_match = JSON_DEATH.search(script_text)
                     if death_match:
                         death_text = death_match.group(1)
                         data['death_date'] = self.date_parser.parse_chinese_date(death_text)
                         self.logger.debug(f"    提取到逝世日期: {death_text}")
                     
                     # 提取主要成就
-                    achievement_match = re.search(r'"majorAchievement".*?"data":\[(.*?)\]\}', script_text)
+                    achievement_match = JSON_ACHIEVEMENT.search(script_text)
                     if achievement_match:
                         achievement_json = achievement_match.group(1)
                         # 提取所有成就文本
-                        achievement_texts = re.findall(r'"text":"([^"]+)"', achievement_json)
+                        achievement_texts = JSON_TEXT.findall(achievement_json)
                         if achievement_texts:
                             data['achievements'] = '；'.join(achievement_texts)
                             self.logger.debug(f"    提取到主要成就: {len(achievement_texts)}项")
                 
                 # 查找描述信息
                 if '"description"' in script_text:
-                    desc_match = re.search(r'"description":"([^"]+)"', script_text)
+                    desc_match = JSON_DESCRIPTION.search(script_text)
                     if desc_match:
                         description = desc_match.group(1)
                         # 如果简介为空，使用描述
@@ -277,27 +339,25 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.debug(f"    JSON提取失败: {str(e)}")
             return False
     
-    def _extract_from_dom(self, soup: BeautifulSoup, data: Dict) -> None:
+    def _extract_from_dom(self, root: HtmlElement, data: Dict) -> None:
         """从DOM结构提取信息（传统方式）"""
         try:
             self.logger.debug("    🔍 开始DOM解析...")
             
             # 提取基础信息框
-            info_box = soup.select_one('.basic-info')
-            if info_box:
+            info_box = first(XPATH_BASIC_INFO, root)
+            if info_box is not None:
                 self.logger.debug("    ✓ 找到基础信息框")
                 
                 # 提取出生日期
-                birth_elem = info_box.find('dt', string=re.compile('出生日期|出生时间'))
-                if birth_elem and birth_elem.find_next_sibling('dd'):
-                    birth_text = birth_elem.find_next_sibling('dd').get_text(strip=True)
+                birth_text = definition_value(info_box, LABEL_BIRTH, XPATH_DT)
+                if birth_text is not None:
                     data['birth_date'] = self.date_parser.parse_chinese_date(birth_text)
                     self.logger.debug(f"    ✓ 提取出生日期: {birth_text}")
                 
                 # 提取去世日期
-                death_elem = info_box.find('dt', string=re.compile('逝世日期|逝世时间'))
-                if death_elem and death_elem.find_next_sibling('dd'):
-                    death_text = death_elem.find_next_sibling('dd').get_text(strip=True)
+                death_text = definition_value(info_box, LABEL_DEATH, XPATH_DT)
+                if death_text is not None:
                     data['death_date'] = self.date_parser.parse_chinese_date(death_text)
                     self.logger.debug(f"    ✓ 提取去世日期: {death_text}")
             else:
@@ -307,12 +367,12 @@ class BaiduBaikeSpider(scrapy.Spider):
             biography_texts = []
             
             # 尝试1: lemma-summary
-            summary = soup.select_one('.lemma-summary')
-            if summary:
+            summary = first(XPATH_LEMMA_SUMMARY, root)
+            if summary is not None:
                 self.logger.debug("    ✓ 找到lemma-summary")
-                paragraphs = summary.find_all('div', class_='para')
+                paragraphs = XPATH_PARAS(summary)
                 for para in paragraphs[:3]:  # 提取前3段
-                    text = clean_text(para.get_text())
+                    text = clean_text(get_text(para))
                     if text:
                         biography_texts.append(text)
                 self.logger.debug(f"    ✓ 提取了 {len(biography_texts)} 段简介")
@@ -320,9 +380,9 @@ class BaiduBaikeSpider(scrapy.Spider):
             # 尝试2: 查找所有段落
             if not biography_texts:
                 self.logger.debug("    → 尝试查找所有段落...")
-                all_paras = soup.find_all('div', class_='para')
+                all_paras = XPATH_PARAS(root)
                 for para in all_paras[:5]:  # 提取前5段
-                    text = clean_text(para.get_text())
+                    text = clean_text(get_text(para))
                     if text and len(text) > 50:  # 过滤太短的段落
                         biography_texts.append(text)
                 self.logger.debug(f"    ✓ 从所有段落中提取了 {len(biography_texts)} 段")
@@ -333,26 +393,26 @@ class BaiduBaikeSpider(scrapy.Spider):
             
             # 提取主要成就 - 尝试多种方式
             # 方式1: 查找data-title
-            achievement_section = soup.find('div', {'data-title': '主要成就'})
-            if achievement_section:
-                data['achievements'] = clean_text(achievement_section.get_text())
+            achievement_section = first(XPATH_ACHIEVEMENT_SECTION, root)
+            if achievement_section is not None:
+                data['achievements'] = clean_text(get_text(achievement_section))
                 self.logger.debug(f"    ✓ 从data-title提取成就: {len(data['achievements'])} 字符")
             
             # 方式2: 查找包含"主要成就"的标题
             if not data['achievements']:
-                for heading in soup.find_all(['h2', 'h3']):
-                    if '主要成就' in heading.get_text():
+                for heading in XPATH_HEADINGS(root):
+                    if '主要成就' in get_text(heading):
                         # 提取该标题后的内容
-                        next_elem = heading.find_next_sibling()
-                        if next_elem:
-                            data['achievements'] = clean_text(next_elem.get_text())
+                        next_elem = next_sibling_element(heading)
+                        if next_elem is not None:
+                            data['achievements'] = clean_text(get_text(next_elem))
                             self.logger.debug(f"    ✓ 从标题提取成就: {len(data['achievements'])} 字符")
                             break
             
             # 提取画像URL
-            portrait = soup.select_one('.summary-pic img')
-            if portrait and portrait.get('src'):
-                data['portrait_url'] = portrait['src']
+            portrait = first(XPATH_SUMMARY_PIC_IMG, root)
+            if portrait is not None and portrait.get('src'):
+                data['portrait_url'] = portrait.get('src')
                 self.logger.debug(f"    ✓ 提取画像URL: {data['portrait_url'][:60]}...")
         
         except Exception as e:
@@ -360,7 +420,7 @@ class BaiduBaikeSpider(scrapy.Spider):
             import traceback
             self.logger.debug(f"    错误堆栈: {traceback.format_exc()}")
     
-    def _extract_infobox_table(self, soup: BeautifulSoup, data: Dict) -> None:
+    def _extract_infobox_table(self, root: HtmlElement, data: Dict) -> None:
         """
         从infobox表格中提取<tr>标签信息
         百度百科的基础信息通常在.basic-info表格中，每行是一个<tr>标签
@@ -373,16 +433,9 @@ class BaiduBaikeSpider(scrapy.Spider):
             info_tables = []
             
             # 尝试多种选择器
-            selectors = [
-                '.basic-info',
-                '.basicInfo-block table',
-                'table.infobox',
-                '.lemma-table',
-            ]
-            
-            for selector in selectors:
-                table = soup.select_one(selector)
-                if table:
+            for selector, xpath in INFOBOX_TABLE_SELECTORS:
+                table = first(xpath, root)
+                if table is not None:
                     info_tables.append(table)
                     self.logger.debug(f"    ✓ 找到表格: {selector}")
                     break
@@ -393,22 +446,22 @@ class BaiduBaikeSpider(scrapy.Spider):
             
             # 遍历表格行
             for table in info_tables:
-                rows = table.find_all('tr')
+                rows = XPATH_ROWS(table)
                 self.logger.debug(f"    📊 找到 {len(rows)} 行数据")
                 
                 row_count = 0
                 for row in rows:
                     try:
                         # 提取表头和表数据
-                        th = row.find(['th', 'dt'])
-                        td = row.find(['td', 'dd'])
+                        th = first(XPATH_ROW_HEADER, row)
+                        td = first(XPATH_ROW_VALUE, row)
                         
-                        if not th or not td:
+                        if th is None or td is None:
                             continue
                         
                         row_count += 1
-                        field_name = clean_text(th.get_text())
-                        field_value = clean_text(td.get_text())
+                        field_name = clean_text(get_text(th))
+                        field_value = clean_text(get_text(td))
                         
                         if not field_name or not field_value:
                             continue
@@ -476,10 +529,10 @@ class BaiduBaikeSpider(scrapy.Spider):
                 
                 # 尝试提取图片URL
                 if not data.get('portrait_url'):
-                    img = table.find('img')
-                    if img and img.get('src'):
+                    img = first(XPATH_IMG, table)
+                    if img is not None and img.get('src'):
                         # 处理相对路径
-                        img_url = img['src']
+                        img_url = img.get('src')
                         if img_url.startswith('//'):
                             img_url = 'https:' + img_url
                         elif img_url.startswith('/'):
@@ -538,44 +591,36 @@ class BaiduBaikeSpider(scrapy.Spider):
         except Exception:
             return (date(1368, 1, 1), None)
     
-    def _extract_event_links(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_content_link_texts(self, root: HtmlElement) -> List[str]:
+        """提取正文（.main-content）中所有链接的文本"""
+        return [get_text(link, strip=True) for link in XPATH_CONTENT_LINKS(root)]
+    
+    def _extract_event_links(self, link_texts: List[str]) -> List[str]:
         """提取事件相关链接"""
         events = []
         
-        # 从正文中提取事件链接
-        content = soup.select_one('.main-content')
-        if content:
-            # 查找包含特定关键词的链接
-            event_keywords = ['之役', '之战', '之变', '政变', '起义', '改革', '运动', '下西洋', '案']
-            links = content.find_all('a', href=True)
-            
-            for link in links:
-                link_text = link.get_text(strip=True)
-                if any(keyword in link_text for keyword in event_keywords):
-                    if link_text and len(link_text) < 20:  # 过滤过长的文本
-                        events.append(link_text)
+        # 查找包含特定关键词的链接
+        event_keywords = ['之役', '之战', '之变', '政变', '起义', '改革', '运动', '下西洋', '案']
+        for link_text in link_texts:
+            if any(keyword in link_text for keyword in event_keywords):
+                if link_text and len(link_text) < 20:  # 过滤过长的文本
+                    events.append(link_text)
         
         return list(set(events))[:15]  # 去重并限制数量
     
-    def _extract_person_links(self, soup: BeautifulSoup) -> List[str]:
+    def _extract_person_links(self, link_texts: List[str]) -> List[str]:
         """提取人物相关链接"""
         persons = []
         
-        # 从正文中提取人物链接
-        content = soup.select_one('.main-content')
-        if content:
-            # 查找人名链接（通常是2-4个字）
-            links = content.find_all('a', href=True)
-            
-            for link in links:
-                link_text = link.get_text(strip=True)
-                # 简单的人名判断：2-4个中文字符
-                if link_text and 2 <= len(link_text) <= 4 and all('\u4e00' <= c <= '\u9fff' for c in link_text):
-                    persons.append(link_text)
+        # 查找人名链接（通常是2-4个字）
+        for link_text in link_texts:
+            # 简单的人名判断：2-4个中文字符
+            if link_text and 2 <= len(link_text) <= 4 and all('\u4e00' <= c <= '\u9fff' for c in link_text):
+                persons.append(link_text)
         
         return list(set(persons))[:25]  # 去重并限制数量
     
-    def parse_event(self, response):
+    async def parse_event(self, response):
         """解析事件页面"""
         emperor_id = response.meta.get('emperor_id')
         emperor_name = response.meta.get('emperor_name')
@@ -587,11 +632,11 @@ class BaiduBaikeSpider(scrapy.Spider):
         self.logger.info(f"{'='*60}")
         
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            
             # 提取事件数据
             self.logger.info("🔍 开始提取事件数据...")
-            event_data = self._extract_event_data(soup, emperor_id)
+            event_data = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_event_page', PageSource.from_response(response), emperor_id
+            ))
             
             if event_data:
                 self.stats['events'] += 1
@@ -612,23 +657,26 @@ class BaiduBaikeSpider(scrapy.Spider):
             import traceback
             self.logger.debug(f"   错误堆栈: {traceback.format_exc()}")
     
-    def _extract_event_data(self, soup: BeautifulSoup, emperor_id: str) -> Optional[Dict]:
+    def _parse_event_page(self, source: PageSource, emperor_id: str) -> Optional[Event]:
+        return self._extract_event_data(source.root(), emperor_id)
+    
+    def _extract_event_data(self, root: HtmlElement, emperor_id: str) -> Optional[Dict]:
         """从页面中提取事件数据"""
         try:
             self.logger.debug("  🔍 开始提取事件详细信息...")
             
             # 获取标题
-            title_elem = soup.select_one('.lemmaWgt-lemmaTitle-title h1')
-            if not title_elem:
+            title_elem = first(XPATH_LEMMA_TITLE, root)
+            if title_elem is None:
                 self.logger.warning("  ✗ 未找到事件标题")
                 return None
             
-            title = clean_text(title_elem.get_text())
+            title = clean_text(get_text(title_elem))
             self.logger.debug(f"  ✓ 提取标题: {title}")
             
             data = {
                 'title': title,
-                'event_type': self._determine_event_type(title, soup),
+                'event_type': self._determine_event_type(title, root),
                 'start_date': None,
                 'end_date': None,
                 'location': None,
@@ -640,31 +688,30 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.debug(f"  ✓ 判断事件类型: {data['event_type'].value}")
             
             # 提取基础信息框
-            info_box = soup.select_one('.basic-info')
-            if info_box:
+            info_box = first(XPATH_BASIC_INFO, root)
+            if info_box is not None:
                 self.logger.debug("  ✓ 找到基础信息框")
                 
                 # 提取时间
-                time_elem = info_box.find('dt', string=re.compile('时间|发生时间|年代'))
-                if time_elem and time_elem.find_next_sibling('dd'):
-                    time_text = time_elem.find_next_sibling('dd').get_text(strip=True)
+                time_text = definition_value(info_box, LABEL_EVENT_TIME, XPATH_DT)
+                if time_text is not None:
                     data['start_date'] = self.date_parser.parse_chinese_date(time_text)
                     self.logger.debug(f"  ✓ 提取时间: {time_text} -> {data['start_date']}")
                 
                 # 提取地点
-                location_elem = info_box.find('dt', string=re.compile('地点|发生地点'))
-                if location_elem and location_elem.find_next_sibling('dd'):
-                    data['location'] = clean_text(location_elem.find_next_sibling('dd').get_text())
+                location_text = definition_value(info_box, LABEL_LOCATION, XPATH_DT, strip=False)
+                if location_text is not None:
+                    data['location'] = clean_text(location_text)
                     self.logger.debug(f"  ✓ 提取地点: {data['location']}")
             else:
                 self.logger.debug("  ✗ 未找到基础信息框")
             
             # 提取描述
-            summary = soup.select_one('.lemma-summary')
-            if summary:
-                paragraphs = summary.find_all('div', class_='para')
+            summary = first(XPATH_LEMMA_SUMMARY, root)
+            if summary is not None:
+                paragraphs = XPATH_PARAS(summary)
                 if paragraphs:
-                    data['description'] = clean_text(paragraphs[0].get_text())
+                    data['description'] = clean_text(get_text(paragraphs[0]))
                     self.logger.debug(f"  ✓ 提取描述: {len(data['description'])} 字符")
             
             # 创建Event实体
@@ -695,7 +742,7 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.debug(f"  错误堆栈: {traceback.format_exc()}")
             return None
     
-    def _determine_event_type(self, title: str, soup: BeautifulSoup) -> EventType:
+    def _determine_event_type(self, title: str, root: HtmlElement) -> EventType:
         """根据标题和内容判断事件类型"""
         if any(keyword in title for keyword in ['之战', '之役', '战争', '战役']):
             return EventType.MILITARY
@@ -708,7 +755,7 @@ class BaiduBaikeSpider(scrapy.Spider):
         else:
             return EventType.POLITICAL  # 默认为政治事件
     
-    def parse_person(self, response):
+    async def parse_person(self, response):
         """解析人物页面"""
         emperor_id = response.meta.get('emperor_id')
         
@@ -719,11 +766,11 @@ class BaiduBaikeSpider(scrapy.Spider):
         self.logger.info(f"{'='*60}")
         
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            
             # 提取人物数据
             self.logger.info("🔍 开始提取人物数据...")
-            person_data = self._extract_person_data(soup, emperor_id)
+            person_data = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_person_page', PageSource.from_response(response), emperor_id
+            ))
             
             if person_data:
                 self.stats['persons'] += 1
@@ -743,18 +790,21 @@ class BaiduBaikeSpider(scrapy.Spider):
             import traceback
             self.logger.debug(f"   错误堆栈: {traceback.format_exc()}")
     
-    def _extract_person_data(self, soup: BeautifulSoup, emperor_id: str) -> Optional[Person]:
+    def _parse_person_page(self, source: PageSource, emperor_id: str) -> Optional[Person]:
+        return self._extract_person_data(source.root(), emperor_id)
+    
+    def _extract_person_data(self, root: HtmlElement, emperor_id: str) -> Optional[Person]:
         """从页面中提取人物数据"""
         try:
             self.logger.debug("  🔍 开始提取人物详细信息...")
             
             # 获取人名
-            title_elem = soup.select_one('.lemmaWgt-lemmaTitle-title h1')
-            if not title_elem:
+            title_elem = first(XPATH_LEMMA_TITLE, root)
+            if title_elem is None:
                 self.logger.warning("  ✗ 未找到人物名称")
                 return None
             
-            name = clean_text(title_elem.get_text())
+            name = clean_text(get_text(title_elem))
             self.logger.debug(f"  ✓ 提取人名: {name}")
             
             # 提取基础信息
@@ -764,48 +814,45 @@ class BaiduBaikeSpider(scrapy.Spider):
             position = None
             person_type = PersonType.OTHER
             
-            info_box = soup.select_one('.basic-info')
-            if info_box:
+            info_box = first(XPATH_BASIC_INFO, root)
+            if info_box is not None:
                 self.logger.debug("  ✓ 找到基础信息框")
                 
                 # 提取别名、字号
-                alias_elem = info_box.find('dt', string=re.compile('别名|字号|本名'))
-                if alias_elem and alias_elem.find_next_sibling('dd'):
-                    alias_text = alias_elem.find_next_sibling('dd').get_text(strip=True)
+                alias_text = definition_value(info_box, LABEL_ALIAS, XPATH_DT)
+                if alias_text is not None:
                     alias_list = [a.strip() for a in re.split('[，、]', alias_text) if a.strip()]
                     self.logger.debug(f"  ✓ 提取别名: {len(alias_list)} 个")
                 
                 # 提取出生日期
-                birth_elem = info_box.find('dt', string=re.compile('出生日期|出生时间'))
-                if birth_elem and birth_elem.find_next_sibling('dd'):
-                    birth_text = birth_elem.find_next_sibling('dd').get_text(strip=True)
+                birth_text = definition_value(info_box, LABEL_BIRTH, XPATH_DT)
+                if birth_text is not None:
                     birth_date = self.date_parser.parse_chinese_date(birth_text)
                     self.logger.debug(f"  ✓ 提取出生日期: {birth_text} -> {birth_date}")
                 
                 # 提取去世日期
-                death_elem = info_box.find('dt', string=re.compile('逝世日期|逝世时间'))
-                if death_elem and death_elem.find_next_sibling('dd'):
-                    death_text = death_elem.find_next_sibling('dd').get_text(strip=True)
+                death_text = definition_value(info_box, LABEL_DEATH, XPATH_DT)
+                if death_text is not None:
                     death_date = self.date_parser.parse_chinese_date(death_text)
                     self.logger.debug(f"  ✓ 提取去世日期: {death_text} -> {death_date}")
                 
                 # 提取职位
-                position_elem = info_box.find('dt', string=re.compile('职业|主要成就|职务'))
-                if position_elem and position_elem.find_next_sibling('dd'):
-                    position = clean_text(position_elem.find_next_sibling('dd').get_text())
+                position_text = definition_value(info_box, LABEL_POSITION, XPATH_DT, strip=False)
+                if position_text is not None:
+                    position = clean_text(position_text)
                     # 根据职位判断人物类型
-                    person_type = self._determine_person_type(position, soup)
+                    person_type = self._determine_person_type(position, root)
                     self.logger.debug(f"  ✓ 提取职位: {position} -> 类型: {person_type.value}")
             else:
                 self.logger.debug("  ✗ 未找到基础信息框")
             
             # 提取生平
             biography = ''
-            summary = soup.select_one('.lemma-summary')
-            if summary:
-                paragraphs = summary.find_all('div', class_='para')
+            summary = first(XPATH_LEMMA_SUMMARY, root)
+            if summary is not None:
+                paragraphs = XPATH_PARAS(summary)
                 if paragraphs:
-                    biography = clean_text(paragraphs[0].get_text())
+                    biography = clean_text(get_text(paragraphs[0]))
                     self.logger.debug(f"  ✓ 提取生平: {len(biography)} 字符")
             
             # 创建Person实体
@@ -836,7 +883,7 @@ class BaiduBaikeSpider(scrapy.Spider):
             self.logger.debug(f"  错误堆栈: {traceback.format_exc()}")
             return None
     
-    def _determine_person_type(self, position: str, soup: BeautifulSoup) -> PersonType:
+    def _determine_person_type(self, position: str, root: HtmlElement) -> PersonType:
         """根据职位和内容判断人物类型"""
         if not position:
             return PersonType.OTHER
@@ -864,6 +911,9 @@ class BaiduBaikeSpider(scrapy.Spider):
     
     def handle_error(self, failure):
         """处理请求错误"""
+        if failure.check(PageUnchanged):
+            self.logger.info(f"⏭️ 页面未变化，跳过: {failure.request.url}")
+            return
         self.stats['requests_failed'] += 1
         self.logger.error(f"❌ 请求失败: {failure.request.url}")
         self.logger.error(f"   错误类型: {failure.type.__name__}")
@@ -4,6 +4,7 @@
 """
 
 import scrapy
+from scrapy.utils.defer import maybe_deferred_to_future
 from bs4 import BeautifulSoup
 from typing import Dict, Any, Optional, List
 import re
@@ -11,6 +12,8 @@ from datetime import date
 
 from crawler.models.entities import Emperor, Event, Person, EventType, PersonType
 from crawler.utils.date_utils import DateParser, clean_text, generate_id
+from crawler.utils.parse_executor import PageSource, ParseExecutor
+from crawler.utils.reign_eras import use_era_file
 from crawler.config.ming_data import MING_EMPERORS, MING_DYNASTY
 
 
@@ -29,7 +32,20 @@ class WikipediaSpider(scrapy.Spider):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.date_parser = DateParser()
+        self.parse_executor = ParseExecutor()  # 由 from_crawler 按 PARSE_EXECUTOR_WORKERS 替换
     
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.parse_executor = ParseExecutor.from_settings(crawler.settings)
+        use_era_file(crawler.settings.get('REIGN_ERA_FILE'))
+        return spider
+    
+    async def start(self):
+        """起始请求（Scrapy >= 2.13 只调用 start()，不再回退到 start_requests()）"""
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
         """生成起始请求"""
         # 从 settings 中获取爬取模式配置
@@ -58,8 +74,8 @@ class WikipediaSpider(scrapy.Spider):
         """构建维基百科URL"""
         return f"https://zh.wikipedia.org/wiki/{keyword}"
     
-    def parse_emperor(self, response):
-        """解析皇帝页面"""
+    async def parse_emperor(self, response):
+        """解析皇帝页面（BeautifulSoup 解析在解析进程池中执行）"""
         emperor_info = response.meta['emperor_info']
         
         self.logger.info(f"\n{'='*80}")
@@ -69,11 +85,11 @@ class WikipediaSpider(scrapy.Spider):
         self.logger.info(f"{'='*80}")
         
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            
             # 提取皇帝信息
             self.logger.info(f"📋 开始提取 {emperor_info['name']} 的详细信息...")
-            emperor_data = self._extract_emperor_data(soup, emperor_info)
+            emperor_data = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_emperor_page', PageSource.from_response(response), emperor_info
+            ))
             
             if emperor_data:
                 self.logger.info(f"✅ 成功爱取皇帝: {emperor_data['name']}")
@@ -93,6 +109,9 @@ class WikipediaSpider(scrapy.Spider):
             import traceback
             self.logger.debug(f"   错误堆栈: {traceback.format_exc()}")
     
+    def _parse_emperor_page(self, source: PageSource, emperor_info: Dict) -> Optional[Dict[str, Any]]:
+        return self._extract_emperor_data(source.soup(), emperor_info)
+    
     def _extract_emperor_data(self, soup: BeautifulSoup, emperor_info: Dict) -> Optional[Dict[str, Any]]:
         """从维基百科页面中提取皇帝数据"""
         data = {
@@ -378,11 +397,12 @@ class WikipediaSpider(scrapy.Spider):
         except Exception:
             return (date(1368, 1, 1), None)
     
-    def parse_event(self, response):
+    async def parse_event(self, response):
         """解析事件页面"""
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            event_data = self._extract_event_data(soup, response.meta.get('emperor_id'))
+            event_data = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_event_page', PageSource.from_response(response), response.meta.get('emperor_id')
+            ))
             
             if event_data:
                 self.logger.info(f"[Wiki] 成功爬取事件: {event_data.title}")
@@ -391,6 +411,9 @@ class WikipediaSpider(scrapy.Spider):
         except Exception as e:
             self.logger.error(f"[Wiki] 解析事件页面失败: {str(e)}")
     
+    def _parse_event_page(self, source: PageSource, emperor_id: str) -> Optional[Event]:
+        return self._extract_event_data(source.soup(), emperor_id)
+    
     def _extract_event_data(self, soup: BeautifulSoup, emperor_id: str) -> Optional[Event]:
         """从维基百科页面中提取事件数据"""
         try:
@@ -462,11 +485,12 @@ class WikipediaSpider(scrapy.Spider):
         else:
             return EventType.POLITICAL
     
-    def parse_person(self, response):
+    async def parse_person(self, response):
         """解析人物页面"""
         try:
-            soup = BeautifulSoup(response.text, 'lxml')
-            person_data = self._extract_person_data(soup, response.meta.get('emperor_id'))
+            person_data = await maybe_deferred_to_future(self.parse_executor.call(
+                self, '_parse_person_page', PageSource.from_response(response), response.meta.get('emperor_id')
+            ))
             
             if person_data:
                 self.logger.info(f"[Wiki] 成功爬取人物: {person_data.name}")
@@ -475,6 +499,9 @@ class WikipediaSpider(scrapy.Spider):
         except Exception as e:
             self.logger.error(f"[Wiki] 解析人物页面失败: {str(e)}")
     
+    def _parse_person_page(self, source: PageSource, emperor_id: str) -> Optional[Person]:
+        return self._extract_person_data(source.soup(), emperor_id)
+    
     def _extract_person_data(self, soup: BeautifulSoup, emperor_id: str) -> Optional[Person]:
         """从维基百科页面中提取人物数据"""
         try:
@@ -11,6 +11,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from crawler.models.entities import Emperor, Event, Person, EventType, PersonType
 from crawler.utils.date_utils import DateParser, clean_text, generate_id
+from crawler.utils.reign_eras import get_era_registry, use_era_file
 from crawler.config.ming_data import MING_EMPERORS, MING_DYNASTY
 from datetime import date
 
@@ -37,6 +38,80 @@ def test_date_parser():
     print()
 
 
+def test_date_parser_lunar_and_batch():
+    """测试农历月日、括注公历和批量解析"""
+    print("=" * 50)
+    print("测试农历月日与批量解析")
+    print("=" * 50)
+    
+    cases = {
+        "永乐三年正月初一": date(1405, 1, 1),
+        "洪武三十一年闰五月初十（1398年6月24日）": date(1398, 5, 10),
+        "嘉靖四十五年十二月十四日": date(1566, 12, 14),
+        "天启元年": date(1621, 1, 1),
+        "约1328年，一说1328年10月21日": date(1328, 10, 21),
+        "不详": None,
+    }
+    for text, expected in cases.items():
+        result = DateParser.parse_chinese_date(text)
+        print(f"输入: {text:30s} => 输出: {result}")
+        assert result == expected
+    
+    texts = list(cases) + [None, "永乐三年正月初一"]
+    assert DateParser.parse_many(texts) == list(cases.values()) + [None, date(1405, 1, 1)]
+    print()
+
+
+def test_era_registry():
+    """测试年号注册表：多朝代年号、同名年号消歧、年份反查"""
+    print("=" * 50)
+    print("测试年号注册表")
+    print("=" * 50)
+    
+    registry = get_era_registry()
+    print(f"年号数量: {len(registry)}")
+    
+    # 文本中的年号（最长匹配）
+    found = [name for _, _, name in registry.find_in_text("太平兴国三年，后改元雍熙")]
+    assert found == ["太平兴国", "雍熙"]
+    
+    # 同名年号：元、明两朝的"天顺"，元朝前后两个"至元"
+    assert DateParser.parse_chinese_date("天顺二年") == date(1458, 1, 1)
+    assert DateParser.parse_chinese_date("天顺元年", "yuan") == date(1328, 1, 1)
+    assert registry.resolve("至元", 30).start_year == 1264
+    assert DateParser.parse_chinese_date("康熙六十一年十一月十三日") == date(1722, 11, 13)
+    
+    # 公历年份反查年号
+    era_years = [(era.name, number) for era, number in registry.to_era_years(1636)]
+    print(f"1636年: {era_years}")
+    assert era_years == [("天聪", 10), ("崇祯", 9), ("崇德", 1)]
+    assert [era.name for era in registry.eras_in_year(1405, "ming")] == ["永乐"]
+    
+    # 自带年号表只收录宋、元、明、清；REIGN_ERA_FILE 可切换为其他年号表
+    assert {era.dynasty_id for era in registry.eras()} == {"song", "yuan", "ming", "qing"}
+    import json
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        era_file = os.path.join(tmp_dir, "eras.json")
+        with open(era_file, "w", encoding="utf-8") as f:
+            json.dump({"dynasties": [{"dynasty_id": "tang", "name": "唐",
+                                      "eras": [{"name": "贞观", "start_year": 627, "end_year": 649}]}]}, f)
+        # 切换年号表后，已缓存的解析结果和 REIGN_YEAR_MAP 随之更新
+        assert DateParser.parse_chinese_date("永乐三年") == date(1405, 1, 1)
+        try:
+            use_era_file(era_file)
+            assert [era.name for era in get_era_registry().eras("tang")] == ["贞观"]
+            assert DateParser.parse_chinese_date("永乐三年") is None
+            assert DateParser.parse_chinese_date("贞观三年", "tang") == date(629, 1, 1)
+            assert DateParser.REIGN_YEAR_MAP == {}
+        finally:
+            use_era_file(None)
+    assert get_era_registry() is registry
+    assert DateParser.parse_chinese_date("永乐三年") == date(1405, 1, 1)
+    assert DateParser.REIGN_YEAR_MAP["永乐"] == (1403, 1424)
+    print()
+
+
 def test_clean_text():
     """测试文本清洗"""
     print("=" * 50)
@@ -194,6 +269,263 @@ def test_ming_data():
     print()
 
 
+def test_pipeline_metrics():
+    """测试 Pipeline 阶段指标（耗时、丢弃、错误、在途数与报告）"""
+    import json
+    import tempfile
+    from crawler.utils.pipeline_metrics import PipelineMetrics
+
+    print("=" * 50)
+    print("测试 Pipeline 阶段指标")
+    print("=" * 50)
+
+    metrics = PipelineMetrics()
+    metrics.add_stage('HtmlStoragePipeline')
+    metrics.add_stage('SQLitePipeline')
+    metrics.item_entered()
+    for outcome in ('ok', 'ok', 'dropped'):
+        metrics.finish('HtmlStoragePipeline', metrics.start('HtmlStoragePipeline'), outcome)
+    started = metrics.start('SQLitePipeline')
+    assert metrics.stages['SQLitePipeline'].in_flight == 1
+    metrics.finish('SQLitePipeline', started, 'error')
+    metrics.item_left()
+
+    stats = metrics.stats_values()
+    assert stats['pipeline/HtmlStoragePipeline/items'] == 3 and stats['pipeline/HtmlStoragePipeline/dropped'] == 1
+    assert stats['pipeline/SQLitePipeline/errors'] == 1 and stats['pipeline/in_flight_max'] == 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'reports', 'pipeline_metrics.json')
+        metrics.write_report(path, 'ming_emperor')
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    print(f"报告: {report['stages']['SQLitePipeline']}")
+    # 阶段按登记顺序输出
+    assert list(report['stages']) == ['HtmlStoragePipeline', 'SQLitePipeline']
+    assert report['stages']['SQLitePipeline']['error_rate'] == 1.0 and report['in_flight'] == 0
+    print()
+
+
+def test_structured_logging():
+    """测试结构化日志（JSON 格式、抽样、后台线程写入）"""
+    import json
+    import logging
+    import tempfile
+    from crawler.utils.structured_logging import EventLog, JsonFormatter, QueuedLogging
+
+    print("=" * 50)
+    print("测试结构化日志")
+    print("=" * 50)
+
+    log = EventLog('crawler.events.test')
+    # 未启用时不抽样，字段函数也不会被调用
+    assert not log.enabled and not log.sampled('page-1')
+    log.emit('page', lambda: 1 / 0)
+
+    log.configure(0.5)
+    # 按 key 抽样：同一个 key 的结果固定
+    assert all(log.sampled(f'page-{i}') == log.sampled(f'page-{i}') for i in range(20))
+    kept = sum(log.sampled() for _ in range(100))
+    assert kept == 50, kept
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'events.jsonl')
+        handler = logging.FileHandler(path, encoding='utf-8')
+        handler.setFormatter(JsonFormatter())
+        queued = QueuedLogging(log.logger, [handler])
+        queued.start()
+        log.emit('pipeline_stage', lambda: {'stage': 'SQLitePipeline', 'duration_ms': 1.5}, item='page-1')
+        log.emit('spider_error', {'error': '超时'}, level=logging.ERROR)
+        queued.stop()
+        handler.close()
+        log.disable()
+        log.emit('page', {'url': 'ignored'})
+
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+    print(f"记录: {records}")
+    assert [record['event'] for record in records] == ['pipeline_stage', 'spider_error']
+    assert records[0]['stage'] == 'SQLitePipeline' and records[0]['item'] == 'page-1'
+    assert records[1]['level'] == 'ERROR' and records[1]['error'] == '超时'
+    print()
+
+
+def test_parse_executor():
+    """测试页面解析执行器（PageSource 跨进程传递、按类调用解析方法）"""
+    import pickle
+    from crawler.utils import parse_executor
+    from crawler.utils.parse_executor import PageSource, ParseExecutor
+
+    print("=" * 50)
+    print("测试页面解析执行器")
+    print("=" * 50)
+
+    class TitleParser:
+        def _title(self, source, suffix):
+            return source.root().xpath('string(//p)') + suffix
+
+    html = '<html><body><p>洪武</p></body></html>'
+    # 绑定的 Response 不随 pickle 传递，工作进程中由 body 重新构建文档树
+    source = PageSource(html.encode('utf-8'), 'https://zh.wikipedia.org/wiki/朱元璋', 'utf-8', response=object())
+    restored = pickle.loads(pickle.dumps(source))
+    assert restored._response is None and restored.body == source.body
+    assert restored.text == html
+
+    # 工作进程中的调用方式：按类创建实例（每个类只创建一次）
+    assert parse_executor._call_in_worker(TitleParser, '_title', restored, ('元年',)) == '洪武元年'
+    assert parse_executor._instance(TitleParser) is parse_executor._instance(TitleParser)
+
+    # 未启用进程池时在当前线程调用，返回已完成的 Deferred
+    executor = ParseExecutor(0)
+    assert not executor.enabled
+    results = []
+    executor.call(TitleParser(), '_title', PageSource.from_text(html), '三十一年').addCallback(results.append)
+    print(f"解析结果: {results}")
+    assert results == ['洪武三十一年']
+
+    # 进程池模式：工作进程中的日志交回父进程中同名的 logger
+    import logging
+    import time
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    worker_logger = logging.getLogger('crawler.test_parse_executor')
+    worker_logger.addHandler(handler)
+    worker_logger.setLevel(logging.INFO)
+    pool_executor = ParseExecutor(1)
+    try:
+        pool_executor._get_pool().submit(worker_logger.warning, '工作进程日志').result(timeout=60)
+        deadline = time.monotonic() + 10
+        while not records and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool_executor.shutdown()
+        worker_logger.removeHandler(handler)
+    print(f"工作进程日志: {[record.getMessage() for record in records]}")
+    assert [record.getMessage() for record in records] == ['工作进程日志']
+    assert records[0].process != os.getpid()
+
+    # 进程池模式：工作进程使用 REIGN_ERA_FILE 设置的年号表
+    import json
+    import tempfile
+    from crawler.utils.reign_eras import get_era_registry
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        era_file = os.path.join(tmp_dir, 'eras.json')
+        with open(era_file, 'w', encoding='utf-8') as f:
+            json.dump({'dynasties': [{'dynasty_id': 'tang', 'name': '唐',
+                                      'eras': [{'name': '贞观', 'start_year': 627, 'end_year': 649}]}]}, f)
+        pool_executor = parse_executor.shared_executor(1, era_file)
+        try:
+            assert parse_executor.shared_executor(1, era_file) is pool_executor
+            registry = pool_executor._get_pool().submit(get_era_registry).result(timeout=60)
+        finally:
+            pool_executor.shutdown()
+    assert [era.name for era in registry.eras('tang')] == ['贞观']
+    print()
+
+
+def test_freshness_store():
+    """测试页面新鲜度记录（正文哈希、校验信息确认、变化次数）"""
+    import tempfile
+    from crawler.utils.freshness import FreshnessStore, content_hash
+
+    print("=" * 50)
+    print("测试页面新鲜度记录")
+    print("=" * 50)
+
+    # 脚本、注释和空白的差异不算内容变化
+    page = b'<html><body><p>\xe6\xb4\xaa\xe6\xad\xa6</p><!-- Cached time: 1 --><script>var id=1;</script></body></html>'
+    same = b'<html><body><p>\xe6\xb4\xaa\xe6\xad\xa6</p>  <!-- Cached time: 2 --><script>var id=2;</script></body></html>'
+    assert content_hash(page) == content_hash(same)
+    assert content_hash(page) != content_hash(page.replace(b'<p>', b'<p>1'))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = FreshnessStore(os.path.join(tmp_dir, 'freshness.db'))
+        url = 'https://zh.wikipedia.org/wiki/朱元璋'
+
+        # 首次下载：变化；Item 处理完成前不提供校验信息
+        assert store.observe(url, content_hash(page), etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+        assert store.validators(url) is None
+        # 未处理成功的页面即使内容相同也要重新处理
+        assert store.observe(url, content_hash(page), etag='"v1"')
+        store.mark_processed(url)
+        assert store.validators(url)['etag'] == '"v1"'
+
+        # 内容未变化
+        assert not store.observe(url, content_hash(same))
+        store.not_modified(url)
+
+        # 内容变化：记录变化次数，重新等待确认
+        assert store.observe(url, content_hash(page + b'<p>new</p>'), etag='"v2"')
+        record = store.get(url)
+        print(f"记录: {record}")
+        assert record['changes'] == 1 and record['checks'] == 5 and not record['processed']
+        assert store.validators(url) is None
+        store.close()
+    print()
+
+
+def test_conditional_request_middleware():
+    """测试条件请求中间件（以重定向前的 URL 为键、指定类型的 Item 完成后确认、Item 失败时不确认）"""
+    import tempfile
+    from scrapy.http import HtmlResponse, Request
+    from crawler.middlewares import ConditionalRequestMiddleware, PageUnchanged
+    from crawler.utils.freshness import FreshnessStore
+
+    print("=" * 50)
+    print("测试条件请求中间件")
+    print("=" * 50)
+
+    class Stats:
+        def inc_value(self, key, spider=None):
+            pass
+
+    class StoredItem(dict):
+        pass
+
+    page = '<html><body><p>洪武</p></body></html>'.encode('utf-8')
+    original, redirected = 'https://zh.wikipedia.org/wiki/A', 'https://zh.wikipedia.org/wiki/B'
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = FreshnessStore(os.path.join(tmp_dir, 'freshness.db'))
+        middleware = ConditionalRequestMiddleware(store, Stats(), confirm_items=(StoredItem,))
+
+        def download(body, etag='"v1"'):
+            # 重定向后的请求（RedirectMiddleware 在 meta 中记录重定向前的 URL）
+            request = Request(redirected, meta={'redirect_urls': [original]})
+            response = HtmlResponse(redirected, body=body, headers={'ETag': etag}, request=request)
+            return middleware.process_response(request, response, None)
+
+        # 未提取的 Item、不属于某个响应的 Item 不确认
+        response = download(page)
+        middleware.item_scraped({'page_id': 'raw'}, response, None)
+        middleware.item_scraped(StoredItem(), None, None)
+        assert store.validators(original) is None and store.get(redirected) is None
+        middleware.item_scraped(StoredItem(), response, None)
+        assert store.validators(original)['etag'] == '"v1"'
+
+        # 下次请求重定向前的 URL 时带上校验信息，内容未变化时跳过
+        request = Request(original)
+        middleware.process_request(request, None)
+        assert request.headers.get('If-None-Match') == b'"v1"'
+        try:
+            download(page)
+            raise AssertionError('未变化的页面应跳过')
+        except PageUnchanged:
+            pass
+
+        # 页面的一个 Item 处理失败：撤销确认，之后其他 Item 成功也不再确认
+        response = download(page + b'<p>new</p>', etag='"v2"')
+        middleware.item_scraped(StoredItem(), response, None)
+        middleware.item_failed(StoredItem(), response, None, exception=Exception('入库失败'))
+        middleware.item_scraped(StoredItem(), response, None)
+        record = store.get(original)
+        print(f"记录: {record}")
+        assert not record['processed'] and record['etag'] == '"v2"'
+        middleware.spider_closed(None)
+    print()
+
+
 def main():
     """运行所有测试"""
     print("\n" + "=" * 50)
@@ -203,11 +535,18 @@ def main():
     try:
         test_ming_data()
         test_date_parser()
+        test_date_parser_lunar_and_batch()
+        test_era_registry()
         test_clean_text()
         test_generate_id()
         test_emperor_entity()
         test_event_entity()
         test_person_entity()
+        test_pipeline_metrics()
+        test_structured_logging()
+        test_parse_executor()
+        test_freshness_store()
+        test_conditional_request_middleware()
         
         print("=" * 50)
         print("所有测试完成！")
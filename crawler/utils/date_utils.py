@@ -5,130 +5,154 @@
 
 import re
 from datetime import date, datetime
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
 from dateutil import parser
 
+from crawler.utils.reign_eras import get_era_registry, on_era_file_switch
+
+
+# 中文数字（1-99）查表，如：三→3，十七→17，二十三→23
+_CHINESE_DIGITS = '一二三四五六七八九'
+
+
+def _build_chinese_numeral_table() -> Dict[str, int]:
+    table = {}
+    for value in range(1, 100):
+        tens, ones = divmod(value, 10)
+        ones_str = _CHINESE_DIGITS[ones - 1] if ones else ''
+        if tens == 0:
+            table[ones_str] = value
+        elif tens == 1:
+            table['十' + ones_str] = value
+        else:
+            table[_CHINESE_DIGITS[tens - 1] + '十' + ones_str] = value
+    return table
+
+
+CHINESE_NUMERALS = _build_chinese_numeral_table()
+
+# 农历月份：正月、冬月、腊月及一至十二
+CHINESE_MONTHS = {**{k: v for k, v in CHINESE_NUMERALS.items() if v <= 12}, '正': 1, '冬': 11, '腊': 12}
+
+# 农历日期：初一至初十、十一至三十、廿X、卅
+CHINESE_DAYS = {k: v for k, v in CHINESE_NUMERALS.items() if v <= 30}
+CHINESE_DAYS.update({'初' + k: v for k, v in CHINESE_NUMERALS.items() if v <= 10})
+CHINESE_DAYS.update({'廿' + k: 20 + v for k, v in CHINESE_NUMERALS.items() if v <= 9})
+CHINESE_DAYS.update({'廿': 20, '卅': 30})
+
+# 日期解析结果缓存大小（同一页面、同一批数据中大量重复的日期字符串）
+DATE_CACHE_SIZE = 8192
+
 
 class DateParser:
     """日期解析器"""
     
-    # 年号到年份的映射（明朝）
-    REIGN_YEAR_MAP = {
-        "洪武": (1368, 1398),
-        "建文": (1398, 1402),
-        "永乐": (1402, 1424),
-        "洪熙": (1424, 1425),
-        "宣德": (1425, 1435),
-        "正统": (1435, 1449),
-        "景泰": (1449, 1457),
-        "天顺": (1457, 1464),
-        "成化": (1464, 1487),
-        "弘治": (1487, 1505),
-        "正德": (1505, 1521),
-        "嘉靖": (1521, 1567),
-        "隆庆": (1567, 1572),
-        "万历": (1572, 1620),
-        "泰昌": (1620, 1621),
-        "天启": (1621, 1627),
-        "崇祯": (1627, 1644)
-    }
+    # 未指定朝代时，同名年号优先按该朝代解析
+    DEFAULT_DYNASTY = 'ming'
+    
+    # 年号到年份的映射（明朝，来自当前年号表；切换年号表时重建）
+    REIGN_YEAR_MAP: Dict[str, tuple] = {}
+    
+    # 年号之后的 年 [+ 月 [+ 日]]，如：三年正月初一、三十一年闰五月初十（年号本身由注册表的前缀树匹配）
+    ERA_TAIL_PATTERN = re.compile(
+        r'(?P<year>\d+|元|[一二三四五六七八九十]+)年'
+        r'(?:(?:（[^）]*）|\([^)]*\))?闰?'
+        r'(?P<month>\d{1,2}|正|冬|腊|十[一二]?|[一二三四五六七八九])月'
+        r'(?P<day>\d{1,2}|初[一二三四五六七八九十]|廿[一二三四五六七八九]?|卅|[二三]?十[一二三四五六七八九]?|[一二三四五六七八九])?)?'
+    )
+    
+    # 公历：年 [+ 月 [+ 日]]，如：1368年1月23日
+    GREGORIAN_DATE_PATTERN = re.compile(r'(?P<year>\d{3,4})年(?:(?P<month>\d{1,2})月(?P<day>\d{1,2})?)?')
+    
+    @staticmethod
+    def parse_chinese_date(text: str, dynasty_id: Optional[str] = None) -> Optional[date]:
+        """
+        解析中文日期格式（优先年号纪年，其次公历）
+        例如：洪武元年、永乐三年正月初一、康熙六十一年、1368年1月23日
+        
+        结果按输入字符串缓存
+        
+        Args:
+            text: 日期文本
+            dynasty_id: 同名年号的朝代提示（默认 DEFAULT_DYNASTY）
+        """
+        if not text:
+            return None
+        return _parse_date_cached(text, dynasty_id or DateParser.DEFAULT_DYNASTY)
     
     @staticmethod
-    def parse_chinese_date(text: str) -> Optional[date]:
+    def parse_many(texts: Iterable[Optional[str]], dynasty_id: Optional[str] = None) -> List[Optional[date]]:
         """
-        解析中文日期格式
-        例如：洪武元年、永乐三年正月初一
+        批量解析日期，相同的字符串只解析一次
+        
+        Args:
+            texts: 日期字符串列表
+            dynasty_id: 同名年号的朝代提示
+        
+        Returns:
+            与输入一一对应的日期列表（无法解析的为 None）
         """
+        texts = list(texts)
+        parsed = {text: DateParser.parse_chinese_date(text, dynasty_id) for text in dict.fromkeys(texts) if text}
+        return [parsed.get(text) if text else None for text in texts]
+    
+    @staticmethod
+    def parse_era_date(text: str, dynasty_id: Optional[str] = None) -> Optional[date]:
+        """解析年号纪年日期（如：永乐三年正月初一），取文本中第一个带年数的年号"""
         if not text:
             return None
         
-        try:
-            # 提取年号和年份（支持数字和中文数字）
-            reign_pattern = r'([洪建永宣正景天成弘德嘉隆万泰启崇][武文乐熙德统泰顺化治靖庆历昌祯]+)(\d+|元|[一二三四五六七八九十]+)年'
-            match = re.search(reign_pattern, text)
-            
+        registry = get_era_registry()
+        for _, end, name in registry.find_in_text(text):
+            match = DateParser.ERA_TAIL_PATTERN.match(text, end)
             if match:
-                reign_title = match.group(1)
-                year_num = match.group(2)
-                
-                if reign_title in DateParser.REIGN_YEAR_MAP:
-                    start_year, _ = DateParser.REIGN_YEAR_MAP[reign_title]
-                    if year_num == "元":
-                        year = start_year
-                    else:
-                        # 转换中文数字或阿拉伯数字
-                        year_offset = DateParser._chinese_year_to_int(year_num)
-                        year = start_year + year_offset - 1
-                    
-                    # 尝试提取月日
-                    month = 1
-                    day = 1
-                    
-                    # 提取月份（在年号之后）
-                    month_pattern = r'年.*?(\d+|正|二|三|四|五|六|七|八|九|十|十一|十二)月'
-                    month_match = re.search(month_pattern, text)
-                    if month_match:
-                        month_str = month_match.group(1)
-                        month = DateParser._chinese_num_to_int(month_str)
-                    
-                    # 提取日期（在月份之后）
-                    day_pattern = r'月.*?(初\d+|初一|初二|初三|初四|初五|初六|初七|初八|初九|廿\d+|二十\d+|三十\d*|\d+)日?'
-                    day_match = re.search(day_pattern, text)
-                    if day_match:
-                        day_str = day_match.group(1)
-                        day = DateParser._parse_chinese_day(day_str)
-                    
-                    try:
-                        return date(year, month, day)
-                    except ValueError:
-                        return date(year, 1, 1)
-            
-            # 尝试解析公历日期
-            return DateParser.parse_gregorian_date(text)
-            
-        except Exception:
+                break
+        else:
             return None
+        
+        year_str, month_str, day_str = match.groups()
+        year_number = DateParser._chinese_year_to_int(year_str)
+        era = registry.resolve(name, year_number, dynasty_id or DateParser.DEFAULT_DYNASTY)
+        year = era.to_gregorian(year_number)
+        month = DateParser._chinese_num_to_int(month_str) if month_str else 1
+        day = DateParser._parse_chinese_day(day_str) if day_str else 1
+        
+        try:
+            return date(year, month, day)
+        except ValueError:
+            return date(year, 1, 1)
     
     @staticmethod
     def parse_gregorian_date(text: str) -> Optional[date]:
-        """解析公历日期"""
+        """解析公历日期（优先取文本中最完整的年月日）"""
         if not text:
             return None
         
-        try:
-            # 先尝试匹配完整的年月日格式
-            full_date_pattern = r'(\d{3,4})年(\d{1,2})月(\d{1,2})日?'
-            match = re.search(full_date_pattern, text)
-            if match:
-                year = int(match.group(1))
-                month = int(match.group(2))
-                day = int(match.group(3))
+        year_month = year_only = None
+        for match in DateParser.GREGORIAN_DATE_PATTERN.finditer(text):
+            if match.group('day'):
+                year, month, day = int(match.group('year')), int(match.group('month')), int(match.group('day'))
                 try:
                     return date(year, month, day)
                 except ValueError:
                     return date(year, 1, 1)
-            
-            # 匹配年月格式
-            year_month_pattern = r'(\d{3,4})年(\d{1,2})月'
-            match = re.search(year_month_pattern, text)
-            if match:
-                year = int(match.group(1))
-                month = int(match.group(2))
-                try:
-                    return date(year, month, 1)
-                except ValueError:
-                    return date(year, 1, 1)
-            
-            # 只有年份
-            year_pattern = r'(\d{3,4})年'
-            match = re.search(year_pattern, text)
-            if match:
-                year = int(match.group(1))
+            if match.group('month'):
+                year_month = year_month or match
+            else:
+                year_only = year_only or match
+        
+        if year_month:
+            year, month = int(year_month.group('year')), int(year_month.group('month'))
+            try:
+                return date(year, month, 1)
+            except ValueError:
                 return date(year, 1, 1)
-            
-            return None
-        except Exception:
-            return None
+        
+        if year_only:
+            return date(int(year_only.group('year')), 1, 1)
+        
+        return None
     
     @staticmethod
     def _chinese_year_to_int(year_str: str) -> int:
@@ -140,97 +164,48 @@ class DateParser:
         if year_str == "元":
             return 1
         
-        num_map = {
-            '一': 1, '二': 2, '三': 3, '四': 4, '五': 5,
-            '六': 6, '七': 7, '八': 8, '九': 9, '十': 10
-        }
-        
-        # 处理十几、几十等
-        if '十' in year_str:
-            if year_str == '十':
-                return 10
-            elif year_str.startswith('十'):  # 十一、十二等
-                return 10 + num_map.get(year_str[1], 0)
-            elif year_str.endswith('十'):  # 二十、三十等
-                return num_map.get(year_str[0], 0) * 10
-            else:  # 二十三、三十五等
-                tens = num_map.get(year_str[0], 0) * 10
-                ones = num_map.get(year_str[2], 0) if len(year_str) > 2 else 0
-                return tens + ones
-        
-        return num_map.get(year_str, 1)
+        return CHINESE_NUMERALS.get(year_str, 1)
     
     @staticmethod
     def _chinese_num_to_int(chinese_num: str) -> int:
         """将中文数字转换为阿拉伯数字（用于月份）"""
-        chinese_map = {
-            '正': 1, '一': 1, '二': 2, '三': 3, '四': 4,
-            '五': 5, '六': 6, '七': 7, '八': 8, '九': 9,
-            '十': 10, '十一': 11, '十二': 12
-        }
-        
         if chinese_num.isdigit():
             return int(chinese_num)
         
-        return chinese_map.get(chinese_num, 1)
+        return CHINESE_MONTHS.get(chinese_num, 1)
     
     @staticmethod
     def _parse_chinese_day(day_str: str) -> int:
-        """解析中文日期（初一、初十、十五等）"""
+        """解析中文日期（初一、初十、十五、廿三等）"""
         if not day_str:
             return 1
-            
+        
         if day_str.isdigit():
             return int(day_str)
         
-        # 初一到初九、初十
-        if day_str.startswith('初'):
-            if len(day_str) == 2:
-                if day_str[1] == '一':
-                    return 1
-                elif day_str[1] == '二':
-                    return 2
-                elif day_str[1] == '三':
-                    return 3
-                elif day_str[1] == '四':
-                    return 4
-                elif day_str[1] == '五':
-                    return 5
-                elif day_str[1] == '六':
-                    return 6
-                elif day_str[1] == '七':
-                    return 7
-                elif day_str[1] == '八':
-                    return 8
-                elif day_str[1] == '九':
-                    return 9
-            return int(day_str[1:]) if day_str[1:].isdigit() else 1
-        
-        # 廿一到廿九（20-29日）
-        if day_str.startswith('廿'):
-            if len(day_str) == 2 and day_str[1].isdigit():
-                return 20 + int(day_str[1])
-            return 20
-        
-        # 二十X
-        if day_str.startswith('二十'):
-            if len(day_str) > 2:
-                return 20 + int(day_str[2:]) if day_str[2:].isdigit() else 20
-            return 20
-        
-        # 三十、三十一
-        if day_str.startswith('三十'):
-            if len(day_str) > 2:
-                return 30 + int(day_str[2:]) if day_str[2:].isdigit() else 30
-            return 30
-        
-        # 十X（10-19日）
-        if day_str.startswith('十'):
-            if len(day_str) == 1:
-                return 10
-            return 10 + int(day_str[1:]) if day_str[1:].isdigit() else 10
-        
-        return 1
+        return CHINESE_DAYS.get(day_str, 1)
+
+
+@on_era_file_switch
+def _reload_eras():
+    """年号表切换后重建 REIGN_YEAR_MAP 并清除解析缓存（缓存的结果按旧年号表解析）"""
+    DateParser.REIGN_YEAR_MAP.clear()
+    DateParser.REIGN_YEAR_MAP.update(
+        (era.name, (era.start_year, era.end_year)) for era in get_era_registry().eras(DateParser.DEFAULT_DYNASTY)
+    )
+    _parse_date_cached.cache_clear()
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_cached(text: str, dynasty_id: str) -> Optional[date]:
+    """解析单个日期字符串（年号纪年优先，其次公历）"""
+    try:
+        return DateParser.parse_era_date(text, dynasty_id) or DateParser.parse_gregorian_date(text)
+    except Exception:
+        return None
+
+
+_reload_eras()
 
 
 def clean_text(text: str) -> str:
@@ -0,0 +1,124 @@
+"""
+页面新鲜度记录
+按 URL 保存上次处理成功的页面校验信息（ETag、Last-Modified、正文哈希），供刷新爬取时：
+- 发送条件请求（If-None-Match / If-Modified-Since），服务器返回 304 时不再下载正文
+- 服务器不支持条件请求（或返回 200）时比较正文哈希，内容未变的页面跳过提取和入库
+
+同时记录每个页面的检查次数、变化次数和最近变化时间（页面的变化频率）
+
+由 crawler.middlewares.ConditionalRequestMiddleware 在 Scrapy 中接入
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# 计算哈希前去除的易变内容：脚本、样式、注释（维基百科的渲染时间、请求 ID 等都在其中）
+_VOLATILE_PATTERN = re.compile(rb'<script\b.*?</script\s*>|<style\b.*?</style\s*>|<!--.*?-->', re.S | re.I)
+_WHITESPACE_PATTERN = re.compile(rb'\s+')
+
+
+def content_hash(body: bytes) -> str:
+    """页面正文哈希（忽略脚本、样式、注释和空白差异）"""
+    normalized = _WHITESPACE_PATTERN.sub(b'', _VOLATILE_PATTERN.sub(b'', body or b''))
+    return hashlib.sha1(normalized).hexdigest()
+
+
+class FreshnessStore:
+    """页面校验信息与变化记录（SQLite）"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA busy_timeout = 30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS page_freshness (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                processed INTEGER NOT NULL DEFAULT 0,
+                checked_at REAL,
+                changed_at REAL,
+                checks INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM page_freshness WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def validators(self, url: str) -> Optional[Dict[str, Any]]:
+        """上次处理成功时的校验信息（未处理成功的页面返回 None，需要重新下载和提取）"""
+        record = self.get(url)
+        return record if record and record['processed'] else None
+
+    def observe(self, url: str, digest: str, etag: Optional[str] = None,
+                last_modified: Optional[str] = None) -> bool:
+        """
+        记录一次下载结果，返回内容是否变化
+
+        内容变化（或首次下载、上次未处理成功）时保存新的校验信息并标记为未处理，
+        在页面的 Item 处理完成后由 mark_processed 确认
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, processed FROM page_freshness WHERE url = ?", (url,)
+            ).fetchone()
+            if row and row['processed'] and row['content_hash'] == digest:
+                self._conn.execute(
+                    """
+                    UPDATE page_freshness SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),
+                        checked_at = ?, checks = checks + 1
+                    WHERE url = ?
+                    """,
+                    (etag, last_modified, now, url)
+                )
+                return False
+            changed = row is not None and row['content_hash'] != digest
+            self._conn.execute(
+                """
+                INSERT INTO page_freshness (url, etag, last_modified, content_hash, processed, checked_at, changed_at, checks)
+                VALUES (?, ?, ?, ?, 0, ?, ?, 1)
+                ON CONFLICT (url) DO UPDATE SET
+                    etag = excluded.etag, last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash, processed = 0,
+                    checked_at = excluded.checked_at, checks = checks + 1,
+                    changed_at = CASE WHEN ? THEN excluded.changed_at ELSE changed_at END,
+                    changes = changes + ?
+                """,
+                (url, etag, last_modified, digest, now, now, changed, int(changed))
+            )
+            return True
+
+    def not_modified(self, url: str):
+        """服务器返回 304"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE page_freshness SET checked_at = ?, checks = checks + 1 WHERE url = ?", (time.time(), url)
+            )
+
+    def mark_processed(self, url: str):
+        """页面的 Item 已处理完成，之后的刷新可以跳过未变化的该页面"""
+        with self._lock:
+            self._conn.execute("UPDATE page_freshness SET processed = 1 WHERE url = ?", (url,))
+
+    def mark_failed(self, url: str):
+        """页面的 Item 处理失败，撤销确认（下次重新下载和提取）"""
+        with self._lock:
+            self._conn.execute("UPDATE page_freshness SET processed = 0 WHERE url = ?", (url,))
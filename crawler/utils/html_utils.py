@@ -0,0 +1,114 @@
+"""
+HTML 解析工具
+爬虫直接复用 Scrapy Response 已构建的 lxml 文档树（response.selector.root），
+不再用 BeautifulSoup 重复解析；常用选择器在导入时预编译
+"""
+from typing import Iterator, List, Optional, Pattern
+
+from lxml import etree
+
+
+# 不计入文本的标签（与 BeautifulSoup get_text 的行为一致）
+NON_TEXT_TAGS = frozenset(['script', 'style', 'template'])
+
+
+def has_class(class_name: str) -> str:
+    """XPath 条件：class 属性中包含完整的类名（等同于 CSS 的 .class_name）"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def compile_xpath(expression: str) -> etree.XPath:
+    """预编译 XPath 表达式"""
+    return etree.XPath(expression)
+
+
+def iter_strings(element) -> Iterator[str]:
+    """按文档顺序遍历元素内的文本片段，跳过注释和脚本/样式内容"""
+    stack = [(element, False)]
+    while stack:
+        node, entered = stack.pop()
+        if entered:
+            if node is not element and node.tail:
+                yield node.tail
+            continue
+        if not isinstance(node.tag, str) or node.tag in NON_TEXT_TAGS:
+            if node is not element and node.tail:
+                yield node.tail
+            continue
+        if node.text:
+            yield node.text
+        stack.append((node, True))
+        for child in reversed(node):
+            stack.append((child, False))
+
+
+def get_text(element, separator: str = '', strip: bool = False) -> str:
+    """
+    提取元素文本（等同于 BeautifulSoup 的 get_text）
+
+    Args:
+        element: lxml 元素
+        separator: 片段分隔符
+        strip: 是否去除每个片段的首尾空白并忽略空片段
+
+    Returns:
+        文本
+    """
+    if element is None:
+        return ''
+    if strip:
+        return separator.join(piece for piece in (s.strip() for s in iter_strings(element)) if piece)
+    return separator.join(iter_strings(element))
+
+
+def first(xpath: etree.XPath, element):
+    """返回预编译 XPath 的第一个匹配元素"""
+    result = xpath(element)
+    return result[0] if result else None
+
+
+def next_sibling_element(element, tag: Optional[str] = None):
+    """
+    返回下一个兄弟元素（跳过注释），等同于 find_next_sibling(tag)
+
+    Args:
+        element: lxml 元素
+        tag: 限定的标签名（可选）
+    """
+    for sibling in element.itersiblings():
+        if not isinstance(sibling.tag, str):
+            continue
+        if tag is None or sibling.tag == tag:
+            return sibling
+    return None
+
+
+def find_by_text(elements: List, pattern: Pattern) -> Optional[object]:
+    """返回第一个文本匹配正则的元素（等同于 find(tag, string=re.compile(...))）"""
+    for element in elements:
+        if pattern.search(get_text(element)):
+            return element
+    return None
+
+
+def definition_value(info_box, label_pattern: Pattern, xpath_dt: etree.XPath, strip: bool = True) -> Optional[str]:
+    """
+    在 dt/dd 信息框中查找标签匹配的 dt，返回其后 dd 的文本
+
+    Args:
+        info_box: 信息框元素
+        label_pattern: dt 文本的正则
+        xpath_dt: 预编译的 dt 选择器
+        strip: 是否去除片段首尾空白
+
+    Returns:
+        dd 文本，未找到时返回 None
+    """
+    dt = find_by_text(xpath_dt(info_box), label_pattern)
+    if dt is None:
+        return None
+    dd = next_sibling_element(dt, 'dd')
+    if dd is None:
+        return None
+    return get_text(dd, strip=strip)
+
@@ -0,0 +1,197 @@
+"""
+页面解析进程池
+爬虫回调和 Pipeline 中的 HTML 解析（lxml / BeautifulSoup）是 CPU 密集的同步代码，在 reactor 线程中执行时
+下载会停顿；ParseExecutor 把 response.body 字节交给进程池解析，提取结果以 Deferred 形式返回，
+下载与解析并行，解析吞吐随 CPU 核数增加
+
+- PageSource: 可跨进程传递的页面内容（body 字节 + URL + 编码），在执行解析的进程中按需构建文档树
+- ParseExecutor.call(obj, 'method', source, *args): 调用 obj.method(source, *args)；
+  进程池模式下在工作进程中按 obj 的类创建无参实例（只用于调用解析方法）执行，参数和返回值需可 pickle；
+  PARSE_EXECUTOR_WORKERS = 0 时在当前线程直接调用，并复用 Scrapy 已解析的文档树
+- 工作进程中的日志经队列（QueueHandler → QueueListener）交回父进程，由父进程中同名的 logger 处理
+- 工作进程使用 REIGN_ERA_FILE 设置的年号表（spawn 启动的进程不继承父进程中 use_era_file 的切换）
+
+用法（回调改为 async def）：
+    result = await maybe_deferred_to_future(self.parse_executor.call(self, '_parse_page', PageSource.from_response(response)))
+"""
+
+import functools
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from twisted.internet import defer
+from twisted.python.failure import Failure
+
+logger = logging.getLogger(__name__)
+
+
+class PageSource:
+    """页面内容（可 pickle）；文档树在首次使用时构建"""
+
+    def __init__(self, body: bytes, url: str = '', encoding: str = 'utf-8', response=None):
+        self.body = body
+        self.url = url
+        self.encoding = encoding
+        # 当前进程内的 Scrapy Response（直接调用时复用其文档树，不随 pickle 传递）
+        self._response = response
+        self._text: Optional[str] = None
+        self._root = None
+
+    @classmethod
+    def from_response(cls, response) -> 'PageSource':
+        return cls(response.body, response.url, response.encoding, response=response)
+
+    @classmethod
+    def from_text(cls, text: str, url: str = '') -> 'PageSource':
+        return cls(text.encode('utf-8'), url, 'utf-8')
+
+    def __getstate__(self):
+        return {'body': self.body, 'url': self.url, 'encoding': self.encoding,
+                '_response': None, '_text': None, '_root': None}
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self._response.text if self._response is not None else \
+                self.body.decode(self.encoding or 'utf-8', errors='replace')
+        return self._text
+
+    def root(self):
+        """lxml 文档树（与 Scrapy 的 response.selector.root 一致）"""
+        if self._root is None:
+            if self._response is not None:
+                self._root = self._response.selector.root
+            else:
+                from scrapy.selector import Selector
+                self._root = Selector(text=self.text, base_url=self.url, type='html').root
+        return self._root
+
+    def soup(self):
+        """BeautifulSoup 文档（每次调用重新解析，调用方自行复用）"""
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(self.text, 'lxml')
+
+
+@functools.lru_cache(maxsize=None)
+def _instance(cls):
+    """工作进程中每个类只创建一个实例"""
+    return cls()
+
+
+def _call_in_worker(cls, method: str, source: PageSource, args: tuple):
+    return getattr(_instance(cls), method)(source, *args)
+
+
+def _init_worker(log_queue, level: int, era_file: Optional[str] = None):
+    """工作进程初始化：spawn 启动的进程没有日志配置，所有记录经队列交给父进程；切换到设置的年号表"""
+    from crawler.utils.reign_eras import use_era_file
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    use_era_file(era_file)
+
+
+def _forward_level() -> int:
+    """工作进程转发日志的最低级别（Scrapy 的根 logger 级别为 NOTSET，实际级别在处理器上）"""
+    root = logging.getLogger()
+    level = root.getEffectiveLevel()
+    if root.handlers:
+        level = max(level, min(handler.level for handler in root.handlers))
+    return level
+
+
+class _DispatchHandler(logging.Handler):
+    """父进程中把工作进程的日志记录交给同名的 logger（沿用父进程的处理器和过滤器）"""
+
+    def emit(self, record: logging.LogRecord):
+        logger_ = logging.getLogger(record.name)
+        if logger_.isEnabledFor(record.levelno):
+            logger_.handle(record)
+
+
+class ParseExecutor:
+    """页面解析执行器（进程池或当前线程）"""
+
+    def __init__(self, workers: int = 0, era_file: Optional[str] = None):
+        self.workers = max(0, int(workers))
+        self.era_file = era_file
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._log_listener: Optional[QueueListener] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> 'ParseExecutor':
+        """同一进程内的爬虫和 Pipeline 共用一个进程池"""
+        return shared_executor(settings.getint('PARSE_EXECUTOR_WORKERS', 0), settings.get('REIGN_ERA_FILE'))
+
+    @property
+    def enabled(self) -> bool:
+        """是否使用进程池"""
+        return self.workers > 0
+
+    def call(self, obj: Any, method: str, source: PageSource, *args) -> defer.Deferred:
+        """执行 obj.method(source, *args)，返回结果的 Deferred"""
+        if not self.enabled:
+            return defer.maybeDeferred(getattr(obj, method), source, *args)
+        future = self._get_pool().submit(_call_in_worker, type(obj), method, source, args)
+        return self._to_deferred(future)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # reactor 在使用时导入（模块导入时导入会抢先安装默认 reactor，与 TWISTED_REACTOR 设置冲突）
+        from twisted.internet import reactor
+        if self._pool is None:
+            # 工作进程用 spawn 启动，不继承父进程的 reactor 和线程
+            context = multiprocessing.get_context('spawn')
+            log_queue = context.Queue()
+            self._log_listener = QueueListener(log_queue, _DispatchHandler())
+            self._log_listener.start()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=context,
+                initializer=_init_worker, initargs=(log_queue, _forward_level(), self.era_file)
+            )
+            reactor.addSystemEventTrigger('before', 'shutdown', self.shutdown)
+            logger.info(f"🧮 页面解析进程池已启动: {self.workers} 个进程")
+        return self._pool
+
+    @staticmethod
+    def _to_deferred(future: Future) -> defer.Deferred:
+        from twisted.internet import reactor
+        d = defer.Deferred(canceller=lambda _: future.cancel())
+
+        def fire(done: Future):
+            if d.called or done.cancelled():
+                return
+            error = done.exception()
+            if error is not None:
+                d.errback(Failure(error))
+            else:
+                d.callback(done.result())
+
+        # 完成回调在进程池的管理线程中执行，结果交回 reactor 线程
+        future.add_done_callback(lambda done: reactor.callFromThread(fire, done))
+        return d
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._log_listener is not None:
+            # 写完队列中剩余的日志
+            self._log_listener.stop()
+            self._log_listener = None
+
+
+_shared: Optional[ParseExecutor] = None
+
+
+def shared_executor(workers: int, era_file: Optional[str] = None) -> ParseExecutor:
+    global _shared
+    if _shared is None or _shared.workers != max(0, int(workers)) or _shared.era_file != era_file:
+        if _shared is not None:
+            _shared.shutdown()
+        _shared = ParseExecutor(workers, era_file)
+    return _shared
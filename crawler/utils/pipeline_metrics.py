@@ -0,0 +1,153 @@
+"""
+Pipeline 阶段指标
+按 Pipeline 类记录 process_item 的调用次数、耗时、丢弃数、错误数和在途 Item 数，
+汇总为 Scrapy stats 键值和 JSON 报告（由 crawler.pipelines.instrumentation 在 Scrapy 中接入）
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+# 每个阶段保留最近的耗时样本数（用于计算分位数）
+SAMPLE_SIZE = 10000
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class StageMetrics:
+    """单个 Pipeline 阶段的指标"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.dropped = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples: deque = deque(maxlen=SAMPLE_SIZE)
+
+    def to_dict(self, elapsed: float) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        return {
+            'items': self.items,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'error_rate': round(self.errors / self.items, 4) if self.items else 0.0,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'total_ms': round(self.total_seconds * 1000, 3),
+            'mean_ms': round(self.total_seconds / self.items * 1000, 3) if self.items else 0.0,
+            'p50_ms': round(_percentile(samples, 50) * 1000, 3),
+            'p95_ms': round(_percentile(samples, 95) * 1000, 3),
+            'max_ms': round(self.max_seconds * 1000, 3),
+            # 该阶段耗时占爬虫运行时间的比例（同步 Pipeline 在 reactor 线程执行，占比即阻塞比例）
+            'share': round(self.total_seconds / elapsed, 4) if elapsed > 0 else 0.0,
+        }
+
+
+class PipelineMetrics:
+    """
+    所有 Pipeline 阶段的指标（线程安全）
+
+    用法：
+        token = metrics.start('SQLitePipeline')
+        ...  # process_item
+        metrics.finish('SQLitePipeline', token, outcome='ok')  # 或 'dropped' / 'error'
+    """
+
+    STATS_PREFIX = 'pipeline'
+
+    def __init__(self):
+        self.stages: Dict[str, StageMetrics] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str) -> StageMetrics:
+        """登记阶段（按 Pipeline 顺序），报告中保持该顺序"""
+        with self._lock:
+            return self.stages.setdefault(name, StageMetrics(name))
+
+    def start(self, name: str) -> float:
+        with self._lock:
+            stage = self.stages.get(name) or self.stages.setdefault(name, StageMetrics(name))
+            stage.in_flight += 1
+            stage.max_in_flight = max(stage.max_in_flight, stage.in_flight)
+        return time.perf_counter()
+
+    def finish(self, name: str, started: float, outcome: str = 'ok') -> float:
+        """记录一次调用，outcome 为 ok / dropped / error；返回耗时（秒）"""
+        seconds = time.perf_counter() - started
+        with self._lock:
+            stage = self.stages[name]
+            stage.in_flight -= 1
+            stage.items += 1
+            stage.total_seconds += seconds
+            stage.max_seconds = max(stage.max_seconds, seconds)
+            stage.samples.append(seconds)
+            if outcome == 'dropped':
+                stage.dropped += 1
+            elif outcome == 'error':
+                stage.errors += 1
+        return seconds
+
+    def item_entered(self):
+        """Item 进入 Pipeline 链（在途数 +1）"""
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def item_left(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def stats_values(self) -> Dict[str, float]:
+        """Scrapy stats 键值，如 pipeline/SQLitePipeline/time_ms"""
+        prefix = self.STATS_PREFIX
+        values: Dict[str, float] = {f'{prefix}/in_flight_max': self.max_in_flight}
+        with self._lock:
+            for name, stage in self.stages.items():
+                values[f'{prefix}/{name}/items'] = stage.items
+                values[f'{prefix}/{name}/dropped'] = stage.dropped
+                values[f'{prefix}/{name}/errors'] = stage.errors
+                values[f'{prefix}/{name}/time_ms'] = round(stage.total_seconds * 1000, 3)
+                values[f'{prefix}/{name}/max_ms'] = round(stage.max_seconds * 1000, 3)
+        return values
+
+    def report(self, spider_name: Optional[str] = None) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        with self._lock:
+            stages = {name: stage.to_dict(elapsed) for name, stage in self.stages.items()}
+            in_flight, max_in_flight = self.in_flight, self.max_in_flight
+        slowest = max(stages, key=lambda name: stages[name]['total_ms'], default=None)
+        return {
+            'spider': spider_name,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 3),
+            'in_flight': in_flight,
+            'max_in_flight': max_in_flight,
+            'slowest_stage': slowest,
+            'stages': stages,
+        }
+
+    def write_report(self, path: str, spider_name: Optional[str] = None) -> Dict[str, Any]:
+        """写入 JSON 报告（先写临时文件再替换，读取方不会读到写了一半的文件）"""
+        report = self.report(spider_name)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return report
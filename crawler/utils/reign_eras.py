@@ -0,0 +1,251 @@
+"""
+年号注册表
+从配置文件加载历代年号（年号 → 起止年份），提供：
+- 前缀树：在文本中逐字扫描匹配年号，耗时与文本长度成正比，与年号数量无关
+- 区间索引：公历年份 → 当年使用的年号（二分查找）
+同名年号（如元、明两朝的"天顺"，元朝前后两个"至元"）按朝代和年数消歧
+
+收录范围：自带的年号表（crawler/config/reign_eras.json）目前只收录宋、元、明、清四朝（960-1911），
+其他朝代的年号不会被识别。补充其他朝代时在 JSON 中添加朝代条目，
+或通过 REIGN_ERA_FILE 设置指向另一份同格式的年号表
+"""
+
+import bisect
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# 默认年号表（宋、元、明、清）
+DEFAULT_ERA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'reign_eras.json')
+
+# 当前使用的年号表，由 use_era_file 按 REIGN_ERA_FILE 设置切换
+_era_file = DEFAULT_ERA_FILE
+
+# 年号表切换后调用（清除依赖当前年号表的缓存）
+_switch_callbacks: List[Callable[[], None]] = []
+
+
+@dataclass(frozen=True)
+class ReignEra:
+    """年号"""
+    name: str  # 年号，如：永乐
+    dynasty_id: str  # 朝代ID，如：ming
+    dynasty_name: str  # 朝代名，如：明
+    start_year: int  # 元年（公历）
+    end_year: int  # 最后一年（公历）
+
+    @property
+    def duration(self) -> int:
+        """使用年数"""
+        return self.end_year - self.start_year + 1
+
+    def to_gregorian(self, year_number: int) -> int:
+        """年号纪年转公历年份（如：永乐三年 → 1405）"""
+        return self.start_year + year_number - 1
+
+    def contains(self, year: int) -> bool:
+        """公历年份是否在该年号内"""
+        return self.start_year <= year <= self.end_year
+
+
+class EraTrie:
+    """年号前缀树"""
+
+    _END = ''  # 结束标记（年号本身不含空字符串）
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._root: Dict[str, Any] = {}
+        for name in names:
+            self.insert(name)
+
+    def insert(self, name: str) -> None:
+        node = self._root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[self._END] = name
+
+    def match_at(self, text: str, pos: int) -> Optional[str]:
+        """返回从 pos 开始的最长年号，没有则返回 None"""
+        node = self._root
+        longest = None
+        for index in range(pos, len(text)):
+            node = node.get(text[index])
+            if node is None:
+                break
+            if self._END in node:
+                longest = node[self._END]
+        return longest
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        按顺序查找文本中出现的年号（最长匹配，不重叠）
+
+        Yields:
+            (起始位置, 结束位置, 年号)
+        """
+        pos = 0
+        length = len(text)
+        while pos < length:
+            if text[pos] in self._root:
+                name = self.match_at(text, pos)
+                if name:
+                    yield pos, pos + len(name), name
+                    pos += len(name)
+                    continue
+            pos += 1
+
+
+class EraIntervalIndex:
+    """公历年份 → 年号 的区间索引"""
+
+    def __init__(self, eras: Iterable[ReignEra]):
+        eras = list(eras)
+        # 以所有年号的起止年份切分为若干区段，每个区段内使用的年号集合不变
+        boundaries = sorted({era.start_year for era in eras} | {era.end_year + 1 for era in eras})
+        self._boundaries = boundaries
+        self._segments: List[List[ReignEra]] = [[] for _ in boundaries]
+        for era in eras:
+            first = bisect.bisect_left(boundaries, era.start_year)
+            last = bisect.bisect_left(boundaries, era.end_year + 1)
+            for index in range(first, last):
+                self._segments[index].append(era)
+        for segment in self._segments:
+            segment.sort(key=lambda era: (era.start_year, era.dynasty_id))
+
+    def lookup(self, year: int) -> List[ReignEra]:
+        """返回该年使用的所有年号（按元年排序）"""
+        index = bisect.bisect_right(self._boundaries, year) - 1
+        if index < 0:
+            return []
+        return list(self._segments[index])
+
+
+class EraRegistry:
+    """年号注册表"""
+
+    def __init__(self, eras: Iterable[ReignEra]):
+        self._eras = sorted(eras, key=lambda era: (era.start_year, era.dynasty_id))
+        self._by_name: Dict[str, List[ReignEra]] = {}
+        for era in self._eras:
+            self._by_name.setdefault(era.name, []).append(era)
+        self._trie = EraTrie(self._by_name)
+        self._index = EraIntervalIndex(self._eras)
+        self._resolved: Dict[Tuple[str, Optional[int], Optional[str]], Optional[ReignEra]] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'EraRegistry':
+        """从配置数据构建（格式见 crawler/config/reign_eras.json）"""
+        eras = []
+        for dynasty in data.get('dynasties', []):
+            for era in dynasty.get('eras', []):
+                eras.append(ReignEra(
+                    name=era['name'],
+                    dynasty_id=dynasty['dynasty_id'],
+                    dynasty_name=dynasty.get('name', dynasty['dynasty_id']),
+                    start_year=int(era['start_year']),
+                    end_year=int(era['end_year'])
+                ))
+        return cls(eras)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_ERA_FILE) -> 'EraRegistry':
+        """从 JSON 文件加载"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._eras)
+
+    @property
+    def names(self) -> List[str]:
+        """所有年号名（去重）"""
+        return list(self._by_name)
+
+    def eras(self, dynasty_id: Optional[str] = None) -> List[ReignEra]:
+        """所有年号（可按朝代过滤），按元年排序"""
+        if dynasty_id is None:
+            return list(self._eras)
+        return [era for era in self._eras if era.dynasty_id == dynasty_id]
+
+    def lookup(self, name: str, dynasty_id: Optional[str] = None) -> List[ReignEra]:
+        """按名称查找年号（同名年号按元年排序）"""
+        candidates = self._by_name.get(name, [])
+        if dynasty_id is not None:
+            candidates = [era for era in candidates if era.dynasty_id == dynasty_id]
+        return list(candidates)
+
+    def resolve(self, name: str, year_number: Optional[int] = None,
+                dynasty_id: Optional[str] = None) -> Optional[ReignEra]:
+        """
+        同名年号消歧
+
+        优先选择指定朝代的年号（该朝代没有此年号时不限朝代），
+        再排除年数超出使用年限的年号，剩余的取最早的一个
+
+        Args:
+            name: 年号名
+            year_number: 年号纪年的年数（如：至元三十年 → 30）
+            dynasty_id: 朝代提示
+
+        Returns:
+            年号，未找到时返回 None
+        """
+        key = (name, year_number, dynasty_id)
+        if key not in self._resolved:
+            self._resolved[key] = self._resolve(name, year_number, dynasty_id)
+        return self._resolved[key]
+
+    def _resolve(self, name: str, year_number: Optional[int], dynasty_id: Optional[str]) -> Optional[ReignEra]:
+        candidates = self._by_name.get(name)
+        if not candidates:
+            return None
+        if dynasty_id is not None:
+            candidates = [era for era in candidates if era.dynasty_id == dynasty_id] or candidates
+        if year_number is not None:
+            candidates = [era for era in candidates if year_number <= era.duration] or candidates
+        return candidates[0]
+
+    def find_in_text(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """按顺序查找文本中出现的年号，产出 (起始位置, 结束位置, 年号)"""
+        return self._trie.find_all(text)
+
+    def eras_in_year(self, year: int, dynasty_id: Optional[str] = None) -> List[ReignEra]:
+        """公历年份 → 当年使用的年号"""
+        eras = self._index.lookup(year)
+        if dynasty_id is not None:
+            eras = [era for era in eras if era.dynasty_id == dynasty_id]
+        return eras
+
+    def to_era_years(self, year: int, dynasty_id: Optional[str] = None) -> List[Tuple[ReignEra, int]]:
+        """公历年份 → 年号纪年（如：1405 → [(永乐, 3)]）"""
+        return [(era, year - era.start_year + 1) for era in self.eras_in_year(year, dynasty_id)]
+
+
+def use_era_file(path: Optional[str] = None):
+    """切换 get_era_registry 默认加载的年号表（REIGN_ERA_FILE 设置），为空时使用自带的年号表"""
+    global _era_file
+    path = path or DEFAULT_ERA_FILE
+    if path == _era_file:
+        return
+    _era_file = path
+    for callback in _switch_callbacks:
+        callback()
+
+
+def on_era_file_switch(callback: Callable[[], None]) -> Callable[[], None]:
+    """注册年号表切换后的回调（可用作装饰器）"""
+    _switch_callbacks.append(callback)
+    return callback
+
+
+def get_era_registry(path: Optional[str] = None) -> EraRegistry:
+    """加载（并缓存）年号注册表，未指定路径时使用当前年号表"""
+    return _load_registry(path or _era_file)
+
+
+@lru_cache(maxsize=None)
+def _load_registry(path: str) -> EraRegistry:
+    return EraRegistry.from_file(path)
@@ -0,0 +1,112 @@
+"""
+结构化日志
+- JsonFormatter: 每条记录输出一行 JSON（事件名 + 字段）
+- EventLog: 结构化事件入口（logger: crawler.events），未启用时直接返回；
+  逐页面 / 逐 Item 的明细按比例抽样，字段在通过启用和抽样检查后才构建，JSON 序列化在后台线程完成
+- QueuedLogging: 把 logger 的处理器移到后台线程（QueueHandler → QueueListener），调用方不再等待磁盘 I/O
+
+由 crawler.extensions.StructuredLogging 在 LOG_MODE = 'structured' 时启用
+"""
+
+import json
+import logging
+import queue
+import zlib
+from datetime import datetime
+from itertools import count
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, List, Optional, Union
+
+EVENT_LOGGER_NAME = 'crawler.events'
+
+# 未启用时的级别（高于 CRITICAL，任何事件都不会被处理）
+_DISABLED = logging.CRITICAL + 1
+
+Fields = Union[Dict[str, Any], Callable[[], Dict[str, Any]], None]
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式：事件记录输出 event + 字段，普通日志输出 message"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+        }
+        fields = getattr(record, 'fields', None)
+        if fields is not None:
+            data['event'] = record.msg
+            data.update(fields)
+        else:
+            data['logger'] = record.name
+            data['message'] = record.getMessage()
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exc'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class EventLog:
+    """结构化事件（默认关闭，configure 后按抽样比例输出）"""
+
+    def __init__(self, logger_name: str = EVENT_LOGGER_NAME):
+        self.logger = logging.getLogger(logger_name)
+        self.logger.propagate = False
+        self.logger.setLevel(_DISABLED)
+        self.sample_rate = 1.0
+        self._counter = count()
+
+    def configure(self, sample_rate: float):
+        self.sample_rate = sample_rate
+        self.logger.setLevel(logging.INFO)
+
+    def disable(self):
+        self.logger.setLevel(_DISABLED)
+
+    @property
+    def enabled(self) -> bool:
+        return self.logger.isEnabledFor(logging.INFO)
+
+    def sampled(self, key: Optional[str] = None) -> bool:
+        """
+        明细是否记录：给定 key（如 page_id）时按哈希抽样，同一个 Item 在各阶段的记录要么都保留要么都跳过；
+        否则按计数均匀抽样
+        """
+        if not self.enabled or self.sample_rate <= 0:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        if key is not None:
+            return zlib.crc32(key.encode('utf-8')) % 10000 < self.sample_rate * 10000
+        return next(self._counter) % max(1, round(1 / self.sample_rate)) == 0
+
+    def emit(self, event: str, fields: Fields = None, level: int = logging.INFO, **kwargs):
+        """输出一条事件；fields 可以是返回字典的函数，只在事件会被记录时才调用"""
+        if not self.logger.isEnabledFor(level):
+            return
+        if callable(fields):
+            fields = fields()
+        self.logger.log(level, event, extra={'fields': {**(fields or {}), **kwargs}})
+
+
+class QueuedLogging:
+    """把 logger 的处理器放到后台线程执行，stop() 时写完队列中剩余的记录"""
+
+    def __init__(self, logger: logging.Logger, handlers: List[logging.Handler]):
+        self.logger = logger
+        self.handlers = handlers
+        self._queue = queue.SimpleQueue()
+        self.queue_handler = QueueHandler(self._queue)
+        self.listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+
+    def start(self):
+        self.listener.start()
+        self.logger.addHandler(self.queue_handler)
+
+    def stop(self):
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+
+
+events = EventLog()
@@ -37,7 +37,7 @@ DOWNLOAD_TIMEOUT = 30
 HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 86400  # 1天
 HTTPCACHE_DIR = 'crawler_new/data/httpcache'
-HTTPCACHE_IGNORE_HTTP_CODES = [500, 502, 503, 504, 408, 429]
+HTTPCACHE_IGNORE_HTTP_CODES = [500, 502, 503, 504, 408, 429, 304]  # 304 是条件请求的结果，不能缓存
 
 # 配置 Item Pipeline
 # 注意：只处理 Wikipedia 单一数据源
@@ -50,13 +50,42 @@ ITEM_PIPELINES = {
     'crawler_new.pipelines.recursive_crawl_pipeline.RecursiveCrawlPipeline': 600,  # 递归爬取
 }
 
+# Pipeline 阶段指标（各 process_item 的耗时、Item 数、在途数、错误率），写入 Scrapy stats 和 JSON 报告
+ITEM_PROCESSOR = 'crawler.pipelines.instrumentation.InstrumentedItemPipelineManager'
+PIPELINE_METRICS_REPORT_PATH = 'crawler_new/data/reports/pipeline_metrics.json'
+PIPELINE_METRICS_INTERVAL = 30  # 报告写入间隔（秒），0 表示只在爬虫结束时写入
+
+# 页面解析进程池：本地大模型提取前的 HTML 清理（皇帝页面）交给独立进程执行，
+# reactor 线程不再解析页面；0 表示在 reactor 线程内直接解析
+PARSE_EXECUTOR_WORKERS = 2
+
 # 配置日志
 LOG_LEVEL = 'INFO'
 LOG_FILE = 'crawler_new/data/logs/crawler.log'
 
+# 日志模式：'verbose' 为逐条详细日志；'structured' 为抽样的 JSON 事件日志（后台线程写入）
+LOG_MODE = 'verbose'
+STRUCTURED_LOG_FILE = 'crawler_new/data/logs/events.jsonl'
+STRUCTURED_LOG_SAMPLE_RATE = 0.1  # 逐页面 / 逐 Item 明细的抽样比例，丢弃、错误和爬虫级事件始终记录
+STRUCTURED_LOG_QUIET_LOGGERS = ['crawler_new.local_llm', 'crawler_new.utils']  # 结构化模式下提升到 WARNING 的 logger
+
+EXTENSIONS = {
+    'crawler.extensions.StructuredLogging': 100,
+}
+
+# 刷新爬取的变化检测：按 URL 记录 ETag / Last-Modified / 正文哈希，发送条件请求，
+# 未变化的页面（304 或正文哈希相同）跳过回调、提取和入库
+FRESHNESS_ENABLED = True
+FRESHNESS_DB_PATH = 'crawler_new/data/freshness.db'
+FRESHNESS_FORCE_REFRESH = False  # True 时照常处理所有页面（如修改了提取逻辑后重新提取）
+# 只有提取完成并入库的整页 Item 才表示页面已处理（未提取的 HtmlPageItem、流式的单条事迹不算）
+FRESHNESS_CONFIRM_ITEMS = ['crawler_new.models.items.ExtractedDataItem']
+
 # 配置下载中间件
 DOWNLOADER_MIDDLEWARES = {
     'crawler_new.middlewares.RandomUserAgentMiddleware': 400,
+    # 放在 HTTP 缓存（900）之前，缓存命中的响应同样做变化检测
+    'crawler.middlewares.ConditionalRequestMiddleware': 580,
 }
 
 # 请求头配置
@@ -68,6 +97,11 @@ DEFAULT_REQUEST_HEADERS = {
 # SQLite数据库配置
 SQLITE_DB_PATH = 'server/database/historygogo.db'
 
+# 年号表：日期解析识别的年号（年号 → 公历起止年份）
+# 自带的 crawler/config/reign_eras.json 目前只收录宋、元、明、清四朝，其他朝代的年号纪年不会被解析；
+# 需要其他朝代时补充该文件，或指向另一份同格式的年号表
+REIGN_ERA_FILE = 'crawler/config/reign_eras.json'
+
 # Neo4j数据库配置
 NEO4J_URI = 'bolt://localhost:7687'
 NEO4J_USER = 'neo4j'
@@ -89,6 +123,17 @@ QWEN_MODEL = 'qwen-max'  # 或 qwen-turbo
 LOCAL_LLM_MODEL = 'qwen2.5:14b' #'qwen3:latest'# Ollama 模型名称
 LOCAL_LLM_BASE_URL = 'http://localhost:11434'  # Ollama API 地址
 
+# 长页面分块提取配置（仅本地 LLM）
+# 按目录章节切分正文并行提取事迹，耗时取决于最长章节而非全文
+# 并行数需与 Ollama 的 OLLAMA_NUM_PARALLEL 配合
+LOCAL_LLM_CHUNKED_EXTRACTION = True
+LOCAL_LLM_CHUNK_MAX_TOKENS = 3000  # 每个分块的 token 预算
+LOCAL_LLM_CHUNK_WORKERS = 4  # 并行提取线程数
+
+# 流式提取配置
+# 边生成边解析事迹，每完成一条立即输出；输出不是合法 JSON 时提前中止生成
+LLM_STREAMING_EXTRACTION = True
+
 # 爬取模式配置
 CRAWL_MODE = 'test'  # 'test' 或 'full'
 TEST_EMPEROR_COUNT = 3  # 测试模式下爬取的皇帝数量
@@ -96,3 +141,25 @@ TEST_EMPEROR_COUNT = 3  # 测试模式下爬取的皇帝数量
 # 递归爬取配置
 ENABLE_RECURSIVE_CRAWL = False  # 是否启用递归爬取人物、事件链接
 MAX_RECURSIVE_DEPTH = 2  # 最大递归深度
+
+# 多进程分片爬取配置（crawler_new/run_sharded.py）
+FRONTIER_PATH = 'crawler_new/data/frontier.db'  # 共享爬取队列（同时是全局去重表）
+FRONTIER_BATCH_SIZE = 16  # 每个进程每次领取的 URL 数
+FRONTIER_MAX_ATTEMPTS = 3  # 请求失败的最大尝试次数
+FRONTIER_WORKER_RESTARTS = 2  # 爬虫进程异常退出后的最大重启次数（超过后该分片未完成的 URL 标记为失败）
+
+# 增量刷新调度配置（crawler_new/run_refresh.py）
+REFRESH_SCHEDULE_PATH = 'crawler_new/data/refresh_schedule.db'  # 页面刷新调度表
+REFRESH_BATCH_FRONTIER_PATH = 'crawler_new/data/refresh_batch.db'  # 每批刷新页面的爬取队列（每批开始时清空）
+REFRESH_BATCH_SIZE = 8  # 每批最多刷新的页面数
+REFRESH_MAX_PAGES_PER_HOUR = 30  # 全局爬取预算：平均每小时最多刷新的页面数
+REFRESH_CYCLE_SECONDS = 300  # 调度周期（秒）
+REFRESH_MIN_INTERVAL = 6 * 3600  # 页面刷新间隔下限（秒）
+REFRESH_DEFAULT_INTERVAL = 7 * 86400  # 新页面的刷新间隔
+REFRESH_MAX_INTERVAL = 60 * 86400  # 页面刷新间隔上限
+REFRESH_CHANGED_FACTOR = 0.5  # 页面有变化时刷新间隔乘以该系数
+REFRESH_UNCHANGED_FACTOR = 1.5  # 页面无变化时刷新间隔乘以该系数
+REFRESH_RETRY_DELAY = 3600  # 爬取失败后的重试间隔
+REFRESH_ACCESS_LOG_PATHS = ['logs/access.log']  # API 访问日志（server 的 ACCESS_LOG_PATH），用于统计页面热度
+REFRESH_POPULARITY_HALF_LIFE = 7 * 86400  # 访问热度半衰期
+REFRESH_POPULARITY_WEIGHT = 1.0  # 热度对刷新间隔的影响权重
@@ -0,0 +1,265 @@
+"""
+长页面分块模块
+按照 Wikipedia 目录结构（TOC）将清理后的文本切分为章节块，
+并提供分块提取结果的合并与去重
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .html_cleaner import CleanedContent
+
+
+# 中日韩统一表意文字（含扩展A区）与全角标点
+_CJK_PATTERN = re.compile(r'[　-〿㐀-䶿一-鿿＀-￯]')
+
+# 句子边界（用于切分超长章节）
+_SENTENCE_END_PATTERN = re.compile(r'(?<=[。！？；])')
+
+# 事件时间中的公元年份
+_YEAR_PATTERN = re.compile(r'(\d{3,4})年')
+
+# 去重时忽略的字符（空白与标点）
+_DEDUP_IGNORE_PATTERN = re.compile(r'[\s，。、；：！？“”‘’（）()《》,.;:!?\'"]')
+
+
+@dataclass
+class SectionChunk:
+    """章节分块"""
+    index: int  # 分块序号（0 为导言部分）
+    titles: List[str]  # 分块包含的章节标题
+    text: str  # 分块文本
+    estimated_tokens: int = 0  # 估算的 token 数
+
+    @property
+    def title(self) -> str:
+        """分块标题（多个章节合并时以 / 连接）"""
+        return ' / '.join(self.titles) if self.titles else '导言'
+
+
+@dataclass
+class _Section:
+    title: str
+    level: int
+    text: str
+    tokens: int = field(default=0)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的 token 数
+
+    千问系列分词器对中文大约 1 字 1 token，对英文/数字大约 4 字符 1 token，
+    这里按此比例粗略估算，用于分块预算，无需精确
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+    cjk_count = len(_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
+def split_by_toc(text: str, toc: List[Dict[str, Any]]) -> List[_Section]:
+    """
+    按目录标题将文本切分为章节
+
+    目录标题按顺序在文本中定位，未找到的标题（如已被截断的“评价”章节）会被跳过；
+    第一个标题之前的内容作为导言章节返回
+
+    Args:
+        text: 清理后的纯文本
+        toc: 目录列表，每项包含 level, id, title
+
+    Returns:
+        章节列表
+    """
+    boundaries = []
+    cursor = 0
+    for entry in toc:
+        title = (entry.get('title') or '').strip()
+        if not title:
+            continue
+        pos = text.find(title, cursor)
+        if pos == -1:
+            continue
+        boundaries.append((pos, title, int(entry.get('level') or 2)))
+        cursor = pos + len(title)
+
+    sections = []
+    lead_end = boundaries[0][0] if boundaries else len(text)
+    lead_text = text[:lead_end].strip()
+    if lead_text:
+        sections.append(_Section(title='', level=1, text=lead_text))
+
+    for idx, (pos, title, level) in enumerate(boundaries):
+        end = boundaries[idx + 1][0] if idx + 1 < len(boundaries) else len(text)
+        section_text = text[pos:end].strip()
+        # 只有标题没有正文的章节（如仅包含子章节的 h2）并入后续章节
+        if len(section_text) <= len(title) + 8:
+            continue
+        sections.append(_Section(title=title, level=level, text=section_text))
+
+    for section in sections:
+        section.tokens = estimate_tokens(section.text)
+    return sections
+
+
+def _split_oversized(section: _Section, max_tokens: int) -> List[_Section]:
+    """将超出预算的章节按句子边界切分"""
+    parts = []
+    buffer = ''
+    for sentence in _SENTENCE_END_PATTERN.split(section.text):
+        if not sentence:
+            continue
+        if buffer and estimate_tokens(buffer) + estimate_tokens(sentence) > max_tokens:
+            parts.append(buffer)
+            buffer = ''
+        buffer += sentence
+    if buffer:
+        parts.append(buffer)
+
+    return [
+        _Section(
+            title=section.title if idx == 0 else f"{section.title or '导言'}（续{idx}）",
+            level=section.level,
+            text=part,
+            tokens=estimate_tokens(part)
+        )
+        for idx, part in enumerate(parts)
+    ]
+
+
+def build_chunks(cleaned_content: CleanedContent, max_tokens: int = 3000) -> List[SectionChunk]:
+    """
+    将清理后的内容切分为不超过 token 预算的章节块
+
+    相邻的短章节会合并到同一块中，以减少大模型调用次数；
+    超过预算的单个章节按句子边界继续切分。导言部分始终单独成块（index=0），
+    便于单独提取皇帝基本信息
+
+    Args:
+        cleaned_content: HTML 清理结果
+        max_tokens: 每个分块的 token 预算
+
+    Returns:
+        分块列表
+    """
+    sections = split_by_toc(cleaned_content.text, cleaned_content.toc)
+
+    normalized = []
+    for section in sections:
+        if section.tokens > max_tokens:
+            normalized.extend(_split_oversized(section, max_tokens))
+        else:
+            normalized.append(section)
+
+    chunks: List[SectionChunk] = []
+    for section in normalized:
+        is_lead = not section.title and not chunks
+        last = chunks[-1] if chunks else None
+        can_merge = (
+            last is not None
+            and last.titles  # 导言块不与正文合并
+            and not is_lead
+            and last.estimated_tokens + section.tokens <= max_tokens
+        )
+        if can_merge:
+            last.titles.append(section.title)
+            last.text = f'{last.text} {section.text}'
+            last.estimated_tokens += section.tokens
+        else:
+            chunks.append(SectionChunk(
+                index=len(chunks),
+                titles=[section.title] if section.title else [],
+                text=section.text,
+                estimated_tokens=section.tokens
+            ))
+
+    return chunks
+
+
+def _event_year(event: Dict[str, Any]) -> Optional[int]:
+    """提取事件时间中的公元年份"""
+    match = _YEAR_PATTERN.search(str(event.get('时间') or ''))
+    return int(match.group(1)) if match else None
+
+
+def _normalize_description(event: Dict[str, Any]) -> str:
+    """事件描述归一化（忽略空白与标点），用于去重比较"""
+    return _DEDUP_IGNORE_PATTERN.sub('', str(event.get('事件') or ''))
+
+
+def _is_duplicate(a: str, b: str, prefix_length: int, min_length: int = 6) -> bool:
+    """两条同年事件描述的前缀一致即视为重复（较短描述不足前缀长度时按其全长比较）"""
+    length = min(prefix_length, len(a), len(b))
+    return length >= min_length and a[:length] == b[:length]
+
+
+def _merge_persons(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """合并两条重复事件的人物列表（按姓名去重，保留有链接的记录）"""
+    merged = {}
+    for person in (target.get('人物') or []) + (source.get('人物') or []):
+        if not isinstance(person, dict) or not person.get('姓名'):
+            continue
+        name = person['姓名']
+        if name not in merged or (not merged[name].get('链接') and person.get('链接')):
+            merged[name] = person
+    target['人物'] = list(merged.values())
+
+
+def merge_events(event_groups: List[List[Dict[str, Any]]], prefix_length: int = 12) -> List[Dict[str, Any]]:
+    """
+    合并各分块提取出的事迹，去重并按时间排序
+
+    相同年份且事件描述前缀相同的事迹视为重复：保留描述更详细的一条，
+    并合并两者的人物列表
+
+    Args:
+        event_groups: 各分块的事迹列表（按分块顺序）
+        prefix_length: 去重时比较的事件描述前缀长度
+
+    Returns:
+        合并后的事迹列表
+    """
+    merged: List[Dict[str, Any]] = []
+    # 按年份分桶，只在同一年份内比较描述
+    buckets: Dict[Optional[int], List[int]] = {}
+
+    for events in event_groups:
+        for event in events or []:
+            if not isinstance(event, dict) or not event.get('事件'):
+                continue
+            year = _event_year(event)
+            description = _normalize_description(event)
+            bucket = buckets.setdefault(year, [])
+
+            duplicate_idx = next(
+                (idx for idx in bucket
+                 if _is_duplicate(description, _normalize_description(merged[idx]), prefix_length)),
+                None
+            )
+            if duplicate_idx is None:
+                bucket.append(len(merged))
+                merged.append(dict(event))
+                continue
+
+            existing = merged[duplicate_idx]
+            if len(description) > len(_normalize_description(existing)):
+                replacement = dict(event)
+                _merge_persons(replacement, existing)
+                merged[duplicate_idx] = replacement
+            else:
+                _merge_persons(existing, event)
+
+    # 有年份的按年份排序，年份相同或缺失时保持分块内的原始顺序
+    def sort_key(idx: int):
+        year = _event_year(merged[idx])
+        return (year if year is not None else float('inf'), idx)
+
+    return [merged[idx] for idx in sorted(range(len(merged)), key=sort_key)]
@@ -4,9 +4,27 @@ HTML 清理处理模块
 保留目录结构和人物/事件链接
 """
 import re
-from typing import Dict, List, Optional
-from bs4 import BeautifulSoup, Tag
+from typing import TYPE_CHECKING, Dict, List, Union
 from dataclasses import dataclass
+from lxml import etree
+
+from ..utils.html_document import (
+    ParsedDocument, XPATH_MW_PARSER_OUTPUT, XPATH_HEADLINE, XPATH_SUP, element_text
+)
+
+if TYPE_CHECKING:
+    from crawler.utils.parse_executor import PageSource
+
+
+# 预编译的选择器与正则
+_XPATH_TOC_HEADINGS = etree.XPath(".//*[self::h2 or self::h3 or self::h4]")
+_XPATH_STOP_HEADINGS = etree.XPath(".//*[self::h2 or self::h3]")
+_XPATH_CONTENT_LINKS = etree.XPath(
+    ".//a[@href][not(ancestor::script or ancestor::style or ancestor::nav or ancestor::footer or ancestor::header)]"
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_REFERENCE_PATTERN = re.compile(r'\[\d+\]')
+_EDIT_MARK_PATTERN = re.compile(r'\[编辑\]|\[編輯\]')
 
 
 @dataclass
@@ -18,7 +36,12 @@ class CleanedContent:
 
 
 class WikipediaHTMLCleaner:
-    """Wikipedia HTML 清理器"""
+    """
+    Wikipedia HTML 清理器
+    
+    基于共享的 lxml 文档树工作，不修改文档树：需要移除的元素只在提取文本时跳过，
+    因此同一个 ParsedDocument 可以继续被其他步骤复用
+    """
     
     # 需要截断的章节ID列表
     STOP_SECTION_IDS = [
@@ -32,47 +55,60 @@ class WikipediaHTMLCleaner:
         'sistersitebox', 'metadata', 'topicon', 'noprint'
     ]
     
-    def clean(self, html_content: str) -> CleanedContent:
+    _XPATH_UNWANTED = etree.XPath(
+        './/*[' + ' or '.join(f"contains(@class, '{name}')" for name in UNWANTED_CLASSES) + ']'
+    )
+    
+    def clean(self, html_content: Union[str, ParsedDocument]) -> CleanedContent:
         """
         清理HTML内容，提取文本、目录和链接
         
         Args:
-            html_content: 原始HTML内容
+            html_content: 原始HTML内容，或已解析的 ParsedDocument（复用文档树，不再重复解析）
             
         Returns:
             CleanedContent: 包含文本、目录和链接的清理结果
         """
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # 1. 移除无关标签
-        self._remove_unwanted_tags(soup)
+        document = ParsedDocument.ensure(html_content)
+        return document.memo(self.memo_key, lambda: self._clean_document(document))
+    
+    @property
+    def memo_key(self) -> str:
+        """清理结果在 ParsedDocument 中的缓存键"""
+        return f'cleaned:{type(self).__name__}'
+    
+    def clean_page(self, source: 'PageSource') -> CleanedContent:
+        """
+        清理页面内容（供解析进程池调用，文档树在工作进程中构建）
         
-        # 2. 获取主要内容区域
-        main_content = soup.find('div', class_='mw-parser-output')
-        if not main_content:
+        结果写回文档缓存（document.remember(cleaner.memo_key, result)）后，clean() 直接返回该结果
+        """
+        return self._clean_document(ParsedDocument(source.text, root_factory=source.root))
+    
+    def _clean_document(self, document: ParsedDocument) -> CleanedContent:
+        """清理已解析的文档"""
+        # 1. 获取主要内容区域（脚本、样式等标签在提取文本时统一跳过）
+        main_content = document.first(XPATH_MW_PARSER_OUTPUT)
+        if main_content is None:
             return CleanedContent(
-                text=soup.get_text(separator=' ', strip=True),
+                text=document.text(' '),
                 toc=[],
                 links=[]
             )
         
-        # 3. 提取目录结构（在删除之前）
+        # 2. 提取目录结构
         toc = self._extract_toc(main_content)
         
-        # 4. 提取人物/事件链接（在清理之前）
+        # 3. 提取人物/事件链接
         links = self._extract_links(main_content)
         
-        # 5. 移除页面提示框等无关内容
-        self._remove_unwanted_elements(main_content)
-        
-        # 6. 移除参考引用标记（sup标签）
-        self._remove_references(main_content)
+        # 4. 收集提取文本时需要跳过的元素：提示框、参考引用标记、截断章节
+        skipped = set(self._find_unwanted_elements(main_content))
+        skipped.update(self._find_references(main_content))
+        skipped.update(self._find_stop_section(main_content, skipped))
         
-        # 7. 截断到指定章节
-        self._truncate_at_stop_section(main_content)
-        
-        # 8. 提取并清理文本
-        text = self._extract_clean_text(main_content)
+        # 5. 提取并清理文本
+        text = self._extract_clean_text(main_content, skipped)
         
         return CleanedContent(
             text=text,
@@ -80,12 +116,7 @@ class WikipediaHTMLCleaner:
             links=links
         )
     
-    def _remove_unwanted_tags(self, soup: BeautifulSoup):
-        """移除脚本、样式等无关标签"""
-        for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
-            tag.decompose()
-    
-    def _extract_toc(self, main_content: Tag) -> List[Dict[str, str]]:
+    def _extract_toc(self, main_content) -> List[Dict[str, str]]:
         """
         提取目录结构
         
@@ -95,14 +126,15 @@ class WikipediaHTMLCleaner:
         toc = []
         
         # 查找所有标题标签
-        for heading in main_content.find_all(['h2', 'h3', 'h4']):
-            heading_span = heading.find('span', class_='mw-headline')
-            if heading_span:
+        for heading in _XPATH_TOC_HEADINGS(main_content):
+            headline = XPATH_HEADLINE(heading)
+            if headline:
+                heading_span = headline[0]
                 section_id = heading_span.get('id', '')
-                section_title = heading_span.get_text(strip=True)
+                section_title = element_text(heading_span)
                 
                 # 确定层级
-                level = int(heading.name[1])  # h2->2, h3->3, h4->4
+                level = int(heading.tag[1])  # h2->2, h3->3, h4->4
                 
                 toc.append({
                     'level': level,
@@ -112,7 +144,7 @@ class WikipediaHTMLCleaner:
         
         return toc
     
-    def _extract_links(self, main_content: Tag) -> List[Dict[str, str]]:
+    def _extract_links(self, main_content) -> List[Dict[str, str]]:
         """
         提取人物/事件链接
         
@@ -122,12 +154,15 @@ class WikipediaHTMLCleaner:
         links = []
         
         # 查找所有链接
-        for link in main_content.find_all('a', href=True):
+        for link in _XPATH_CONTENT_LINKS(main_content):
             href = link.get('href', '')
-            text = link.get_text(strip=True)
             
             # 只保留Wikipedia内部链接（/wiki/开头）
-            if href.startswith('/wiki/') and text:
+            if not href.startswith('/wiki/'):
+                continue
+            
+            text = element_text(link)
+            if text:
                 # 判断链接类型
                 link_type = self._classify_link(href, text)
                 
@@ -182,54 +217,51 @@ class WikipediaHTMLCleaner:
         
         return 'other'
     
-    def _remove_unwanted_elements(self, main_content: Tag):
-        """移除页面提示框等无关内容（保留目录div）"""
-        for unwanted_class in self.UNWANTED_CLASSES:
-            for element in main_content.find_all(class_=lambda x: x and unwanted_class in x):
-                element.decompose()
+    def _find_unwanted_elements(self, main_content) -> List:
+        """查找页面提示框等无关内容（保留目录div）"""
+        return self._XPATH_UNWANTED(main_content)
     
-    def _remove_references(self, main_content: Tag):
-        """移除参考引用标记（sup标签）"""
-        for sup_tag in main_content.find_all('sup'):
-            sup_tag.decompose()
+    def _find_references(self, main_content) -> List:
+        """查找参考引用标记（sup标签）"""
+        return XPATH_SUP(main_content)
     
-    def _truncate_at_stop_section(self, main_content: Tag):
-        """在指定章节处截断内容"""
+    def _find_stop_section(self, main_content, skipped: set) -> List:
+        """查找需要截断的章节（从指定章节标题开始的内容）"""
         end_marker = None
         
-        for heading in main_content.find_all(['h2', 'h3']):
-            heading_span = heading.find('span', class_='mw-headline')
-            if heading_span:
-                heading_id = heading_span.get('id', '')
-                if heading_id in self.STOP_SECTION_IDS:
-                    end_marker = heading
-                    break
-        
-        if end_marker:
-            # 移除该标记及其后的所有内容
-            section_to_remove = end_marker.find_parent('section')
-            if section_to_remove and section_to_remove != main_content:
-                section_to_remove.decompose()
-            else:
-                # 移除该heading及其后续所有兄弟节点
-                for sibling in list(end_marker.find_next_siblings()):
-                    sibling.decompose()
-                end_marker.decompose()
-    
-    def _extract_clean_text(self, main_content: Tag) -> str:
+        for heading in _XPATH_STOP_HEADINGS(main_content):
+            # 已被跳过的区域（如提示框）中的标题不参与判断
+            if heading in skipped or any(ancestor in skipped for ancestor in heading.iterancestors()):
+                continue
+            headline = XPATH_HEADLINE(heading)
+            if headline and headline[0].get('id', '') in self.STOP_SECTION_IDS:
+                end_marker = heading
+                break
+        
+        if end_marker is None:
+            return []
+        
+        # 移动版页面中章节包裹在 section 中，整体跳过该章节
+        section = next(end_marker.iterancestors('section'), None)
+        if section is not None and section is not main_content:
+            return [section]
+        
+        # 跳过该heading及其后续所有兄弟节点
+        return [end_marker] + list(end_marker.itersiblings())
+    
+    def _extract_clean_text(self, main_content, skipped: set) -> str:
         """提取并清理文本"""
         # 使用空格作为分隔符提取文本
-        text = main_content.get_text(separator=' ', strip=True)
+        text = element_text(main_content, ' ', skipped)
         
         # 清理多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_PATTERN.sub(' ', text)
         
         # 移除残留的引用标记
-        text = re.sub(r'\[\d+\]', '', text)
+        text = _REFERENCE_PATTERN.sub('', text)
         
         # 移除残留的编辑标记
-        text = re.sub(r'\[编辑\]', '', text)
-        text = re.sub(r'\[編輯\]', '', text)
+        text = _EDIT_MARK_PATTERN.sub('', text)
         
         return text.strip()
 
@@ -4,12 +4,19 @@
 """
 
 import json
+import logging
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import requests
-from typing import Dict, Any, List
-from bs4 import BeautifulSoup
+from typing import Dict, Any, List, Iterator, Callable, Optional, Union
 from .html_cleaner import HTMLCleanerFactory, CleanedContent
+from .chunking import SectionChunk, build_chunks, merge_events
+from ..utils.json_stream import IncrementalJSONArrayParser, StreamingJSONError, iter_array_items
+from ..utils.html_document import ParsedDocument
+
+logger = logging.getLogger(__name__)
 
 
 class LocalLLMExtractor:
@@ -27,12 +34,12 @@ class LocalLLMExtractor:
         self.base_url = base_url
         self.api_url = f'{base_url}/api/generate'
     
-    def extract_emperor_all_data(self, html_content: str, page_name: str) -> Dict[str, Any]:
+    def extract_emperor_all_data(self, html_content: Union[str, ParsedDocument], page_name: str) -> Dict[str, Any]:
         """
         一次性提取皇帝所有信息（基本信息 + 生平事迹）
         
         Args:
-            html_content: Wikipedia HTML 内容
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
             page_name: 页面名称（皇帝姓名）
         
         Returns:
@@ -41,30 +48,30 @@ class LocalLLMExtractor:
         # 清理 HTML，只保留主要内容
         cleaned_html = self._clean_html(html_content, 'wikipedia', page_name)
         
-        print(f'Cleaning HTML content for {page_name}...')
+        logger.debug('Cleaning HTML content for %s...', page_name)
         # 构建一次性提取的提示词
         prompt = self._build_emperor_all_data_prompt(cleaned_html, page_name)
-        print(f'Building prompt for {page_name}...')
+        logger.debug('Building prompt for %s...', page_name)
 
         # 调用本地大模型 API
         response_text = self._call_local_llm(prompt)
-        print(f'Calling local LLM for {page_name}...')
+        logger.debug('Calling local LLM for %s...', page_name)
 
         # 存储 JSON 响应
         self._save_response_to_file(response_text)
-        print(f'Saving response to file for {page_name}...')
+        logger.debug('Saving response to file for %s...', page_name)
         # 解析返回结果
         result = self._parse_emperor_all_data_response(response_text)
-        print(f'Parsing response for {page_name}...')
+        logger.debug('Parsing response for %s...', page_name)
         
         return result
     
-    def extract_emperor_info(self, html_content: str, page_name: str) -> Dict[str, Any]:
+    def extract_emperor_info(self, html_content: Union[str, ParsedDocument], page_name: str) -> Dict[str, Any]:
         """
         从皇帝页面 HTML 中提取结构化信息
         
         Args:
-            html_content: Wikipedia HTML 内容
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
             page_name: 页面名称（皇帝姓名）
         
         Returns:
@@ -84,12 +91,12 @@ class LocalLLMExtractor:
         
         return emperor_info
     
-    def extract_emperor_events(self, html_content: str, page_name: str) -> List[Dict[str, Any]]:
+    def extract_emperor_events(self, html_content: Union[str, ParsedDocument], page_name: str) -> List[Dict[str, Any]]:
         """
         从皇帝页面 HTML 中提取生平事迹
         
         Args:
-            html_content: Wikipedia HTML 内容
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
             page_name: 页面名称（皇帝姓名）
         
         Returns:
@@ -112,34 +119,184 @@ class LocalLLMExtractor:
         
         return events
     
-    def _clean_html(self, html_content: str, data_source: str = 'wikipedia', page_name: str = None) -> str:
+    def extract_emperor_all_data_stream(self, html_content: Union[str, ParsedDocument], page_name: str,
+                                        on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        流式一次性提取皇帝所有信息
+        
+        边生成边解析 events 数组，每完成一条事迹立即回调 on_event；
+        输出不是合法 JSON 时立即断开连接，停止继续生成
+        
+        Args:
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
+            page_name: 页面名称（皇帝姓名）
+            on_event: 每完成一条事迹时的回调
+        
+        Returns:
+            包含 emperor_info 和 events 的字典
+        """
+        cleaned_html = self._clean_html(html_content, 'wikipedia', page_name)
+        prompt = self._build_emperor_all_data_prompt(cleaned_html, page_name)
+        
+        parser = IncrementalJSONArrayParser(array_key='events')
+        for event in self._stream_array_items(prompt, parser):
+            if on_event:
+                on_event(event)
+        
+        response_text = parser.text
+        self._save_response_to_file(response_text)
+        return self._parse_emperor_all_data_response(response_text)
+    
+    def extract_emperor_events_stream(self, html_content: Union[str, ParsedDocument], page_name: str) -> Iterator[Dict[str, Any]]:
+        """
+        流式提取生平事迹，每完成一条事迹立即产出
+        
+        Args:
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
+            page_name: 页面名称（皇帝姓名）
+        
+        Yields:
+            单条生平事迹
+        """
+        cleaned_html = self._clean_html(html_content, 'wikipedia', page_name)
+        prompt = self._build_events_prompt(cleaned_html, page_name)
+        
+        parser = IncrementalJSONArrayParser(array_key=None)
+        yield from self._stream_array_items(prompt, parser)
+        self._save_response_to_file(parser.text)
+    
+    def extract_emperor_all_data_chunked(self, html_content: Union[str, ParsedDocument], page_name: str,
+                                         max_chunk_tokens: int = 3000, max_workers: int = 4,
+                                         on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        分块提取皇帝所有信息（适用于长页面）
+        
+        按目录章节将正文切分为若干块，导言块提取基本信息，各章节块并行提取生平事迹，
+        最后合并去重。总耗时取决于最长的章节，而不是整篇文章
+        
+        Args:
+            html_content: Wikipedia HTML 内容（或已解析的 ParsedDocument）
+            page_name: 页面名称（皇帝姓名）
+            max_chunk_tokens: 每个分块的 token 预算
+            max_workers: 并行调用大模型的线程数（需配合 Ollama 的 OLLAMA_NUM_PARALLEL）
+            on_event: 每完成一条事迹时的回调（设置后各分块使用流式输出，回调在工作线程中执行）
+        
+        Returns:
+            包含 emperor_info 和 events 的字典
+        """
+        cleaned_content = self._clean_content(html_content, 'wikipedia', page_name)
+        chunks = build_chunks(cleaned_content, max_chunk_tokens)
+        
+        # 页面较短时无需分块，直接使用一次性提取
+        if len(chunks) <= 1:
+            prompt = self._build_emperor_all_data_prompt(cleaned_content.text, page_name)
+            response_text = self._call_local_llm(prompt)
+            self._save_response_to_file(response_text)
+            return self._parse_emperor_all_data_response(response_text)
+        
+        logger.info('Chunked extraction for %s: %s chunks', page_name, len(chunks))
+        
+        # 基本信息只依赖导言（含信息框），与各章节的事迹提取并行执行
+        info_prompt = self._build_emperor_prompt(chunks[0].text, page_name)
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            info_future = executor.submit(self._call_local_llm, info_prompt)
+            event_futures = [
+                executor.submit(self._extract_chunk_events, chunk, page_name, on_event)
+                for chunk in chunks
+            ]
+            
+            event_groups = []
+            failed_chunks = []
+            for chunk, future in zip(chunks, event_futures):
+                try:
+                    event_groups.append(future.result())
+                except Exception as e:
+                    failed_chunks.append(chunk.title)
+                    logger.warning('⚠️  分块提取失败 [%s]: %s', chunk.title, str(e)[:200])
+                    event_groups.append([])
+            
+            info_response = info_future.result()
+        
+        if len(failed_chunks) == len(chunks):
+            raise Exception(f"所有分块提取均失败: {', '.join(failed_chunks)}")
+        
+        self._save_response_to_file(info_response)
+        emperor_info = self._parse_emperor_response(info_response)
+        events = merge_events(event_groups)
+        logger.info('Merged %s events into %s for %s', sum(len(g) for g in event_groups), len(events), page_name)
+        
+        return {
+            'emperor_info': emperor_info,
+            'events': events
+        }
+    
+    def _extract_chunk_events(self, chunk: SectionChunk, page_name: str,
+                              on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+        """提取单个分块中的生平事迹"""
+        prompt = self._build_section_events_prompt(chunk.text, page_name, chunk.title)
+        # 单个章节的事迹较少，缩短最大输出长度以减少推理时间
+        if on_event is None:
+            response_text = self._call_local_llm(prompt, num_predict=2048)
+            self._save_response_to_file(response_text)
+            return self._parse_events_response(response_text)
+        
+        parser = IncrementalJSONArrayParser(array_key=None)
+        events = []
+        for event in self._stream_array_items(prompt, parser, num_predict=2048):
+            events.append(event)
+            on_event(event)
+        self._save_response_to_file(parser.text)
+        return events
+    
+    def _clean_html(self, html_content: Union[str, ParsedDocument], data_source: str = 'wikipedia', page_name: str = None) -> str:
         """
         清理 HTML，移除脚本、样式等无关内容
         提取 infobox vcard 到 id="评价" 之间的主要内容
         同时提取目录结构和人物/事件链接
         
         Args:
-            html_content: 原始 HTML
+            html_content: 原始 HTML（或已解析的 ParsedDocument）
             data_source: 数据源（固定为 'wikipedia'）
             page_name: 页面名称（可选，用于保存文件命名）
         
         Returns:
             清理后的 HTML 文本
         """
-        # 使用独立的HTML清理器
-        cleaner = HTMLCleanerFactory.create_cleaner(data_source)
-        cleaned_content = cleaner.clean(html_content)
+        return self._clean_content(html_content, data_source, page_name).text
+    
+    def _clean_content(self, html_content: Union[str, ParsedDocument], data_source: str = 'wikipedia', page_name: str = None) -> CleanedContent:
+        """
+        清理 HTML 并保存中间结果，返回包含文本、目录和链接的完整清理结果
         
-        # 保存清理后的文本
-        self._save_cleaned_text(cleaned_content.text, page_name)
+        同一个 ParsedDocument 只清理、保存一次，一次性提取失败后的降级提取直接复用结果
+        
+        Args:
+            html_content: 原始 HTML（或已解析的 ParsedDocument）
+            data_source: 数据源（固定为 'wikipedia'）
+            page_name: 页面名称（可选，用于保存文件命名）
         
-        # 保存目录结构
-        self._save_toc(cleaned_content.toc, page_name)
+        Returns:
+            CleanedContent: 清理结果
+        """
+        document = ParsedDocument.ensure(html_content)
         
-        # 保存链接数据
-        self._save_links(cleaned_content.links, page_name)
+        def clean_and_save() -> CleanedContent:
+            # 使用独立的HTML清理器
+            cleaner = HTMLCleanerFactory.create_cleaner(data_source)
+            cleaned_content = cleaner.clean(document)
+            
+            # 保存清理后的文本
+            self._save_cleaned_text(cleaned_content.text, page_name)
+            
+            # 保存目录结构
+            self._save_toc(cleaned_content.toc, page_name)
+            
+            # 保存链接数据
+            self._save_links(cleaned_content.links, page_name)
+            
+            return cleaned_content
         
-        return cleaned_content.text
+        return document.memo(f'local_llm_cleaned:{data_source}', clean_and_save)
     
     def _build_emperor_all_data_prompt(self, cleaned_html: str, page_name: str) -> str:
         """构建一次性提取皇帝所有信息的提示词(基本信息 + 生平事迹)"""
@@ -284,17 +441,50 @@ class LocalLLMExtractor:
 6. **提取重点**：政治、军事、文化、外交等重大事件，按时间顺序排列
 7. **数量控制**：15-20个关键事件
 8. **链接提取**：从原网页中提取实际链接，如果没有则填写 null
+"""
+        return prompt
+    
+    def _build_section_events_prompt(self, section_text: str, page_name: str, section_title: str) -> str:
+        """构建单个章节的生平事迹提取提示词（分块提取模式）"""
+        prompt = f"""你是一个历史数据提取专家。以下内容是 Wikipedia 皇帝“{page_name}”词条中的一部分（章节：{section_title}），请提取该部分中记载的生平事迹。
+
+=== Wikipedia 内容（节选） ===
+{section_text}
+
+请按照以下 JSON 格式输出事迹列表，只返回 JSON，不要有其他内容：
+
+[
+  {{
+    "时间": "1344年（至正四年）",
+    "事件": "淮北大旱，父母兄长相继去世；入皇觉寺为僧，不久被遣散，开始三年游方僧生涯，亲历民间疾苦，深刻影响其治国理念。",
+    "事件影响": "亲历底层苦难，形成重农抑商政策基础",
+    "人物": [
+      {{"姓名": "朱五四", "关系": "父", "链接": null}}
+    ],
+    "地点": "皇觉寺（濠州，今安徽凤阳）"
+  }}
+]
+
+注意：
+1. **只提取本节选中明确记载的事迹**，不要补充节选以外的内容；没有可提取的事迹时返回 []
+2. **时间格式**：精确到年月日，并标注古代年号，如"1328年10月29日（元天历元年九月十八日）"
+3. **事件描述**：详细记录事件经过和背景，200字以内
+4. **事件影响**：简述该事件对后续历史的影响
+5. **人物结构**：每个人物包含“姓名”、“关系”（如父、母、好友、大臣等）、“链接”（没有则填写 null）
+6. **地点格式**：“古代地名（今地名）”，如“应天府（今南京市）”
+7. **排列顺序**：按时间顺序排列
 """
         return prompt
 
     
-    def _call_local_llm(self, prompt: str, max_retries: int = 3) -> str:
+    def _call_local_llm(self, prompt: str, max_retries: int = 3, num_predict: int = 4096) -> str:
         """
         调用本地大模型 API (Ollama)
         
         Args:
             prompt: 提示词
             max_retries: 最大重试次数
+            num_predict: 最大输出 token 数
         
         Returns:
             API 返回的文本
@@ -303,18 +493,7 @@ class LocalLLMExtractor:
             'Content-Type': 'application/json'
         }
         
-        data = {
-            'model': self.model_name,
-            'prompt': prompt,
-            'stream': False,
-            'options': {
-                'temperature': 0.2,  # 降低随机性，提升结构化输出稳定性
-                'top_p': 0.8,
-                'top_k': 40,
-                'num_predict': 4096,  # 增加最大输出长度，确保能输出 15-20 条事迹
-                'repeat_penalty': 1.1  # 防止重复内容
-            }
-        }
+        data = self._build_generate_payload(prompt, num_predict, stream=False)
         
         for attempt in range(max_retries):
             try:
@@ -340,6 +519,76 @@ class LocalLLMExtractor:
         
         return ""
     
+    def _build_generate_payload(self, prompt: str, num_predict: int = 4096, stream: bool = False) -> Dict[str, Any]:
+        """构建 Ollama /api/generate 请求体"""
+        return {
+            'model': self.model_name,
+            'prompt': prompt,
+            'stream': stream,
+            'options': {
+                'temperature': 0.2,  # 降低随机性，提升结构化输出稳定性
+                'top_p': 0.8,
+                'top_k': 40,
+                'num_predict': num_predict,  # 默认 4096，确保能输出 15-20 条事迹
+                'repeat_penalty': 1.1  # 防止重复内容
+            }
+        }
+    
+    def _stream_local_llm(self, prompt: str, num_predict: int = 4096, max_retries: int = 3) -> Iterator[str]:
+        """
+        流式调用本地大模型 API (Ollama)
+        
+        生成器关闭时连接随之关闭，Ollama 会停止本次生成。
+        连接失败、非 200 响应或尚未输出任何内容时出错会重试；已输出的片段已交给调用方解析，
+        之后再出错时重试会产生重复内容，直接抛出
+        
+        Args:
+            prompt: 提示词
+            num_predict: 最大输出 token 数
+            max_retries: 最大重试次数
+        
+        Yields:
+            增量输出的文本片段
+        """
+        data = self._build_generate_payload(prompt, num_predict, stream=True)
+        
+        for attempt in range(max_retries):
+            started = False
+            try:
+                with requests.post(self.api_url, json=data, stream=True, timeout=300) as response:
+                    if response.status_code != 200:
+                        raise Exception(f"API请求失败: {response.status_code}, {response.text}")
+                    
+                    # Ollama 按行返回 JSON：{"response": "...", "done": false}
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get('error'):
+                            raise Exception(f"本地大模型返回错误: {chunk['error']}")
+                        piece = chunk.get('response', '')
+                        if piece:
+                            started = True
+                            yield piece
+                        if chunk.get('done'):
+                            break
+                return
+            except Exception as e:
+                if started:
+                    raise
+                if attempt == max_retries - 1:
+                    raise Exception(f"流式调用本地大模型失败（已重试{max_retries}次）: {str(e)}")
+                logger.warning('流式调用本地大模型失败，重试 (%s/%s): %s', attempt + 1, max_retries, str(e)[:200])
+    
+    def _stream_array_items(self, prompt: str, parser: IncrementalJSONArrayParser,
+                            num_predict: int = 4096) -> Iterator[Dict[str, Any]]:
+        """流式调用大模型并逐条产出解析完成的数组元素，输出不合法时立即中止生成"""
+        try:
+            yield from iter_array_items(self._stream_local_llm(prompt, num_predict), parser)
+        except StreamingJSONError as e:
+            self._save_response_to_file(parser.text)
+            raise Exception(f"流式输出解析失败，已中止生成: {str(e)}, 返回文本: {parser.text[:200]}")
+    
     def _parse_emperor_all_data_response(self, response_text: str) -> Dict[str, Any]:
         """
         解析一次性提取的完整数据（基本信息 + 生平事迹）
@@ -454,10 +703,10 @@ class LocalLLMExtractor:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            print(f"💾 已保存清理后的文本: {filepath}")
-            print(f"   文本大小: {len(content)} 字符")
+            logger.info("💾 已保存清理后的文本: %s", filepath)
+            logger.info("   文本大小: %s 字符", len(content))
         except Exception as e:
-            print(f"⚠️  保存清理文本失败: {str(e)}")
+            logger.warning("⚠️  保存清理文本失败: %s", e)
     
     def _save_response_to_file(self, content: str) -> None:
         """
@@ -474,18 +723,18 @@ class LocalLLMExtractor:
             )
             os.makedirs(output_dir, exist_ok=True)
             
-            # 生成文件名（时间戳）
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:17]
-            filename = f'qwen_response_{timestamp}.json'
+            # 生成文件名（时间戳 + 随机后缀，分块并行提取时同一时刻的多个响应不会互相覆盖）
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            filename = f'qwen_response_{timestamp}_{uuid.uuid4().hex[:8]}.json'
             filepath = os.path.join(output_dir, filename)
             
             # 保存文件
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            print(f"💾 已保存API响应: {filepath}")
+            logger.info("💾 已保存API响应: %s", filepath)
         except Exception as e:
-            print(f"⚠️  保存API响应失败: {str(e)}")
+            logger.warning("⚠️  保存API响应失败: %s", e)
     
     def _save_toc(self, toc: List[Dict[str, str]], page_name: str = None) -> None:
         """
@@ -515,10 +764,10 @@ class LocalLLMExtractor:
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(toc, f, ensure_ascii=False, indent=2)
             
-            print(f"📑 已保存目录结构: {filepath}")
-            print(f"   目录条目数: {len(toc)}")
+            logger.info("📑 已保存目录结构: %s", filepath)
+            logger.info("   目录条目数: %s", len(toc))
         except Exception as e:
-            print(f"⚠️  保存目录结构失败: {str(e)}")
+            logger.warning("⚠️  保存目录结构失败: %s", e)
     
     def _save_links(self, links: List[Dict[str, str]], page_name: str = None) -> None:
         """
@@ -560,8 +809,8 @@ class LocalLLMExtractor:
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, ensure_ascii=False, indent=2)
             
-            print(f"🔗 已保存链接数据: {filepath}")
-            print(f"   链接总数: {len(links)}")
-            print(f"   链接分类: {link_stats}")
+            logger.info("🔗 已保存链接数据: %s", filepath)
+            logger.info("   链接总数: %s", len(links))
+            logger.info("   链接分类: %s", link_stats)
         except Exception as e:
-            print(f"⚠️  保存链接数据失败: {str(e)}")
\ No newline at end of file
+            logger.warning("⚠️  保存链接数据失败: %s", e)
\ No newline at end of file
@@ -28,6 +28,9 @@ class HtmlPageItem(scrapy.Item):
     # HTML内容
     html_content = scrapy.Field()
     
+    # 已解析的文档（ParsedDocument，复用响应的 lxml 文档树，仅在进程内传递，不落盘）
+    document = scrapy.Field()
+    
     # 元数据（如朝代顺序、关联ID等）
     metadata = scrapy.Field()
     
@@ -54,6 +57,22 @@ class ExtractedDataItem(scrapy.Item):
     extraction_time = scrapy.Field()
 
 
+class ExtractedEventItem(scrapy.Item):
+    """流式提取中单条解析完成的事迹（在整页提取完成前送入后续 Pipeline）"""
+    
+    # 原始HTML Item
+    html_item = scrapy.Field()
+    
+    # 事迹（与 ExtractedDataItem.extracted_data['events'] 中的元素格式相同）
+    event = scrapy.Field()
+    
+    # 在本页面中的序号（从 1 开始）
+    index = scrapy.Field()
+    
+    # 提取时间
+    extraction_time = scrapy.Field()
+
+
 class LinkItem(scrapy.Item):
     """链接Item - 用于递归爬取"""
     
@@ -1,26 +1,44 @@
 """
 千问大模型提取 Pipeline
 使用通义千问处理 HTML 并提取结构化数据
+启用解析进程池（PARSE_EXECUTOR_WORKERS > 0）时，本地大模型提取前的 HTML 清理在进程池中执行
+流式提取（LLM_STREAMING_EXTRACTION）时提取在线程中执行，每完成一条事迹立即作为 ExtractedEventItem 送入后续 Pipeline
 """
 
+import itertools
+import time
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable
 
-from crawler_new.models.items import HtmlPageItem, ExtractedDataItem
+from scrapy.exceptions import DropItem
+from scrapy.utils.defer import deferred_from_coro
+
+from crawler_new.models.items import HtmlPageItem, ExtractedDataItem, ExtractedEventItem
 from crawler_new.utils.qwen_extractor import QwenExtractor
 from crawler_new.local_llm.local_extractor import LocalLLMExtractor
+from crawler_new.local_llm.html_cleaner import HTMLCleanerFactory
+from crawler_new.utils.html_document import ParsedDocument
+from crawler.utils.parse_executor import PageSource, ParseExecutor
 
 
 class QwenExtractionPipeline:
     """千问大模型提取Pipeline"""
     
-    def __init__(self, api_key: str, model: str, use_local_llm: bool = False, local_llm_model: str = '', local_llm_base_url: str = ''):
+    def __init__(self, api_key: str, model: str, use_local_llm: bool = False, local_llm_model: str = '', local_llm_base_url: str = '',
+                 chunked_extraction: bool = False, chunk_max_tokens: int = 3000, chunk_workers: int = 4,
+                 streaming_extraction: bool = False):
         self.api_key = api_key
         self.model = model
         self.use_local_llm = use_local_llm
         self.local_llm_model = local_llm_model
         self.local_llm_base_url = local_llm_base_url
+        self.chunked_extraction = chunked_extraction
+        self.chunk_max_tokens = chunk_max_tokens
+        self.chunk_workers = chunk_workers
+        self.streaming_extraction = streaming_extraction
         self.extractor = None
+        self.parse_executor = ParseExecutor()
+        self.crawler = None
     
     @classmethod
     def from_crawler(cls, crawler):
@@ -30,7 +48,15 @@ class QwenExtractionPipeline:
         model = crawler.settings.get('QWEN_MODEL', 'qwen-max')
         local_llm_model = crawler.settings.get('LOCAL_LLM_MODEL', 'qwen2.5:7b')
         local_llm_base_url = crawler.settings.get('LOCAL_LLM_BASE_URL', 'http://localhost:11434')
-        return cls(api_key, model, use_local_llm, local_llm_model, local_llm_base_url)
+        chunked_extraction = crawler.settings.getbool('LOCAL_LLM_CHUNKED_EXTRACTION', False)
+        chunk_max_tokens = crawler.settings.getint('LOCAL_LLM_CHUNK_MAX_TOKENS', 3000)
+        chunk_workers = crawler.settings.getint('LOCAL_LLM_CHUNK_WORKERS', 4)
+        streaming_extraction = crawler.settings.getbool('LLM_STREAMING_EXTRACTION', False)
+        pipeline = cls(api_key, model, use_local_llm, local_llm_model, local_llm_base_url,
+                       chunked_extraction, chunk_max_tokens, chunk_workers, streaming_extraction)
+        pipeline.parse_executor = ParseExecutor.from_settings(crawler.settings)
+        pipeline.crawler = crawler
+        return pipeline
     
     def open_spider(self, spider):
         """Spider 开启时初始化提取器"""
@@ -46,6 +72,8 @@ class QwenExtractionPipeline:
                 spider.logger.info(f"   模型: {self.local_llm_model}")
                 spider.logger.info(f"   API地址: {self.local_llm_base_url}")
                 spider.logger.info(f"   优势: 无字符限制，完整HTML处理")
+                if self.chunked_extraction:
+                    spider.logger.info(f"   分块提取: 开启（每块 {self.chunk_max_tokens} tokens，{self.chunk_workers} 并行）")
             except Exception as e:
                 spider.logger.error(f"   ❌ 本地大模型初始化失败: {str(e)}")
                 spider.logger.warning(f"   提示：请确保 Ollama 服务已启动 (ollama serve)")
@@ -63,6 +91,8 @@ class QwenExtractionPipeline:
                 spider.logger.info(f"   API Key: {self.api_key[:10]}...")
                 spider.logger.info(f"   注意: 存在字符限制")
         
+        if self.extractor and self.streaming_extraction:
+            spider.logger.info(f"   流式提取: 开启（逐条解析事迹，输出异常时提前中止）")
         spider.logger.info(f"{'='*100}\n")
     
     def process_item(self, item, spider):
@@ -76,6 +106,39 @@ class QwenExtractionPipeline:
             spider.logger.warning(f"⚠️  [跳过] 千问提取: {item['page_id']}（Extractor 未初始化）")
             return item
         
+        # 事件、人物页面的提取暂不清理 HTML
+        if self.use_local_llm and self.parse_executor.enabled and item['page_type'] == 'emperor':
+            return self._clean_in_pool(item, spider)
+        return self._run_extraction(item, spider)
+    
+    def _run_extraction(self, item: HtmlPageItem, spider):
+        """流式提取时在线程中提取（reactor 线程同时处理已送出的单条事迹），否则直接提取"""
+        if self.crawler is not None and item['page_type'] == 'emperor' and self._uses_streaming():
+            from twisted.internet import threads
+            return threads.deferToThread(self._extract_item, item, spider)
+        return self._extract_item(item, spider)
+    
+    def _uses_streaming(self) -> bool:
+        return self.streaming_extraction and isinstance(self.extractor, LocalLLMExtractor)
+    
+    def _clean_in_pool(self, item: HtmlPageItem, spider):
+        """在解析进程池中清理 HTML，结果写入文档缓存后再提取（提取器直接复用清理结果）"""
+        document = self._get_document(item)
+        cleaner = HTMLCleanerFactory.create_cleaner('wikipedia')
+        
+        def cleaned(content):
+            document.remember(cleaner.memo_key, content)
+            return self._run_extraction(item, spider)
+        
+        def clean_failed(failure):
+            spider.logger.warning(f"⚠️  进程池清理失败，改为在当前进程清理: {item['page_id']}（{failure.getErrorMessage()}）")
+            return self._run_extraction(item, spider)
+        
+        source = PageSource.from_text(document.html_content, item.get('source_url', ''))
+        return self.parse_executor.call(cleaner, 'clean_page', source).addCallbacks(cleaned, clean_failed)
+    
+    def _extract_item(self, item: HtmlPageItem, spider):
+        """按页面类型提取"""
         try:
             # 根据页面类型处理
             page_type = item['page_type']
@@ -113,28 +176,50 @@ class QwenExtractionPipeline:
             spider.logger.error(f"{'='*80}\n")
             import traceback
             spider.logger.debug(traceback.format_exc())
-            return item
+            # 未提取的页面不再送入后续 Pipeline（item_dropped），新鲜度记录不会被确认，下次刷新时重新提取
+            raise DropItem(f"千问提取失败: {item['page_id']}")
     
     def _extract_emperor(self, html_item: HtmlPageItem, spider) -> ExtractedDataItem:
         """提取皇帝信息（只处理 Wikipedia）"""
         page_name = html_item['page_name']
-        html_content = html_item['html_content']
+        # 整个提取过程（含降级提取）共用同一个已解析文档，页面只解析一次
+        html_content = self._get_document(html_item)
         
         spider.logger.info(f"\n{'='*80}")
         spider.logger.info(f"🤖 [大模型提取] 开始提取皇帝信息")
         spider.logger.info(f"   皇帝: {page_name}")
         spider.logger.info(f"   Wikipedia HTML: {len(html_content)} 字符")
-        spider.logger.info(f"   提取模式: 一次性提取（基本信息 + 生平事迹）")
+        use_chunked = self.chunked_extraction and isinstance(self.extractor, LocalLLMExtractor)
+        if use_chunked:
+            spider.logger.info(f"   提取模式: 分块并行提取（按目录章节）")
+        else:
+            spider.logger.info(f"   提取模式: 一次性提取（基本信息 + 生平事迹）")
         spider.logger.info(f"{'='*80}")
         
         spider.logger.info(f"\n🚀 [大模型调用] 一次性提取所有数据...")
         
         try:
-            # 1. 一次性提取所有数据
-            result = self.extractor.extract_emperor_all_data(
-                html_content=html_content,
-                page_name=page_name
-            )
+            # 1. 一次性提取所有数据（长页面按章节分块并行提取）
+            on_event = self._make_event_listener(html_item, spider) if self._uses_streaming() else None
+            if use_chunked:
+                result = self.extractor.extract_emperor_all_data_chunked(
+                    html_content=html_content,
+                    page_name=page_name,
+                    max_chunk_tokens=self.chunk_max_tokens,
+                    max_workers=self.chunk_workers,
+                    on_event=on_event
+                )
+            elif on_event:
+                result = self.extractor.extract_emperor_all_data_stream(
+                    html_content=html_content,
+                    page_name=page_name,
+                    on_event=on_event
+                )
+            else:
+                result = self.extractor.extract_emperor_all_data(
+                    html_content=html_content,
+                    page_name=page_name
+                )
             
             emperor_info = result.get('emperor_info', {})
             events = result.get('events', [])
@@ -232,11 +317,19 @@ class QwenExtractionPipeline:
         
         try:
             # 1. 一次性提取所有数据
-            result = self.extractor.extract_emperor_all_data(
-                html_content_wiki=html_wiki,
-                html_content_baidu=html_baidu,
-                page_name=page_name
-            )
+            if self.streaming_extraction:
+                result = self.extractor.extract_emperor_all_data_stream(
+                    html_content_wiki=html_wiki,
+                    html_content_baidu=html_baidu,
+                    page_name=page_name,
+                    on_event=self._make_event_listener(html_item, spider)
+                )
+            else:
+                result = self.extractor.extract_emperor_all_data(
+                    html_content_wiki=html_wiki,
+                    html_content_baidu=html_baidu,
+                    page_name=page_name
+                )
             
             emperor_info = result.get('emperor_info', {})
             events = result.get('events', [])
@@ -352,6 +445,46 @@ class QwenExtractionPipeline:
         
         return extracted_item
     
+    def _get_document(self, html_item: HtmlPageItem) -> ParsedDocument:
+        """获取 Item 的已解析文档（爬虫未提供时在此解析一次并回填到 Item）"""
+        document = html_item.get('document')
+        if document is None:
+            document = ParsedDocument(html_item['html_content'])
+            html_item['document'] = document
+        return document
+    
+    def _make_event_listener(self, html_item: HtmlPageItem, spider) -> Callable[[Dict[str, Any]], None]:
+        """创建流式提取的事迹回调：每解析完成一条事迹立即送入后续 Pipeline，并记录首条事迹耗时"""
+        page_name = html_item['page_name']
+        start_time = time.monotonic()
+        # 分块模式下回调在多个工作线程中执行，itertools.count 的 next() 是原子操作
+        counter = itertools.count(1)
+        
+        def on_event(event: Dict[str, Any]):
+            index = next(counter)
+            elapsed = time.monotonic() - start_time
+            if index == 1:
+                spider.logger.info(f"   ⏱️  首条事迹耗时: {elapsed:.1f}s ({page_name})")
+            spider.logger.info(f"   📨 [{index}] {event.get('时间')} - {str(event.get('事件', ''))[:30]}...")
+            if self.crawler is not None:
+                from twisted.internet import reactor
+                event_item = ExtractedEventItem(html_item=html_item, event=event, index=index,
+                                                extraction_time=datetime.now().isoformat())
+                # 回调在提取线程中执行，Item 交给 reactor 线程处理
+                reactor.callFromThread(self._send_to_pipelines, event_item, spider)
+        
+        return on_event
+    
+    def _send_to_pipelines(self, item, spider):
+        """把 Item 送入 Item Pipeline（与爬虫产出的 Item 一样依次经过各 Pipeline，并触发 item_scraped 等信号）"""
+        scraper = self.crawler.engine.scraper
+        if hasattr(scraper, 'start_itemproc_async'):  # Scrapy >= 2.14
+            deferred_from_coro(scraper.start_itemproc_async(item, response=None))
+        elif hasattr(scraper, 'start_itemproc'):  # Scrapy 2.13
+            scraper.start_itemproc(item, response=None)
+        else:
+            scraper._process_spidermw_output(item, None, None, spider)
+    
     def _extract_links_from_events(self, events: List[Dict]) -> List[Dict]:
         """从事迹中提取人物和事件链接（适配新数据格式）"""
         links = []
@@ -1,6 +1,7 @@
 """
 递归爬取 Pipeline
 根据提取的链接自动触发新的爬取任务
+分片模式下链接写入共享爬取队列，由链接所属分片的进程爬取（全局去重）
 """
 
 import scrapy
@@ -79,31 +80,31 @@ class RecursiveCrawlPipeline:
         if not link_url or link_url == 'null':
             return
         
+        if link_type not in ('event', 'person'):
+            spider.logger.warning(f"   ⚠️  未知链接类型: {link_type}")
+            return
+        
         # 标记已爬取
         self.crawled_urls.add(link_url)
         
+        meta = {
+            f'{link_type}_name': link_name,
+            'data_source': link.get('source', 'wikipedia'),
+            'depth': depth,
+            'source_page': spider.name
+        }
+        
+        # 分片模式：写入共享队列（其他进程已发现的链接不会重复入队）
+        frontier = getattr(spider, 'frontier', None)
+        if frontier is not None:
+            if frontier.add(link_url, link_type, meta, depth):
+                spider.logger.info(f"   📥 链接入队: {link_type} - {link_name}（深度: {depth}）")
+            return
+        
         spider.logger.info(f"   📥 添加递归请求: {link_type} - {link_name}（深度: {depth}）")
         
         # 构建请求
-        if link_type == 'event':
-            callback = spider.parse_event
-            meta = {
-                'event_name': link_name,
-                'data_source': link.get('source', 'wikipedia'),
-                'depth': depth,
-                'source_page': spider.name
-            }
-        elif link_type == 'person':
-            callback = spider.parse_person
-            meta = {
-                'person_name': link_name,
-                'data_source': link.get('source', 'wikipedia'),
-                'depth': depth,
-                'source_page': spider.name
-            }
-        else:
-            spider.logger.warning(f"   ⚠️  未知链接类型: {link_type}")
-            return
+        callback = spider.parse_event if link_type == 'event' else spider.parse_person
         
         # 创建请求并提交到调度器
         request = scrapy.Request(
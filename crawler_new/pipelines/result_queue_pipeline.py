@@ -0,0 +1,121 @@
+"""
+分片爬取的结果队列 Pipeline
+多进程分片爬取时，各爬虫进程不直接写 SQLite，而是把提取结果放入进程间队列，
+由主进程中唯一的写入线程（ResultWriter）复用 SQLitePipeline 入库，避免多个进程争用数据库写锁
+"""
+
+import logging
+import queue
+import threading
+from typing import Any, Dict, Optional
+
+from scrapy.exceptions import DropItem, NotConfigured
+
+from crawler_new.models.items import ExtractedDataItem, HtmlPageItem
+from crawler_new.pipelines.sqlite_pipeline import SQLitePipeline
+
+# 不跨进程传递的字段：文档树无法序列化，HTML 原文已由 HtmlStoragePipeline 落盘，入库不需要
+LOCAL_ONLY_FIELDS = ('document', 'html_content')
+
+# 本进程的结果队列（Scrapy 会深拷贝 settings，进程间队列不能放在 settings 中，由 bind_result_queue 设置）
+_result_queue = None
+
+
+def bind_result_queue(result_queue):
+    """爬虫进程启动时绑定主进程传入的结果队列"""
+    global _result_queue
+    _result_queue = result_queue
+
+
+def item_to_record(item: ExtractedDataItem) -> Dict[str, Any]:
+    """ExtractedDataItem → 可跨进程传递的字典"""
+    record = dict(item)
+    record['html_item'] = {key: value for key, value in dict(item['html_item']).items()
+                           if key not in LOCAL_ONLY_FIELDS}
+    return record
+
+
+def record_to_item(record: Dict[str, Any]) -> ExtractedDataItem:
+    record = dict(record)
+    record['html_item'] = HtmlPageItem(**record['html_item'])
+    return ExtractedDataItem(**record)
+
+
+class ResultQueuePipeline:
+    """把提取结果放入结果队列（替代分片进程中的 SQLitePipeline）"""
+
+    def __init__(self, result_queue):
+        self.result_queue = result_queue
+        self.sent = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if _result_queue is None:
+            raise NotConfigured('结果队列未绑定（ResultQueuePipeline 只用于 run_sharded.py 启动的爬虫进程）')
+        return cls(_result_queue)
+
+    def open_spider(self, spider):
+        spider.logger.info("📤 结果队列 Pipeline 已初始化（由主进程统一写入 SQLite）")
+
+    def close_spider(self, spider):
+        # 结束标记：写入线程据此判断该进程的结果已全部送达
+        self.result_queue.put(None)
+        spider.logger.info(f"📤 已发送 {self.sent} 条提取结果到写入进程")
+
+    def process_item(self, item, spider):
+        if not isinstance(item, ExtractedDataItem):
+            return item
+        self.result_queue.put(item_to_record(item))
+        self.sent += 1
+        return item
+
+
+class ResultWriter(threading.Thread):
+    """
+    主进程中的唯一写入者：从结果队列读取各进程的提取结果，通过 SQLitePipeline 入库
+
+    收到所有进程的结束标记，或所有进程都已退出（异常退出的进程不会发送结束标记）且队列为空时结束；
+    单条结果入库失败（DropItem）时跳过，其他异常（如无法打开数据库）保存在 error 中并结束线程，由主进程中止爬取
+    """
+
+    def __init__(self, result_queue, db_path: str, workers: int):
+        super().__init__(name='result-writer', daemon=True)
+        self.result_queue = result_queue
+        self.workers = workers
+        self.processes = []
+        self.pipeline = SQLitePipeline(db_path)
+        # SQLitePipeline 只通过 spider.logger 输出日志
+        self.logger = logging.getLogger('crawler_new.result_writer')
+        self.written = 0
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        finished = 0
+        try:
+            self.pipeline.open_spider(self)
+            while finished < self.workers:
+                try:
+                    record = self.result_queue.get(timeout=1)
+                except queue.Empty:
+                    if self.processes and not any(process.is_alive() for process in self.processes):
+                        self.logger.warning("⚠️ 爬虫进程均已退出，部分进程未发送结束标记")
+                        break
+                    continue
+                if record is None:
+                    finished += 1
+                    continue
+                try:
+                    self.pipeline.process_item(record_to_item(record), self)
+                except DropItem:
+                    # SQLitePipeline 已记录错误，该页面的新鲜度记录不会被确认
+                    continue
+                self.written += 1
+        except BaseException as e:
+            self.error = e
+            self.logger.exception("❌ 结果写入线程异常退出")
+        finally:
+            self.pipeline.close_spider(self)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.pipeline.stats, written=self.written)
@@ -3,46 +3,302 @@ SQLite 存储 Pipeline
 将提取的结构化数据存入 SQLite 数据库
 """
 
-from crawler_new.models.items import ExtractedDataItem
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional, Set
+
+from scrapy import signals
+from scrapy.exceptions import DropItem
+
+from crawler_new.models.items import ExtractedDataItem, ExtractedEventItem, HtmlPageItem
+from crawler.utils.date_utils import DateParser, generate_id
+from crawler.utils.reign_eras import use_era_file
+from server.database.sqlite_manager import SQLiteManager, upsert_sql
 
 
 class SQLitePipeline:
     """SQLite存储Pipeline"""
-    
+
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.conn = None
-    
+        self.db_manager: Optional[SQLiteManager] = None
+        self.stats = {
+            'emperors': 0,
+            'events': 0,
+            'persons': 0,
+            'person_emperor': 0,
+            'errors': 0
+        }
+        # 流式提取时已随 ExtractedEventItem 入库的事迹 ID（按页面），整页 Item 到达时不再重复写入；
+        # 整页 Item 中没有的（分块提取合并去重时移除的）事迹删除，页面提取或入库失败时全部删除
+        self.streamed_event_ids: Dict[str, Set[str]] = {}
+
     @classmethod
     def from_crawler(cls, crawler):
         db_path = crawler.settings.get('SQLITE_DB_PATH', 'server/database/historygogo.db')
-        return cls(db_path)
-    
+        use_era_file(crawler.settings.get('REIGN_ERA_FILE'))
+        pipeline = cls(db_path)
+        crawler.signals.connect(pipeline.item_dropped, signal=signals.item_dropped)
+        return pipeline
+
     def open_spider(self, spider):
-        """Spider 开启时连接数据库"""
-        spider.logger.info(f"💾 SQLite Pipeline 已初始化: {self.db_path}")
-        spider.logger.info("   （数据库存储功能待实现，需复用 crawler 的 SQLite Pipeline 逻辑）")
-    
+        """Spider 开启时连接数据库（新数据库或表结构版本落后时执行初始化脚本，不改写已有数据）"""
+        self.db_manager = SQLiteManager(self.db_path)
+        self.db_manager.ensure_schema()
+        spider.logger.info(f"💾 SQLite Pipeline 已初始化: {self.db_manager.db_path}")
+
     def close_spider(self, spider):
         """Spider 关闭时断开数据库连接"""
-        if self.conn:
-            self.conn.close()
-    
+        spider.logger.info(
+            f"💾 SQLite存储统计: 皇帝={self.stats['emperors']}, 事件={self.stats['events']}, "
+            f"人物={self.stats['persons']}, 人物-皇帝关联={self.stats['person_emperor']}, 错误={self.stats['errors']}"
+        )
+        if self.db_manager:
+            # 整页 Item 未到达的页面（如提取中途停止爬虫），删除已入库的流式事迹
+            for page_id in list(self.streamed_event_ids):
+                self._discard_streamed_events(page_id, spider)
+            # 同一实体只保留最新一条变更日志，日志条数不随重复爬取增长
+            try:
+                self.db_manager.compact_change_log()
+            except Exception as e:
+                spider.logger.warning(f"⚠️ 变更日志压缩失败: {e}")
+            self.db_manager.close()
+
+    def item_dropped(self, item, response, exception, spider):
+        """页面提取失败（HtmlPageItem 被丢弃）或整页入库失败时，删除该页面已入库的流式事迹"""
+        if isinstance(item, HtmlPageItem):
+            page_id = item.get('page_id')
+        elif isinstance(item, ExtractedDataItem):
+            page_id = item['html_item'].get('page_id')
+        else:
+            return
+        if page_id in self.streamed_event_ids and self.db_manager:
+            self._discard_streamed_events(page_id, spider)
+
     def process_item(self, item, spider):
         """处理 Item"""
+        if isinstance(item, ExtractedEventItem):
+            try:
+                self._save_streamed_event(item, spider)
+            except Exception as e:
+                self.stats['errors'] += 1
+                spider.logger.error(f"❌ SQLite存储失败: {item['html_item']['page_id']} 事迹 {item['index']}, 错误: {str(e)}")
+            return item
+
         # 只处理 ExtractedDataItem
         if not isinstance(item, ExtractedDataItem):
             return item
-        
+
         try:
-            # TODO: 实现数据库存储逻辑
-            # 1. 解析 extracted_data
-            # 2. 转换为 crawler.models.entities 中的数据模型
-            # 3. 存入 SQLite 数据库
-            
-            spider.logger.info(f"💾 SQLite存储: {item['html_item']['page_id']}（待实现）")
-            
+            if item.get('data_type') == 'emperor':
+                self._save_emperor_data(item, spider)
+            else:
+                spider.logger.info(f"💾 SQLite存储: {item['html_item']['page_id']}（{item.get('data_type')} 类型暂不入库）")
+
         except Exception as e:
+            self.stats['errors'] += 1
             spider.logger.error(f"❌ SQLite存储失败: {item['html_item']['page_id']}, 错误: {str(e)}")
-        
+            # 丢弃 Item（item_dropped），页面的新鲜度记录不会被确认，下次刷新时重新提取和入库
+            raise DropItem(f"SQLite存储失败: {item['html_item']['page_id']}")
+
         return item
+
+    def _save_emperor_data(self, item: ExtractedDataItem, spider):
+        """保存皇帝、生平事迹、相关人物，以及人物-皇帝关联"""
+        html_item = item['html_item']
+        extracted = item.get('extracted_data') or {}
+        emperor_info = extracted.get('emperor_info') or {}
+        events = extracted.get('events') or []
+
+        saved = self._save_emperor(html_item, emperor_info, spider)
+        if saved is None:
+            return
+        emperor_id, name, dynasty_id = saved
+        streamed = self.streamed_event_ids.get(html_item['page_id'], set())
+        event_ids = self._save_events(events, emperor_id, name, dynasty_id, html_item.get('data_source'), spider,
+                                      skip_ids=streamed)
+        # 分块提取的各块事迹流式入库后才合并去重，被合并掉的事迹从库中删除
+        stale = streamed - set(event_ids)
+        if stale:
+            self._delete_events(stale)
+            spider.logger.info(f"💾 删除合并去重后的流式事迹 {len(stale)} 条: {name}")
+        self.streamed_event_ids.pop(html_item['page_id'], None)
+
+    def _save_streamed_event(self, item: ExtractedEventItem, spider):
+        """流式提取的单条事迹立即入库（皇帝记录不存在时先按种子数据插入基础信息，整页提取完成后再补全）"""
+        html_item = item['html_item']
+        saved = self._save_emperor(html_item, {}, spider, update=False)
+        if saved is None:
+            return
+        emperor_id, name, dynasty_id = saved
+        event_ids = self._save_events([item['event']], emperor_id, name, dynasty_id, html_item.get('data_source'), spider)
+        self.streamed_event_ids.setdefault(html_item['page_id'], set()).update(event_ids)
+
+    def _discard_streamed_events(self, page_id: str, spider):
+        """删除页面已入库的流式事迹（整页提取没有完成，不保留部分结果）"""
+        event_ids = self.streamed_event_ids.pop(page_id, set())
+        if event_ids:
+            self._delete_events(event_ids)
+            spider.logger.warning(f"⚠️ 页面未完成提取入库，删除已入库的流式事迹 {len(event_ids)} 条: {page_id}")
+
+    def _delete_events(self, event_ids: Set[str]):
+        """删除事迹及其人物关联"""
+        rows = [(event_id,) for event_id in sorted(event_ids)]
+        self.db_manager.execute_many("DELETE FROM event_person_relation WHERE event_id = ?", rows)
+        self.db_manager.execute_many("DELETE FROM events WHERE event_id = ?", rows)
+
+    def _save_emperor(self, html_item, emperor_info: Dict[str, Any], spider, update: bool = True):
+        """
+        写入皇帝记录，返回 (emperor_id, 名称, dynasty_id)；缺少在位时间时返回 None
+
+        update=False 时只在记录不存在时插入（流式事迹入库前使用，不修改已有记录）
+        """
+        metadata = html_item.get('metadata') or {}
+        dynasty_id = metadata.get('dynasty_id', 'ming')
+        name = emperor_info.get('皇帝') or html_item['page_name']
+        emperor_id = generate_id(f"{dynasty_id}_emperor", name, metadata['dynasty_order'])
+
+        reign_start, reign_end = self._parse_reign_years(metadata.get('reign_years'))
+        if reign_start is None:
+            spider.logger.warning(f"⚠️ 缺少在位时间，跳过皇帝入库: {name}")
+            return None
+
+        on_conflict = """
+            ON CONFLICT (emperor_id) DO UPDATE SET
+                name = excluded.name,
+                temple_name = COALESCE(excluded.temple_name, emperors.temple_name),
+                reign_title = COALESCE(excluded.reign_title, emperors.reign_title),
+                birth_date = COALESCE(excluded.birth_date, emperors.birth_date),
+                death_date = COALESCE(excluded.death_date, emperors.death_date),
+                biography = COALESCE(excluded.biography, emperors.biography),
+                updated_at = CURRENT_TIMESTAMP
+        """ if update else "ON CONFLICT (emperor_id) DO NOTHING"
+        self.db_manager.execute(
+            f"""
+            INSERT INTO emperors (
+                emperor_id, dynasty_id, name, temple_name, reign_title,
+                birth_date, death_date, reign_start, reign_end, reign_duration,
+                dynasty_order, biography, data_source
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            {on_conflict}
+            """,
+            (
+                emperor_id,
+                dynasty_id,
+                name,
+                emperor_info.get('庙号') or metadata.get('temple_name'),
+                emperor_info.get('年号') or metadata.get('reign_title'),
+                self._isoformat(self._parse_date(emperor_info.get('出生'))),
+                self._isoformat(self._parse_date(emperor_info.get('去世'))),
+                reign_start.isoformat(),
+                reign_end.isoformat() if reign_end else None,
+                reign_end.year - reign_start.year if reign_end else None,
+                metadata['dynasty_order'],
+                emperor_info.get('简介'),
+                html_item.get('data_source')
+            )
+        )
+        if update:
+            self.stats['emperors'] += 1
+            spider.logger.debug(f"💾 已保存皇帝: {name}")
+        return emperor_id, name, dynasty_id
+
+    def _save_events(self, events: List[Dict[str, Any]], emperor_id: str, emperor_name: str,
+                     dynasty_id: str, data_source: Optional[str], spider, skip_ids: Set[str] = frozenset()) -> List[str]:
+        """
+        保存生平事迹及其中出现的人物，返回这些事迹的 ID
+
+        skip_ids 中的事迹已入库，不再写入事迹本身，人物及关联照常写入（合并去重后人物列表可能增加）
+        """
+        event_ids = []
+        event_rows = []
+        person_rows = {}
+        event_person_rows = []
+        relations = {}
+
+        for event in events:
+            description = (event.get('事件') or '').strip()
+            start_date = self._parse_date(event.get('时间'))
+            if not description or start_date is None:
+                continue
+
+            event_id = generate_id(f"{dynasty_id}_event", f"{emperor_id}:{event.get('时间')}:{description}")
+            event_ids.append(event_id)
+            if event_id not in skip_ids:
+                event_rows.append((
+                    event_id, dynasty_id, emperor_id, description[:50], 'political',
+                    start_date.isoformat(), description, data_source
+                ))
+
+            for person in event.get('人物') or []:
+                person_name = (person.get('姓名') or '').strip()
+                if not person_name or person_name == emperor_name:
+                    continue
+                person_id = generate_id(f"{dynasty_id}_person", person_name)
+                person_rows[person_id] = (person_id, dynasty_id, person_name, 'other', data_source)
+                event_person_rows.append((f"{event_id}_{person_id}", event_id, person_id, person.get('关系')))
+                # 同一人物在多条事迹中出现时，保留第一次出现的关系
+                relations.setdefault(person_id, (person_id, emperor_id, person.get('关系')))
+
+        if event_rows:
+            # 重复提取的相同事迹不改写，不产生变更日志
+            self.db_manager.execute_many(
+                upsert_sql('events', 'event_id', [
+                    'event_id', 'dynasty_id', 'emperor_id', 'title', 'event_type',
+                    'start_date', 'description', 'data_source'
+                ]),
+                event_rows
+            )
+            self.stats['events'] += len(event_rows)
+
+        if person_rows:
+            # 人物详情由人物页面提取补全，这里只在不存在时插入基础信息
+            self.db_manager.execute_many(
+                """
+                INSERT OR IGNORE INTO persons (person_id, dynasty_id, name, person_type, data_source)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                list(person_rows.values())
+            )
+            self.stats['persons'] += len(person_rows)
+
+        if event_person_rows:
+            self.db_manager.execute_many(
+                """
+                INSERT OR IGNORE INTO event_person_relation (relation_id, event_id, person_id, role)
+                VALUES (?, ?, ?, ?)
+                """,
+                event_person_rows
+            )
+
+        if relations:
+            self.stats['person_emperor'] += self.db_manager.save_person_emperor_relations(
+                list(relations.values()), source='crawler_new'
+            )
+
+        spider.logger.info(f"💾 已保存 {emperor_name}: 事迹 {len(event_rows)} 条, 人物 {len(person_rows)} 位")
+        return event_ids
+
+    @staticmethod
+    def _parse_date(text: Optional[str]) -> Optional[date]:
+        """
+        解析大模型输出的日期
+
+        输出格式为"公历（年号纪年）"，如"1328年10月21日（元天历元年九月十八日）"，
+        因此优先解析公历部分，没有公历时再解析年号纪年
+        """
+        if not text:
+            return None
+        return DateParser.parse_gregorian_date(text) or DateParser.parse_chinese_date(text)
+
+    @staticmethod
+    def _parse_reign_years(reign_years: Optional[str]) -> tuple:
+        """解析在位年份，如"1368-1398"、"1435-1449, 1457-1464" """
+        years = [int(year) for year in re.findall(r'\d{3,4}', reign_years or '')]
+        if not years:
+            return None, None
+        return date(years[0], 1, 1), date(years[-1], 1, 1) if len(years) > 1 else None
+
+    @staticmethod
+    def _isoformat(value: Optional[date]) -> Optional[str]:
+        return value.isoformat() if value else None
@@ -15,13 +15,14 @@ from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 
 
-def run_crawler(spider_name='ming_emperor', mode='test'):
+def run_crawler(spider_name='ming_emperor', mode='test', force=False):
     """
     运行爬虫
     
     Args:
         spider_name: 爬虫名称，默认 'ming_emperor'
         mode: 爬取模式，可选 'test', 'full'
+        force: 是否重新处理未变化的页面
     """
     # 设置工作目录
     os.chdir(project_root)
@@ -41,6 +42,7 @@ def run_crawler(spider_name='ming_emperor', mode='test'):
     
     # 覆盖部分配置
     settings.set('CRAWL_MODE', mode)
+    settings.set('FRESHNESS_FORCE_REFRESH', force)
     
     # 创建爬虫进程
     process = CrawlerProcess(settings)
@@ -61,10 +63,12 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='运行 crawler_new 爬虫（只爬取 Wikipedia）')
     parser.add_argument('--spider', default='ming_emperor', help='爬虫名称')
     parser.add_argument('--mode', default='test', choices=['test', 'full'], help='爬取模式')
+    parser.add_argument('--force', action='store_true', help='重新处理内容未变化的页面（如修改了提取逻辑后）')
     
     args = parser.parse_args()
     
     run_crawler(
         spider_name=args.spider,
-        mode=args.mode
+        mode=args.mode,
+        force=args.force
     )
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""
+增量刷新调度（常驻进程）
+代替定期全量重爬：为每个已爬取的页面维护下次爬取时间（crawler_new/utils/refresh_schedule.py），
+每个调度周期取出到期页面中 陈旧度 × 热度 最高的一小批，在全局预算（每小时页面数）内重新爬取
+
+- 页面来源：起始皇帝页面 + 分片爬取队列中已完成的页面（FRONTIER_PATH）
+- 变化频率：由条件请求 / 正文哈希（crawler.utils.freshness）判断每次刷新页面是否变化，自适应调整刷新间隔
+- 页面热度：服务端 API 访问日志中各皇帝 / 事件 / 人物的访问次数（crawler_new/utils/access_log.py）
+- 每批页面写入单独的爬取队列，由新启动的爬虫进程（分片模式的 ming_emperor 爬虫）爬取；
+  未变化的页面在下载后即跳过，不调用大模型、不重复入库
+
+    python crawler_new/run_refresh.py            # 常驻运行，Ctrl-C 在当前批次结束后退出
+    python crawler_new/run_refresh.py --once     # 只执行一个调度周期（可由 cron 调用）
+    python crawler_new/run_refresh.py --dry-run  # 只显示到期页面，不爬取，不修改调度表和访问日志读取位置
+"""
+
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scrapy.settings import Settings
+from w3lib.url import safe_url_string
+
+from crawler.utils.freshness import FreshnessStore
+from crawler_new.run_sharded import emperor_seeds, load_settings, suffix_output_paths
+from crawler_new.utils.access_log import AccessLogReader, PopularityResolver
+from crawler_new.utils.frontier import DONE, CrawlFrontier
+from crawler_new.utils.refresh_schedule import CHANGED, FAILED, UNCHANGED, RateBudget, RefreshSchedule
+
+
+def run_batch_worker(batch_path: str):
+    """爬虫进程：爬取本批次队列中的页面"""
+    os.chdir(project_root)
+    from scrapy.crawler import CrawlerProcess
+
+    settings = load_settings('full')
+    # 只刷新到期页面：不递归爬取新链接，不读 HTTP 缓存；失败不在批次内重试，由调度器稍后重新安排
+    settings.set('ENABLE_RECURSIVE_CRAWL', False)
+    settings.set('HTTPCACHE_ENABLED', False)
+    settings.set('FRESHNESS_ENABLED', True)
+    settings.set('FRONTIER_MAX_ATTEMPTS', 1)
+    suffix_output_paths(settings, '_refresh')
+
+    process = CrawlerProcess(settings)
+    process.crawl('ming_emperor', frontier=batch_path)
+    process.start()
+
+
+def sync_catalog(schedule: RefreshSchedule, settings: Settings, freshness: FreshnessStore, dry_run: bool = False) -> int:
+    """把起始皇帝页面和分片爬取已完成的页面加入调度，返回新增的页面数（dry_run 时只统计，不加入）"""
+    pages = [(url, 'emperor', meta) for url, meta in emperor_seeds('full', 0)]
+    frontier_path = settings.get('FRONTIER_PATH')
+    if frontier_path and Path(frontier_path).exists():
+        frontier = CrawlFrontier(frontier_path)
+        pages += [(entry['url'], entry['page_type'], {**entry['meta'], 'depth': entry['depth']})
+                  for entry in frontier.entries(DONE)]
+        frontier.close()
+
+    if dry_run:
+        return sum(schedule.get(url) is None for url, _, _ in pages)
+    added = 0
+    for url, page_type, meta in pages:
+        # 已经爬取过的页面从上次检查时间开始计算，不必立即刷新
+        record = freshness.validators(safe_url_string(url))
+        added += schedule.add(url, page_type, meta, crawled_at=record['checked_at'] if record else None)
+    return added
+
+
+def collect_popularity(schedule: RefreshSchedule, readers: List[AccessLogReader], resolver: PopularityResolver,
+                       dry_run: bool = False) -> int:
+    """
+    读取新增的访问日志，更新页面热度，返回计入页面的访问次数
+
+    dry_run 时只统计：不保存日志读取位置、不更新热度（下次正式运行时这些访问照常计入）
+    """
+    entity_hits = None
+    for reader in readers:
+        hits = reader.read_new()
+        entity_hits = hits if entity_hits is None else entity_hits + hits
+        if not dry_run:
+            schedule.set_state(f'access_log:{reader.path}', reader.position)
+
+    page_hits = resolver.resolve(entity_hits, schedule.entries()) if entity_hits else {}
+    if not dry_run:
+        # 没有新的访问时同样调用，使已有热度按时间衰减
+        schedule.add_hits(page_hits)
+    return int(sum(page_hits.values()))
+
+
+def crawl_batch(entries: List[Dict], settings: Settings, freshness: FreshnessStore) -> Dict[str, str]:
+    """在新的爬虫进程中爬取一批页面，返回各页面的刷新结果（CHANGED / UNCHANGED / FAILED）"""
+    batch_path = settings.get('REFRESH_BATCH_FRONTIER_PATH')
+    batch = CrawlFrontier(batch_path, max_attempts=1)
+    batch.reset()
+    for entry in entries:
+        batch.add(entry['url'], entry['page_type'], entry['meta'], depth=entry['meta'].get('depth', 0))
+
+    # 新鲜度记录以下载时的 URL（百分号编码）为键
+    keys = {entry['url']: safe_url_string(entry['url']) for entry in entries}
+    before = {url: freshness.get(key) for url, key in keys.items()}
+
+    # Twisted reactor 不能重复启动，每批使用新的进程
+    process = multiprocessing.get_context('spawn').Process(target=run_batch_worker, args=(batch_path,),
+                                                           name='crawler-refresh')
+    process.start()
+    process.join()
+
+    done = {entry['url'] for entry in batch.entries(DONE)}
+    batch.close()
+
+    outcomes = {}
+    for url, key in keys.items():
+        previous, current = before[url], freshness.get(key)
+        if url not in done:
+            outcomes[url] = FAILED
+        elif current is not None and (previous is None or not previous['processed']
+                                      or current['changes'] > previous['changes']):
+            outcomes[url] = CHANGED
+        else:
+            # 条件请求返回 304 或正文哈希未变（没有新鲜度记录时同样按未变化处理，刷新间隔逐渐延长）
+            outcomes[url] = UNCHANGED
+    return outcomes
+
+
+def run_refresh(once: bool = False, dry_run: bool = False, batch_size: int = None,
+                pages_per_hour: float = None, cycle_seconds: float = None):
+    """运行刷新调度"""
+    os.chdir(project_root)
+    for dir_path in ('crawler_new/data/logs', 'crawler_new/data/html'):
+        Path(dir_path).mkdir(parents=True, exist_ok=True)
+
+    settings = load_settings('full')
+    batch_size = batch_size or settings.getint('REFRESH_BATCH_SIZE', 8)
+    pages_per_hour = pages_per_hour or settings.getfloat('REFRESH_MAX_PAGES_PER_HOUR', 30)
+    cycle_seconds = cycle_seconds or settings.getfloat('REFRESH_CYCLE_SECONDS', 300)
+
+    schedule = RefreshSchedule.from_settings(settings)
+    freshness = FreshnessStore(settings.get('FRESHNESS_DB_PATH'))
+    budget = RateBudget(pages_per_hour, burst=batch_size)
+    readers = [AccessLogReader(path, **schedule.get_state(f'access_log:{path}', {}))
+               for path in settings.getlist('REFRESH_ACCESS_LOG_PATHS')]
+    resolver = PopularityResolver(settings.get('SQLITE_DB_PATH'))
+
+    # 收到退出信号时等当前批次结束后退出（爬虫进程同样收到信号，会尽快结束）
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    print(f"🔁 增量刷新调度: 每批最多 {batch_size} 个页面, 预算 {pages_per_hour:g} 页/小时, 周期 {cycle_seconds:g} 秒")
+    print(f"   调度表: {schedule.path}")
+    print(f"{'='*80}\n")
+
+    try:
+        while not stop.is_set():
+            now = time.time()
+            added = sync_catalog(schedule, settings, freshness, dry_run)
+            hits = collect_popularity(schedule, readers, resolver, dry_run)
+            available = budget.available(now)
+            due = schedule.due(now, limit=min(batch_size, available)) if available else []
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] 页面: {schedule.stats(now)}, 新增 {added}, "
+                  f"新访问 {hits}, 可用预算 {available}, 本批 {len(due)}")
+
+            if due and not dry_run:
+                budget.spend(len(due))
+                outcomes = crawl_batch(due, settings, freshness)
+                for url, outcome in outcomes.items():
+                    schedule.record(url, outcome)
+                summary = {key: list(outcomes.values()).count(key) for key in (CHANGED, UNCHANGED, FAILED)}
+                print(f"   刷新结果: {summary}")
+            elif due:
+                for entry in due:
+                    print(f"   - {entry['page_type']}: {entry['url']}")
+
+            if once or dry_run:
+                break
+            stop.wait(cycle_seconds)
+    finally:
+        schedule.close()
+        freshness.close()
+    print("\n✅ 增量刷新调度已退出")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='增量刷新调度：按陈旧度和访问热度持续刷新已爬取的页面')
+    parser.add_argument('--once', action='store_true', help='只执行一个调度周期')
+    parser.add_argument('--dry-run', action='store_true', help='只显示到期页面，不爬取，不修改调度状态')
+    parser.add_argument('--batch-size', type=int, help='每批最多刷新的页面数（默认 REFRESH_BATCH_SIZE）')
+    parser.add_argument('--pages-per-hour', type=float, help='每小时最多刷新的页面数（默认 REFRESH_MAX_PAGES_PER_HOUR）')
+    parser.add_argument('--cycle', type=float, help='调度周期秒数（默认 REFRESH_CYCLE_SECONDS）')
+
+    args = parser.parse_args()
+
+    run_refresh(args.once, args.dry_run, args.batch_size, args.pages_per_hour, args.cycle)
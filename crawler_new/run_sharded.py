@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+多进程分片爬取
+单个 CrawlerProcess 的页面解析都在一个 CPU 核上执行；这里启动 N 个爬虫进程（各自一个 Scrapy reactor），
+按 URL 哈希划分共享爬取队列（crawler_new/utils/frontier.py），发现的事件 / 人物链接写回队列后由所属分片爬取，
+各进程的提取结果经进程间队列汇总到主进程，由唯一的写入线程存入 SQLite
+
+中断后再次运行会从队列中断处继续（--reset 重新开始）；
+运行中某个进程异常退出时，主进程放回它领取的 URL 并重启该分片（最多 FRONTIER_WORKER_RESTARTS 次）
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+# 将项目根目录添加到 Python 路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from scrapy.settings import Settings
+
+from crawler_new.config.ming_data import MING_EMPERORS
+from crawler_new.pipelines.result_queue_pipeline import ResultWriter, bind_result_queue
+from crawler_new.utils.frontier import CrawlFrontier
+
+SETTINGS_MODULE = 'crawler_new.config.settings'
+SQLITE_PIPELINE = 'crawler_new.pipelines.sqlite_pipeline.SQLitePipeline'
+RESULT_QUEUE_PIPELINE = 'crawler_new.pipelines.result_queue_pipeline.ResultQueuePipeline'
+
+
+def load_settings(mode: str) -> Settings:
+    settings = Settings()
+    settings.setmodule(SETTINGS_MODULE, priority='project')
+    settings.set('CRAWL_MODE', mode)
+    return settings
+
+
+def emperor_seeds(mode: str, test_emperor_count: int):
+    """起始皇帝页面 [(URL, meta)]"""
+    emperors = MING_EMPERORS[:test_emperor_count] if mode == 'test' else MING_EMPERORS
+    return [(emperor_info['wikipedia_url'], {
+        'emperor_info': emperor_info,
+        'data_source': 'wikipedia',
+        'page_type': 'emperor',
+    }) for emperor_info in emperors]
+
+
+def seed_frontier(frontier: CrawlFrontier, mode: str, test_emperor_count: int) -> int:
+    """把起始皇帝页面放入队列（已入队的保持原状态）"""
+    return sum(frontier.add(url, 'emperor', meta) for url, meta in emperor_seeds(mode, test_emperor_count))
+
+
+def suffix_output_paths(settings: Settings, suffix: str):
+    """日志和报告文件名加上后缀，多个爬虫进程分别写入，避免互相覆盖"""
+    for name in ('LOG_FILE', 'PIPELINE_METRICS_REPORT_PATH', 'STRUCTURED_LOG_FILE'):
+        path = settings.get(name)
+        if path:
+            root, ext = os.path.splitext(path)
+            settings.set(name, f'{root}{suffix}{ext}')
+
+
+def run_worker(shard: int, shards: int, mode: str, frontier_path: str, result_queue):
+    """爬虫进程：只爬取本分片的 URL，提取结果放入结果队列"""
+    os.chdir(project_root)
+    from scrapy.crawler import CrawlerProcess
+
+    settings = load_settings(mode)
+    # SQLite 由主进程统一写入
+    pipelines = dict(settings.getdict('ITEM_PIPELINES'))
+    pipelines[RESULT_QUEUE_PIPELINE] = pipelines.pop(SQLITE_PIPELINE, 400)
+    settings.set('ITEM_PIPELINES', pipelines)
+    bind_result_queue(result_queue)
+
+    suffix_output_paths(settings, f'_shard{shard}')
+
+    process = CrawlerProcess(settings)
+    process.crawl('ming_emperor', frontier=frontier_path, shard=shard, shards=shards)
+    process.start()
+
+
+def supervise(processes: List, frontier: CrawlFrontier, max_restarts: int, make_process: Callable[[int], Any],
+              abort: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    等待所有爬虫进程结束，返回是否全部正常结束（因 abort 中止时返回 False）
+
+    进程异常退出（退出码非 0）时它领取的 URL 不会再被标记完成，其他进程会一直等待：
+    放回这些 URL 并重启该分片；重启次数用完后把该分片未完成的 URL 标记为失败（之后其他进程发现的该分片链接同样标记为失败），
+    其他进程即可正常结束。processes 原地替换为重启后的进程（写入线程据此判断进程是否都已退出）
+
+    abort() 返回 True 时（如结果写入线程已退出，爬虫进程会一直阻塞在有界结果队列的 put 上）终止所有进程，
+    放回它们领取的 URL
+    """
+    restarts = [0] * len(processes)
+    abandoned = set()
+    while True:
+        if abort is not None and abort():
+            for shard, process in enumerate(processes):
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+                frontier.release_worker(shard)
+            print("❌ 爬取中止，已终止所有爬虫进程")
+            return False
+
+        # 先取存活进程的快照：检查之后才退出的进程留到下一轮处理，不会在返回前被漏掉
+        alive = {shard for shard, process in enumerate(processes) if process.is_alive()}
+        for shard, process in enumerate(processes):
+            if shard in alive or process.exitcode == 0 or shard in abandoned:
+                continue
+            released = frontier.release_worker(shard)
+            if restarts[shard] < max_restarts:
+                restarts[shard] += 1
+                print(f"⚠️ 分片 {shard} 的进程异常退出（退出码 {process.exitcode}），放回 {released} 个 URL，"
+                      f"第 {restarts[shard]} 次重启")
+                replacement = make_process(shard)
+                replacement.start()
+                processes[shard] = replacement
+                alive.add(shard)
+            else:
+                abandoned.add(shard)
+                print(f"❌ 分片 {shard} 的进程异常退出（退出码 {process.exitcode}），重启次数已用完，"
+                      f"该分片未完成的 URL 标记为失败")
+        for shard in abandoned:
+            frontier.abandon_shard(shard, len(processes))
+
+        if not alive:
+            return True
+        multiprocessing.connection.wait([processes[shard].sentinel for shard in alive], timeout=5)
+
+
+def run_sharded(workers: int, mode: str = 'test', frontier_path: str = None, reset: bool = False) -> int:
+    """启动分片爬取，返回失败的 URL 数"""
+    os.chdir(project_root)
+    for dir_path in ('crawler_new/data/logs', 'crawler_new/data/html', 'crawler_new/data/httpcache'):
+        Path(dir_path).mkdir(parents=True, exist_ok=True)
+
+    settings = load_settings(mode)
+    frontier_path = frontier_path or settings.get('FRONTIER_PATH')
+    frontier = CrawlFrontier(frontier_path, max_attempts=settings.getint('FRONTIER_MAX_ATTEMPTS', 3))
+    if reset:
+        frontier.reset()
+    released = frontier.release_claimed()
+    seeded = seed_frontier(frontier, mode, settings.getint('TEST_EMPEROR_COUNT', 3))
+
+    print(f"🚀 分片爬取: {workers} 个进程, 模式: {mode}")
+    print(f"   爬取队列: {frontier_path}（新增 {seeded} 个起始页面，恢复 {released} 个中断的 URL）")
+    print(f"   队列状态: {frontier.counts()}")
+    print(f"{'='*80}\n")
+
+    # Twisted reactor 不能在 fork 出的子进程中复用，使用 spawn 启动全新的解释器
+    context = multiprocessing.get_context('spawn')
+    # 有界队列：写入跟不上时爬虫进程在 put 处等待，而不是无限占用内存
+    result_queue = context.Queue(maxsize=1000)
+    writer = ResultWriter(result_queue, settings.get('SQLITE_DB_PATH'), workers)
+
+    processes = [
+        context.Process(target=run_worker, args=(shard, workers, mode, frontier_path, result_queue),
+                        name=f'crawler-shard{shard}')
+        for shard in range(workers)
+    ]
+    writer.processes = processes
+    started = time.time()
+    for process in processes:
+        process.start()
+    writer.start()
+
+    # 写入线程异常退出后不再有人读取结果队列，中止爬取（否则爬虫进程阻塞在 put 上，或写入的结果丢失）
+    supervise(processes, frontier, settings.getint('FRONTIER_WORKER_RESTARTS', 2),
+              lambda shard: context.Process(target=run_worker, args=(shard, workers, mode, frontier_path, result_queue),
+                                            name=f'crawler-shard{shard}'),
+              abort=lambda: writer.error is not None)
+    writer.join()
+
+    counts = frontier.counts()
+    frontier.close()
+    print(f"\n{'='*80}")
+    print(f"✅ 分片爬取完成，耗时 {time.time() - started:.1f} 秒")
+    print(f"   进程退出码: {[process.exitcode for process in processes]}")
+    print(f"   队列状态: {counts}")
+    print(f"   SQLite 写入: {writer.stats}")
+    print(f"{'='*80}")
+    if writer.error is not None:
+        raise RuntimeError(f"结果写入线程异常退出，部分提取结果未入库: {writer.error}") from writer.error
+    return counts.get('failed', 0)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='多进程分片运行 crawler_new 爬虫')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='爬虫进程数（默认 CPU 核数）')
+    parser.add_argument('--mode', default='test', choices=['test', 'full'], help='爬取模式')
+    parser.add_argument('--frontier', help='共享爬取队列路径（默认 FRONTIER_PATH）')
+    parser.add_argument('--reset', action='store_true', help='清空爬取队列，重新开始')
+
+    args = parser.parse_args()
+
+    failed = run_sharded(args.workers, args.mode, args.frontier, args.reset)
+    sys.exit(1 if failed else 0)
@@ -4,12 +4,17 @@
 """
 
 import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
 from datetime import datetime
 from typing import Optional
 from urllib.parse import urljoin
 
 from crawler_new.models.items import HtmlPageItem, LinkItem
+from crawler_new.utils.html_document import ParsedDocument
 from crawler_new.config.ming_data import MING_EMPERORS, MING_DYNASTY
+from crawler_new.utils.frontier import CrawlFrontier
+from crawler.middlewares import PageUnchanged
 
 
 class MingEmperorSpider(scrapy.Spider):
@@ -26,19 +31,47 @@ class MingEmperorSpider(scrapy.Spider):
         'CONCURRENT_REQUESTS': 4,
     }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, frontier: Optional[str] = None, shard: int = 0, shards: int = 1, *args, **kwargs):
         """
         初始化爬虫
         
         Args:
-            无需参数，固定爬取 Wikipedia
+            frontier: 分片模式下共享爬取队列的路径（由 run_sharded.py 传入），为空时按单进程方式爬取
+            shard: 本进程的分片编号
+            shards: 分片总数
         """
         super().__init__(*args, **kwargs)
         self.data_source = 'wikipedia'  # 固定为 Wikipedia
         self.crawled_urls = set()  # 防止重复爬取
+        self.frontier_path = frontier
+        self.shard = int(shard)
+        self.shards = int(shards)
+        self.frontier: Optional[CrawlFrontier] = None
+    
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        if spider.frontier_path:
+            spider.frontier = CrawlFrontier(
+                spider.frontier_path, max_attempts=crawler.settings.getint('FRONTIER_MAX_ATTEMPTS', 3)
+            )
+            crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+            crawler.signals.connect(spider.close_frontier, signal=signals.spider_closed)
+        return spider
         
+    async def start(self):
+        """起始请求（Scrapy >= 2.13 只调用 start()，不再回退到 start_requests()）"""
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
         """生成起始请求"""
+        if self.frontier is not None:
+            # 分片模式：请求全部来自共享队列（起始皇帝由 run_sharded.py 播种）
+            self.logger.info(f"🧩 [分片模式] 分片 {self.shard + 1}/{self.shards}，队列: {self.frontier_path}")
+            yield from self._claim_requests()
+            return
+        
         # 从 settings 中获取爬取模式配置
         crawl_mode = self.settings.get('CRAWL_MODE', 'test')
         test_emperor_count = self.settings.get('TEST_EMPEROR_COUNT', 3)
@@ -96,6 +129,45 @@ class MingEmperorSpider(scrapy.Spider):
             dont_filter=True
         )
     
+    def spider_idle(self, spider):
+        """分片模式：当前批次处理完后标记完成并领取下一批；其他分片仍有任务时保持运行（它们可能发现本分片的链接）"""
+        if spider is not self:
+            return
+        self.frontier.finish_claimed(self.shard)
+        claimed = 0
+        for request in self._claim_requests():
+            self.crawler.engine.crawl(request)
+            claimed += 1
+        if claimed or self.frontier.remaining() > 0:
+            raise DontCloseSpider
+    
+    def close_frontier(self, spider, reason):
+        if spider is self:
+            self.logger.info(f"🧩 [分片模式] 分片 {self.shard + 1}/{self.shards} 结束，队列状态: {self.frontier.counts()}")
+            self.frontier.close()
+    
+    def _claim_requests(self):
+        """从共享队列领取本分片的一批 URL 并生成请求"""
+        batch_size = self.settings.getint('FRONTIER_BATCH_SIZE', 16)
+        for entry in self.frontier.claim(self.shard, self.shards, self.shard, batch_size):
+            yield scrapy.Request(
+                url=entry['url'],
+                callback=getattr(self, f"parse_{entry['page_type']}"),
+                errback=self._frontier_failed,
+                meta={**entry['meta'], 'depth': entry['depth'], 'frontier_url': entry['url']},
+                dont_filter=True  # 去重由共享队列负责
+            )
+    
+    def _frontier_failed(self, failure):
+        """请求失败：放回队列重试（超过 FRONTIER_MAX_ATTEMPTS 次后标记为失败）"""
+        url = failure.request.meta.get('frontier_url', failure.request.url)
+        if failure.check(PageUnchanged):
+            # 页面未变化：不是失败，空闲时随批次标记为完成
+            self.logger.info(f"⏭️  [分片模式] 页面未变化，跳过: {url}")
+            return
+        self.logger.warning(f"⚠️  [分片模式] 请求失败，放回队列: {url}（{failure.getErrorMessage()}）")
+        self.frontier.fail(url)
+    
     def parse_emperor(self, response):
         """解析皇帝页面 - 只保存 HTML，不做解析"""
         emperor_info = response.meta['emperor_info']
@@ -129,6 +201,8 @@ class MingEmperorSpider(scrapy.Spider):
             data_source=data_source,
             source_url=response.url,
             html_content=response.text,
+            # 复用 Scrapy 已构建的文档树，后续清理与提取不再重复解析
+            document=ParsedDocument.from_response(response),
             metadata={
                 'temple_name': emperor_info.get('temple_name'),
                 'reign_title': emperor_info.get('reign_title'),
@@ -0,0 +1,79 @@
+"""
+测试长页面分块与事迹合并功能
+"""
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler_new.local_llm.html_cleaner import CleanedContent
+from crawler_new.local_llm.chunking import build_chunks, estimate_tokens, merge_events, split_by_toc
+
+
+def _sample_content():
+    text = (
+        '明太祖朱元璋，明朝开国皇帝。 '
+        '早年 朱元璋生于濠州钟离。幼时家贫，曾为地主放牛。 '
+        '起兵 至正十二年投奔郭子兴。' + '屡立战功。' * 200 + ' '
+        '建立明朝 洪武元年于应天府称帝，国号大明。'
+    )
+    toc = [
+        {'level': 2, 'id': '早年', 'title': '早年'},
+        {'level': 2, 'id': '起兵', 'title': '起兵'},
+        {'level': 2, 'id': '建立明朝', 'title': '建立明朝'},
+        {'level': 2, 'id': '评价', 'title': '评价'},  # 已被截断，不在正文中
+    ]
+    return CleanedContent(text=text, toc=toc, links=[])
+
+
+def test_split_by_toc():
+    """测试按目录切分章节"""
+    content = _sample_content()
+    sections = split_by_toc(content.text, content.toc)
+
+    titles = [section.title for section in sections]
+    print(f"📑 章节: {titles}")
+    assert titles == ['', '早年', '起兵', '建立明朝']
+    assert sections[0].text.startswith('明太祖朱元璋')
+    assert sections[2].text.startswith('起兵')
+
+
+def test_build_chunks():
+    """测试分块预算：导言单独成块，短章节合并，超长章节切分"""
+    chunks = build_chunks(_sample_content(), max_tokens=300)
+
+    for chunk in chunks:
+        print(f"📦 [{chunk.index}] {chunk.title}: {chunk.estimated_tokens} tokens")
+        assert chunk.estimated_tokens <= 300
+
+    assert chunks[0].title == '导言'
+    assert len(chunks) > 3
+    assert estimate_tokens('朱元璋 abcd') == 5
+
+
+def test_merge_events():
+    """测试事迹合并去重"""
+    group_a = [
+        {'时间': '1368年1月23日（洪武元年正月初四）', '事件': '在应天府称帝，建立明朝', '人物': [{'姓名': '朱元璋', '链接': None}]},
+        {'时间': '1352年（至正十二年）', '事件': '投奔郭子兴起义军', '人物': []},
+    ]
+    group_b = [
+        {'时间': '1368年（洪武元年）', '事件': '在应天府称帝，建立明朝，定都应天，年号洪武', '人物': [{'姓名': '朱元璋', '链接': 'https://zh.wikipedia.org/wiki/朱元璋'}]},
+        {'时间': '不详', '事件': '确立里甲制度', '人物': []},
+    ]
+
+    events = merge_events([group_a, group_b])
+
+    print(f"📜 合并后事迹: {[e['事件'] for e in events]}")
+    assert len(events) == 3
+    assert events[0]['事件'] == '投奔郭子兴起义军'
+    assert events[1]['事件'].endswith('年号洪武')
+    assert events[1]['人物'][0]['链接'] is not None
+    assert events[2]['事件'] == '确立里甲制度'
+
+
+if __name__ == '__main__':
+    test_split_by_toc()
+    test_build_chunks()
+    test_merge_events()
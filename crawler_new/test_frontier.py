@@ -0,0 +1,145 @@
+"""
+测试分片爬取的共享爬取队列
+"""
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler_new.run_sharded import supervise
+from crawler_new.utils.frontier import CrawlFrontier, shard_key
+
+
+def test_dedup_and_sharding():
+    """测试多个进程（各自的连接）共享队列：全局去重，按分片领取互不重叠"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'frontier.db')
+        worker_a, worker_b = CrawlFrontier(path), CrawlFrontier(path)
+
+        urls = [f'https://zh.wikipedia.org/wiki/事件{i}' for i in range(20)]
+        assert all(worker_a.add(url, 'event', {'event_name': url[-3:]}, depth=1) for url in urls)
+        # 另一个进程发现同样的链接不会重复入队
+        assert not any(worker_b.add(url, 'event', {}, depth=1) for url in urls)
+        assert worker_b.add('https://zh.wikipedia.org/wiki/朱元璋', 'emperor', {'page_type': 'emperor'})
+
+        claimed_a = worker_a.claim(0, 2, 0, limit=100)
+        claimed_b = worker_b.claim(1, 2, 1, limit=100)
+        urls_a = {entry['url'] for entry in claimed_a}
+        urls_b = {entry['url'] for entry in claimed_b}
+        print(f"🧩 分片 0: {len(urls_a)} 个, 分片 1: {len(urls_b)} 个")
+        assert not urls_a & urls_b and len(urls_a | urls_b) == 21
+        assert all(shard_key(url) % 2 == 0 for url in urls_a)
+        # 浅层优先：皇帝页面（深度 0）排在所属分片的最前面
+        first = (claimed_a if shard_key('https://zh.wikipedia.org/wiki/朱元璋') % 2 == 0 else claimed_b)[0]
+        assert first['page_type'] == 'emperor' and first['meta'] == {'page_type': 'emperor'}
+
+        # 已领取的不会被再次领取
+        assert worker_a.claim(0, 2, 0, limit=100) == []
+        assert worker_a.remaining() == 21
+
+        worker_a.finish_claimed(0)
+        assert worker_b.remaining() == len(urls_b)
+        worker_b.finish_claimed(1)
+        assert worker_a.remaining() == 0 and worker_a.counts() == {'done': 21}
+        worker_a.close()
+        worker_b.close()
+
+
+def test_retry_and_resume():
+    """测试失败重试和中断恢复"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frontier = CrawlFrontier(os.path.join(tmp_dir, 'frontier.db'), max_attempts=2)
+        url = 'https://zh.wikipedia.org/wiki/土木之变'
+        frontier.add(url, 'event', {}, depth=1)
+
+        # 第一次失败放回队列，第二次失败后标记为 failed
+        assert frontier.claim(0, 1, 0, limit=10)[0]['url'] == url
+        frontier.fail(url)
+        assert frontier.counts() == {'pending': 1}
+        frontier.claim(0, 1, 0, limit=10)
+        frontier.fail(url)
+        assert frontier.counts() == {'failed': 1} and frontier.remaining() == 0
+
+        # 进程中断时遗留的 claimed 在下次运行时回到 pending
+        other = 'https://zh.wikipedia.org/wiki/于谦'
+        frontier.add(other, 'person', {}, depth=1)
+        frontier.claim(0, 1, 0, limit=10)
+        assert frontier.release_claimed() == 1
+        assert frontier.claim(0, 1, 3, limit=10)[0]['url'] == other
+        frontier.close()
+
+
+def test_crashed_worker():
+    """测试进程异常退出：放回它领取的 URL 并重启；重启次数用完后该分片未完成的 URL 标记为失败，不再阻塞其他进程"""
+    import multiprocessing
+    context = multiprocessing.get_context('fork')
+
+    def crash():
+        os._exit(3)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frontier = CrawlFrontier(os.path.join(tmp_dir, 'frontier.db'))
+        urls = [f'https://zh.wikipedia.org/wiki/事件{i}' for i in range(4)]
+        for url in urls:
+            frontier.add(url, 'event', {}, depth=1)
+        assert len(frontier.claim(0, 1, 0, limit=2)) == 2
+
+        # 崩溃后放回领取的 URL，重启的进程正常结束
+        started = []
+
+        def restart(shard):
+            started.append(shard)
+            return context.Process(target=lambda: None)
+
+        processes = [context.Process(target=crash)]
+        processes[0].start()
+        supervise(processes, frontier, max_restarts=1, make_process=restart)
+        assert started == [0] and processes[0].exitcode == 0
+        assert frontier.counts() == {'pending': 4} and frontier.remaining() == 4
+
+        # 重启次数用完：该分片未完成的 URL 标记为失败
+        frontier.claim(0, 1, 0, limit=2)
+        processes = [context.Process(target=crash)]
+        processes[0].start()
+        supervise(processes, frontier, max_restarts=0, make_process=restart)
+        assert started == [0]
+        assert frontier.counts() == {'failed': 4} and frontier.remaining() == 0
+        frontier.close()
+
+
+def test_writer_failure_aborts():
+    """测试结果写入线程异常退出：终止阻塞的爬虫进程并放回它们领取的 URL，不会一直等待"""
+    import multiprocessing
+    import queue
+    import time
+    from crawler_new.pipelines.result_queue_pipeline import ResultWriter
+    context = multiprocessing.get_context('fork')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        frontier = CrawlFrontier(os.path.join(tmp_dir, 'frontier.db'))
+        frontier.add('https://zh.wikipedia.org/wiki/事件0', 'event', {}, depth=1)
+        assert len(frontier.claim(0, 1, 0, limit=1)) == 1
+
+        # 数据库路径是目录，无法打开
+        writer = ResultWriter(queue.Queue(), tmp_dir, 1)
+        processes = [context.Process(target=time.sleep, args=(600,))]
+        writer.processes = processes
+        processes[0].start()
+        writer.start()
+        writer.join()
+        assert writer.error is not None
+
+        assert supervise(processes, frontier, max_restarts=0, make_process=None,
+                         abort=lambda: writer.error is not None) is False
+        assert not processes[0].is_alive()
+        assert frontier.counts() == {'pending': 1}
+        frontier.close()
+
+
+if __name__ == '__main__':
+    test_dedup_and_sharding()
+    test_retry_and_resume()
+    test_crashed_worker()
+    test_writer_failure_aborts()
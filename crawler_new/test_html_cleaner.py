@@ -4,10 +4,10 @@
 import os
 import sys
 
-# 添加路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'local_llm'))
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from html_cleaner import HTMLCleanerFactory
+from crawler_new.local_llm.html_cleaner import HTMLCleanerFactory
 
 
 def test_html_cleaner():
@@ -0,0 +1,82 @@
+"""
+测试大模型流式输出的增量 JSON 解析
+"""
+import json
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler_new.utils.json_stream import IncrementalJSONArrayParser, StreamingJSONError, iter_array_items
+
+
+def _split(text, size=3):
+    """模拟 token 流：按固定长度切分文本"""
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def test_parse_events_in_object():
+    """测试解析 {"emperor_info": ..., "events": [...]} 中的事迹数组"""
+    data = {
+        'emperor_info': {'皇帝': '朱元璋', '年号': ['洪武', {'备注': '}]'}]},
+        'events': [
+            {'时间': '1328年', '事件': '出生 "重八" [ {', '人物': [{'姓名': '朱五四'}]},
+            {'时间': '1344年', '事件': '入皇觉寺为僧', '人物': []},
+        ]
+    }
+    text = '```json\n' + json.dumps(data, ensure_ascii=False) + '\n```'
+
+    parser = IncrementalJSONArrayParser(array_key='events')
+    events = []
+    for piece in _split(text):
+        events.extend(parser.feed(piece))
+
+    print(f"📜 解析出事迹: {events}")
+    assert events == data['events']
+    assert parser.finished
+    parser.close()
+
+
+def test_parse_top_level_array():
+    """测试解析顶层数组，元素完成即返回"""
+    parser = IncrementalJSONArrayParser(array_key=None)
+    assert parser.feed('[{"时间": "1368年"}, {"时间"') == [{'时间': '1368年'}]
+    assert parser.feed(': "1398年"}]') == [{'时间': '1398年'}]
+
+
+def test_abort_on_malformed_output():
+    """测试输出不合法时中止并关闭上游流"""
+    closed = []
+
+    def token_stream():
+        try:
+            yield from _split('[{"时间": "1368年"}, {"时间": "1398年",}, {"时间": "1399年"}]')
+        finally:
+            closed.append(True)
+
+    parser = IncrementalJSONArrayParser(array_key=None)
+    received = []
+    try:
+        for event in iter_array_items(token_stream(), parser):
+            received.append(event)
+        raise AssertionError('应当抛出 StreamingJSONError')
+    except StreamingJSONError as e:
+        print(f"❌ 中止: {e}")
+
+    assert received == [{'时间': '1368年'}]
+    assert closed == [True]
+
+    # 开头不是 JSON 的输出也应尽早中止
+    try:
+        IncrementalJSONArrayParser(max_preamble=20).feed('抱歉，我无法完成这个任务。' * 5)
+        raise AssertionError('应当抛出 StreamingJSONError')
+    except StreamingJSONError:
+        pass
+
+
+if __name__ == '__main__':
+    test_parse_events_in_object()
+    test_parse_top_level_array()
+    test_abort_on_malformed_output()
@@ -0,0 +1,161 @@
+"""
+测试增量刷新调度：自适应刷新间隔、按陈旧度和热度排序、爬取预算、访问日志热度统计
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler_new.utils.access_log import AccessLogReader, PopularityResolver, parse_entity
+from crawler_new.utils.refresh_schedule import CHANGED, FAILED, UNCHANGED, RateBudget, RefreshSchedule
+
+HOUR = 3600
+DAY = 86400
+
+
+def test_adaptive_interval_and_priority():
+    """测试刷新间隔随变化情况调整，到期页面按陈旧度 × 热度排序"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        schedule = RefreshSchedule(os.path.join(tmp_dir, 'schedule.db'), min_interval=6 * HOUR,
+                                   default_interval=4 * DAY, max_interval=30 * DAY, retry_delay=HOUR)
+        now = 1_000_000_000.0
+        volatile, stable, fresh = ('https://zh.wikipedia.org/wiki/朱元璋', 'https://zh.wikipedia.org/wiki/朱棣',
+                                   'https://zh.wikipedia.org/wiki/朱瞻基')
+        assert schedule.add(volatile, 'emperor', {'emperor_info': {'dynasty_order': 1}}, crawled_at=now - 10 * DAY, now=now)
+        assert schedule.add(stable, 'emperor', {'emperor_info': {'dynasty_order': 3}}, crawled_at=now - 10 * DAY, now=now)
+        assert not schedule.add(stable, 'emperor', {}, now=now)
+        # 从未爬取的页面立即到期且最优先
+        schedule.add(fresh, 'emperor', {}, now=now)
+        assert [entry['url'] for entry in schedule.due(now, limit=10)][0] == fresh
+
+        # 有变化的页面间隔缩短，无变化的延长
+        schedule.record(volatile, CHANGED, now=now)
+        schedule.record(stable, UNCHANGED, now=now)
+        assert schedule.get(volatile)['interval'] == 2 * DAY
+        assert schedule.get(stable)['interval'] == 6 * DAY
+        assert schedule.get(volatile)['next_crawl_at'] == now + 2 * DAY
+        for _ in range(10):
+            schedule.record(volatile, CHANGED, now=now)
+            schedule.record(stable, UNCHANGED, now=now)
+        assert schedule.get(volatile)['interval'] == 6 * HOUR
+        assert schedule.get(stable)['interval'] == 30 * DAY
+
+        # 失败不改变间隔，按重试间隔重新安排
+        schedule.record(fresh, FAILED, now=now)
+        assert schedule.get(fresh)['next_crawl_at'] == now + HOUR and schedule.get(fresh)['failures'] == 1
+
+        # 热度缩短实际刷新间隔
+        schedule.record(stable, UNCHANGED, now=now)
+        schedule.add_hits({stable: 1000}, now=now)
+        boost = schedule.get(stable)['boost']
+        print(f"🔥 热度系数: {boost:.2f}")
+        assert boost > 7 and schedule.get(stable)['next_crawl_at'] == now + 30 * DAY / boost
+
+        # 陈旧度相同时热门页面优先，从未爬取成功的页面仍最优先
+        person, popular_person = 'https://zh.wikipedia.org/wiki/于谦', 'https://zh.wikipedia.org/wiki/王守仁'
+        schedule.add(person, 'person', {}, crawled_at=now - 10 * DAY, now=now)
+        schedule.add(popular_person, 'person', {}, crawled_at=now - 10 * DAY, now=now)
+        schedule.add_hits({popular_person: 10}, now=now)
+        later = now + HOUR
+        assert [entry['url'] for entry in schedule.due(later, limit=3)] == [fresh, popular_person, person]
+        assert schedule.stats(later) == {'pages': 5, 'due': 3, 'never_crawled': 1}
+
+        # 热度按半衰期衰减
+        schedule.add_hits({}, now=now + schedule.popularity_half_life)
+        assert abs(schedule.get(stable)['popularity'] - 500) < 1e-6
+        schedule.close()
+
+
+def test_rate_budget():
+    """测试令牌桶预算"""
+    budget = RateBudget(pages_per_hour=6, burst=4, now=0)
+    assert budget.available(0) == 4
+    budget.spend(4)
+    assert budget.available(0) == 0 and budget.wait_time(1) == 600
+    assert budget.available(1200) == 2
+    # 累积不超过 burst
+    assert budget.available(100 * HOUR) == 4
+
+
+def test_access_log_popularity():
+    """测试访问日志增量读取和实体访问次数换算为页面访问次数"""
+    assert parse_entity('127.0.0.1:5000 - "GET /api/v1/emperors/ming_emperor_001 HTTP/1.1" 200') == \
+        ('emperor', 'ming_emperor_001')
+    assert parse_entity('1.2.3.4 - - [10/Oct/2026:13:55:36 +0800] "GET /api/v1/persons/p%20001?fields=name HTTP/1.1" '
+                        '200 512 "-" "HistoryGogo"') == ('person', 'p 001')
+    assert parse_entity('127.0.0.1:5000 - "GET /api/v1/emperors/?page=2 HTTP/1.1" 200') is None
+    assert parse_entity('127.0.0.1:5000 - "GET /api/v1/events/missing HTTP/1.1" 404') is None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_path = os.path.join(tmp_dir, 'access.log')
+        with open(log_path, 'w', encoding='utf-8') as f:
+            f.write('127.0.0.1:1 - "GET /api/v1/emperors/e1 HTTP/1.1" 200\n' * 3)
+            f.write('127.0.0.1:1 - "GET /api/v1/events/ev1 HTTP/1.1" 200\n')
+            f.write('127.0.0.1:1 - "GET /api/v1/persons/p1 HTTP/1.1" 200')  # 未写完的行
+        reader = AccessLogReader(log_path)
+        hits = reader.read_new()
+        assert hits == {('emperor', 'e1'): 3, ('event', 'ev1'): 1}
+
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write('\n')
+        # 从记录的位置继续读取
+        reader = AccessLogReader(log_path, **reader.position)
+        assert reader.read_new() == {('person', 'p1'): 1}
+        assert reader.read_new() == {}
+
+        db_path = os.path.join(tmp_dir, 'history.db')
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE emperors (emperor_id TEXT PRIMARY KEY, name TEXT, dynasty_id TEXT, dynasty_order INTEGER);
+            CREATE TABLE events (event_id TEXT PRIMARY KEY, emperor_id TEXT, title TEXT);
+            CREATE TABLE persons (person_id TEXT PRIMARY KEY, name TEXT);
+            CREATE TABLE person_emperor (person_id TEXT, emperor_id TEXT);
+            INSERT INTO emperors VALUES ('e1', '朱元璋', 'ming', 1), ('e3', '朱棣', 'ming', 3), ('q1', '努尔哈赤', 'qing', 1);
+            INSERT INTO events VALUES ('ev1', 'e3', '靖难之役'), ('ev2', 'q1', '萨尔浒之战');
+            INSERT INTO persons VALUES ('p1', '于谦');
+            INSERT INTO person_emperor VALUES ('p1', 'e1'), ('p1', 'e3');
+        """)
+        conn.commit()
+        conn.close()
+
+        catalog = [
+            {'url': 'wiki/朱元璋', 'page_type': 'emperor', 'meta': {'emperor_info': {'dynasty_order': 1}}},
+            {'url': 'wiki/朱棣', 'page_type': 'emperor', 'meta': {'emperor_info': {'dynasty_order': 3}}},
+            {'url': 'wiki/于谦', 'page_type': 'person', 'meta': {'person_name': '于谦'}},
+        ]
+        # 其他朝代的第 1 位皇帝及其事件不计入明朝第 1 位皇帝的页面
+        page_hits = PopularityResolver(db_path).resolve(
+            hits + Counter({('person', 'p1'): 2, ('event', 'unknown'): 5, ('emperor', 'q1'): 4, ('event', 'ev2'): 1}),
+            catalog
+        )
+        print(f"📈 页面访问次数: {page_hits}")
+        assert page_hits == {'wiki/朱元璋': 5, 'wiki/朱棣': 3, 'wiki/于谦': 2}
+
+        # --dry-run：只统计，不保存日志读取位置、不更新热度
+        from crawler_new.run_refresh import collect_popularity
+        schedule = RefreshSchedule(os.path.join(tmp_dir, 'schedule.db'))
+        for entry in catalog:
+            schedule.add(entry['url'], entry['page_type'], entry['meta'])
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write('127.0.0.1:1 - "GET /api/v1/emperors/e1 HTTP/1.1" 200\n')
+        readers = [AccessLogReader(log_path, **reader.position)]
+        resolver = PopularityResolver(db_path)
+        assert collect_popularity(schedule, readers, resolver, dry_run=True) == 1
+        assert schedule.get_state(f'access_log:{log_path}') is None and schedule.get_state('popularity_at') is None
+        assert schedule.get('wiki/朱元璋')['popularity'] == 0
+
+        readers = [AccessLogReader(log_path, **reader.position)]
+        assert collect_popularity(schedule, readers, resolver) == 1
+        assert schedule.get_state(f'access_log:{log_path}') == readers[0].position
+        assert schedule.get('wiki/朱元璋')['popularity'] == 1
+        schedule.close()
+
+
+if __name__ == '__main__':
+    test_adaptive_interval_and_priority()
+    test_rate_budget()
+    test_access_log_popularity()
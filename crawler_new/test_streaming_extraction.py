@@ -0,0 +1,175 @@
+"""
+测试流式提取：流式调用的重试，以及单条事迹提前入库后整页 Item 不重复写入
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from crawler_new.local_llm import local_extractor
+from crawler_new.local_llm.chunking import merge_events
+from crawler_new.local_llm.local_extractor import LocalLLMExtractor
+from crawler_new.models.items import ExtractedDataItem, ExtractedEventItem, HtmlPageItem
+from crawler_new.pipelines.sqlite_pipeline import SQLitePipeline
+
+
+class FakeStreamResponse:
+    """模拟 Ollama 的流式响应（按行返回 JSON）"""
+
+    def __init__(self, pieces, fail_after=None):
+        self.status_code = 200
+        self.text = ''
+        self.pieces = pieces
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_lines(self):
+        for i, piece in enumerate(self.pieces):
+            if i == self.fail_after:
+                raise requests.ConnectionError('连接中断')
+            yield json.dumps({'response': piece, 'done': False}).encode()
+        yield json.dumps({'response': '', 'done': True}).encode()
+
+
+def _patch_post(responses):
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(kwargs)
+        response = responses[len(calls) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    local_extractor.requests.post = post
+    return calls
+
+
+def test_stream_retry():
+    """测试连接失败时重试，已有输出后出错时不重试（避免重复内容）"""
+    original_post = requests.post
+    extractor = LocalLLMExtractor()
+    try:
+        calls = _patch_post([requests.ConnectionError('拒绝连接'), FakeStreamResponse(['[{"a":', ' 1}]'])])
+        assert ''.join(extractor._stream_local_llm('prompt')) == '[{"a": 1}]'
+        assert len(calls) == 2
+
+        calls = _patch_post([FakeStreamResponse(['[{"a":', ' 1}]'], fail_after=1), FakeStreamResponse(['[]'])])
+        pieces = []
+        try:
+            for piece in extractor._stream_local_llm('prompt'):
+                pieces.append(piece)
+            raise AssertionError('输出中途出错应抛出异常')
+        except requests.ConnectionError:
+            pass
+        assert pieces == ['[{"a":'] and len(calls) == 1
+    finally:
+        local_extractor.requests.post = original_post
+
+
+def test_streamed_events_saved_once():
+    """测试流式事迹先于整页 Item 入库，整页 Item 只补写未入库的事迹"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = SQLitePipeline(os.path.join(tmp_dir, 'history.db'))
+        spider = logging.getLogger('test_streaming')
+        spider.logger = spider
+        pipeline.open_spider(spider)
+
+        html_item = HtmlPageItem(
+            page_type='emperor', page_id='ming_emperor_001', page_name='朱元璋', data_source='wikipedia',
+            metadata={'dynasty_id': 'ming', 'dynasty_order': 1, 'reign_years': '1368-1398'}
+        )
+        events = [
+            {'时间': '1368年1月23日', '事件': '在应天府称帝，建立明朝', '人物': [{'姓名': '马皇后', '关系': '皇后'}]},
+            {'时间': '1380年', '事件': '胡惟庸案', '人物': [{'姓名': '胡惟庸', '关系': '丞相'}]},
+        ]
+
+        # 首条事迹提前入库（皇帝记录按种子数据创建）
+        pipeline.process_item(ExtractedEventItem(html_item=html_item, event=events[0], index=1), spider)
+        db = pipeline.db_manager
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM events")['n'] == 1
+        assert db.fetch_one("SELECT name FROM emperors WHERE emperor_id = 'ming_emperor_001'")['name'] == '朱元璋'
+
+        pipeline.process_item(ExtractedDataItem(
+            data_type='emperor', html_item=html_item,
+            extracted_data={'emperor_info': {'皇帝': '明太祖朱元璋', '年号': '洪武'}, 'events': events},
+            extracted_links=[]
+        ), spider)
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM events")['n'] == 2
+        assert pipeline.stats['events'] == 2 and pipeline.stats['errors'] == 0
+        emperor = db.fetch_one("SELECT name, reign_title FROM emperors WHERE emperor_id = 'ming_emperor_001'")
+        assert emperor['name'] == '明太祖朱元璋' and emperor['reign_title'] == '洪武'
+        assert pipeline.streamed_event_ids == {}
+        pipeline.close_spider(spider)
+
+
+def test_chunked_streaming_merge():
+    """测试分块 + 流式提取：合并去重时移除的流式事迹从库中删除，提取失败时删除页面已入库的流式事迹"""
+    from scrapy.exceptions import DropItem
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pipeline = SQLitePipeline(os.path.join(tmp_dir, 'history.db'))
+        spider = logging.getLogger('test_streaming')
+        spider.logger = spider
+        pipeline.open_spider(spider)
+        db = pipeline.db_manager
+
+        html_item = HtmlPageItem(
+            page_type='emperor', page_id='ming_emperor_001', page_name='朱元璋', data_source='wikipedia',
+            metadata={'dynasty_id': 'ming', 'dynasty_order': 1, 'reign_years': '1368-1398'}
+        )
+        # 两个分块提取出同一事迹（同一年份、描述前缀相同），各自流式入库
+        chunk_groups = [
+            [{'时间': '1380年', '事件': '胡惟庸案，朱元璋诛杀丞相胡惟庸', '人物': [{'姓名': '胡惟庸', '关系': '丞相'}]}],
+            [{'时间': '1380年', '事件': '胡惟庸案，朱元璋诛杀丞相胡惟庸并废除中书省',
+              '人物': [{'姓名': '李善长', '关系': '大臣'}]}],
+        ]
+        for index, group in enumerate(chunk_groups, 1):
+            pipeline.process_item(ExtractedEventItem(html_item=html_item, event=group[0], index=index), spider)
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM events")['n'] == 2
+
+        merged = merge_events(chunk_groups)
+        assert len(merged) == 1
+        pipeline.process_item(ExtractedDataItem(
+            data_type='emperor', html_item=html_item,
+            extracted_data={'emperor_info': {}, 'events': merged}, extracted_links=[]
+        ), spider)
+        rows = db.fetch_all("SELECT event_id, description FROM events")
+        print(f"📜 合并后的事迹: {[row['description'] for row in rows]}")
+        assert len(rows) == 1 and rows[0]['description'] == merged[0]['事件']
+        # 保留的事迹补上被合并事迹中的人物
+        persons = db.fetch_all("SELECT person_id FROM event_person_relation WHERE event_id = ?", (rows[0]['event_id'],))
+        assert len(persons) == 2
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM event_person_relation")['n'] == 2
+        assert pipeline.streamed_event_ids == {}
+
+        # 流式输出中途中止、整页提取失败（HtmlPageItem 被丢弃）：删除已入库的流式事迹
+        other = HtmlPageItem(
+            page_type='emperor', page_id='ming_emperor_003', page_name='朱棣', data_source='wikipedia',
+            metadata={'dynasty_id': 'ming', 'dynasty_order': 3, 'reign_years': '1402-1424'}
+        )
+        pipeline.process_item(ExtractedEventItem(
+            html_item=other, event={'时间': '1403年', '事件': '改元永乐', '人物': []}, index=1
+        ), spider)
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM events")['n'] == 2
+        pipeline.item_dropped(other, None, DropItem('提取失败'), spider)
+        assert db.fetch_one("SELECT COUNT(*) AS n FROM events")['n'] == 1
+        assert pipeline.streamed_event_ids == {}
+        pipeline.close_spider(spider)
+
+
+if __name__ == '__main__':
+    test_stream_retry()
+    test_streamed_events_saved_once()
+    test_chunked_streaming_merge()
@@ -0,0 +1,160 @@
+"""
+API 访问日志统计
+读取服务端访问日志（server/main.py 写入的 ACCESS_LOG_PATH，uvicorn 或 nginx 格式均可），
+按详情类接口的路径统计各皇帝 / 事件 / 人物被访问的次数，再换算到产生这些数据的爬取页面，
+作为增量刷新调度（crawler_new/run_refresh.py）的页面热度
+"""
+
+import os
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+
+from crawler_new.config.ming_data import MING_DYNASTY
+
+# 请求行和状态码：uvicorn 为 `127.0.0.1:5000 - "GET /path HTTP/1.1" 200`，nginx 的 combined 格式同样包含这一段
+_REQUEST_PATTERN = re.compile(r'"(?:GET|HEAD) (\S+) HTTP/[\d.]+" (\d{3})')
+
+# 详情类接口（列表、搜索等接口不针对单个实体，不计入热度）
+ENTITY_ROUTES = (
+    ('emperor', re.compile(r'^/api/v1/(?:emperors|statistics/emperor|relations/emperor)/([^/?#]+)')),
+    ('event', re.compile(r'^/api/v1/(?:events|relations/event)/([^/?#]+)')),
+    ('person', re.compile(r'^/api/v1/(?:persons|relations/person)/([^/?#]+)')),
+)
+
+EntityKey = Tuple[str, str]
+
+
+def parse_entity(line: str) -> Optional[EntityKey]:
+    """从一行访问日志中解析被访问的实体 (类型, ID)；非详情请求或错误响应返回 None"""
+    match = _REQUEST_PATTERN.search(line)
+    if not match or int(match.group(2)) >= 400:
+        return None
+    path = match.group(1)
+    for entity_type, pattern in ENTITY_ROUTES:
+        route = pattern.match(path)
+        if route:
+            return entity_type, unquote(route.group(1))
+    return None
+
+
+class AccessLogReader:
+    """
+    增量读取访问日志
+
+    记录已读取的位置（inode + 偏移量），每次只统计新追加的完整行；日志轮转（inode 变化或文件变小）后从头读取
+    """
+
+    def __init__(self, path: str, inode: Optional[int] = None, offset: int = 0):
+        self.path = str(path)
+        self.inode = inode
+        self.offset = offset
+
+    @property
+    def position(self) -> Dict[str, Any]:
+        return {'inode': self.inode, 'offset': self.offset}
+
+    def read_new(self) -> Counter:
+        """读取上次之后新增的日志，返回 {(类型, ID): 访问次数}"""
+        hits: Counter = Counter()
+        if not os.path.exists(self.path):
+            return hits
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode, self.offset = stat.st_ino, 0
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        # 只处理完整的行，写了一半的行留到下次
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].decode('utf-8', errors='replace').splitlines():
+            entity = parse_entity(line)
+            if entity:
+                hits[entity] += 1
+        self.offset += end
+        return hits
+
+
+class PopularityResolver:
+    """把实体访问次数换算为页面访问次数（实体数据来自哪些爬取页面，就计入哪些页面）"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def resolve(self, entity_hits: Counter, catalog: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Args:
+            entity_hits: {(类型, ID): 访问次数}
+            catalog: 刷新调度中的页面 [{'url', 'page_type', 'meta'}]
+
+        Returns:
+            {页面 URL: 访问次数}
+        """
+        if not entity_hits or not Path(self.db_path).exists():
+            return {}
+
+        # 皇帝页面按 (朝代, 朝代顺序) 对应（皇帝表的名称来自大模型提取，可能与种子数据不同；
+        # 不同朝代的第 N 位皇帝不是同一页面），种子数据未注明朝代的为明朝；事件 / 人物页面按名称对应
+        emperor_pages: Dict[Tuple[str, int], str] = {}
+        named_pages: Dict[Tuple[str, str], str] = {}
+        for entry in catalog:
+            meta = entry['meta']
+            if entry['page_type'] == 'emperor':
+                emperor_info = meta.get('emperor_info') or {}
+                order = emperor_info.get('dynasty_order')
+                if order is not None:
+                    dynasty_id = emperor_info.get('dynasty_id') or MING_DYNASTY['dynasty_id']
+                    emperor_pages[(dynasty_id, order)] = entry['url']
+            elif meta.get(f"{entry['page_type']}_name"):
+                named_pages[(entry['page_type'], meta[f"{entry['page_type']}_name"])] = entry['url']
+
+        ids: Dict[str, List[str]] = {'emperor': [], 'event': [], 'person': []}
+        for entity_type, entity_id in entity_hits:
+            ids[entity_type].append(entity_id)
+
+        page_hits: Counter = Counter()
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        try:
+            for entity_type, entity_id, name, emperors in self._sources(conn, ids):
+                count = entity_hits[(entity_type, entity_id)]
+                pages = {emperor_pages[emperor] for emperor in emperors if emperor in emperor_pages}
+                if (entity_type, name) in named_pages:
+                    pages.add(named_pages[(entity_type, name)])
+                for page in pages:
+                    page_hits[page] += count
+        finally:
+            conn.close()
+        return dict(page_hits)
+
+    @staticmethod
+    def _sources(conn: sqlite3.Connection, ids: Dict[str, List[str]]):
+        """查询实体的名称和所属皇帝：[(类型, ID, 名称, {(朝代, 朝代顺序)})]（人物可能关联多位皇帝）"""
+        queries = {
+            'emperor': "SELECT emperor_id, name, dynasty_id, dynasty_order FROM emperors WHERE emperor_id IN ({})",
+            'event': """
+                SELECT e.event_id, e.title, m.dynasty_id, m.dynasty_order FROM events e
+                LEFT JOIN emperors m ON m.emperor_id = e.emperor_id
+                WHERE e.event_id IN ({})
+            """,
+            'person': """
+                SELECT p.person_id, p.name, m.dynasty_id, m.dynasty_order FROM persons p
+                LEFT JOIN person_emperor pe ON pe.person_id = p.person_id
+                LEFT JOIN emperors m ON m.emperor_id = pe.emperor_id
+                WHERE p.person_id IN ({})
+            """,
+        }
+        for entity_type, entity_ids in ids.items():
+            if not entity_ids:
+                continue
+            sql = queries[entity_type].format(', '.join('?' * len(entity_ids)))
+            sources: Dict[str, Tuple[str, set]] = {}
+            for entity_id, name, dynasty_id, order in conn.execute(sql, entity_ids):
+                emperors = sources.setdefault(entity_id, (name, set()))[1]
+                if order is not None:
+                    emperors.add((dynasty_id, order))
+            for entity_id, (name, emperors) in sources.items():
+                yield entity_type, entity_id, name, emperors
@@ -0,0 +1,177 @@
+"""
+持久化爬取队列（frontier）
+多个爬虫进程共享的待爬 URL 表（SQLite，WAL 模式），同时也是全局去重表：
+- URL 为主键，任何进程发现的链接只会入队一次
+- 按 URL 哈希分片，每个进程只领取自己分片的 URL
+- 状态：pending → claimed（已领取）→ done / failed；进程中断后 claimed 的 URL 在下次运行时回到 pending，
+  运行中某个进程异常退出时由主进程放回它领取的 URL（release_worker）
+
+由 crawler_new/run_sharded.py 创建和播种，MingEmperorSpider 在分片模式下从中领取请求，
+RecursiveCrawlPipeline 把发现的链接写入其中
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PENDING = 'pending'
+CLAIMED = 'claimed'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def shard_key(url: str) -> int:
+    """URL 的分片键（各进程计算结果一致，与 Python 的 hash 随机化无关）"""
+    return zlib.crc32(url.encode('utf-8'))
+
+
+class CrawlFrontier:
+    """共享的持久化爬取队列"""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # 每个进程一个连接；Pipeline 线程和 reactor 线程共用时由锁串行化
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("PRAGMA busy_timeout = 30000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                page_type TEXT NOT NULL,
+                meta TEXT NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                shard_key INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier(status, depth);
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, url: str, page_type: str, meta: Optional[Dict[str, Any]] = None, depth: int = 0) -> bool:
+        """URL 入队；已存在（任一进程入队过）时返回 False"""
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO frontier (url, page_type, meta, depth, shard_key, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (url, page_type, json.dumps(meta or {}, ensure_ascii=False), depth, shard_key(url), time.time())
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, shard: int, shards: int, worker: int, limit: int) -> List[Dict[str, Any]]:
+        """领取本分片的待爬 URL（浅层优先），返回 [{'url', 'page_type', 'meta', 'depth'}]"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    """
+                    SELECT url, page_type, meta, depth FROM frontier
+                    WHERE status = ? AND shard_key % ? = ?
+                    ORDER BY depth, rowid
+                    LIMIT ?
+                    """,
+                    (PENDING, shards, shard, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE frontier SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?",
+                    [(CLAIMED, worker, time.time(), row['url']) for row in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [{'url': row['url'], 'page_type': row['page_type'], 'meta': json.loads(row['meta']),
+                 'depth': row['depth']} for row in rows]
+
+    def finish_claimed(self, worker: int) -> int:
+        """进程空闲时调用：已领取且处理完的 URL 标记为 done"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE frontier SET status = ?, updated_at = ? WHERE status = ? AND worker = ?",
+                (DONE, time.time(), CLAIMED, worker)
+            ).rowcount
+
+    def fail(self, url: str):
+        """下载或解析失败：未超过重试次数的放回 pending，否则标记为 failed"""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE frontier SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, updated_at = ?
+                WHERE url = ? AND status = ?
+                """,
+                (self.max_attempts, FAILED, PENDING, time.time(), url, CLAIMED)
+            )
+
+    def release_claimed(self) -> int:
+        """把上次运行中断时遗留的 claimed 放回 pending（只能在没有进程运行时调用）"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE frontier SET status = ?, worker = NULL, updated_at = ? WHERE status = ?",
+                (PENDING, time.time(), CLAIMED)
+            ).rowcount
+
+    def release_worker(self, worker: int) -> int:
+        """
+        进程异常退出后放回它领取的 URL（由主进程调用）
+
+        尝试次数已达上限的标记为 failed，避免反复导致进程崩溃的页面无限重试
+        """
+        with self._lock:
+            return self._conn.execute(
+                """
+                UPDATE frontier SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, worker = NULL, updated_at = ?
+                WHERE status = ? AND worker = ?
+                """,
+                (self.max_attempts, FAILED, PENDING, time.time(), CLAIMED, worker)
+            ).rowcount
+
+    def abandon_shard(self, shard: int, shards: int) -> int:
+        """分片的进程无法再运行时，把该分片未完成的 URL 标记为 failed，其他进程不再等待它们"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE frontier SET status = ?, updated_at = ? WHERE status IN (?, ?) AND shard_key % ? = ?",
+                (FAILED, time.time(), PENDING, CLAIMED, shards, shard)
+            ).rowcount
+
+    def remaining(self) -> int:
+        """所有分片中未完成（pending + claimed）的 URL 数"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM frontier WHERE status IN (?, ?)", (PENDING, CLAIMED)
+            ).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的 URL 数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def entries(self, status: str = DONE) -> List[Dict[str, Any]]:
+        """某一状态的所有 URL [{'url', 'page_type', 'meta', 'depth'}]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, page_type, meta, depth FROM frontier WHERE status = ? ORDER BY rowid", (status,)
+            ).fetchall()
+        return [{'url': row['url'], 'page_type': row['page_type'], 'meta': json.loads(row['meta']),
+                 'depth': row['depth']} for row in rows]
+
+    def reset(self):
+        """清空队列（重新开始全量爬取）"""
+        with self._lock:
+            self._conn.execute("DELETE FROM frontier")
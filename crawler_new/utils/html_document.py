@@ -0,0 +1,167 @@
+"""
+共享的 HTML 解析文档
+每个页面只解析一次（lxml），清理器、链接提取、大模型提取器共用同一棵文档树；
+常用的 XPath 在模块导入时预编译
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional, Union
+
+from lxml import etree, html as lxml_html
+
+
+def _has_class(class_name: str) -> str:
+    """XPath 条件：class 属性中包含完整的类名"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# 预编译的 XPath 选择器
+XPATH_MW_PARSER_OUTPUT = etree.XPath(f"(//div[{_has_class('mw-parser-output')}])[1]")
+XPATH_HEADLINE = etree.XPath(f"(.//span[{_has_class('mw-headline')}])[1]")
+XPATH_SUP = etree.XPath(".//sup")
+XPATH_LEMMA_SUMMARY = etree.XPath(f"(//div[{_has_class('lemma-summary')}])[1]")
+XPATH_MAIN_CONTENT = etree.XPath(f"(//div[{_has_class('main-content')}])[1]")
+
+# 清理时整体跳过的标签
+SKIPPED_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header'])
+
+
+def iter_text(element, skip: Optional[set] = None) -> Iterator[str]:
+    """
+    按文档顺序遍历元素内的文本片段（不修改文档树）
+
+    与 BeautifulSoup 的 get_text 一致：跳过注释和处理指令，
+    被跳过元素的尾随文本（tail）仍然保留
+
+    Args:
+        element: 起始元素
+        skip: 需要跳过的元素集合（连同其子树）
+
+    Yields:
+        文本片段
+    """
+    skip = skip or set()
+    # 栈中保存 (元素, 是否已进入)；进入时输出 text，离开时输出 tail
+    stack = [(element, False)]
+    while stack:
+        node, entered = stack.pop()
+        if entered:
+            if node is not element and node.tail:
+                yield node.tail
+            continue
+        is_markup = not isinstance(node.tag, str)  # 注释、处理指令
+        if is_markup or node in skip or node.tag in SKIPPED_TAGS:
+            if node is not element and node.tail:
+                yield node.tail
+            continue
+        if node.text:
+            yield node.text
+        stack.append((node, True))
+        for child in reversed(node):
+            stack.append((child, False))
+
+
+def element_text(element, separator: str = '', skip: Optional[set] = None) -> str:
+    """
+    提取元素文本，每个片段去除首尾空白并忽略空片段（等同于 get_text(separator, strip=True)）
+
+    Args:
+        element: 元素
+        separator: 片段分隔符
+        skip: 需要跳过的元素集合
+
+    Returns:
+        文本
+    """
+    return separator.join(
+        piece for piece in (fragment.strip() for fragment in iter_text(element, skip)) if piece
+    )
+
+
+class ParsedDocument:
+    """
+    一次解析、多处复用的 HTML 文档
+
+    - root: lxml.html 文档树（只读使用，各处理步骤不修改文档树；首次使用时才构建，
+      解析交给进程池时 reactor 线程不需要解析）
+    - memo(): 缓存基于该文档的派生结果（如清理后的文本），
+      同一页面在一次提取与降级提取之间不会重复清理
+    """
+
+    def __init__(self, html_content: Union[str, bytes, None] = None, root=None,
+                 root_factory: Optional[Callable[[], Any]] = None):
+        """
+        Args:
+            html_content: 原始 HTML（root 未提供时解析该内容）
+            root: 已解析的 lxml 文档树
+            root_factory: 返回文档树的函数（如 Scrapy Response 的 selector.root），首次使用时调用
+        """
+        self._root = root
+        self._root_factory = root_factory
+        self._html_content = html_content
+        self._memo: Dict[str, Any] = {}
+
+    @classmethod
+    def from_response(cls, response) -> 'ParsedDocument':
+        """复用 Scrapy Response 的 lxml 文档树（首次使用时构建），不再重复解析"""
+        return cls(html_content=response.text, root_factory=lambda: response.selector.root)
+
+    @property
+    def root(self):
+        if self._root is None:
+            if self._root_factory is not None:
+                self._root = self._root_factory()
+            else:
+                html_content = self._html_content or '<html></html>'
+                try:
+                    self._root = lxml_html.document_fromstring(html_content)
+                except ValueError:
+                    # 带 XML 编码声明的 Unicode 字符串需要先编码
+                    self._root = lxml_html.document_fromstring(html_content.encode('utf-8'))
+        return self._root
+
+    @classmethod
+    def ensure(cls, document: Union['ParsedDocument', str, bytes]) -> 'ParsedDocument':
+        """将 HTML 字符串或已解析文档统一为 ParsedDocument"""
+        if isinstance(document, ParsedDocument):
+            return document
+        return cls(document)
+
+    @property
+    def html_content(self) -> str:
+        """原始 HTML 文本"""
+        if self._html_content is None:
+            self._html_content = lxml_html.tostring(self.root, encoding='unicode')
+        if isinstance(self._html_content, bytes):
+            self._html_content = self._html_content.decode('utf-8', errors='replace')
+        return self._html_content
+
+    def __len__(self) -> int:
+        return len(self.html_content)
+
+    def remember(self, key: str, value: Any):
+        """写入派生结果（如进程池中算好的清理结果）"""
+        self._memo[key] = value
+
+    def memo(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        获取（或计算并缓存）基于该文档的派生结果
+
+        Args:
+            key: 缓存键
+            factory: 结果不存在时的计算函数
+
+        Returns:
+            派生结果
+        """
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+    def first(self, xpath: etree.XPath):
+        """返回预编译 XPath 的第一个匹配元素"""
+        result = xpath(self.root)
+        return result[0] if result else None
+
+    def text(self, separator: str = ' ') -> str:
+        """全文文本（跳过脚本、样式等标签）"""
+        return element_text(self.root, separator)
@@ -0,0 +1,225 @@
+"""
+大模型流式输出的增量 JSON 解析
+边接收 token 边解析事迹数组，每完成一个元素立即返回，
+并在输出明显不合法时尽早终止，避免浪费生成时间
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class StreamingJSONError(Exception):
+    """流式输出不是合法 JSON（应中止生成）"""
+    pass
+
+
+# 对象中指向目标数组的键，如 "events": [
+_KEY_BEFORE_ARRAY_TEMPLATE = r'"{key}"\s*:\s*$'
+
+
+class IncrementalJSONArrayParser:
+    """
+    增量解析 JSON 数组元素
+
+    支持两种输出形态：
+    - 顶层即数组：[{...}, {...}]
+    - 对象中的数组字段：{"emperor_info": {...}, "events": [{...}, {...}]}
+
+    每次 feed() 返回本次新完成的数组元素（对象），完整文本可通过 text 获取，
+    用于在流结束后解析数组以外的字段
+
+    用法:
+        parser = IncrementalJSONArrayParser(array_key='events')
+        for piece in token_stream:
+            for event in parser.feed(piece):
+                handle(event)
+        parser.close()
+    """
+
+    def __init__(self, array_key: Optional[str] = 'events', max_preamble: int = 200):
+        """
+        Args:
+            array_key: 顶层为对象时，要增量解析的数组字段名
+            max_preamble: JSON 开始前允许的最大非空白字符数（如 ```json 代码块标记）
+        """
+        self.array_key = array_key
+        self.max_preamble = max_preamble
+        self._key_pattern = re.compile(_KEY_BEFORE_ARRAY_TEMPLATE.format(key=re.escape(array_key))) if array_key else None
+
+        self._buffer: List[str] = []
+        self._text = ''
+        self._pos = 0  # 已扫描到的位置
+        self._stack: List[str] = []  # 当前嵌套的容器（'{' 或 '['）
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._finished = False
+        self._preamble = 0
+        self._target_depth: Optional[int] = None  # 目标数组所在的嵌套深度
+        self._element_start: Optional[int] = None
+        self._container_start: Optional[int] = None  # 当前对象的起始位置（用于匹配键名）
+        self.items_parsed = 0
+
+    @property
+    def text(self) -> str:
+        """目前为止接收到的完整文本"""
+        if self._buffer:
+            self._text += ''.join(self._buffer)
+            self._buffer = []
+        return self._text
+
+    @property
+    def finished(self) -> bool:
+        """顶层 JSON 值是否已经闭合"""
+        return self._finished
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        输入一段新的输出文本
+
+        Args:
+            chunk: 新增的文本片段
+
+        Returns:
+            本次新完成的数组元素列表
+
+        Raises:
+            StreamingJSONError: 输出不是合法 JSON
+        """
+        if not chunk or self._finished:
+            return []
+        self._buffer.append(chunk)
+        text = self.text
+        completed = []
+
+        pos = self._pos
+        length = len(text)
+        while pos < length:
+            char = text[pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                pos += 1
+                continue
+
+            if not self._started:
+                if char in '{[':
+                    self._started = True
+                elif not char.isspace() and char != '`':
+                    self._preamble += 1
+                    if self._preamble > self.max_preamble:
+                        raise StreamingJSONError(f"输出开头 {self.max_preamble} 个字符内未找到 JSON")
+                    pos += 1
+                    continue
+                else:
+                    pos += 1
+                    continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._open(char, pos, text)
+            elif char in '}]':
+                item = self._close(char, pos, text)
+                if item is not None:
+                    completed.append(item)
+                if self._finished:
+                    pos += 1
+                    break
+            pos += 1
+
+        self._pos = pos
+        return completed
+
+    def close(self) -> None:
+        """
+        流结束时调用，检查 JSON 是否完整
+
+        Raises:
+            StreamingJSONError: 输出在 JSON 闭合之前结束
+        """
+        if not self._started:
+            raise StreamingJSONError("输出中未找到 JSON")
+        if not self._finished:
+            raise StreamingJSONError(f"输出在 JSON 闭合前结束（已解析 {self.items_parsed} 个元素）")
+
+    def _open(self, char: str, pos: int, text: str) -> None:
+        depth = len(self._stack)
+        if char == '[' and self._target_depth is None and self._is_target_array(depth, pos, text):
+            self._target_depth = depth + 1
+        elif char == '{' and self._target_depth is not None and depth == self._target_depth:
+            self._element_start = pos
+        elif char == '[' and self._target_depth is not None and depth == self._target_depth:
+            raise StreamingJSONError("数组元素应为对象")
+
+        if char == '{' and depth == 0:
+            self._container_start = pos
+        self._stack.append(char)
+
+    def _close(self, char: str, pos: int, text: str) -> Optional[Dict[str, Any]]:
+        if not self._stack:
+            raise StreamingJSONError(f"位置 {pos} 出现多余的 '{char}'")
+        opener = self._stack.pop()
+        if (opener, char) not in (('{', '}'), ('[', ']')):
+            raise StreamingJSONError(f"位置 {pos} 的 '{char}' 与 '{opener}' 不匹配")
+
+        depth = len(self._stack)
+        item = None
+        if char == '}' and self._element_start is not None and depth == self._target_depth:
+            fragment = text[self._element_start:pos + 1]
+            self._element_start = None
+            try:
+                item = json.loads(fragment)
+            except json.JSONDecodeError as e:
+                raise StreamingJSONError(f"第 {self.items_parsed + 1} 个元素解析失败: {e}") from e
+            self.items_parsed += 1
+        elif char == ']' and self._target_depth is not None and depth == self._target_depth - 1:
+            self._target_depth = -1  # 目标数组已结束，不再匹配其他数组
+
+        if depth == 0:
+            self._finished = True
+        return item
+
+    def _is_target_array(self, depth: int, pos: int, text: str) -> bool:
+        """判断即将开始的数组是否为目标数组"""
+        if depth == 0:
+            return True
+        if depth == 1 and self._stack[0] == '{' and self._key_pattern is not None:
+            return bool(self._key_pattern.search(text, self._container_start or 0, pos))
+        return False
+
+
+def iter_array_items(chunks: Iterator[str], parser: IncrementalJSONArrayParser) -> Iterator[Dict[str, Any]]:
+    """
+    消费 token 流，逐个产出完成的数组元素
+
+    解析出错或调用方提前停止迭代时会关闭上游的 token 流（断开 HTTP 连接），
+    服务端随之停止生成
+
+    Args:
+        chunks: 大模型输出的文本片段迭代器
+        parser: 增量解析器
+
+    Yields:
+        完成解析的数组元素
+
+    Raises:
+        StreamingJSONError: 输出不是合法 JSON
+    """
+    try:
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                yield item
+            if parser.finished:
+                break
+        parser.close()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
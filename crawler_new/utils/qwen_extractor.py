@@ -4,12 +4,19 @@
 """
 
 import json
+import logging
 import os
-from typing import Dict, Any, Optional, List
-from bs4 import BeautifulSoup
+from typing import Dict, Any, Optional, List, Iterator, Callable, Union
 from openai import OpenAI
 from datetime import datetime
 
+from crawler_new.utils.json_stream import IncrementalJSONArrayParser, StreamingJSONError, iter_array_items
+from crawler_new.utils.html_document import (
+    ParsedDocument, XPATH_MW_PARSER_OUTPUT, XPATH_LEMMA_SUMMARY, XPATH_MAIN_CONTENT, element_text
+)
+
+logger = logging.getLogger(__name__)
+
 
 class QwenExtractor:
     """千问大模型提取器"""
@@ -30,7 +37,7 @@ class QwenExtractor:
             base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
         )
     
-    def extract_emperor_all_data(self, html_content_wiki: str, html_content_baidu: str, page_name: str) -> Dict[str, Any]:
+    def extract_emperor_all_data(self, html_content_wiki: Union[str, ParsedDocument], html_content_baidu: Union[str, ParsedDocument], page_name: str) -> Dict[str, Any]:
         """
         一次性提取皇帝所有信息（基本信息 + 生平事迹，融合双源数据）
         
@@ -44,29 +51,63 @@ class QwenExtractor:
         """
 
 
-        print("Using QwenExtractor to extract emperor all data... 1")
+        logger.debug("Using QwenExtractor to extract emperor all data... 1")
         # 清理 HTML，只保留主要内容
         cleaned_wiki = self._clean_html(html_content_wiki, 'wikipedia') if html_content_wiki else ''
         cleaned_baidu = self._clean_html(html_content_baidu, 'baidu') if html_content_baidu else ''
         
-        print("Using QwenExtractor to extract emperor all data... 2")
+        logger.debug("Using QwenExtractor to extract emperor all data... 2")
         # 构建一次性提取的融合提示词
         prompt = self._build_emperor_all_data_prompt(cleaned_wiki, cleaned_baidu, page_name)
         
-        print("Using QwenExtractor to extract emperor all data... 3")
+        logger.debug("Using QwenExtractor to extract emperor all data... 3")
         # 调用千问 API
         response_text = self._call_qwen_api(prompt)
 
-        print("Using QwenExtractor to extract emperor all data... 4")
+        logger.debug("Using QwenExtractor to extract emperor all data... 4")
         
         # 解析返回结果
         result = self._parse_emperor_all_data_response(response_text)
 
-        print("Using QwenExtractor to extract emperor all data... 5")
+        logger.debug("Using QwenExtractor to extract emperor all data... 5")
         
         return result
     
-    def extract_emperor_info(self, html_content_wiki: str, html_content_baidu: str, page_name: str) -> Dict[str, Any]:
+    def extract_emperor_all_data_stream(self, html_content_wiki: Union[str, ParsedDocument], html_content_baidu: Union[str, ParsedDocument], page_name: str,
+                                        on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        流式一次性提取皇帝所有信息（融合双源数据）
+        
+        边生成边解析 events 数组，每完成一条事迹立即回调 on_event；
+        输出不是合法 JSON 时立即中止生成
+        
+        Args:
+            html_content_wiki: Wikipedia HTML 内容
+            html_content_baidu: 百度百科 HTML 内容
+            page_name: 页面名称（皇帝姓名）
+            on_event: 每完成一条事迹时的回调
+        
+        Returns:
+            包含 emperor_info 和 events 的字典
+        """
+        cleaned_wiki = self._clean_html(html_content_wiki, 'wikipedia') if html_content_wiki else ''
+        cleaned_baidu = self._clean_html(html_content_baidu, 'baidu') if html_content_baidu else ''
+        prompt = self._build_emperor_all_data_prompt(cleaned_wiki, cleaned_baidu, page_name)
+        
+        parser = IncrementalJSONArrayParser(array_key='events')
+        try:
+            for event in iter_array_items(self._stream_qwen_api(prompt), parser):
+                if on_event:
+                    on_event(event)
+        except StreamingJSONError as e:
+            self._save_response_to_file(parser.text)
+            raise Exception(f"流式输出解析失败，已中止生成: {str(e)}, 返回文本: {parser.text[:200]}")
+        
+        response_text = parser.text
+        self._save_response_to_file(response_text)
+        return self._parse_emperor_all_data_response(response_text)
+    
+    def extract_emperor_info(self, html_content_wiki: Union[str, ParsedDocument], html_content_baidu: Union[str, ParsedDocument], page_name: str) -> Dict[str, Any]:
         """
         从皇帝页面 HTML 中提取结构化信息（融合双源数据）
         【保留此方法以兼容旧代码，但推荐使用 extract_emperor_all_data】
@@ -94,7 +135,7 @@ class QwenExtractor:
         
         return emperor_info
     
-    def extract_emperor_events(self, html_content_wiki: str, html_content_baidu: str, page_name: str) -> List[Dict[str, Any]]:
+    def extract_emperor_events(self, html_content_wiki: Union[str, ParsedDocument], html_content_baidu: Union[str, ParsedDocument], page_name: str) -> List[Dict[str, Any]]:
         """
         从皇帝页面 HTML 中提取生平事迹（融合双源数据）
         
@@ -129,40 +170,39 @@ class QwenExtractor:
         """从事件页面提取信息（待实现）"""
         pass
     
-    def _clean_html(self, html_content: str, data_source: str) -> str:
+    def _clean_html(self, html_content: Union[str, ParsedDocument], data_source: str) -> str:
         """
         清理 HTML，移除脚本、样式等无关内容
         
         Args:
-            html_content: 原始 HTML
+            html_content: 原始 HTML，或已解析的 ParsedDocument（复用文档树，结果按数据源缓存）
             data_source: 数据源
         
         Returns:
             清理后的 HTML 文本
         """
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # 移除无关标签
-        for tag in soup(['script', 'style', 'nav', 'footer', 'header']):
-            tag.decompose()
-        
+        document = ParsedDocument.ensure(html_content)
+        return document.memo(f'qwen_cleaned:{data_source}', lambda: self._extract_main_text(document, data_source))
+    
+    def _extract_main_text(self, document: ParsedDocument, data_source: str) -> str:
+        """提取主要内容区域的文本（脚本、样式等标签在提取时跳过）"""
         # 根据数据源提取主要内容
+        main_content = None
         if data_source == 'wikipedia':
             # Wikipedia：提取 mw-parser-output
-            main_content = soup.find('div', class_='mw-parser-output')
-            if main_content:
-                return main_content.get_text(separator='\n', strip=True)
+            main_content = document.first(XPATH_MW_PARSER_OUTPUT)
         
         elif data_source == 'baidu':
             # 百度百科：提取主体内容
-            main_content = soup.find('div', class_='lemma-summary')
-            if not main_content:
-                main_content = soup.find('div', class_='main-content')
-            if main_content:
-                return main_content.get_text(separator='\n', strip=True)
+            main_content = document.first(XPATH_LEMMA_SUMMARY)
+            if main_content is None:
+                main_content = document.first(XPATH_MAIN_CONTENT)
+        
+        if main_content is not None:
+            return element_text(main_content, '\n')
         
         # 默认返回全文本
-        return soup.get_text(separator='\n', strip=True)
+        return document.text('\n')
     
     def _build_emperor_all_data_prompt(self, cleaned_wiki: str, cleaned_baidu: str, page_name: str) -> str:
         """构建一次性提取皇帝所有信息的提示词（基本信息 + 生平事迹，双源融合）"""
@@ -407,11 +447,11 @@ class QwenExtractor:
         Returns:
             API 返回的文本
         """
-        print("Calling Qwen API...")
+        logger.debug("Calling Qwen API...")
         
         for attempt in range(max_retries):
             try:
-                print(f"Attempt {attempt + 1} to call Qwen API...")
+                logger.debug("Attempt %s to call Qwen API...", attempt + 1)
                 
                 completion = self.client.chat.completions.create(
                     model=self.model,
@@ -422,7 +462,7 @@ class QwenExtractor:
                 
                 # 提取返回内容
                 content = completion.choices[0].message.content
-                print(f"✅ Qwen API call successful")
+                logger.info("✅ Qwen API call successful")
                 
                 # 保存原始JSON响应到文件
                 self._save_response_to_file(content)
@@ -430,13 +470,42 @@ class QwenExtractor:
                 return content
             
             except Exception as e:
-                print(f"❌ Attempt {attempt + 1} failed: {str(e)}")
+                logger.warning("❌ Attempt %s failed: %s", attempt + 1, e)
                 if attempt == max_retries - 1:
                     raise Exception(f"调用千问API失败（已重试{max_retries}次）: {str(e)}")
                 continue
         
         return ""
     
+    def _stream_qwen_api(self, prompt: str) -> Iterator[str]:
+        """
+        流式调用千问 API（使用 OpenAI SDK）
+        
+        生成器关闭时同时关闭底层流，服务端随之停止生成
+        
+        Args:
+            prompt: 提示词
+        
+        Yields:
+            增量输出的文本片段
+        """
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {'role': 'user', 'content': prompt}
+            ],
+            stream=True
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if piece:
+                    yield piece
+        finally:
+            stream.close()
+    
     def _parse_emperor_all_data_response(self, response_text: str) -> Dict[str, Any]:
         """
         解析一次性提取的完整数据（基本信息 + 生平事迹）
@@ -546,6 +615,6 @@ class QwenExtractor:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             
-            print(f"💾 已保存API响应: {filepath}")
+            logger.info("💾 已保存API响应: %s", filepath)
         except Exception as e:
-            print(f"⚠️  保存API响应失败: {str(e)}")
+            logger.warning("⚠️  保存API响应失败: %s", e)
@@ -0,0 +1,227 @@
+"""
+增量刷新调度表
+为每个已爬取的页面维护下次爬取时间，由 crawler_new/run_refresh.py 按批次取出到期页面重新爬取：
+- 刷新间隔按页面的变化情况自适应：本次有变化时缩短（× REFRESH_CHANGED_FACTOR），无变化时延长（× REFRESH_UNCHANGED_FACTOR），
+  限制在 [REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL] 之间
+- 页面热度（API 访问次数，按半衰期衰减）进一步缩短刷新间隔：实际间隔 = 刷新间隔 / (1 + 权重 × ln(1 + 热度))
+- 到期页面按 陈旧度（距上次爬取的时间 / 刷新间隔）× 热度系数 排序，预算不足时优先刷新最陈旧、最热门的页面
+
+RateBudget 为全局爬取预算（令牌桶）
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+FAILED = 'failed'
+
+# 下次爬取时间：从未爬取成功的页面在重试时间（或立即）爬取；其余为上次爬取时间 + 实际间隔（不早于重试时间）
+_NEXT_CRAWL_SQL = """
+    next_crawl_at = CASE
+        WHEN crawled_at IS NULL THEN COALESCE(retry_at, next_crawl_at)
+        ELSE MAX(COALESCE(retry_at, 0), crawled_at + MAX(?, interval / boost))
+    END
+"""
+
+
+class RefreshSchedule:
+    """页面刷新调度表（SQLite）"""
+
+    def __init__(self, path: str, min_interval: float = 6 * 3600, default_interval: float = 7 * 86400,
+                 max_interval: float = 60 * 86400, changed_factor: float = 0.5, unchanged_factor: float = 1.5,
+                 retry_delay: float = 3600, popularity_weight: float = 1.0, popularity_half_life: float = 7 * 86400):
+        self.path = str(path)
+        self.min_interval = min_interval
+        self.default_interval = default_interval
+        self.max_interval = max_interval
+        self.changed_factor = changed_factor
+        self.unchanged_factor = unchanged_factor
+        self.retry_delay = retry_delay
+        self.popularity_weight = popularity_weight
+        self.popularity_half_life = popularity_half_life
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS refresh_schedule (
+                url TEXT PRIMARY KEY,
+                page_type TEXT NOT NULL,
+                meta TEXT NOT NULL,
+                interval REAL NOT NULL,
+                popularity REAL NOT NULL DEFAULT 0,
+                boost REAL NOT NULL DEFAULT 1,
+                crawled_at REAL,
+                retry_at REAL,
+                next_crawl_at REAL NOT NULL,
+                crawls INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_refresh_next ON refresh_schedule(next_crawl_at);
+            CREATE TABLE IF NOT EXISTS refresh_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+
+    @classmethod
+    def from_settings(cls, settings) -> 'RefreshSchedule':
+        return cls(
+            settings.get('REFRESH_SCHEDULE_PATH'),
+            min_interval=settings.getfloat('REFRESH_MIN_INTERVAL', 6 * 3600),
+            default_interval=settings.getfloat('REFRESH_DEFAULT_INTERVAL', 7 * 86400),
+            max_interval=settings.getfloat('REFRESH_MAX_INTERVAL', 60 * 86400),
+            changed_factor=settings.getfloat('REFRESH_CHANGED_FACTOR', 0.5),
+            unchanged_factor=settings.getfloat('REFRESH_UNCHANGED_FACTOR', 1.5),
+            retry_delay=settings.getfloat('REFRESH_RETRY_DELAY', 3600),
+            popularity_weight=settings.getfloat('REFRESH_POPULARITY_WEIGHT', 1.0),
+            popularity_half_life=settings.getfloat('REFRESH_POPULARITY_HALF_LIFE', 7 * 86400),
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, url: str, page_type: str, meta: Optional[Dict[str, Any]] = None,
+            crawled_at: Optional[float] = None, now: Optional[float] = None) -> bool:
+        """
+        页面加入调度（已存在时返回 False）
+
+        crawled_at 为页面上次爬取的时间（如新鲜度记录中的检查时间），为空时页面立即到期
+        """
+        now = time.time() if now is None else now
+        next_crawl_at = crawled_at + self.default_interval if crawled_at else now
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT OR IGNORE INTO refresh_schedule (url, page_type, meta, interval, crawled_at, next_crawl_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (url, page_type, json.dumps(meta or {}, ensure_ascii=False), self.default_interval,
+                 crawled_at, next_crawl_at)
+            )
+            return cursor.rowcount == 1
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """所有页面 [{'url', 'page_type', 'meta'}]"""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, page_type, meta FROM refresh_schedule").fetchall()
+        return [{'url': row['url'], 'page_type': row['page_type'], 'meta': json.loads(row['meta'])} for row in rows]
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM refresh_schedule WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def due(self, now: Optional[float] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """到期页面，按 陈旧度 × 热度系数 从高到低（从未爬取的页面最优先）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT url, page_type, meta FROM refresh_schedule
+                WHERE next_crawl_at <= ?
+                ORDER BY (? - COALESCE(crawled_at, 0)) / interval * boost DESC, url
+                LIMIT ?
+                """,
+                (now, now, limit)
+            ).fetchall()
+        return [{'url': row['url'], 'page_type': row['page_type'], 'meta': json.loads(row['meta'])} for row in rows]
+
+    def record(self, url: str, outcome: str, now: Optional[float] = None):
+        """记录一次刷新结果（CHANGED / UNCHANGED / FAILED）并计算下次爬取时间"""
+        now = time.time() if now is None else now
+        if outcome == FAILED:
+            # 失败不影响刷新间隔，稍后重试
+            update = "failures = failures + 1, retry_at = ?"
+            params = [now + self.retry_delay]
+        else:
+            factor = self.changed_factor if outcome == CHANGED else self.unchanged_factor
+            update = """
+                interval = MIN(?, MAX(?, interval * ?)), crawled_at = ?, retry_at = NULL,
+                crawls = crawls + 1, changes = changes + ?
+            """
+            params = [self.max_interval, self.min_interval, factor, now, int(outcome == CHANGED)]
+        with self._lock:
+            self._conn.execute(f"UPDATE refresh_schedule SET {update} WHERE url = ?", (*params, url))
+            self._conn.execute(f"UPDATE refresh_schedule SET {_NEXT_CRAWL_SQL} WHERE url = ?", (self.min_interval, url))
+
+    def add_hits(self, hits: Dict[str, float], now: Optional[float] = None):
+        """累加页面访问次数：已有热度按半衰期衰减后加上新的访问次数，并重新计算热度系数和下次爬取时间"""
+        now = time.time() if now is None else now
+        last = self.get_state('popularity_at')
+        decay = 0.5 ** ((now - last) / self.popularity_half_life) if last and self.popularity_half_life > 0 else 1.0
+        with self._lock:
+            rows = self._conn.execute("SELECT url, popularity FROM refresh_schedule").fetchall()
+            updates = []
+            for row in rows:
+                popularity = row['popularity'] * decay + hits.get(row['url'], 0)
+                updates.append((popularity, 1 + self.popularity_weight * math.log1p(popularity), row['url']))
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("UPDATE refresh_schedule SET popularity = ?, boost = ? WHERE url = ?", updates)
+                self._conn.execute(f"UPDATE refresh_schedule SET {_NEXT_CRAWL_SQL}", (self.min_interval,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.set_state('popularity_at', now)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, int]:
+        """页面总数、到期数、从未爬取成功的页面数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT COUNT(*), COALESCE(SUM(next_crawl_at <= ?), 0), COALESCE(SUM(crawled_at IS NULL), 0)
+                FROM refresh_schedule
+                """,
+                (now,)
+            ).fetchone()
+        return {'pages': row[0], 'due': row[1], 'never_crawled': row[2]}
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        """调度器的持久化状态（如访问日志读取位置）"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM refresh_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO refresh_state (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+
+class RateBudget:
+    """全局爬取预算（令牌桶）：平均每小时最多 pages_per_hour 个页面，最多累积 burst 个"""
+
+    def __init__(self, pages_per_hour: float, burst: int, now: Optional[float] = None):
+        self.rate = pages_per_hour / 3600
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.time() if now is None else now
+
+    def available(self, now: Optional[float] = None) -> int:
+        """当前可以爬取的页面数"""
+        now = time.time() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return int(self.tokens)
+
+    def spend(self, pages: int):
+        self.tokens -= pages
+
+    def wait_time(self, pages: int = 1) -> float:
+        """累积到 pages 个页面的预算还需要的秒数"""
+        if self.tokens >= pages:
+            return 0.0
+        return (pages - self.tokens) / self.rate if self.rate > 0 else float('inf')
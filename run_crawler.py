@@ -16,13 +16,14 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 
-def run_crawler(mode='test', spider_name='baidu_baike'):
+def run_crawler(mode='test', spider_name='baidu_baike', force=False):
     """
     运行爬虫
     
     Args:
         mode: 'test' 或 'full'，测试模式只爬取前3位皇帝
         spider_name: 爬虫名称，'baidu_baike' 或 'wikipedia'
+        force: 是否重新处理内容未变化的页面
     """
     print("=" * 80)
     print(f"🚀 启动爬虫：{spider_name}")
@@ -34,6 +35,7 @@ def run_crawler(mode='test', spider_name='baidu_baike'):
     
     # 覆盖爬取模式配置
     settings.set('CRAWL_MODE', mode)
+    settings.set('FRESHNESS_FORCE_REFRESH', force)
     
     # 创建日志目录
     log_dir = project_root / 'crawler' / 'data' / 'logs'
@@ -97,6 +99,12 @@ def main():
         help='选择爬虫：baidu_baike, wikipedia, 或 all（两个都爬）'
     )
     
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='重新处理内容未变化的页面（默认跳过自上次爬取后未变化的页面）'
+    )
+    
     args = parser.parse_args()
     
     print("\n" + "🚀 HistoryGogo 数据爬取工具".center(80, "="))
@@ -115,14 +123,14 @@ def main():
     # 运行爬虫
     if args.spider == 'all':
         # 先爬百度百科
-        run_crawler(args.mode, 'baidu_baike')
+        run_crawler(args.mode, 'baidu_baike', args.force)
         print("\n⏳ 等待5秒后开始爬取维基百科...\n")
         import time
         time.sleep(5)
         # 再爬维基百科
-        run_crawler(args.mode, 'wikipedia')
+        run_crawler(args.mode, 'wikipedia', args.force)
     else:
-        run_crawler(args.mode, args.spider)
+        run_crawler(args.mode, args.spider, args.force)
     
     print("\n" + "=" * 80)
     print("✅ 所有爬取任务完成！")
@@ -0,0 +1,49 @@
+"""
+管理API路由
+慢查询日志查看（压测时发现全表扫描等问题语句）
+"""
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Optional
+from server.config.settings import settings
+from server.database.sqlite_manager import SQLiteManager
+
+router = APIRouter()
+
+
+def verify_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """要求请求头 X-Admin-Token 与 ADMIN_TOKEN 一致；未配置 ADMIN_TOKEN 时管理接口不可用"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理接口未启用（未配置 ADMIN_TOKEN）")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="管理令牌无效")
+
+
+@router.get("/slow-queries", dependencies=[Depends(verify_admin_token)])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="返回条数"),
+    full_scan_only: bool = Query(False, description="只返回执行计划包含全表扫描（SCAN）的语句")
+):
+    """
+    获取最近的慢查询（最新的在前）
+
+    每条包含：耗时、脱敏后的语句（字符串字面量替换为 ?）、参数类型、EXPLAIN QUERY PLAN、是否全表扫描
+    """
+    slow_query_log = SQLiteManager.slow_query_log
+    if slow_query_log is None:
+        return {"enabled": False, "stats": None, "queries": []}
+
+    return {
+        "enabled": True,
+        "stats": slow_query_log.stats(),
+        "queries": slow_query_log.entries(limit, full_scan_only)
+    }
+
+
+@router.delete("/slow-queries", dependencies=[Depends(verify_admin_token)])
+async def clear_slow_queries():
+    """清空慢查询缓冲区（日志文件保留）"""
+    if SQLiteManager.slow_query_log is not None:
+        SQLiteManager.slow_query_log.clear()
+    return {"cleared": True}
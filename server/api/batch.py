@@ -0,0 +1,83 @@
+"""
+批量查询API路由
+客户端一个页面需要的皇帝、人物、事件详情一次请求取回，
+每种实体只执行固定次数的 IN (...) 查询
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Dict, Optional, Tuple, Type
+from server.schemas.batch import BatchRequest, BatchResponse
+from server.schemas.emperor import EmperorDetail
+from server.schemas.event import EventDetail
+from server.schemas.person import PersonDetail
+from server.schemas.projection import parse_fields, project
+from server.database.dependencies import get_db
+from server.database.sqlite_manager import SQLiteManager
+from server.repositories.emperor_repository import EmperorRepository
+from server.repositories.event_repository import EventRepository
+from server.repositories.person_repository import PersonRepository
+from server.config.settings import settings
+
+router = APIRouter()
+
+
+@router.post("", response_model=BatchResponse)
+async def batch_get(
+    request: BatchRequest,
+    db: SQLiteManager = Depends(get_db)
+):
+    """
+    批量获取皇帝、人物、事件详情
+
+    请求示例：
+    {"emperor_ids": ["ming_emperor_001"], "person_ids": [...], "event_ids": [...],
+     "person_fields": "name,birth_date,death_date"}
+    """
+    total_ids = len(request.emperor_ids) + len(request.person_ids) + len(request.event_ids)
+    if total_ids > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"批量查询ID数量超出限制: {total_ids} > {settings.BATCH_MAX_IDS}"
+        )
+
+    try:
+        emperor_fields = parse_fields(request.emperor_fields, EmperorDetail, "emperor_id")
+        person_fields = parse_fields(request.person_fields, PersonDetail, "person_id")
+        event_fields = parse_fields(request.event_fields, EventDetail, "event_id")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        emperors = EmperorRepository(db).get_details(request.emperor_ids, emperor_fields)
+        persons = PersonRepository(db).get_details(request.person_ids, person_fields)
+        events = EventRepository(db).get_details(request.event_ids, event_fields)
+
+        not_found = []
+        for ids, found in ((request.emperor_ids, emperors), (request.person_ids, persons), (request.event_ids, events)):
+            not_found.extend(id_ for id_ in dict.fromkeys(ids) if id_ not in found)
+
+        if emperor_fields or person_fields or event_fields:
+            # 投影响应只包含请求的字段，未指定字段的实体仍按完整 Schema 返回
+            return JSONResponse({
+                "emperors": _serialize(EmperorDetail, emperor_fields, emperors),
+                "persons": _serialize(PersonDetail, person_fields, persons),
+                "events": _serialize(EventDetail, event_fields, events),
+                "not_found": not_found
+            })
+
+        return {
+            "emperors": emperors,
+            "persons": persons,
+            "events": events,
+            "not_found": not_found
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量查询失败: {str(e)}")
+
+
+def _serialize(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]], items: Dict[str, dict]) -> Dict[str, dict]:
+    """按 Schema（或字段投影）序列化详情"""
+    if fields:
+        return {id_: project(schema, fields, item) for id_, item in items.items()}
+    return {id_: schema.model_validate(item).model_dump(mode="json") for id_, item in items.items()}
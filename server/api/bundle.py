@@ -0,0 +1,98 @@
+"""
+离线数据包API路由
+客户端下载朝代全量包（gzip 压缩的 SQLite 快照）后本地查询，之后只拉取增量包
+
+构建数据包（导出、VACUUM、gzip）是阻塞操作，路由均为同步函数，由 FastAPI 放到线程池执行，不阻塞事件循环
+"""
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, Response
+from typing import Optional
+from server.database.dependencies import get_db
+from server.database.sqlite_manager import SQLiteManager
+from server.services.bundle_service import BundleService, BundleNotFoundError
+
+router = APIRouter()
+
+
+def _version_headers(entry: dict) -> dict:
+    return {
+        "ETag": f'"{entry["version"]}"',
+        "X-Bundle-Version": entry["version"],
+        "X-Content-Hash": entry["content_hash"],
+    }
+
+
+@router.get("/{dynasty_id}/manifest")
+def get_bundle_manifest(
+    dynasty_id: str,
+    db: SQLiteManager = Depends(get_db)
+):
+    """获取数据包版本清单（latest 为最新版本，versions 为可作为增量起点的版本）"""
+    service = BundleService(db)
+    try:
+        service.ensure_latest(dynasty_id)
+        return service.load_manifest(dynasty_id)
+    except BundleNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取数据包清单失败: {str(e)}")
+
+
+@router.get("/{dynasty_id}")
+def get_bundle(
+    dynasty_id: str,
+    if_none_match: Optional[str] = Header(None),
+    db: SQLiteManager = Depends(get_db)
+):
+    """
+    下载朝代全量包
+
+    返回 gzip 压缩的 SQLite 文件，包含 dynasties、emperors、events、persons、works、
+    person_emperor、event_person_relation、person_relations 以及预计算的 timeline 表；
+    If-None-Match 与最新版本一致时返回 304
+    """
+    service = BundleService(db)
+    try:
+        latest = service.ensure_latest(dynasty_id)
+    except BundleNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"构建数据包失败: {str(e)}")
+
+    headers = _version_headers(latest)
+    if if_none_match and if_none_match.strip('W/"') == latest["version"]:
+        return Response(status_code=304, headers=headers)
+
+    return FileResponse(
+        service.snapshot_path(dynasty_id, latest["version"]),
+        media_type="application/gzip",
+        filename=f"{dynasty_id}_{latest['version']}.sqlite.gz",
+        headers=headers
+    )
+
+
+@router.get("/{dynasty_id}/delta")
+def get_bundle_delta(
+    dynasty_id: str,
+    from_version: str = Query(..., description="客户端当前的数据包版本"),
+    db: SQLiteManager = Depends(get_db)
+):
+    """
+    下载从 from_version 到最新版本的增量包（gzip 压缩的 JSON）
+
+    from_version 已过期或不存在时返回 404，客户端应改为下载全量包
+    """
+    service = BundleService(db)
+    try:
+        latest, path = service.delta(dynasty_id, from_version)
+    except BundleNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"生成增量包失败: {str(e)}")
+
+    return FileResponse(
+        path,
+        media_type="application/gzip",
+        filename=path.name,
+        headers=_version_headers(latest)
+    )
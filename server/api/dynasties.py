@@ -22,8 +22,10 @@ async def get_dynasties(
         sql = """
             SELECT 
                 d.*,
-                (SELECT COUNT(*) FROM emperors WHERE dynasty_id = d.dynasty_id) as emperor_count
+                COALESCE(c.value, 0) as emperor_count
             FROM dynasties d
+            LEFT JOIN entity_counters c
+                ON c.entity_type = 'dynasty' AND c.entity_id = d.dynasty_id AND c.counter = 'emperor_count'
             ORDER BY start_year
             LIMIT ? OFFSET ?
         """
@@ -40,7 +42,7 @@ async def get_dynasties(
                 "founder": row[5],
                 "description": row[6],
                 "data_source": row[7],
-                "emperor_count": row[10] if len(row) > 10 else 0
+                "emperor_count": row[-1]
             })
         
         return dynasties
@@ -58,8 +60,10 @@ async def get_dynasty(
         sql = """
             SELECT 
                 d.*,
-                (SELECT COUNT(*) FROM emperors WHERE dynasty_id = d.dynasty_id) as emperor_count
+                COALESCE(c.value, 0) as emperor_count
             FROM dynasties d
+            LEFT JOIN entity_counters c
+                ON c.entity_type = 'dynasty' AND c.entity_id = d.dynasty_id AND c.counter = 'emperor_count'
             WHERE d.dynasty_id = ?
         """
         row = db.fetch_one(sql, (dynasty_id,))
@@ -78,7 +82,7 @@ async def get_dynasty(
             "data_source": row[7],
             "created_at": row[8],
             "updated_at": row[9],
-            "emperor_count": row[10] if len(row) > 10 else 0
+            "emperor_count": row[-1]
         }
     except HTTPException:
         raise
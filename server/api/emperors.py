@@ -2,13 +2,25 @@
 皇帝API路由
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 from server.schemas.emperor import EmperorResponse, EmperorSummary, EmperorDetail
+from server.schemas.person import EmperorPerson
+from server.schemas.projection import parse_fields, project
 from server.database.dependencies import get_db
 from server.database.sqlite_manager import SQLiteManager
+from server.repositories.emperor_repository import EmperorRepository
+from server.api.responses import RowEncoder
 
 router = APIRouter()
 
+# 列表查询的列（与 EmperorSummary 字段一致）
+EMPEROR_SUMMARY_ENCODER = RowEncoder(
+    EmperorSummary,
+    ("emperor_id", "name", "temple_name", "reign_title", "reign_start", "reign_end",
+     "reign_duration", "dynasty_order", "portrait_url")
+)
+
 
 @router.get("/", response_model=List[EmperorSummary])
 async def get_emperors(
@@ -39,21 +51,7 @@ async def get_emperors(
             """
             rows = db.fetch_all(sql, (limit, skip))
         
-        emperors = []
-        for row in rows:
-            emperors.append({
-                "emperor_id": row[0],
-                "name": row[1],
-                "temple_name": row[2],
-                "reign_title": row[3],
-                "reign_start": row[4],
-                "reign_end": row[5],
-                "reign_duration": row[6],
-                "dynasty_order": row[7],
-                "portrait_url": row[8]
-            })
-        
-        return emperors
+        return EMPEROR_SUMMARY_ENCODER.response(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取皇帝列表失败: {str(e)}")
 
@@ -61,44 +59,68 @@ async def get_emperors(
 @router.get("/{emperor_id}", response_model=EmperorDetail)
 async def get_emperor(
     emperor_id: str,
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔（如 name,reign_start），默认返回全部字段"),
     db: SQLiteManager = Depends(get_db)
 ):
     """获取皇帝详情"""
     try:
-        sql = """
-            SELECT e.*,
-                   (SELECT COUNT(*) FROM events WHERE emperor_id = e.emperor_id) as event_count,
-                   (SELECT COUNT(*) FROM persons WHERE related_emperors LIKE '%' || e.emperor_id || '%') as person_count
-            FROM emperors e
-            WHERE e.emperor_id = ?
-        """
-        row = db.fetch_one(sql, (emperor_id,))
+        selected = parse_fields(fields, EmperorDetail, "emperor_id")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        emperor = EmperorRepository(db).get_detail(emperor_id, selected)
         
-        if not row:
+        if not emperor:
             raise HTTPException(status_code=404, detail=f"皇帝不存在: {emperor_id}")
         
-        return {
-            "emperor_id": row[0],
-            "dynasty_id": row[1],
-            "name": row[2],
-            "temple_name": row[3],
-            "reign_title": row[4],
-            "birth_date": row[5],
-            "death_date": row[6],
-            "reign_start": row[7],
-            "reign_end": row[8],
-            "reign_duration": row[9],
-            "dynasty_order": row[10],
-            "biography": row[11],
-            "achievements": row[12],
-            "portrait_url": row[13],
-            "data_source": row[14],
-            "event_count": row[17] if len(row) > 17 else 0,
-            "person_count": row[18] if len(row) > 18 else 0,
-            "created_at": row[15] if len(row) > 15 else None,
-            "updated_at": row[16] if len(row) > 16 else None
-        }
+        if selected:
+            # 投影响应只包含请求的字段
+            return JSONResponse(project(EmperorDetail, selected, emperor))
+        return emperor
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取皇帝详情失败: {str(e)}")
+
+
+@router.get("/{emperor_id}/persons", response_model=List[EmperorPerson])
+async def get_emperor_persons(
+    emperor_id: str,
+    person_type: str = Query(None, description="按人物类型筛选"),
+    db: SQLiteManager = Depends(get_db)
+):
+    """获取皇帝在位期间的相关人物（臣子等）"""
+    try:
+        sql = """
+            SELECT p.person_id, p.name, p.person_type, p.alias, p.birth_date, p.death_date,
+                   p.dynasty_id, pe.position
+            FROM person_emperor pe
+            JOIN persons p ON p.person_id = pe.person_id
+            WHERE pe.emperor_id = ?
+        """
+        params = [emperor_id]
+        
+        if person_type:
+            sql += " AND p.person_type = ?"
+            params.append(person_type)
+        
+        sql += " ORDER BY p.birth_date, p.name"
+        rows = db.fetch_all(sql, tuple(params))
+        
+        persons = []
+        for row in rows:
+            persons.append({
+                "person_id": row[0],
+                "name": row[1],
+                "person_type": row[2],
+                "alias": row[3],
+                "birth_date": row[4],
+                "death_date": row[5],
+                "dynasty_id": row[6],
+                "position": row[7]
+            })
+        
+        return persons
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取皇帝相关人物失败: {str(e)}")
@@ -2,13 +2,22 @@
 事件API路由
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from server.schemas.event import EventSummary, EventDetail
+from server.schemas.projection import parse_fields, project
 from server.database.dependencies import get_db
 from server.database.sqlite_manager import SQLiteManager
+from server.repositories.event_repository import EventRepository
+from server.api.responses import RowEncoder
 
 router = APIRouter()
 
+# 列表查询的列（与 EventSummary 字段一致）
+EVENT_SUMMARY_ENCODER = RowEncoder(
+    EventSummary, ("event_id", "title", "event_type", "start_date", "end_date", "location")
+)
+
 
 @router.get("/", response_model=List[EventSummary])
 async def get_events(
@@ -23,7 +32,7 @@ async def get_events(
     try:
         # 构建SQL查询
         sql = """
-            SELECT event_id, title, event_type, start_date, end_date, location, dynasty_id, emperor_id
+            SELECT event_id, title, event_type, start_date, end_date, location
             FROM events
             WHERE 1=1
         """
@@ -46,20 +55,7 @@ async def get_events(
         
         rows = db.fetch_all(sql, tuple(params))
         
-        events = []
-        for row in rows:
-            events.append({
-                "event_id": row[0],
-                "title": row[1],
-                "event_type": row[2],
-                "start_date": row[3],
-                "end_date": row[4],
-                "location": row[5],
-                "dynasty_id": row[6],
-                "emperor_id": row[7]
-            })
-        
-        return events
+        return EVENT_SUMMARY_ENCODER.response(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取事件列表失败: {str(e)}")
 
@@ -67,48 +63,25 @@ async def get_events(
 @router.get("/{event_id}", response_model=EventDetail)
 async def get_event(
     event_id: str,
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔（如 title,start_date），默认返回全部字段"),
     db: SQLiteManager = Depends(get_db)
 ):
     """获取事件详情"""
     try:
-        sql = """
-            SELECT e.*,
-                   (SELECT COUNT(*) FROM event_persons WHERE event_id = e.event_id) as person_count
-            FROM events e
-            WHERE e.event_id = ?
-        """
-        row = db.fetch_one(sql, (event_id,))
+        selected = parse_fields(fields, EventDetail, "event_id")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        event = EventRepository(db).get_detail(event_id, selected)
         
-        if not row:
+        if not event:
             raise HTTPException(status_code=404, detail=f"事件不存在: {event_id}")
         
-        # 获取相关人物ID列表
-        related_persons_sql = """
-            SELECT person_id FROM event_persons WHERE event_id = ?
-        """
-        person_rows = db.fetch_all(related_persons_sql, (event_id,))
-        related_persons = [p[0] for p in person_rows] if person_rows else []
-        
-        return {
-            "event_id": row[0],
-            "dynasty_id": row[1],
-            "emperor_id": row[2],
-            "title": row[3],
-            "event_type": row[4],
-            "start_date": row[5],
-            "end_date": row[6],
-            "location": row[7],
-            "description": row[8],
-            "participants": row[9],
-            "casualties": row[10],
-            "result": row[11],
-            "significance": row[12],
-            "data_source": row[13],
-            "related_persons": related_persons,
-            "person_count": row[16] if len(row) > 16 else 0,
-            "created_at": row[14] if len(row) > 14 else None,
-            "updated_at": row[15] if len(row) > 15 else None
-        }
+        if selected:
+            # 投影响应只包含请求的字段
+            return JSONResponse(project(EventDetail, selected, event))
+        return event
     except HTTPException:
         raise
     except Exception as e:
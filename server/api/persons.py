@@ -2,13 +2,22 @@
 人物API路由
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 from server.schemas.person import PersonSummary, PersonDetail
+from server.schemas.projection import parse_fields, project
 from server.database.dependencies import get_db
 from server.database.sqlite_manager import SQLiteManager
+from server.repositories.person_repository import PersonRepository
+from server.api.responses import RowEncoder
 
 router = APIRouter()
 
+# 列表查询的列（与 PersonSummary 字段一致）
+PERSON_SUMMARY_ENCODER = RowEncoder(
+    PersonSummary, ("person_id", "name", "person_type", "alias", "birth_date", "death_date", "dynasty_id")
+)
+
 
 @router.get("/", response_model=List[PersonSummary])
 async def get_persons(
@@ -41,19 +50,7 @@ async def get_persons(
         
         rows = db.fetch_all(sql, tuple(params))
         
-        persons = []
-        for row in rows:
-            persons.append({
-                "person_id": row[0],
-                "name": row[1],
-                "person_type": row[2],
-                "alias": row[3],
-                "birth_date": row[4],
-                "death_date": row[5],
-                "dynasty_id": row[6]
-            })
-        
-        return persons
+        return PERSON_SUMMARY_ENCODER.response(rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取人物列表失败: {str(e)}")
 
@@ -61,52 +58,25 @@ async def get_persons(
 @router.get("/{person_id}", response_model=PersonDetail)
 async def get_person(
     person_id: str,
+    fields: Optional[str] = Query(None, description="返回字段，逗号分隔（如 name,birth_date），默认返回全部字段"),
     db: SQLiteManager = Depends(get_db)
 ):
     """获取人物详情"""
     try:
-        sql = """
-            SELECT p.*,
-                   (SELECT COUNT(*) FROM event_persons WHERE person_id = p.person_id) as event_count,
-                   (SELECT COUNT(*) FROM works WHERE author_id = p.person_id) as work_count
-            FROM persons p
-            WHERE p.person_id = ?
-        """
-        row = db.fetch_one(sql, (person_id,))
+        selected = parse_fields(fields, PersonDetail, "person_id")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        person = PersonRepository(db).get_detail(person_id, selected)
         
-        if not row:
+        if not person:
             raise HTTPException(status_code=404, detail=f"人物不存在: {person_id}")
         
-        # 获取相关皇帝ID列表
-        related_emperors = []
-        if row[11]:  # related_emperors字段
-            related_emperors = row[11].split(',') if ',' in row[11] else [row[11]]
-        
-        # 获取作品列表
-        works_sql = "SELECT title FROM works WHERE author_id = ?"
-        work_rows = db.fetch_all(works_sql, (person_id,))
-        works = [w[0] for w in work_rows] if work_rows else []
-        
-        return {
-            "person_id": row[0],
-            "dynasty_id": row[1],
-            "name": row[2],
-            "person_type": row[3],
-            "alias": row[4],
-            "birth_date": row[5],
-            "death_date": row[6],
-            "position": row[7],
-            "biography": row[8],
-            "achievements": row[9],
-            "data_source": row[10],
-            "related_emperors": related_emperors,
-            "style": row[12] if len(row) > 12 else None,
-            "works": works,
-            "event_count": row[15] if len(row) > 15 else 0,
-            "work_count": row[16] if len(row) > 16 else 0,
-            "created_at": row[13] if len(row) > 13 else None,
-            "updated_at": row[14] if len(row) > 14 else None
-        }
+        if selected:
+            # 投影响应只包含请求的字段
+            return JSONResponse(project(PersonDetail, selected, person))
+        return person
     except HTTPException:
         raise
     except Exception as e:
@@ -9,8 +9,9 @@ from server.database.neo4j_manager import get_neo4j_manager, Neo4jManager
 router = APIRouter()
 
 
+# 同步函数由线程池执行，查询期间事件循环可以接收并合并相同请求（SingleFlightMiddleware）
 @router.get("/person/{person_id}")
-async def get_person_relations(
+def get_person_relations(
     person_id: str,
     depth: int = Query(2, ge=1, le=3, description="关系深度（1-3层）"),
     relation_types: Optional[str] = Query(None, description="关系类型，逗号分隔"),
@@ -0,0 +1,69 @@
+"""
+快速 JSON 响应
+列表/时间轴等大响应直接把查询结果编码为 JSON 字节，跳过逐行 Pydantic 校验和 jsonable_encoder；
+路由上的 response_model 保留，只用于 OpenAPI 文档。
+由 settings.FAST_JSON_RESPONSES 控制，关闭时返回普通数据、由 FastAPI 按 response_model 校验
+"""
+import json
+from typing import Any, Iterable, Sequence, Type, Union
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from server.config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """编码为 JSON 字节（中文不转义）"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson（可选）编码的 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RowEncoder:
+    """
+    查询结果 → JSON 的编码器
+
+    构造时（模块导入时）按 Schema 校验一次列名：列必须是 Schema 的字段，且覆盖所有必填字段；
+    之后每次请求直接按列名组装，不再逐行校验
+    """
+
+    def __init__(self, schema: Type[BaseModel], columns: Sequence[str]):
+        fields = schema.model_fields
+        unknown = [name for name in columns if name not in fields]
+        if unknown:
+            raise ValueError(f"{schema.__name__} 不包含字段: {', '.join(unknown)}")
+        missing = [name for name, field in fields.items() if field.is_required() and name not in columns]
+        if missing:
+            raise ValueError(f"{schema.__name__} 缺少必填字段: {', '.join(missing)}")
+
+        self.schema = schema
+        self.columns = tuple(columns)
+
+    def to_dicts(self, rows: Iterable[Sequence]) -> list:
+        """查询结果转为字典列表（列顺序与 columns 一致）"""
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in rows]
+
+    def response(self, rows: Iterable[Sequence]) -> Union[FastJSONResponse, list]:
+        """列表响应：开启 FAST_JSON_RESPONSES 时直接编码，否则交由 response_model 校验"""
+        return json_response(self.to_dicts(rows))
+
+
+def json_response(content: Any) -> Any:
+    """开启 FAST_JSON_RESPONSES 时直接编码为响应（跳过 response_model 校验），否则原样返回"""
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(content)
+    return content
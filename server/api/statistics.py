@@ -9,8 +9,9 @@ from server.database.sqlite_manager import SQLiteManager
 router = APIRouter()
 
 
+# 同步函数由线程池执行，查询期间事件循环可以接收并合并相同请求（SingleFlightMiddleware）
 @router.get("/overview")
-async def get_overview_statistics(
+def get_overview_statistics(
     db: SQLiteManager = Depends(get_db)
 ):
     """
@@ -24,32 +25,12 @@ async def get_overview_statistics(
     - 作品数量
     """
     try:
-        stats = {}
-        
-        # 统计朝代数量
-        dynasty_count_sql = "SELECT COUNT(*) FROM dynasties"
-        dynasty_count = db.fetch_one(dynasty_count_sql)
-        stats["dynasty_count"] = dynasty_count[0] if dynasty_count else 0
-        
-        # 统计皇帝数量
-        emperor_count_sql = "SELECT COUNT(*) FROM emperors"
-        emperor_count = db.fetch_one(emperor_count_sql)
-        stats["emperor_count"] = emperor_count[0] if emperor_count else 0
-        
-        # 统计事件数量
-        event_count_sql = "SELECT COUNT(*) FROM events"
-        event_count = db.fetch_one(event_count_sql)
-        stats["event_count"] = event_count[0] if event_count else 0
-        
-        # 统计人物数量
-        person_count_sql = "SELECT COUNT(*) FROM persons"
-        person_count = db.fetch_one(person_count_sql)
-        stats["person_count"] = person_count[0] if person_count else 0
-        
-        # 统计作品数量
-        work_count_sql = "SELECT COUNT(*) FROM works"
-        work_count = db.fetch_one(work_count_sql)
-        stats["work_count"] = work_count[0] if work_count else 0
+        # 读取触发器维护的全库计数
+        counters = db.get_counters('global')
+        stats = {
+            name: counters.get(name, 0)
+            for name in ("dynasty_count", "emperor_count", "event_count", "person_count", "work_count")
+        }
         
         return stats
         
@@ -58,7 +39,7 @@ async def get_overview_statistics(
 
 
 @router.get("/dynasty/{dynasty_id}")
-async def get_dynasty_statistics(
+def get_dynasty_statistics(
     dynasty_id: str,
     db: SQLiteManager = Depends(get_db)
 ):
@@ -139,7 +120,7 @@ async def get_dynasty_statistics(
 
 
 @router.get("/emperor/{emperor_id}")
-async def get_emperor_statistics(
+def get_emperor_statistics(
     emperor_id: str,
     db: SQLiteManager = Depends(get_db)
 ):
@@ -188,6 +169,23 @@ async def get_emperor_statistics(
                 stats["event_count_by_type"][row[0]] = row[1]
                 stats["total_events"] += row[1]
         
+        # 统计相关人物（按类型，基于 person_emperor 关联）
+        person_type_sql = """
+            SELECT p.person_type, COUNT(*) as count
+            FROM person_emperor pe
+            JOIN persons p ON p.person_id = pe.person_id
+            WHERE pe.emperor_id = ?
+            GROUP BY p.person_type
+            ORDER BY count DESC
+        """
+        person_type_rows = db.fetch_all(person_type_sql, (emperor_id,))
+        stats["person_count_by_type"] = {}
+        stats["total_persons"] = 0
+        if person_type_rows:
+            for row in person_type_rows:
+                stats["person_count_by_type"][row[0]] = row[1]
+                stats["total_persons"] += row[1]
+        
         # 获取事件列表（TOP 10）
         top_events_sql = """
             SELECT event_id, title, event_type, start_date
@@ -216,7 +214,7 @@ async def get_emperor_statistics(
 
 
 @router.get("/trends/timeline")
-async def get_timeline_trends(
+def get_timeline_trends(
     dynasty_id: str,
     db: SQLiteManager = Depends(get_db)
 ):
@@ -277,7 +275,7 @@ async def get_timeline_trends(
 
 
 @router.get("/rankings/emperors")
-async def get_emperor_rankings(
+def get_emperor_rankings(
     metric: str = "reign_duration",
     limit: int = 10,
     db: SQLiteManager = Depends(get_db)
@@ -288,6 +286,7 @@ async def get_emperor_rankings(
     支持的排名指标：
     - reign_duration: 在位时长
     - event_count: 相关事件数量
+    - person_count: 相关人物数量
     """
     try:
         if metric == "reign_duration":
@@ -307,6 +306,15 @@ async def get_emperor_rankings(
                 ORDER BY event_count DESC
                 LIMIT ?
             """
+        elif metric == "person_count":
+            sql = """
+                SELECT e.emperor_id, e.name, e.temple_name, e.dynasty_id, COUNT(pe.person_id) as person_count
+                FROM emperors e
+                LEFT JOIN person_emperor pe ON e.emperor_id = pe.emperor_id
+                GROUP BY e.emperor_id
+                ORDER BY person_count DESC
+                LIMIT ?
+            """
         else:
             raise HTTPException(status_code=400, detail=f"不支持的排名指标: {metric}")
         
@@ -321,7 +329,7 @@ async def get_emperor_rankings(
                     "name": row[1],
                     "temple_name": row[2],
                     "value": row[3] if metric == "reign_duration" else row[4],
-                    "dynasty_id": row[3] if metric == "reign_duration" else row[4]
+                    "dynasty_id": row[4] if metric == "reign_duration" else row[3]
                 })
         
         return {
@@ -0,0 +1,78 @@
+"""
+增量同步API路由
+客户端/缓存保存上次同步到的版本，只拉取之后的变更（由 change_log 触发器记录）
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, List, Optional
+from server.schemas.sync import SyncResponse
+from server.database.dependencies import get_db
+from server.database.sqlite_manager import SQLiteManager
+from server.repositories.emperor_repository import EmperorRepository
+from server.repositories.event_repository import EventRepository
+from server.repositories.person_repository import PersonRepository
+
+router = APIRouter()
+
+ENTITY_TYPES = ("dynasty", "emperor", "event", "person", "work")
+
+# 可随变更返回详情的实体类型
+DETAIL_REPOSITORIES = {
+    "emperor": EmperorRepository,
+    "event": EventRepository,
+    "person": PersonRepository,
+}
+
+
+@router.get("", response_model=SyncResponse)
+async def sync_changes(
+    since: int = Query(0, ge=0, description="上次同步到的版本（首次同步传 0）"),
+    limit: int = Query(500, ge=1, le=5000, description="每页最多读取的变更日志条数"),
+    entity_types: Optional[str] = Query(None, description="实体类型，逗号分隔（dynasty,emperor,event,person,work），默认全部"),
+    include_data: bool = Query(False, description="是否随 upsert 返回皇帝/人物/事件的当前详情"),
+    db: SQLiteManager = Depends(get_db)
+):
+    """
+    分页读取 since 之后的变更
+
+    客户端循环请求（since 取上一页的 next_since）直到 has_more 为 false；
+    按顺序应用 changes：upsert 重新获取（或使用 data），delete 删除本地记录
+    """
+    type_list = None
+    if entity_types:
+        type_list = [t.strip() for t in entity_types.split(",") if t.strip()]
+        unknown = [t for t in type_list if t not in ENTITY_TYPES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"不支持的实体类型: {', '.join(unknown)}")
+
+    try:
+        latest_version = db.get_change_version()
+        changes, next_since, has_more = db.get_changes(since, limit, type_list)
+
+        if include_data:
+            _attach_details(db, changes)
+
+        return {
+            "since": since,
+            "next_since": next_since,
+            "latest_version": latest_version,
+            "has_more": has_more,
+            "changes": changes
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取变更失败: {str(e)}")
+
+
+def _attach_details(db: SQLiteManager, changes: List[dict]):
+    """为 upsert 变更附加实体详情（每种实体一次批量查询）"""
+    ids: Dict[str, List[str]] = {entity_type: [] for entity_type in DETAIL_REPOSITORIES}
+    for change in changes:
+        if change["op"] == "upsert" and change["entity_type"] in ids:
+            ids[change["entity_type"]].append(change["entity_id"])
+
+    details = {
+        entity_type: DETAIL_REPOSITORIES[entity_type](db).get_details(entity_ids) if entity_ids else {}
+        for entity_type, entity_ids in ids.items()
+    }
+    for change in changes:
+        if change["op"] == "upsert" and change["entity_type"] in details:
+            change["data"] = details[change["entity_type"]].get(change["entity_id"])
@@ -0,0 +1,314 @@
+"""
+响应缓存
+数据只在爬虫写库时变化，读接口的响应按 路由 + 规范化查询参数 缓存；
+数据版本取 change_log 的最新 version（爬虫管道写库时由触发器递增），版本变化后旧缓存全部失效
+
+后端：
+- LRUCacheBackend: 进程内 LRU，按响应字节数限制容量（默认）
+- RedisCacheBackend: 多进程共享（设置 CACHE_REDIS_URL 且安装 redis 时使用，否则退回进程内 LRU）
+"""
+import asyncio
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from server.config.settings import settings
+from server.database.sqlite_manager import SQLiteManager
+from server.middleware import MSGPACK_MEDIA_TYPE, accepts, msgpack, negotiate_encoding
+
+try:
+    import redis
+except ImportError:  # redis 为可选依赖，未安装时使用进程内缓存
+    redis = None
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    data_version: int
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(key) + len(value) for key, value in self.headers)
+
+
+class CacheBackend:
+    """缓存后端接口"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedResponse, ttl: int):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LRUCacheBackend(CacheBackend):
+    """进程内 LRU 缓存，总字节数超过 max_bytes 时淘汰最久未使用的条目"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: CachedResponse, ttl: int):
+        if value.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self.current_bytes += value.size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        stats.update(entries=len(self._entries), bytes=self.current_bytes, max_bytes=self.max_bytes)
+        return stats
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis 共享缓存（过期由 Redis TTL 负责，容量由 Redis maxmemory 策略负责）"""
+
+    KEY_PREFIX = "historygogo:response:"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        data = self.client.get(self.KEY_PREFIX + key)
+        return pickle.loads(data) if data else None
+
+    def set(self, key: str, value: CachedResponse, ttl: int):
+        self.client.setex(self.KEY_PREFIX + key, ttl, pickle.dumps(value))
+
+    def clear(self):
+        for key in self.client.scan_iter(self.KEY_PREFIX + "*"):
+            self.client.delete(key)
+
+
+def create_backend() -> CacheBackend:
+    """按配置创建缓存后端"""
+    if settings.CACHE_REDIS_URL:
+        if redis is not None:
+            return RedisCacheBackend(settings.CACHE_REDIS_URL)
+        print("⚠️ 未安装 redis，响应缓存使用进程内 LRU")
+    return LRUCacheBackend(settings.CACHE_MAX_BYTES)
+
+
+class DataVersion:
+    """
+    数据版本（change_log 最新 version）
+
+    最多每 CACHE_VERSION_CHECK_INTERVAL 秒查询一次数据库
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db = SQLiteManager(db_path or settings.SQLITE_DB_PATH)
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at >= settings.CACHE_VERSION_CHECK_INTERVAL:
+            with self._lock:
+                if now - self._checked_at >= settings.CACHE_VERSION_CHECK_INTERVAL:
+                    try:
+                        self._version = self.db.get_change_version()
+                    except Exception:
+                        # 读取失败（如数据库尚未初始化）时版本记为 -1，此时不写入缓存
+                        self._version = -1
+                    self._checked_at = now
+        return self._version
+
+
+def route_ttl(path: str) -> Optional[int]:
+    """
+    路由的缓存时间（秒），不在 CACHE_ROUTES 中的路由返回 None
+
+    CACHE_ROUTE_TTLS 按路径前缀覆盖默认的 CACHE_TTL，最长匹配的前缀优先
+    """
+    if not any(path.startswith(prefix) for prefix in settings.CACHE_ROUTES):
+        return None
+    matched = [prefix for prefix in settings.CACHE_ROUTE_TTLS if path.startswith(prefix)]
+    if not matched:
+        return settings.CACHE_TTL
+    return settings.CACHE_ROUTE_TTLS[max(matched, key=len)]
+
+
+def cache_key(scope) -> str:
+    """缓存键：路径 + 排序后的查询参数 + 协商出的响应格式/压缩算法"""
+    headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+    query = urlencode(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+    msgpack_flag = "msgpack" if msgpack is not None and accepts(headers.get("accept", ""), MSGPACK_MEDIA_TYPE) else "json"
+    encoding = negotiate_encoding(headers.get("accept-encoding", "")) or "identity"
+    return f"{scope['path'].rstrip('/')}?{query}|{msgpack_flag}|{encoding}"
+
+
+class ResponseCacheMiddleware:
+    """
+    响应缓存中间件（ASGI）
+
+    只缓存 CACHE_ROUTES 中路由的 GET 200 响应，缓存的是编码/压缩后的字节；
+    响应头 X-Cache 标明 HIT / MISS
+    """
+
+    def __init__(self, app, backend: CacheBackend = None, data_version: DataVersion = None):
+        self.app = app
+        self.backend = backend or create_backend()
+        self.data_version = data_version or DataVersion()
+
+    async def __call__(self, scope, receive, send):
+        if not settings.CACHE_ENABLED or scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        ttl = route_ttl(scope["path"])
+        if ttl is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = cache_key(scope)
+        version = self.data_version.current()
+        entry = self.backend.get(key)
+        if entry is not None and entry.data_version == version:
+            self.backend.hits += 1
+            await send({"type": "http.response.start", "status": entry.status,
+                        "headers": entry.headers + [(b"x-cache", b"HIT")]})
+            await send({"type": "http.response.body", "body": entry.body})
+            return
+
+        self.backend.misses += 1
+        start_message = None
+        chunks: List[bytes] = []
+
+        async def caching_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                message = {**message, "headers": list(message["headers"]) + [(b"x-cache", b"MISS")]}
+            elif message["type"] == "http.response.body" and start_message["status"] == 200:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and version >= 0:
+                    self.backend.set(key, CachedResponse(
+                        status=200,
+                        headers=list(start_message["headers"]),
+                        body=b"".join(chunks),
+                        data_version=version,
+                        expires_at=time.monotonic() + ttl
+                    ), ttl)
+            await send(message)
+
+        await self.app(scope, receive, caching_send)
+
+
+
+class SingleFlightGroup:
+    """进行中的请求（键 → 响应消息列表的 Future）及合并统计"""
+
+    def __init__(self):
+        self.in_flight: Dict[str, "asyncio.Future"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "followers": self.followers, "in_flight": len(self.in_flight)}
+
+
+class SingleFlightMiddleware:
+    """
+    相同请求合并中间件（ASGI）
+
+    SINGLE_FLIGHT_ROUTES 中路由的并发相同 GET 请求（键同响应缓存）只执行一次，
+    其余请求等待第一个请求完成后复用其响应，避免缓存未命中时大量请求同时查询 SQLite/Neo4j
+    """
+
+    def __init__(self, app, group: SingleFlightGroup = None):
+        self.app = app
+        self.group = group or SingleFlightGroup()
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "GET"
+                or not any(scope["path"].startswith(prefix) for prefix in settings.SINGLE_FLIGHT_ROUTES)):
+            await self.app(scope, receive, send)
+            return
+
+        group = self.group
+        key = cache_key(scope)
+        future = group.in_flight.get(key)
+        if future is not None:
+            group.followers += 1
+            for message in await asyncio.shield(future):
+                await send(message)
+            return
+
+        group.leaders += 1
+        future = asyncio.get_running_loop().create_future()
+        group.in_flight[key] = future
+        messages: List[dict] = []
+
+        async def recording_send(message):
+            messages.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, recording_send)
+            future.set_result(messages)
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "Future exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            group.in_flight.pop(key, None)
@@ -2,7 +2,7 @@
 服务器配置文件
 """
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -36,6 +36,63 @@ class Settings(BaseSettings):
     API_PREFIX: str = "/api/v1"
     PAGE_SIZE_DEFAULT: int = 20
     PAGE_SIZE_MAX: int = 100
+    BATCH_MAX_IDS: int = 200  # 批量查询接口单次请求的ID总数上限
+    FAST_JSON_RESPONSES: bool = True  # 列表/时间轴接口直接编码 JSON，跳过 response_model 逐行校验
+    
+    # 响应压缩配置（按 Accept-Encoding 协商，小于 COMPRESSION_MIN_SIZE 字节的响应不压缩）
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+    
+    # 离线数据包配置
+    BUNDLE_DIR: str = "server/data/bundles"
+    BUNDLE_KEEP_VERSIONS: int = 10  # 保留的历史版本数（增量包只能从这些版本开始）
+    BUNDLE_REBUILD_INTERVAL: int = 3600  # 最新版本构建超过该秒数后，下次请求时重新构建
+    
+    # 响应缓存配置（数据版本变化时自动失效）
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 进程内缓存的响应总字节数上限
+    CACHE_REDIS_URL: Optional[str] = None  # 设置后使用 Redis 共享缓存（需安装 redis）
+    CACHE_VERSION_CHECK_INTERVAL: float = 1.0  # 数据版本检查间隔（秒）
+    CACHE_TTL: int = 3600  # 默认缓存时间（秒）
+    CACHE_ROUTES: List[str] = [
+        "/api/v1/dynasties",
+        "/api/v1/emperors",
+        "/api/v1/events",
+        "/api/v1/persons",
+        "/api/v1/timeline",
+        "/api/v1/statistics",
+        "/api/v1/search",
+    ]
+    CACHE_ROUTE_TTLS: Dict[str, int] = {  # 按路径前缀覆盖 CACHE_TTL
+        "/api/v1/search": 300,
+        "/api/v1/statistics": 600,
+    }
+    
+    # 相同请求合并（并发的相同 GET 请求共享一次计算）
+    SINGLE_FLIGHT_ROUTES: List[str] = [
+        "/api/v1/timeline",
+        "/api/v1/statistics",
+        "/api/v1/relations/person",
+    ]
+    
+    # 性能指标（/metrics 输出 Prometheus 文本格式）
+    METRICS_ENABLED: bool = True
+    METRICS_STATEMENT_MAX_LENGTH: int = 200  # 查询指标中规范化语句的最大长度
+    
+    # 慢查询日志（超过阈值的语句及其 EXPLAIN QUERY PLAN，通过 /api/v1/admin/slow-queries 查看）
+    SLOW_QUERY_LOG_ENABLED: bool = False
+    SLOW_QUERY_THRESHOLD_MS: float = 50
+    SLOW_QUERY_BUFFER_SIZE: int = 200
+    SLOW_QUERY_LOG_PATH: Optional[str] = "logs/slow_queries.log"
+    
+    # 访问日志（uvicorn 访问日志另写一份到文件，爬虫的增量刷新调度据此统计页面热度），为空时不写入
+    ACCESS_LOG_PATH: Optional[str] = "logs/access.log"
+    ACCESS_LOG_MAX_BYTES: int = 50 * 1024 * 1024  # 单个文件上限，超过后轮转
+    ACCESS_LOG_BACKUP_COUNT: int = 3
+    
+    # 管理接口令牌（请求需带 X-Admin-Token 头；未设置时管理接口一律拒绝）
+    ADMIN_TOKEN: Optional[str] = None
     
     class Config:
         env_file = ".env"
@@ -116,6 +116,42 @@ CREATE TABLE IF NOT EXISTS person_relations (
     UNIQUE(person_id_from, person_id_to, relation_type)
 );
 
+-- 人物皇帝关联表（侍奉关系，与 Neo4j 的 SERVED_UNDER 对应）
+-- 主键 (person_id, emperor_id) 支持按人物查皇帝，idx_person_emperor_emperor_id 支持按皇帝查人物
+CREATE TABLE IF NOT EXISTS person_emperor (
+    person_id TEXT NOT NULL,
+    emperor_id TEXT NOT NULL,
+    position TEXT,
+    source TEXT,  -- 关联来源: crawler, crawler_new, neo4j
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (person_id, emperor_id),
+    FOREIGN KEY (person_id) REFERENCES persons(person_id),
+    FOREIGN KEY (emperor_id) REFERENCES emperors(emperor_id)
+) WITHOUT ROWID;
+
+-- 计数表（由下方触发器维护，列表/详情/统计接口直接读取，避免 COUNT(*) 子查询）
+-- entity_type: global（全库计数，entity_id 为空字符串）, dynasty, emperor, event, person
+-- counter: dynasty_count, emperor_count, event_count, person_count, work_count
+CREATE TABLE IF NOT EXISTS entity_counters (
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    counter TEXT NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (entity_type, entity_id, counter)
+) WITHOUT ROWID;
+
+-- 变更日志（由下方触发器写入，/api/v1/sync 按 version 增量读取）
+-- version 单调递增（AUTOINCREMENT 保证删除日志后不复用）
+-- entity_type: dynasty, emperor, event, person, work；关联表的变更记为所属实体的 upsert
+-- op: upsert, delete
+CREATE TABLE IF NOT EXISTS change_log (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity_type TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    op TEXT NOT NULL,
+    changed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 创建索引以优化查询性能
 
 -- 皇帝表索引
@@ -142,9 +178,284 @@ CREATE INDEX IF NOT EXISTS idx_event_person_event_id ON event_person_relation(ev
 CREATE INDEX IF NOT EXISTS idx_event_person_person_id ON event_person_relation(person_id);
 CREATE INDEX IF NOT EXISTS idx_person_relations_from ON person_relations(person_id_from);
 CREATE INDEX IF NOT EXISTS idx_person_relations_to ON person_relations(person_id_to);
+CREATE INDEX IF NOT EXISTS idx_person_emperor_emperor_id ON person_emperor(emperor_id, person_id);
+
+-- 计数触发器
+-- INSERT OR REPLACE 替换记录时，只有开启 PRAGMA recursive_triggers 才会触发 DELETE 触发器，
+-- SQLiteManager.connect() 会开启该选项；其他工具直接改库后可执行
+-- python -m server.database.sqlite_manager rebuild-counters 重建计数
+
+CREATE TRIGGER IF NOT EXISTS trg_dynasties_count_insert AFTER INSERT ON dynasties
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('global', '', 'dynasty_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dynasties_count_delete AFTER DELETE ON dynasties
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'global' AND entity_id = '' AND counter = 'dynasty_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_emperors_count_insert AFTER INSERT ON emperors
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('global', '', 'emperor_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('dynasty', NEW.dynasty_id, 'emperor_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_emperors_count_delete AFTER DELETE ON emperors
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'global' AND entity_id = '' AND counter = 'emperor_count';
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'dynasty' AND entity_id = OLD.dynasty_id AND counter = 'emperor_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_emperors_dynasty_id_count_update AFTER UPDATE OF dynasty_id ON emperors
+WHEN OLD.dynasty_id IS NOT NEW.dynasty_id
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'dynasty' AND entity_id = OLD.dynasty_id AND counter = 'emperor_count';
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('dynasty', NEW.dynasty_id, 'emperor_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_count_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('global', '', 'event_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) SELECT 'emperor', NEW.emperor_id, 'event_count', 1 WHERE NEW.emperor_id IS NOT NULL
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_count_delete AFTER DELETE ON events
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'global' AND entity_id = '' AND counter = 'event_count';
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'emperor' AND entity_id = OLD.emperor_id AND counter = 'event_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_emperor_id_count_update AFTER UPDATE OF emperor_id ON events
+WHEN OLD.emperor_id IS NOT NEW.emperor_id
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'emperor' AND entity_id = OLD.emperor_id AND counter = 'event_count';
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) SELECT 'emperor', NEW.emperor_id, 'event_count', 1 WHERE NEW.emperor_id IS NOT NULL
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_persons_count_insert AFTER INSERT ON persons
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('global', '', 'person_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_persons_count_delete AFTER DELETE ON persons
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'global' AND entity_id = '' AND counter = 'person_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_works_count_insert AFTER INSERT ON works
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('global', '', 'work_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('person', NEW.person_id, 'work_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_works_count_delete AFTER DELETE ON works
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'global' AND entity_id = '' AND counter = 'work_count';
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'person' AND entity_id = OLD.person_id AND counter = 'work_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_works_person_id_count_update AFTER UPDATE OF person_id ON works
+WHEN OLD.person_id IS NOT NEW.person_id
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'person' AND entity_id = OLD.person_id AND counter = 'work_count';
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('person', NEW.person_id, 'work_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_count_insert AFTER INSERT ON event_person_relation
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('event', NEW.event_id, 'person_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('person', NEW.person_id, 'event_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_count_delete AFTER DELETE ON event_person_relation
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'event' AND entity_id = OLD.event_id AND counter = 'person_count';
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'person' AND entity_id = OLD.person_id AND counter = 'event_count';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_event_id_count_update AFTER UPDATE OF event_id ON event_person_relation
+WHEN OLD.event_id IS NOT NEW.event_id
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'event' AND entity_id = OLD.event_id AND counter = 'person_count';
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('event', NEW.event_id, 'person_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
 
--- 插入明朝基础数据
-INSERT OR REPLACE INTO dynasties (dynasty_id, name, start_year, end_year, capital, founder, description)
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_person_id_count_update AFTER UPDATE OF person_id ON event_person_relation
+WHEN OLD.person_id IS NOT NEW.person_id
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'person' AND entity_id = OLD.person_id AND counter = 'event_count';
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('person', NEW.person_id, 'event_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_person_emperor_count_insert AFTER INSERT ON person_emperor
+BEGIN
+    INSERT INTO entity_counters (entity_type, entity_id, counter, value) VALUES ('emperor', NEW.emperor_id, 'person_count', 1)
+        ON CONFLICT (entity_type, entity_id, counter) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_person_emperor_count_delete AFTER DELETE ON person_emperor
+BEGIN
+    UPDATE entity_counters SET value = value - 1 WHERE entity_type = 'emperor' AND entity_id = OLD.emperor_id AND counter = 'person_count';
+END;
+
+-- 变更日志触发器
+-- INSERT OR REPLACE 替换记录时依次记录 delete 和 upsert（需开启 PRAGMA recursive_triggers），按 version 顺序应用即可；
+-- 爬虫按主键 upsert（sqlite_manager.upsert_sql），内容未变的记录不改写
+-- UPDATE 触发器只在内容列变化时记录（不比较 created_at / updated_at、person_emperor.source 等元数据），
+-- 重复写入相同数据不产生变更日志；触发器定义修改后先 DROP 再创建，已有数据库升级表结构版本时随之更新
+
+CREATE TRIGGER IF NOT EXISTS trg_dynasties_change_insert AFTER INSERT ON dynasties
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('dynasty', NEW.dynasty_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_dynasties_change_update;
+CREATE TRIGGER trg_dynasties_change_update AFTER UPDATE ON dynasties
+WHEN OLD.name IS NOT NEW.name OR OLD.start_year IS NOT NEW.start_year OR OLD.end_year IS NOT NEW.end_year OR OLD.capital IS NOT NEW.capital
+  OR OLD.founder IS NOT NEW.founder OR OLD.description IS NOT NEW.description
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('dynasty', NEW.dynasty_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_dynasties_change_delete AFTER DELETE ON dynasties
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('dynasty', OLD.dynasty_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_emperors_change_insert AFTER INSERT ON emperors
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', NEW.emperor_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_emperors_change_update;
+CREATE TRIGGER trg_emperors_change_update AFTER UPDATE ON emperors
+WHEN OLD.dynasty_id IS NOT NEW.dynasty_id OR OLD.name IS NOT NEW.name OR OLD.temple_name IS NOT NEW.temple_name OR OLD.reign_title IS NOT NEW.reign_title
+  OR OLD.birth_date IS NOT NEW.birth_date OR OLD.death_date IS NOT NEW.death_date OR OLD.reign_start IS NOT NEW.reign_start OR OLD.reign_end IS NOT NEW.reign_end
+  OR OLD.reign_duration IS NOT NEW.reign_duration OR OLD.dynasty_order IS NOT NEW.dynasty_order OR OLD.biography IS NOT NEW.biography OR OLD.achievements IS NOT NEW.achievements
+  OR OLD.portrait_url IS NOT NEW.portrait_url OR OLD.data_source IS NOT NEW.data_source
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', NEW.emperor_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_emperors_change_delete AFTER DELETE ON emperors
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', OLD.emperor_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_change_insert AFTER INSERT ON events
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', NEW.event_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_events_change_update;
+CREATE TRIGGER trg_events_change_update AFTER UPDATE ON events
+WHEN OLD.dynasty_id IS NOT NEW.dynasty_id OR OLD.emperor_id IS NOT NEW.emperor_id OR OLD.title IS NOT NEW.title OR OLD.event_type IS NOT NEW.event_type
+  OR OLD.start_date IS NOT NEW.start_date OR OLD.end_date IS NOT NEW.end_date OR OLD.location IS NOT NEW.location OR OLD.description IS NOT NEW.description
+  OR OLD.significance IS NOT NEW.significance OR OLD.casualty IS NOT NEW.casualty OR OLD.result IS NOT NEW.result OR OLD.data_source IS NOT NEW.data_source
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', NEW.event_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_events_change_delete AFTER DELETE ON events
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', OLD.event_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_persons_change_insert AFTER INSERT ON persons
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_persons_change_update;
+CREATE TRIGGER trg_persons_change_update AFTER UPDATE ON persons
+WHEN OLD.dynasty_id IS NOT NEW.dynasty_id OR OLD.name IS NOT NEW.name OR OLD.alias IS NOT NEW.alias OR OLD.birth_date IS NOT NEW.birth_date
+  OR OLD.death_date IS NOT NEW.death_date OR OLD.person_type IS NOT NEW.person_type OR OLD.position IS NOT NEW.position OR OLD.biography IS NOT NEW.biography
+  OR OLD.style IS NOT NEW.style OR OLD.contributions IS NOT NEW.contributions OR OLD.portrait_url IS NOT NEW.portrait_url OR OLD.data_source IS NOT NEW.data_source
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_persons_change_delete AFTER DELETE ON persons
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', OLD.person_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_works_change_insert AFTER INSERT ON works
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('work', NEW.work_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_works_change_update;
+CREATE TRIGGER trg_works_change_update AFTER UPDATE ON works
+WHEN OLD.person_id IS NOT NEW.person_id OR OLD.title IS NOT NEW.title OR OLD.work_type IS NOT NEW.work_type OR OLD.creation_date IS NOT NEW.creation_date
+  OR OLD.description IS NOT NEW.description OR OLD.content IS NOT NEW.content OR OLD.image_url IS NOT NEW.image_url
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('work', NEW.work_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_works_change_delete AFTER DELETE ON works
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('work', OLD.work_id, 'delete');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_change_insert AFTER INSERT ON event_person_relation
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', NEW.event_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_event_person_relation_change_update;
+CREATE TRIGGER trg_event_person_relation_change_update AFTER UPDATE ON event_person_relation
+WHEN OLD.event_id IS NOT NEW.event_id OR OLD.person_id IS NOT NEW.person_id OR OLD.role IS NOT NEW.role
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', NEW.event_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_event_person_relation_change_delete AFTER DELETE ON event_person_relation
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('event', OLD.event_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', OLD.person_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_person_emperor_change_insert AFTER INSERT ON person_emperor
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', NEW.emperor_id, 'upsert');
+END;
+
+DROP TRIGGER IF EXISTS trg_person_emperor_change_update;
+CREATE TRIGGER trg_person_emperor_change_update AFTER UPDATE ON person_emperor
+WHEN OLD.person_id IS NOT NEW.person_id OR OLD.emperor_id IS NOT NEW.emperor_id OR OLD.position IS NOT NEW.position
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', NEW.emperor_id, 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_person_emperor_change_delete AFTER DELETE ON person_emperor
+BEGIN
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', OLD.person_id, 'upsert');
+    INSERT INTO change_log (entity_type, entity_id, op) VALUES ('emperor', OLD.emperor_id, 'upsert');
+END;
+
+-- 插入明朝基础数据（已存在时保留，重复执行不改写记录、不产生变更日志）
+INSERT INTO dynasties (dynasty_id, name, start_year, end_year, capital, founder, description)
 VALUES (
     'ming',
     '明朝',
@@ -153,4 +464,5 @@ VALUES (
     '北京',
     '朱元璋',
     '明朝（1368年-1644年）是中国历史上最后一个由汉族建立的大一统王朝，共传十六帝，享国276年。'
-);
+)
+ON CONFLICT (dynasty_id) DO NOTHING;
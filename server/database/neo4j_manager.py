@@ -3,8 +3,9 @@ Neo4j数据库管理器
 用于图数据库操作
 """
 from neo4j import GraphDatabase
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +13,15 @@ logger = logging.getLogger(__name__)
 class Neo4jManager:
     """Neo4j数据库管理器"""
     
+    # 查询钩子：每条 Cypher 执行后以 (query, 耗时秒数) 调用，用于性能统计
+    query_hooks: List[Callable[[str, float], None]] = []
+    
+    @classmethod
+    def add_query_hook(cls, hook: Callable[[str, float], None]):
+        """注册查询钩子（对所有实例生效）"""
+        if hook not in cls.query_hooks:
+            cls.query_hooks.append(hook)
+    
     def __init__(self, uri: str = "bolt://localhost:7687", user: str = "neo4j", password: str = "password"):
         """
         初始化Neo4j连接
@@ -49,6 +59,7 @@ class Neo4jManager:
             logger.warning("Neo4j未连接，返回空结果")
             return []
         
+        start = time.perf_counter()
         try:
             with self.driver.session() as session:
                 result = session.run(query, parameters or {})
@@ -56,6 +67,10 @@ class Neo4jManager:
         except Exception as e:
             logger.error(f"查询执行失败: {str(e)}")
             return []
+        finally:
+            elapsed = time.perf_counter() - start
+            for hook in self.query_hooks:
+                hook(query, elapsed)
     
     def get_person_relations(
         self,
@@ -219,7 +234,24 @@ class Neo4jManager:
         except Exception as e:
             logger.error(f"获取皇帝臣子失败: {str(e)}")
             return []
-    
+
+    def get_served_under_relations(self) -> List[Dict[str, Any]]:
+        """
+        获取全部人物-皇帝任职关系（用于同步到 SQLite 的 person_emperor 表）
+
+        Returns:
+            关系列表（person_id, emperor_id, position）
+        """
+        if not self.driver:
+            return []
+
+        query = """
+        MATCH (p:Person)-[r:SERVED_UNDER]->(e:Emperor)
+        RETURN p.id as person_id, e.id as emperor_id, r.position as position
+        """
+
+        return self.execute_query(query)
+
     def test_connection(self) -> bool:
         """
         测试数据库连接
@@ -0,0 +1,120 @@
+"""
+慢查询日志
+超过阈值的语句连同耗时、脱敏后的参数和 EXPLAIN QUERY PLAN 一起记录到环形缓冲区和日志文件，
+用于在压测中自动发现全表扫描（如 LIKE 搜索、SUBSTR 分组）
+
+启用：
+    SQLiteManager.set_slow_query_log(SlowQueryLog(threshold_ms=50, log_path="logs/slow_queries.log"))
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 可以执行 EXPLAIN QUERY PLAN 的语句（只读查询）
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def redact_sql(sql: str) -> str:
+    """去掉语句中的字符串字面量（替换为 ?）并压缩空白"""
+    return _WHITESPACE.sub(" ", _STRING_LITERAL.sub("?", sql)).strip()
+
+
+def redact_params(params, many: bool = False) -> Optional[List[str]]:
+    """参数只保留类型，如 ['str', 'int']；批量执行只记录第一组参数的类型"""
+    if params is None:
+        return None
+    if many:
+        params = next(iter(params), None)
+        if params is None:
+            return []
+    if isinstance(params, dict):
+        return [f"{key}:{type(value).__name__}" for key, value in params.items()]
+    return [type(value).__name__ for value in params]
+
+
+class SlowQueryLog:
+    """慢查询记录器（环形缓冲区 + 可选日志文件，线程安全）"""
+
+    def __init__(self, threshold_ms: float = 50, capacity: int = 200, log_path: Optional[str] = None,
+                 explain: bool = True):
+        """
+        Args:
+            threshold_ms: 慢查询阈值（毫秒），0 表示记录所有语句
+            capacity: 环形缓冲区容量
+            log_path: 日志文件路径（每行一条 JSON），为空时只保存在内存
+            explain: 是否对查询语句执行 EXPLAIN QUERY PLAN
+        """
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.log_path = Path(log_path) if log_path else None
+        self._entries: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total = 0
+        if self.log_path:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def observe(self, conn: Optional[sqlite3.Connection], sql: str, params, seconds: float, many: bool = False):
+        """语句执行后调用，超过阈值时记录"""
+        if seconds < self.threshold:
+            return
+
+        entry = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(seconds * 1000, 3),
+            "sql": redact_sql(sql),
+            "params": redact_params(params, many),
+            "plan": self._explain(conn, sql, params) if self.explain and not many else None,
+        }
+        entry["full_scan"] = any(step.startswith("SCAN") for step in entry["plan"] or [])
+
+        with self._lock:
+            self._entries.append(entry)
+            self.total += 1
+            if self.log_path:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.warning(f"慢查询日志写入失败: {e}")
+
+    @staticmethod
+    def _explain(conn: Optional[sqlite3.Connection], sql: str, params) -> Optional[List[str]]:
+        """EXPLAIN QUERY PLAN 的 detail 列（如 'SCAN persons'、'SEARCH emperors USING INDEX ...'）"""
+        if conn is None or not _EXPLAINABLE.match(sql):
+            return None
+        try:
+            cursor = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            return [row[3] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN 失败: {e}"]
+
+    def entries(self, limit: Optional[int] = None, full_scan_only: bool = False) -> List[Dict]:
+        """最近的慢查询（最新的在前）"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        if full_scan_only:
+            entries = [entry for entry in entries if entry["full_scan"]]
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "total": self.total,
+            "buffered": len(self._entries),
+            "capacity": self._entries.maxlen,
+            "log_path": str(self.log_path) if self.log_path else None,
+        }
@@ -4,14 +4,105 @@ SQLite数据库管理器
 """
 
 import sqlite3
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import os
 
 
+# entity_counters 重建语句：(entity_type, entity_id, counter, value)，与 init_sqlite.sql 中的触发器一一对应
+COUNTER_REBUILD_SQL = [
+    "SELECT 'global', '', 'dynasty_count', COUNT(*) FROM dynasties",
+    "SELECT 'global', '', 'emperor_count', COUNT(*) FROM emperors",
+    "SELECT 'global', '', 'event_count', COUNT(*) FROM events",
+    "SELECT 'global', '', 'person_count', COUNT(*) FROM persons",
+    "SELECT 'global', '', 'work_count', COUNT(*) FROM works",
+    "SELECT 'dynasty', dynasty_id, 'emperor_count', COUNT(*) FROM emperors GROUP BY dynasty_id",
+    "SELECT 'emperor', emperor_id, 'event_count', COUNT(*) FROM events WHERE emperor_id IS NOT NULL GROUP BY emperor_id",
+    "SELECT 'emperor', emperor_id, 'person_count', COUNT(*) FROM person_emperor GROUP BY emperor_id",
+    "SELECT 'event', event_id, 'person_count', COUNT(*) FROM event_person_relation GROUP BY event_id",
+    "SELECT 'person', person_id, 'event_count', COUNT(*) FROM event_person_relation GROUP BY person_id",
+    "SELECT 'person', person_id, 'work_count', COUNT(*) FROM works GROUP BY person_id",
+]
+
+
+# 表结构版本（记录在 PRAGMA user_version 中）；修改 init_sqlite.sql 后加一，已有数据库在下次连接时补建
+# 2: 变更日志 UPDATE 触发器只在内容列变化时记录
+SCHEMA_VERSION = 2
+
+
+def upsert_sql(table: str, key: str, columns: List[str], touch: bool = True) -> str:
+    """
+    生成按主键写入的语句（INSERT ... ON CONFLICT DO UPDATE，参数按 columns 顺序）
+
+    与 INSERT OR REPLACE 不同，已存在的记录原地更新（不经过 delete，不重置 created_at），
+    内容未变时不改写，不产生变更日志
+
+    Args:
+        table: 表名
+        key: 主键列（须在 columns 中）
+        columns: 写入的列
+        touch: 内容变化时是否更新 updated_at
+    """
+    values = [column for column in columns if column != key]
+    assignments = [f"{column} = excluded.{column}" for column in values]
+    if touch:
+        assignments.append("updated_at = CURRENT_TIMESTAMP")
+    changed = ' OR '.join(f"{table}.{column} IS NOT excluded.{column}" for column in values)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+        f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(assignments)} WHERE {changed}"
+    )
+
+
 class SQLiteManager:
     """SQLite数据库管理器"""
     
+    # 查询钩子：每条语句执行后以 (sql, 耗时秒数) 调用，用于性能统计；没有钩子时不计时
+    query_hooks: List[Callable[[str, float], None]] = []
+    
+    # 慢查询日志（SlowQueryLog），为 None 时不记录
+    slow_query_log = None
+    
+    @classmethod
+    def add_query_hook(cls, hook: Callable[[str, float], None]):
+        """注册查询钩子（对所有实例生效）"""
+        if hook not in cls.query_hooks:
+            cls.query_hooks.append(hook)
+    
+    @classmethod
+    def set_slow_query_log(cls, slow_query_log):
+        """启用（或传 None 关闭）慢查询日志（对所有实例生效）"""
+        cls.slow_query_log = slow_query_log
+    
+    def _run(self, cursor: sqlite3.Cursor, sql: str, params=None, many: bool = False, fetch: str = None):
+        """
+        执行语句（fetch 为 one / all 时同时取回结果），有查询钩子或慢查询日志时记录耗时
+
+        SQLite 在取结果时才逐行执行查询，耗时包含取结果的时间
+        """
+        timed = self.query_hooks or self.slow_query_log is not None
+        start = time.perf_counter() if timed else None
+        try:
+            if many:
+                cursor.executemany(sql, params)
+            elif params:
+                cursor.execute(sql, params)
+            else:
+                cursor.execute(sql)
+            if fetch == "one":
+                return cursor.fetchone()
+            if fetch == "all":
+                return cursor.fetchall()
+            return None
+        finally:
+            if start is not None:
+                elapsed = time.perf_counter() - start
+                for hook in self.query_hooks:
+                    hook(sql, elapsed)
+                if self.slow_query_log is not None:
+                    self.slow_query_log.observe(self.connection, sql, params, elapsed, many)
+    
     def __init__(self, db_path: str = None):
         """
         初始化数据库管理器
@@ -39,6 +130,8 @@ class SQLiteManager:
             )
             # 启用外键约束
             self.connection.execute("PRAGMA foreign_keys = ON")
+            # INSERT OR REPLACE 替换记录时触发 DELETE 触发器，保证 entity_counters 计数准确
+            self.connection.execute("PRAGMA recursive_triggers = ON")
             # 设置row_factory以返回字典
             self.connection.row_factory = sqlite3.Row
         
@@ -65,22 +158,38 @@ class SQLiteManager:
         conn = self.connect()
         try:
             conn.executescript(sql_script)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             conn.commit()
+            # 已有数据的数据库首次创建计数表时，补齐计数
+            self.rebuild_counters()
             print(f"✅ 数据库初始化成功: {self.db_path}")
         except Exception as e:
             conn.rollback()
             print(f"❌ 数据库初始化失败: {str(e)}")
             raise
     
+    def ensure_schema(self) -> bool:
+        """
+        连接数据库，表结构版本落后时执行 init_sqlite.sql 补建
+
+        建表语句均为 IF NOT EXISTS、初始数据为 ON CONFLICT DO NOTHING，已是最新版本的数据库只建立连接，
+        不会重写已有数据，也不会产生变更日志
+
+        Returns:
+            是否执行了初始化脚本
+        """
+        conn = self.connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return False
+        self.initialize_database()
+        return True
+    
     def execute(self, sql: str, params: tuple = None):
         """执行SQL语句"""
         conn = self.connect()
         cursor = conn.cursor()
         try:
-            if params:
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(sql)
+            self._run(cursor, sql, params)
             conn.commit()
             return cursor
         except Exception as e:
@@ -92,7 +201,7 @@ class SQLiteManager:
         conn = self.connect()
         cursor = conn.cursor()
         try:
-            cursor.executemany(sql, params_list)
+            self._run(cursor, sql, params_list, many=True)
             conn.commit()
             return cursor.rowcount
         except Exception as e:
@@ -103,22 +212,139 @@ class SQLiteManager:
         """查询单条记录"""
         conn = self.connect()
         cursor = conn.cursor()
-        if params:
-            cursor.execute(sql, params)
-        else:
-            cursor.execute(sql)
-        return cursor.fetchone()
+        return self._run(cursor, sql, params, fetch="one")
     
     def fetch_all(self, sql: str, params: tuple = None):
         """查询多条记录"""
         conn = self.connect()
         cursor = conn.cursor()
-        if params:
-            cursor.execute(sql, params)
-        else:
-            cursor.execute(sql)
-        return cursor.fetchall()
+        return self._run(cursor, sql, params, fetch="all")
     
+    def save_person_emperor_relations(self, relations: list, source: str) -> int:
+        """
+        批量写入人物-皇帝关联（person_emperor）
+
+        人物或皇帝尚未入库的关联会被跳过；已存在的关联更新职位和来源
+
+        Args:
+            relations: (person_id, emperor_id, position) 列表
+            source: 关联来源（crawler / crawler_new / neo4j）
+
+        Returns:
+            写入的关联数
+        """
+        sql = """
+            INSERT INTO person_emperor (person_id, emperor_id, position, source)
+            SELECT ?, ?, ?, ?
+            WHERE EXISTS (SELECT 1 FROM persons WHERE person_id = ?1)
+              AND EXISTS (SELECT 1 FROM emperors WHERE emperor_id = ?2)
+            ON CONFLICT (person_id, emperor_id) DO UPDATE SET
+                position = COALESCE(excluded.position, person_emperor.position),
+                source = excluded.source
+        """
+        params_list = [
+            (person_id, emperor_id, position or None, source)
+            for person_id, emperor_id, position in relations
+            if person_id and emperor_id
+        ]
+        if not params_list:
+            return 0
+        return self.execute_many(sql, params_list)
+
+    def rebuild_counters(self) -> int:
+        """
+        按实际数据重建 entity_counters 计数表
+
+        触发器会实时维护计数，只在首次建表或绕过触发器改库后需要重建
+
+        Returns:
+            计数记录数
+        """
+        conn = self.connect()
+        try:
+            conn.execute("DELETE FROM entity_counters")
+            for sql in COUNTER_REBUILD_SQL:
+                conn.execute(
+                    f"INSERT INTO entity_counters (entity_type, entity_id, counter, value) {sql}"
+                )
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+        return self.count_records('entity_counters')
+
+    def get_counters(self, entity_type: str, entity_id: str = '') -> Dict[str, int]:
+        """
+        读取实体的计数
+
+        Args:
+            entity_type: global, dynasty, emperor, event, person
+            entity_id: 实体ID（global 计数为空字符串）
+
+        Returns:
+            计数名 → 计数值
+        """
+        rows = self.fetch_all(
+            "SELECT counter, value FROM entity_counters WHERE entity_type = ? AND entity_id = ?",
+            (entity_type, entity_id)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def get_changes(self, since: int, limit: int,
+                    entity_types: Optional[List[str]] = None) -> Tuple[List[dict], int, bool]:
+        """
+        读取 change_log 中 version > since 的变更
+
+        同一页内同一实体的多次变更只保留最后一次（按 version 排序）
+
+        Args:
+            since: 客户端已同步到的版本
+            limit: 最多读取的日志条数
+            entity_types: 只读取这些实体类型，默认全部
+
+        Returns:
+            (变更列表, 下一页的起始版本, 是否可能还有更多变更)
+        """
+        sql = "SELECT version, entity_type, entity_id, op FROM change_log WHERE version > ?"
+        params: list = [since]
+        if entity_types:
+            sql += f" AND entity_type IN ({', '.join('?' * len(entity_types))})"
+            params.extend(entity_types)
+        sql += " ORDER BY version LIMIT ?"
+        params.append(limit)
+
+        rows = self.fetch_all(sql, tuple(params))
+        latest: Dict[Tuple[str, str], dict] = {}
+        for row in rows:
+            key = (row[1], row[2])
+            latest.pop(key, None)  # 重新插入，使字典顺序与最后一次变更的 version 一致
+            latest[key] = {"version": row[0], "entity_type": row[1], "entity_id": row[2], "op": row[3]}
+        next_since = rows[-1][0] if rows else since
+        return list(latest.values()), next_since, len(rows) == limit
+
+    def compact_change_log(self) -> int:
+        """
+        压缩变更日志：同一实体只保留最新一条
+
+        get_changes 对同一实体只返回最后一次变更，被覆盖的旧日志对任何 since 都不影响同步结果；
+        最新版本号不变（最大 version 总是所属实体的最新一条），缓存版本也不会变化
+
+        Returns:
+            删除的日志条数
+        """
+        return self.execute(
+            """
+            DELETE FROM change_log WHERE version NOT IN (
+                SELECT MAX(version) FROM change_log GROUP BY entity_type, entity_id
+            )
+            """
+        ).rowcount
+
+    def get_change_version(self) -> int:
+        """当前最新的变更版本（没有变更时为 0）"""
+        row = self.fetch_one("SELECT MAX(version) FROM change_log")
+        return (row[0] or 0) if row else 0
+
     def get_table_info(self, table_name: str):
         """获取表结构信息"""
         sql = f"PRAGMA table_info({table_name})"
@@ -199,6 +425,20 @@ if __name__ == "__main__":
     """测试数据库管理器"""
     import sys
     
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild-counters':
+        # 重建计数表：python -m server.database.sqlite_manager rebuild-counters [db_path]
+        manager = SQLiteManager(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"✅ 计数表已重建: {manager.rebuild_counters()} 条计数")
+        manager.close()
+        sys.exit(0)
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'compact-change-log':
+        # 压缩变更日志：python -m server.database.sqlite_manager compact-change-log [db_path]
+        manager = SQLiteManager(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"✅ 变更日志已压缩: 删除 {manager.compact_change_log()} 条")
+        manager.close()
+        sys.exit(0)
+    
     # 初始化数据库
     print("初始化数据库...")
     init_database()
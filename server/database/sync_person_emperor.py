@@ -0,0 +1,47 @@
+"""
+人物-皇帝关联同步
+将 Neo4j 中的 SERVED_UNDER 关系同步到 SQLite 的 person_emperor 表，
+使 API 的人物/皇帝关联查询不依赖 Neo4j 在线
+
+用法:
+    python -m server.database.sync_person_emperor
+"""
+
+from server.database.sqlite_manager import SQLiteManager
+from server.database.neo4j_manager import Neo4jManager
+
+
+def sync_from_neo4j(sqlite_manager: SQLiteManager, neo4j_manager: Neo4jManager) -> int:
+    """
+    同步 Neo4j 的 SERVED_UNDER 关系
+
+    Args:
+        sqlite_manager: SQLite 管理器
+        neo4j_manager: Neo4j 管理器
+
+    Returns:
+        写入的关联数（人物或皇帝不在 SQLite 中的关系会被跳过）
+    """
+    relations = neo4j_manager.get_served_under_relations()
+    return sqlite_manager.save_person_emperor_relations(
+        [(r['person_id'], r['emperor_id'], r.get('position')) for r in relations],
+        source='neo4j'
+    )
+
+
+if __name__ == "__main__":
+    from server.config.settings import settings
+
+    sqlite_manager = SQLiteManager(settings.SQLITE_DB_PATH)
+    sqlite_manager.ensure_schema()
+    neo4j_manager = Neo4jManager(settings.NEO4J_URI, settings.NEO4J_USER, settings.NEO4J_PASSWORD)
+
+    try:
+        if not neo4j_manager.test_connection():
+            print("❌ Neo4j 未连接，无法同步")
+        else:
+            count = sync_from_neo4j(sqlite_manager, neo4j_manager)
+            print(f"✅ 已同步 {count} 条人物-皇帝关联")
+    finally:
+        neo4j_manager.close()
+        sqlite_manager.close()
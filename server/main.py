@@ -1,10 +1,59 @@
 """
 FastAPI主应用入口
 """
+import logging
+from contextlib import asynccontextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from server.api import dynasties, emperors, events, persons, timeline, search, statistics, relations
+from fastapi.responses import PlainTextResponse
+from server.api import dynasties, emperors, events, persons, timeline, search, statistics, relations, batch, bundle, sync, admin
 from server.config.settings import settings
+from server.middleware import ResponseEncodingMiddleware
+from server.cache import ResponseCacheMiddleware, SingleFlightGroup, SingleFlightMiddleware, create_backend
+from server.metrics import MetricsMiddleware, install_query_hooks, render_metrics
+from server.database.sqlite_manager import SQLiteManager
+from server.database.slow_query_log import SlowQueryLog
+
+
+def _access_log_handler() -> RotatingFileHandler:
+    """访问日志文件（按大小轮转）"""
+    Path(settings.ACCESS_LOG_PATH).parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        settings.ACCESS_LOG_PATH,
+        maxBytes=settings.ACCESS_LOG_MAX_BYTES,
+        backupCount=settings.ACCESS_LOG_BACKUP_COUNT,
+        encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    return handler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    应用启动时补建表结构（旧版本创建的数据库缺少计数表、人物-皇帝关联表、变更日志等表），
+    并打开访问日志文件（只导入 server.main 的测试、基准测试和命令行工具不创建日志文件）
+    """
+    db = SQLiteManager(settings.SQLITE_DB_PATH)
+    try:
+        db.ensure_schema()
+    finally:
+        db.close()
+
+    access_logger = logging.getLogger("uvicorn.access")
+    access_log_handler = _access_log_handler() if settings.ACCESS_LOG_PATH else None
+    if access_log_handler is not None:
+        access_logger.addHandler(access_log_handler)
+    try:
+        yield
+    finally:
+        if access_log_handler is not None:
+            access_logger.removeHandler(access_log_handler)
+            access_log_handler.close()
+
 
 # 创建FastAPI应用实例
 app = FastAPI(
@@ -12,10 +61,28 @@ app = FastAPI(
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
-# 配置CORS中间件
+# 响应编码中间件（MessagePack 转码、gzip/brotli 压缩）
+app.add_middleware(ResponseEncodingMiddleware)
+
+# 相同请求合并中间件（缓存未命中的并发相同请求只执行一次）
+single_flight = SingleFlightGroup()
+app.add_middleware(SingleFlightMiddleware, group=single_flight)
+
+# 响应缓存中间件（在编码中间件外层，缓存编码/压缩后的响应）
+response_cache = create_backend()
+app.add_middleware(ResponseCacheMiddleware, backend=response_cache)
+
+# 性能指标中间件（在缓存外层，缓存命中的请求也计入）及 SQLite/Neo4j 查询计时
+if settings.METRICS_ENABLED:
+    install_query_hooks()
+    app.add_middleware(MetricsMiddleware)
+
+# 配置CORS中间件（最后添加，位于最外层）：CORS 响应头按每个请求的 Origin 生成，
+# 不进入响应缓存和相同请求合并的共享响应，否则会把第一个请求的 Access-Control-Allow-Origin 返回给其他来源
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -24,6 +91,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 慢查询日志
+if settings.SLOW_QUERY_LOG_ENABLED:
+    SQLiteManager.set_slow_query_log(SlowQueryLog(
+        threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+        capacity=settings.SLOW_QUERY_BUFFER_SIZE,
+        log_path=settings.SLOW_QUERY_LOG_PATH
+    ))
+
 # 注册API路由
 app.include_router(dynasties.router, prefix="/api/v1/dynasties", tags=["朝代"])
 app.include_router(emperors.router, prefix="/api/v1/emperors", tags=["皇帝"])
@@ -33,6 +108,10 @@ app.include_router(timeline.router, prefix="/api/v1/timeline", tags=["时间轴"
 app.include_router(search.router, prefix="/api/v1/search", tags=["搜索"])
 app.include_router(statistics.router, prefix="/api/v1/statistics", tags=["统计"])
 app.include_router(relations.router, prefix="/api/v1/relations", tags=["关系图谱"])
+app.include_router(batch.router, prefix="/api/v1/batch", tags=["批量查询"])
+app.include_router(bundle.router, prefix="/api/v1/bundle", tags=["离线数据包"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["增量同步"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["管理"])
 
 
 @app.get("/", tags=["根路径"])
@@ -53,6 +132,18 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/cache/stats", tags=["健康检查"])
+async def cache_stats():
+    """响应缓存命中统计及相同请求合并统计"""
+    return {**response_cache.stats(), "single_flight": single_flight.stats()}
+
+
+@app.get("/metrics", tags=["健康检查"], response_class=PlainTextResponse)
+async def metrics():
+    """性能指标（Prometheus 文本格式）：请求数、请求延迟、SQLite/Neo4j 查询耗时"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
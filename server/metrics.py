@@ -0,0 +1,219 @@
+"""
+性能指标
+- MetricsMiddleware: 按路由模板记录请求数（含状态码）和延迟直方图
+- SQLite / Neo4j 查询钩子: 按规范化后的语句记录查询耗时直方图
+- render_metrics(): 输出 Prometheus 文本格式，由 /metrics 接口返回
+"""
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from server.config.settings import settings
+
+# 延迟直方图的桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """累积直方图（Prometheus histogram 语义）"""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """指标注册表（计数器与直方图，按标签区分）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+
+    def describe(self, name: str, metric_type: str, help_text: str):
+        self._help[name] = (metric_type, help_text)
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.total}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.total}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, default_type: str):
+        metric_type, help_text = self._help.get(name, (default_type, ""))
+        if help_text:
+            lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+registry = MetricsRegistry()
+registry.describe("http_requests_total", "counter", "HTTP 请求数（按路由模板、方法、状态码）")
+registry.describe("http_request_duration_seconds", "histogram", "HTTP 请求延迟（秒）")
+registry.describe("sqlite_query_duration_seconds", "histogram", "SQLite 语句耗时（秒，按规范化语句）")
+registry.describe("neo4j_query_duration_seconds", "histogram", "Neo4j Cypher 耗时（秒，按规范化语句）")
+
+
+# ---------------------------------------------------------------------------
+# 语句规范化（去掉字面量和空白差异，避免标签基数失控）
+# ---------------------------------------------------------------------------
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"\\\\]|\\\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """规范化 SQL / Cypher：字面量替换为 ?，IN (?, ?, ...) 合并为 (?...)，压缩空白并截断"""
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?...)", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    limit = settings.METRICS_STATEMENT_MAX_LENGTH
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def record_sqlite_query(sql: str, seconds: float):
+    registry.observe("sqlite_query_duration_seconds", {"statement": normalize_statement(sql)}, seconds)
+
+
+def record_neo4j_query(query: str, seconds: float):
+    registry.observe("neo4j_query_duration_seconds", {"statement": normalize_statement(query)}, seconds)
+
+
+def install_query_hooks():
+    """注册 SQLite / Neo4j 查询钩子（neo4j 驱动未安装时只注册 SQLite）"""
+    from server.database.sqlite_manager import SQLiteManager
+    SQLiteManager.add_query_hook(record_sqlite_query)
+    try:
+        from server.database.neo4j_manager import Neo4jManager
+    except ImportError:
+        return
+    Neo4jManager.add_query_hook(record_neo4j_query)
+
+
+# ---------------------------------------------------------------------------
+# 请求指标
+# ---------------------------------------------------------------------------
+
+class MetricsMiddleware:
+    """
+    请求指标中间件（ASGI）
+
+    标签使用路由模板（如 /api/v1/emperors/{emperor_id}）；位于响应缓存外层，缓存命中的请求也会被统计
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def status_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, status_send)
+        finally:
+            path = _route_template(scope) or _route_prefix(scope["path"])
+            registry.inc("http_requests_total", {"method": scope["method"], "route": path, "status": str(status)})
+            registry.observe("http_request_duration_seconds", {"method": scope["method"], "route": path},
+                             time.perf_counter() - start)
+
+
+def _route_template(scope) -> Optional[str]:
+    """
+    完整的路由模板（如 /api/v1/dynasties/{dynasty_id}）
+
+    include_router 注册的子路由 route.path 只是子路由内的路径（列表接口都是 /，朝代详情和时间轴都是 /{dynasty_id}），
+    按模板的层数从实际路径中取出前面的挂载前缀补齐；route.path 已是完整路径时前缀为空
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return None
+    depth = template.count("/")
+    prefix = scope["path"].rsplit("/", depth)[0] if depth else ""
+    return prefix + template
+
+
+def _route_prefix(path: str) -> str:
+    """
+    未经过路由的请求（缓存命中、合并请求的等待方）按配置的路由前缀归类，
+    如 /api/v1/timeline*；都不匹配时记为 unmatched
+    """
+    matched = [prefix for prefix in settings.CACHE_ROUTES + settings.SINGLE_FLIGHT_ROUTES if path.startswith(prefix)]
+    return max(matched, key=len) + "*" if matched else "unmatched"
+
+
+def render_metrics() -> str:
+    return registry.render()
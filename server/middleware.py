@@ -0,0 +1,162 @@
+"""
+响应编码中间件
+按客户端请求头协商响应格式：
+- Accept: application/msgpack 时把 JSON 响应转为 MessagePack（iOS 客户端使用，需安装 msgpack）
+- Accept-Encoding 包含 br / gzip 时压缩较大的响应（brotli 需安装 brotli，否则只用 gzip）
+"""
+import gzip
+import json
+from typing import List, Optional, Tuple
+
+from server.config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖，未安装时忽略 Accept: application/msgpack
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖，未安装时只支持 gzip
+    brotli = None
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# 已经压缩过的内容类型（如离线数据包），不再压缩
+COMPRESSED_MEDIA_TYPES = (b"application/gzip", b"application/zip", b"image/")
+
+
+def _json_loads(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def accepts(header: str, token: str) -> bool:
+    """请求头（Accept / Accept-Encoding）是否接受 token（q=0 视为不接受）"""
+    for part in header.split(","):
+        name, *params = [item.strip() for item in part.split(";")]
+        if name.lower() != token:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """选择压缩算法：优先 brotli，其次 gzip；都不接受时返回 None"""
+    if brotli is not None and accepts(accept_encoding, "br"):
+        return "br"
+    if accepts(accept_encoding, "gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """按协商结果压缩响应体"""
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+
+
+def merge_vary(values: List[bytes], tokens: List[bytes]) -> bytes:
+    """合并 Vary 响应头：保留内层已有的值（如 CORS 的 Origin），追加新的值（不区分大小写去重）"""
+    merged: List[bytes] = []
+    for value in values + [b", ".join(tokens)]:
+        for token in value.split(b","):
+            token = token.strip()
+            if token and token.lower() not in (item.lower() for item in merged):
+                merged.append(token)
+    return b", ".join(merged)
+
+
+class ResponseEncodingMiddleware:
+    """
+    响应编码中间件（ASGI）
+
+    收齐响应体后按请求头转码、压缩，再一次性发送；已带 Content-Encoding 或已压缩类型（如离线数据包下载）的响应
+    在 http.response.start 时即判定为透传，响应体逐块转发，不缓存在内存中
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        want_msgpack = msgpack is not None and accepts(request_headers.get("accept", ""), MSGPACK_MEDIA_TYPE)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+
+        if not want_msgpack and encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        chunks: List[bytes] = []
+
+        async def buffered_send(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                if self._is_passthrough(message):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._send_encoded(send, start_message, b"".join(chunks), want_msgpack, encoding)
+
+        await self.app(scope, receive, buffered_send)
+
+    @staticmethod
+    def _is_passthrough(start_message) -> bool:
+        """响应是否原样透传（已带 Content-Encoding，或内容类型已经压缩过）"""
+        response_headers = {key.lower(): value for key, value in start_message["headers"]}
+        return (b"content-encoding" in response_headers
+                or response_headers.get(b"content-type", b"").startswith(COMPRESSED_MEDIA_TYPES))
+
+    @staticmethod
+    async def _send_encoded(send, start_message, body: bytes, want_msgpack: bool, encoding: Optional[str]):
+        headers: List[Tuple[bytes, bytes]] = [
+            (key, value) for key, value in start_message["headers"]
+            if key.lower() not in (b"content-length", b"vary")
+        ]
+        response_headers = {key.lower(): value for key, value in headers}
+        vary = [value for key, value in start_message["headers"] if key.lower() == b"vary"]
+
+        if b"content-encoding" not in response_headers:
+            content_type = response_headers.get(b"content-type", b"")
+            if want_msgpack and content_type.startswith(b"application/json"):
+                body = msgpack.packb(_json_loads(body), use_bin_type=True)
+                headers = [(key, value) for key, value in headers if key.lower() != b"content-type"]
+                headers.append((b"content-type", MSGPACK_MEDIA_TYPE.encode()))
+
+            if (encoding is not None and len(body) >= settings.COMPRESSION_MIN_SIZE
+                    and not content_type.startswith(COMPRESSED_MEDIA_TYPES)):
+                body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"vary", merge_vary(vary, [b"Accept", b"Accept-Encoding"])))
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
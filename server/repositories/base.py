@@ -0,0 +1,108 @@
+"""
+数据访问基类
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from server.database.sqlite_manager import SQLiteManager
+
+
+class BaseRepository:
+    """
+    数据访问基类：按ID批量查询（WHERE ... IN (...)），支持字段投影
+
+    子类声明：
+    - TABLE: 主表（含别名），如 "emperors e"
+    - ID_FIELD: 主键字段名
+    - COLUMNS: 字段名 → SQL 表达式（查询只选择需要的字段，不使用 *）
+    - JOINS: 字段名 → 该字段需要的 JOIN 子句
+    - RELATED: 字段名 → 返回 (实体ID, 值) 的关联查询，结果聚合为列表
+    """
+
+    TABLE: str = ""
+    ID_FIELD: str = ""
+    COLUMNS: Dict[str, str] = {}
+    JOINS: Dict[str, str] = {}
+    RELATED: Dict[str, str] = {}
+
+    def __init__(self, db: SQLiteManager):
+        self.db = db
+
+    @classmethod
+    def field_names(cls) -> List[str]:
+        """支持的全部字段"""
+        return list(cls.COLUMNS) + list(cls.RELATED)
+
+    @staticmethod
+    def placeholders(ids: List[str]) -> str:
+        """生成 IN 子句占位符，如 ?, ?, ?"""
+        return ", ".join("?" * len(ids))
+
+    @staticmethod
+    def unique_ids(ids: Iterable[str]) -> List[str]:
+        """去重并保持顺序"""
+        return list(dict.fromkeys(ids))
+
+    def group_values(self, sql: str, ids: List[str]) -> Dict[str, List]:
+        """
+        执行返回 (分组ID, 值) 的查询，按分组ID聚合为列表
+
+        Args:
+            sql: 包含 {ids} 占位的查询语句
+            ids: 分组ID列表
+
+        Returns:
+            分组ID → 值列表（没有值的ID为空列表）
+        """
+        grouped = {id_: [] for id_ in ids}
+        for row in self.db.fetch_all(sql.format(ids=self.placeholders(ids)), tuple(ids)):
+            grouped[row[0]].append(row[1])
+        return grouped
+
+    def build_select(self, fields: Sequence[str]) -> str:
+        """按字段生成查询语句（主键始终在第一列）"""
+        columns = [self.ID_FIELD] + [f for f in self.COLUMNS if f in fields and f != self.ID_FIELD]
+        select = ",\n               ".join(f"{self.COLUMNS[f]} AS {f}" for f in columns)
+        joins = "".join(f"\n        {self.JOINS[f]}" for f in columns if f in self.JOINS)
+        return (
+            f"SELECT {select}\n"
+            f"        FROM {self.TABLE}{joins}\n"
+            f"        WHERE {self.COLUMNS[self.ID_FIELD]} IN ({{ids}})"
+        )
+
+    def convert_row(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """行数据转换（如 JSON 字段解码），子类按需覆盖"""
+        return item
+
+    def get_details(self, ids: List[str], fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取详情（主表一次查询，每个关联字段一次查询）
+
+        Args:
+            ids: 实体ID列表
+            fields: 需要的字段（None 表示全部字段），不属于本实体的字段忽略
+
+        Returns:
+            实体ID → 详情（不存在的ID不在结果中）
+        """
+        ids = self.unique_ids(ids)
+        if not ids:
+            return {}
+        if fields is None:
+            fields = self.field_names()
+
+        sql = self.build_select(fields).format(ids=self.placeholders(ids))
+        items = {row[0]: self.convert_row(dict(row)) for row in self.db.fetch_all(sql, tuple(ids))}
+        if not items:
+            return {}
+
+        found_ids = list(items)
+        for field, related_sql in self.RELATED.items():
+            if field in fields:
+                grouped = self.group_values(related_sql, found_ids)
+                for id_, item in items.items():
+                    item[field] = grouped[id_]
+        return items
+
+    def get_detail(self, id_: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """获取单个详情，不存在时返回 None"""
+        return self.get_details([id_], fields).get(id_)
@@ -0,0 +1,40 @@
+"""
+皇帝数据访问
+"""
+from server.repositories.base import BaseRepository
+
+
+class EmperorRepository(BaseRepository):
+    """皇帝数据访问"""
+
+    TABLE = "emperors e"
+    ID_FIELD = "emperor_id"
+
+    COLUMNS = {
+        "emperor_id": "e.emperor_id",
+        "dynasty_id": "e.dynasty_id",
+        "name": "e.name",
+        "temple_name": "e.temple_name",
+        "reign_title": "e.reign_title",
+        "birth_date": "e.birth_date",
+        "death_date": "e.death_date",
+        "reign_start": "e.reign_start",
+        "reign_end": "e.reign_end",
+        "reign_duration": "e.reign_duration",
+        "dynasty_order": "e.dynasty_order",
+        "biography": "e.biography",
+        "achievements": "e.achievements",
+        "portrait_url": "e.portrait_url",
+        "data_source": "e.data_source",
+        "created_at": "e.created_at",
+        "updated_at": "e.updated_at",
+        "event_count": "COALESCE(ec.value, 0)",
+        "person_count": "COALESCE(pc.value, 0)",
+    }
+
+    JOINS = {
+        "event_count": "LEFT JOIN entity_counters ec "
+                       "ON ec.entity_type = 'emperor' AND ec.entity_id = e.emperor_id AND ec.counter = 'event_count'",
+        "person_count": "LEFT JOIN entity_counters pc "
+                        "ON pc.entity_type = 'emperor' AND pc.entity_id = e.emperor_id AND pc.counter = 'person_count'",
+    }
@@ -0,0 +1,39 @@
+"""
+事件数据访问
+"""
+from server.repositories.base import BaseRepository
+
+
+class EventRepository(BaseRepository):
+    """事件数据访问"""
+
+    TABLE = "events e"
+    ID_FIELD = "event_id"
+
+    COLUMNS = {
+        "event_id": "e.event_id",
+        "dynasty_id": "e.dynasty_id",
+        "emperor_id": "e.emperor_id",
+        "title": "e.title",
+        "event_type": "e.event_type",
+        "start_date": "e.start_date",
+        "end_date": "e.end_date",
+        "location": "e.location",
+        "description": "e.description",
+        "significance": "e.significance",
+        "casualties": "e.casualty",
+        "result": "e.result",
+        "data_source": "e.data_source",
+        "created_at": "e.created_at",
+        "updated_at": "e.updated_at",
+        "person_count": "COALESCE(c.value, 0)",
+    }
+
+    JOINS = {
+        "person_count": "LEFT JOIN entity_counters c "
+                        "ON c.entity_type = 'event' AND c.entity_id = e.event_id AND c.counter = 'person_count'",
+    }
+
+    RELATED = {
+        "related_persons": "SELECT event_id, person_id FROM event_person_relation WHERE event_id IN ({ids})",
+    }
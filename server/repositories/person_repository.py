@@ -0,0 +1,58 @@
+"""
+人物数据访问
+"""
+import json
+from typing import Any, Dict
+
+from server.repositories.base import BaseRepository
+
+
+class PersonRepository(BaseRepository):
+    """人物数据访问"""
+
+    TABLE = "persons p"
+    ID_FIELD = "person_id"
+
+    COLUMNS = {
+        "person_id": "p.person_id",
+        "dynasty_id": "p.dynasty_id",
+        "name": "p.name",
+        "alias": "p.alias",
+        "birth_date": "p.birth_date",
+        "death_date": "p.death_date",
+        "person_type": "p.person_type",
+        "position": "p.position",
+        "biography": "p.biography",
+        "style": "p.style",
+        "contributions": "p.contributions",
+        "portrait_url": "p.portrait_url",
+        "data_source": "p.data_source",
+        "created_at": "p.created_at",
+        "updated_at": "p.updated_at",
+        "event_count": "COALESCE(ec.value, 0)",
+        "work_count": "COALESCE(wc.value, 0)",
+    }
+
+    JOINS = {
+        "event_count": "LEFT JOIN entity_counters ec "
+                       "ON ec.entity_type = 'person' AND ec.entity_id = p.person_id AND ec.counter = 'event_count'",
+        "work_count": "LEFT JOIN entity_counters wc "
+                      "ON wc.entity_type = 'person' AND wc.entity_id = p.person_id AND wc.counter = 'work_count'",
+    }
+
+    RELATED = {
+        # 相关皇帝（按在位时间排序）
+        "related_emperors": """
+            SELECT pe.person_id, pe.emperor_id
+            FROM person_emperor pe
+            JOIN emperors e ON e.emperor_id = pe.emperor_id
+            WHERE pe.person_id IN ({ids})
+            ORDER BY e.reign_start
+        """,
+        "works": "SELECT person_id, title FROM works WHERE person_id IN ({ids})",
+    }
+
+    def convert_row(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if "alias" in item:
+            item["alias"] = json.loads(item["alias"]) if item["alias"] else None  # JSON数组
+        return item
@@ -0,0 +1,26 @@
+"""
+批量查询Schema定义
+"""
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from server.schemas.emperor import EmperorDetail
+from server.schemas.event import EventDetail
+from server.schemas.person import PersonDetail
+
+
+class BatchRequest(BaseModel):
+    """批量查询请求"""
+    emperor_ids: List[str] = Field(default_factory=list, description="皇帝ID列表")
+    person_ids: List[str] = Field(default_factory=list, description="人物ID列表")
+    event_ids: List[str] = Field(default_factory=list, description="事件ID列表")
+    emperor_fields: Optional[str] = Field(None, description="皇帝返回字段，逗号分隔，默认全部")
+    person_fields: Optional[str] = Field(None, description="人物返回字段，逗号分隔，默认全部")
+    event_fields: Optional[str] = Field(None, description="事件返回字段，逗号分隔，默认全部")
+
+
+class BatchResponse(BaseModel):
+    """批量查询响应（按ID索引的详情，与单个详情接口结构一致）"""
+    emperors: Dict[str, EmperorDetail] = Field(default_factory=dict, description="皇帝详情")
+    persons: Dict[str, PersonDetail] = Field(default_factory=dict, description="人物详情")
+    events: Dict[str, EventDetail] = Field(default_factory=dict, description="事件详情")
+    not_found: List[str] = Field(default_factory=list, description="不存在的ID")
@@ -43,6 +43,11 @@ class PersonSummary(BaseModel):
         from_attributes = True
 
 
+class EmperorPerson(PersonSummary):
+    """皇帝相关人物Schema（person_emperor 关联）"""
+    position: Optional[str] = Field(None, description="在该皇帝朝中的职位")
+
+
 class PersonDetail(PersonResponse):
     """人物详情Schema"""
     style: Optional[str] = Field(None, description="风格特点")
@@ -0,0 +1,49 @@
+"""
+字段投影（fields= 参数）
+客户端只请求需要的字段，查询只读取对应的列，响应只包含这些字段
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel], id_field: str) -> Optional[Tuple[str, ...]]:
+    """
+    解析并校验 fields 参数
+
+    Args:
+        fields: 逗号分隔的字段名，如 "name,reign_start"；为空表示返回全部字段
+        schema: 详情 Schema，字段必须属于该 Schema
+        id_field: 主键字段（始终返回）
+
+    Returns:
+        字段元组（主键在前），未指定时返回 None
+
+    Raises:
+        ValueError: 包含不支持的字段
+    """
+    if not fields:
+        return None
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    invalid = [name for name in names if name not in schema.model_fields]
+    if invalid:
+        raise ValueError(f"不支持的字段: {', '.join(invalid)}")
+
+    return tuple(dict.fromkeys([id_field] + names))
+
+
+@lru_cache(maxsize=256)
+def projection_model(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """生成只包含指定字段的 Schema（字段类型与说明沿用原 Schema）"""
+    definitions = {
+        name: (schema.model_fields[name].annotation, schema.model_fields[name])
+        for name in fields
+    }
+    return create_model(f"{schema.__name__}Projection", **definitions)
+
+
+def project(schema: Type[BaseModel], fields: Tuple[str, ...], data: Dict[str, Any]) -> Dict[str, Any]:
+    """按字段投影校验并序列化数据（返回可直接 JSON 编码的字典）"""
+    return projection_model(schema, fields).model_validate(data).model_dump(mode="json")
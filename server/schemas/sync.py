@@ -0,0 +1,23 @@
+"""
+增量同步Schema定义
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class ChangeItem(BaseModel):
+    """变更记录"""
+    version: int = Field(..., description="变更版本（单调递增）")
+    entity_type: str = Field(..., description="实体类型: dynasty, emperor, event, person, work")
+    entity_id: str = Field(..., description="实体ID")
+    op: str = Field(..., description="操作: upsert, delete")
+    data: Optional[Dict[str, Any]] = Field(None, description="实体当前详情（include_data=true 且为皇帝/人物/事件的 upsert 时返回）")
+
+
+class SyncResponse(BaseModel):
+    """增量同步响应"""
+    since: int = Field(..., description="请求的起始版本")
+    next_since: int = Field(..., description="下一页的起始版本（客户端保存该值用于下次同步）")
+    latest_version: int = Field(..., description="服务端当前最新版本")
+    has_more: bool = Field(..., description="是否还有更多变更")
+    changes: List[ChangeItem] = Field(default_factory=list, description="变更列表（同一实体只保留本页最后一次变更）")
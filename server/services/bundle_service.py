@@ -0,0 +1,363 @@
+"""
+离线数据包服务
+把一个朝代的皇帝、事件、人物、关联关系和预计算的时间轴导出为 gzip 压缩的 SQLite 快照，
+客户端下载一次后在本地查询；数据更新后可只下载两个版本之间的增量包
+
+存储结构（settings.BUNDLE_DIR 下）：
+    {dynasty_id}/manifest.json                     版本清单（最新版本在 latest）
+    {dynasty_id}/{version}.sqlite.gz               全量包
+    {dynasty_id}/delta_{from}_{to}.json.gz         增量包（按需生成后缓存）
+
+版本号取数据内容哈希的前16位，数据不变时重复构建不会产生新版本
+
+用法:
+    python -m server.services.bundle_service build [dynasty_id ...]
+    python -m server.services.bundle_service delta <dynasty_id> <from_version>
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from server.config.settings import settings
+from server.database.sqlite_manager import SQLiteManager
+from server.services.timeline_service import build_timeline
+
+
+# 数据包格式版本（表结构变化时递增，客户端据此判断能否读取）
+BUNDLE_FORMAT = 1
+
+# 导出的表：(表名, 主键列, 按朝代筛选的条件)
+BUNDLE_TABLES: List[Tuple[str, Tuple[str, ...], str]] = [
+    ("dynasties", ("dynasty_id",), "dynasty_id = ?"),
+    ("emperors", ("emperor_id",), "dynasty_id = ?"),
+    ("events", ("event_id",), "dynasty_id = ?"),
+    ("persons", ("person_id",), "dynasty_id = ?"),
+    ("works", ("work_id",), "person_id IN (SELECT person_id FROM persons WHERE dynasty_id = ?)"),
+    ("person_emperor", ("person_id", "emperor_id"), "emperor_id IN (SELECT emperor_id FROM emperors WHERE dynasty_id = ?)"),
+    ("event_person_relation", ("relation_id",), "event_id IN (SELECT event_id FROM events WHERE dynasty_id = ?)"),
+    ("person_relations", ("relation_id",), "person_id_from IN (SELECT person_id FROM persons WHERE dynasty_id = ?)"),
+]
+
+# 不导出的列（客户端不需要，且会让内容哈希随无关更新变化）
+EXCLUDED_COLUMNS = {"created_at", "updated_at"}
+
+# 预计算时间轴表：每年一行，item 为 TimelineItem 的 JSON
+TIMELINE_TABLE = "timeline"
+TIMELINE_DDL = f"CREATE TABLE {TIMELINE_TABLE} (year INTEGER PRIMARY KEY, item TEXT NOT NULL)"
+
+
+# 按朝代串行化构建：并发请求同一朝代的过期数据包时只构建一次，其余请求等待后读取新清单
+_build_locks: Dict[str, threading.Lock] = {}
+_build_locks_guard = threading.Lock()
+
+
+def _build_lock(dynasty_id: str) -> threading.Lock:
+    with _build_locks_guard:
+        return _build_locks.setdefault(dynasty_id, threading.Lock())
+
+
+class BundleNotFoundError(Exception):
+    """朝代或数据包版本不存在"""
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class BundleService:
+    """离线数据包构建与读取"""
+
+    def __init__(self, db: SQLiteManager, bundle_dir: str = None):
+        self.db = db
+        self.bundle_dir = Path(bundle_dir or settings.BUNDLE_DIR)
+
+    # ------------------------------------------------------------------
+    # 版本清单
+    # ------------------------------------------------------------------
+
+    def _dynasty_dir(self, dynasty_id: str) -> Path:
+        return self.bundle_dir / dynasty_id
+
+    def snapshot_path(self, dynasty_id: str, version: str) -> Path:
+        return self._dynasty_dir(dynasty_id) / f"{version}.sqlite.gz"
+
+    def delta_path(self, dynasty_id: str, from_version: str, to_version: str) -> Path:
+        return self._dynasty_dir(dynasty_id) / f"delta_{from_version}_{to_version}.json.gz"
+
+    def load_manifest(self, dynasty_id: str) -> Optional[dict]:
+        """读取版本清单，未构建过时返回 None"""
+        path = self._dynasty_dir(dynasty_id) / "manifest.json"
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_manifest(self, dynasty_id: str, manifest: dict):
+        path = self._dynasty_dir(dynasty_id) / "manifest.json"
+        _atomic_write(path, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def is_stale(self, manifest: Optional[dict]) -> bool:
+        """清单不存在或最新版本构建时间超过 BUNDLE_REBUILD_INTERVAL 秒时需要重新构建"""
+        if not manifest:
+            return True
+        built_at = datetime.fromisoformat(manifest["versions"][-1]["built_at"])
+        return (datetime.now() - built_at).total_seconds() > settings.BUNDLE_REBUILD_INTERVAL
+
+    def ensure_latest(self, dynasty_id: str) -> dict:
+        """返回最新版本信息，必要时先构建（同一朝代同时只有一个构建，拿到锁后重新检查清单）"""
+        manifest = self.load_manifest(dynasty_id)
+        if self.is_stale(manifest):
+            with _build_lock(dynasty_id):
+                manifest = self.load_manifest(dynasty_id)
+                if self.is_stale(manifest):
+                    manifest = self.build(dynasty_id)
+        return manifest["versions"][-1]
+
+    # ------------------------------------------------------------------
+    # 全量包
+    # ------------------------------------------------------------------
+
+    def build(self, dynasty_id: str) -> dict:
+        """
+        构建朝代数据包
+
+        数据与最新版本相同时只刷新构建时间，不产生新版本；
+        超过 BUNDLE_KEEP_VERSIONS 的旧版本及其增量包会被删除
+
+        Returns:
+            更新后的版本清单
+
+        Raises:
+            BundleNotFoundError: 朝代不存在
+        """
+        timeline = build_timeline(self.db, dynasty_id)
+        if timeline is None:
+            raise BundleNotFoundError(f"朝代不存在: {dynasty_id}")
+
+        source = self.db.connect()
+        dynasty_dir = self._dynasty_dir(dynasty_id)
+        dynasty_dir.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".sqlite", dir=dynasty_dir)
+        os.close(fd)
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                content_hash = self._export(source, target, dynasty_id, timeline)
+                version = content_hash[:16]
+                target.executemany(
+                    "INSERT INTO bundle_meta (key, value) VALUES (?, ?)",
+                    [("format", str(BUNDLE_FORMAT)), ("dynasty_id", dynasty_id),
+                     ("version", version), ("content_hash", content_hash)]
+                )
+                target.commit()
+                target.execute("VACUUM")
+            finally:
+                target.close()
+
+            manifest = self.load_manifest(dynasty_id) or {
+                "dynasty_id": dynasty_id,
+                "format": BUNDLE_FORMAT,
+                "versions": []
+            }
+            built_at = datetime.now().isoformat(timespec="seconds")
+            latest = manifest["versions"][-1] if manifest["versions"] else None
+
+            if latest and latest["version"] == version and self.snapshot_path(dynasty_id, version).exists():
+                latest["built_at"] = built_at
+            else:
+                with open(tmp_path, "rb") as f:
+                    data = gzip.compress(f.read(), compresslevel=9)
+                _atomic_write(self.snapshot_path(dynasty_id, version), data)
+                manifest["versions"] = [v for v in manifest["versions"] if v["version"] != version]
+                manifest["versions"].append({
+                    "version": version,
+                    "content_hash": content_hash,
+                    "sha256": hashlib.sha256(data).hexdigest(),
+                    "size": len(data),
+                    "built_at": built_at
+                })
+                self._prune(dynasty_id, manifest)
+
+            manifest["latest"] = version
+            self._save_manifest(dynasty_id, manifest)
+            return manifest
+        finally:
+            os.remove(tmp_path)
+
+    def _export(self, source: sqlite3.Connection, target: sqlite3.Connection,
+                dynasty_id: str, timeline: dict) -> str:
+        """把朝代数据写入快照库，返回内容哈希（按主键排序后逐行计算，与文件字节无关）"""
+        digest = hashlib.sha256()
+        target.execute("CREATE TABLE bundle_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        for table, primary_key, condition in BUNDLE_TABLES:
+            columns = [
+                (row[1], row[2]) for row in source.execute(f"PRAGMA table_info({table})")
+                if row[1] not in EXCLUDED_COLUMNS
+            ]
+            names = [name for name, _ in columns]
+            column_defs = ", ".join(f"{name} {type_}" for name, type_ in columns)
+            target.execute(f"CREATE TABLE {table} ({column_defs}, PRIMARY KEY ({', '.join(primary_key)}))")
+
+            rows = source.execute(
+                f"SELECT {', '.join(names)} FROM {table} WHERE {condition} ORDER BY {', '.join(primary_key)}",
+                (dynasty_id,)
+            ).fetchall()
+            rows = [tuple(row) for row in rows]
+            target.executemany(
+                f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", rows
+            )
+
+            digest.update(_dumps([table, names]).encode("utf-8"))
+            for row in rows:
+                digest.update(_dumps(row).encode("utf-8"))
+
+        target.execute(TIMELINE_DDL)
+        items = [(item["year"], _dumps(item)) for item in timeline["timeline"]]
+        target.executemany(f"INSERT INTO {TIMELINE_TABLE} (year, item) VALUES (?, ?)", items)
+        for item in items:
+            digest.update(_dumps(item).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def _prune(self, dynasty_id: str, manifest: dict):
+        """只保留最近 BUNDLE_KEEP_VERSIONS 个版本"""
+        keep = max(1, settings.BUNDLE_KEEP_VERSIONS)
+        removed = manifest["versions"][:-keep]
+        manifest["versions"] = manifest["versions"][-keep:]
+        for entry in removed:
+            self.snapshot_path(dynasty_id, entry["version"]).unlink(missing_ok=True)
+            for path in self._dynasty_dir(dynasty_id).glob(f"delta_*{entry['version']}*.json.gz"):
+                path.unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # 增量包
+    # ------------------------------------------------------------------
+
+    def delta(self, dynasty_id: str, from_version: str) -> Tuple[dict, Path]:
+        """
+        生成（或读取缓存的）从 from_version 到最新版本的增量包
+
+        增量包为 gzip 压缩的 JSON：
+        {"format", "dynasty_id", "from_version", "to_version", "content_hash",
+         "tables": {表名: {"columns", "primary_key", "upserts": [行], "deletes": [主键]}}}
+        只包含有变化的表
+
+        Returns:
+            (最新版本信息, 增量包路径)
+
+        Raises:
+            BundleNotFoundError: 朝代不存在，或 from_version 已被清理/从未存在（客户端应下载全量包）
+        """
+        latest = self.ensure_latest(dynasty_id)
+        manifest = self.load_manifest(dynasty_id)
+        if from_version not in {v["version"] for v in manifest["versions"]}:
+            raise BundleNotFoundError(f"数据包版本不存在: {from_version}")
+
+        path = self.delta_path(dynasty_id, from_version, latest["version"])
+        if path.exists():
+            return latest, path
+
+        old_rows = _read_snapshot(self.snapshot_path(dynasty_id, from_version))
+        new_rows = _read_snapshot(self.snapshot_path(dynasty_id, latest["version"]))
+
+        tables = {}
+        for table, (columns, primary_key, rows) in new_rows.items():
+            _, _, previous = old_rows.get(table, (columns, primary_key, {}))
+            upserts = [row for key, row in rows.items() if previous.get(key) != row]
+            deletes = [list(key) for key in previous if key not in rows]
+            if upserts or deletes:
+                tables[table] = {
+                    "columns": columns,
+                    "primary_key": primary_key,
+                    "upserts": upserts,
+                    "deletes": deletes
+                }
+
+        delta = {
+            "format": BUNDLE_FORMAT,
+            "dynasty_id": dynasty_id,
+            "from_version": from_version,
+            "to_version": latest["version"],
+            "content_hash": latest["content_hash"],
+            "tables": tables
+        }
+        _atomic_write(path, gzip.compress(_dumps(delta).encode("utf-8"), compresslevel=9))
+        return latest, path
+
+
+def _read_snapshot(path: Path) -> Dict[str, Tuple[List[str], List[str], Dict[tuple, list]]]:
+    """读取快照中的全部数据表：表名 → (列名, 主键列, 主键 → 行)"""
+    fd, tmp_path = tempfile.mkstemp(suffix=".sqlite")
+    try:
+        with os.fdopen(fd, "wb") as f, gzip.open(path, "rb") as src:
+            f.write(src.read())
+        conn = sqlite3.connect(tmp_path)
+        try:
+            result = {}
+            table_names = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'bundle_meta'"
+            )]
+            for table in table_names:
+                info = list(conn.execute(f"PRAGMA table_info({table})"))
+                columns = [row[1] for row in info]
+                primary_key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+                key_index = [columns.index(name) for name in primary_key]
+                rows = {}
+                for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}"):
+                    rows[tuple(row[i] for i in key_index)] = list(row)
+                result[table] = (columns, primary_key, rows)
+            return result
+        finally:
+            conn.close()
+    finally:
+        os.remove(tmp_path)
+
+
+def _atomic_write(path: Path, data: bytes):
+    """先写临时文件再替换，避免读到写了一半的文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def main(argv: Sequence[str] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="离线数据包构建")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="构建全量包（默认所有朝代）")
+    build_parser.add_argument("dynasty_ids", nargs="*")
+    delta_parser = subparsers.add_parser("delta", help="生成从指定版本到最新版本的增量包")
+    delta_parser.add_argument("dynasty_id")
+    delta_parser.add_argument("from_version")
+    args = parser.parse_args(argv)
+
+    db = SQLiteManager(settings.SQLITE_DB_PATH)
+    try:
+        service = BundleService(db)
+        if args.command == "build":
+            dynasty_ids = args.dynasty_ids or [row[0] for row in db.fetch_all("SELECT dynasty_id FROM dynasties")]
+            for dynasty_id in dynasty_ids:
+                manifest = service.build(dynasty_id)
+                latest = manifest["versions"][-1]
+                print(f"✅ {dynasty_id}: 版本 {latest['version']}（{latest['size']} 字节）")
+        else:
+            latest, path = service.delta(args.dynasty_id, args.from_version)
+            print(f"✅ {args.dynasty_id}: {args.from_version} → {latest['version']}（{path.stat().st_size} 字节）: {path}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
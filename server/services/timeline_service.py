@@ -0,0 +1,107 @@
+"""
+时间轴构建服务
+时间轴接口与离线数据包共用
+"""
+from collections import defaultdict
+from typing import Dict, Optional
+
+from server.database.sqlite_manager import SQLiteManager
+
+
+def build_timeline(db: SQLiteManager, dynasty_id: str) -> Optional[dict]:
+    """
+    构建指定朝代的时间轴（结构与 TimelineResponse 一致）
+
+    Returns:
+        时间轴数据，朝代不存在时返回 None
+    """
+    # 获取朝代信息
+    dynasty_sql = "SELECT dynasty_id, name, start_year, end_year FROM dynasties WHERE dynasty_id = ?"
+    dynasty_row = db.fetch_one(dynasty_sql, (dynasty_id,))
+
+    if not dynasty_row:
+        return None
+
+    dynasty_name = dynasty_row[1]
+    start_year = dynasty_row[2]
+    end_year = dynasty_row[3]
+
+    # 获取该朝代的所有事件
+    events_sql = """
+        SELECT event_id, title, event_type, start_date, location
+        FROM events
+        WHERE dynasty_id = ?
+        ORDER BY start_date
+    """
+    event_rows = db.fetch_all(events_sql, (dynasty_id,))
+
+    # 获取该朝代的所有皇帝
+    emperors_sql = """
+        SELECT emperor_id, name, temple_name, reign_title, reign_start, reign_end
+        FROM emperors
+        WHERE dynasty_id = ?
+        ORDER BY dynasty_order
+    """
+    emperor_rows = db.fetch_all(emperors_sql, (dynasty_id,))
+
+    # 按年份组织时间轴数据
+    timeline_dict: Dict[int, dict] = defaultdict(lambda: {
+        "year": 0,
+        "events": [],
+        "emperor": None
+    })
+
+    # 添加事件到时间轴
+    for event in event_rows:
+        if event[3]:  # start_date
+            try:
+                year = int(event[3][:4]) if isinstance(event[3], str) else event[3].year
+                timeline_dict[year]["year"] = year
+                timeline_dict[year]["events"].append({
+                    "event_id": event[0],
+                    "title": event[1],
+                    "event_type": event[2],
+                    "start_date": event[3],
+                    "location": event[4]
+                })
+            except (ValueError, AttributeError):
+                continue
+
+    # 添加皇帝到时间轴（每年显示在位皇帝）
+    for emperor in emperor_rows:
+        if emperor[4] and emperor[5]:  # reign_start, reign_end
+            try:
+                start = int(emperor[4][:4]) if isinstance(emperor[4], str) else emperor[4].year
+                end = int(emperor[5][:4]) if isinstance(emperor[5], str) else emperor[5].year
+
+                for year in range(start, end + 1):
+                    if year not in timeline_dict:
+                        timeline_dict[year] = {
+                            "year": year,
+                            "events": [],
+                            "emperor": None
+                        }
+
+                    if timeline_dict[year]["emperor"] is None:
+                        timeline_dict[year]["emperor"] = {
+                            "emperor_id": emperor[0],
+                            "name": emperor[1],
+                            "temple_name": emperor[2],
+                            "reign_title": emperor[3],
+                            "reign_year": year - start + 1
+                        }
+            except (ValueError, AttributeError):
+                continue
+
+    # 排序并转换为列表
+    timeline = sorted(timeline_dict.values(), key=lambda x: x["year"])
+
+    return {
+        "dynasty_id": dynasty_id,
+        "dynasty_name": dynasty_name,
+        "start_year": start_year,
+        "end_year": end_year,
+        "timeline": timeline,
+        "total_events": len(event_rows) if event_rows else 0,
+        "total_emperors": len(emperor_rows) if emperor_rows else 0
+    }
@@ -134,6 +134,11 @@ def main():
     print("\n【时间轴API测试】")
     results.append(test_endpoint("GET", f"{BASE_URL}/timeline/ming", "获取明朝时间轴"))
     
+    # 6. 测试批量查询API
+    print("\n【批量查询API测试】")
+    results.append(test_endpoint("POST", f"{BASE_URL}/batch", "批量获取详情",
+                                 {"emperor_ids": ["ming_emperor_001"], "person_ids": [], "event_ids": []}))
+    
     # 统计结果
     print("\n" + "="*60)
     print("测试结果统计")
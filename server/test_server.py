@@ -0,0 +1,521 @@
+"""
+服务端测试：数据库（关联表、计数表、变更日志、慢查询日志）及 API 接口（TestClient 驱动完整应用和全部中间件）
+"""
+import os
+import sys
+import tempfile
+from functools import lru_cache
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from server.config.settings import settings
+from server.database.slow_query_log import SlowQueryLog
+from server.database.sqlite_manager import SQLiteManager
+
+# API 测试使用的临时数据库（进程退出时删除）
+_TMP_DIR = tempfile.TemporaryDirectory()
+
+
+def _seed(db: SQLiteManager):
+    """API 测试数据：明朝两位皇帝、两个事件、两位人物"""
+    db.execute_many(
+        "INSERT INTO emperors (emperor_id, dynasty_id, name, temple_name, reign_title, reign_start, reign_end, dynasty_order, "
+        "data_source) VALUES (?, 'ming', ?, ?, ?, ?, ?, ?, 'wikipedia')",
+        [('ming_emperor_001', '朱元璋', '太祖', '洪武', '1368-01-23', '1398-06-24', 1),
+         ('ming_emperor_003', '朱棣', '成祖', '永乐', '1402-07-17', '1424-08-12', 3)]
+    )
+    db.execute_many(
+        "INSERT INTO events (event_id, dynasty_id, emperor_id, title, event_type, start_date, data_source) "
+        "VALUES (?, 'ming', ?, ?, ?, ?, 'wikipedia')",
+        [('ming_event_001', 'ming_emperor_003', '靖难之役', 'military', '1399-08-06'),
+         ('ming_event_002', 'ming_emperor_003', '迁都北京', 'political', '1421-01-01')]
+    )
+    db.execute_many(
+        "INSERT INTO persons (person_id, dynasty_id, name, person_type, position, data_source) "
+        "VALUES (?, 'ming', ?, ?, ?, 'wikipedia')",
+        [('ming_person_001', '姚广孝', 'minister', '太子少师'), ('ming_person_002', '郑和', 'eunuch', '内官监太监')]
+    )
+    db.execute("INSERT INTO event_person_relation (relation_id, event_id, person_id) VALUES ('r1', 'ming_event_001', 'ming_person_001')")
+    db.save_person_emperor_relations([('ming_person_001', 'ming_emperor_003', '太子少师'),
+                                      ('ming_person_002', 'ming_emperor_003', None)], source='crawler')
+
+
+@lru_cache(maxsize=None)
+def _client() -> TestClient:
+    """使用临时数据库的 API 客户端（应用在首次请求时构建中间件，之后读取的都是临时数据库）"""
+    db_path = os.path.join(_TMP_DIR.name, 'api.db')
+    db = SQLiteManager(db_path)
+    db.initialize_database()
+    _seed(db)
+    db.close()
+    settings.SQLITE_DB_PATH = db_path
+    settings.BUNDLE_DIR = os.path.join(_TMP_DIR.name, 'bundles')
+    settings.ACCESS_LOG_PATH = os.path.join(_TMP_DIR.name, 'logs', 'access.log')
+
+    from server.main import app
+    return TestClient(app)
+
+
+def test_person_emperor_relation():
+    """测试人物-皇帝关联表"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SQLiteManager(os.path.join(tmp_dir, 'test.db'))
+        db.initialize_database()
+        db.execute("INSERT OR IGNORE INTO dynasties (dynasty_id, name, start_year, end_year) VALUES ('ming', '明朝', 1368, 1644)")
+        db.execute_many(
+            "INSERT INTO emperors (emperor_id, dynasty_id, name, reign_start, dynasty_order) VALUES (?, 'ming', ?, ?, ?)",
+            [('ming_emperor_001', '朱元璋', '1368-01-23', 1), ('ming_emperor_003', '朱棣', '1402-07-17', 3)]
+        )
+        db.execute("INSERT INTO persons (person_id, dynasty_id, name, person_type) VALUES ('ming_person_x', 'ming', '姚广孝', 'minister')")
+
+        count = db.save_person_emperor_relations([
+            ('ming_person_x', 'ming_emperor_003', '太子少师'),
+            ('ming_person_x', 'ming_emperor_001', None),
+            ('ming_person_missing', 'ming_emperor_001', '大将'),  # 人物不存在，跳过
+        ], source='crawler')
+        print(f"写入关联: {count}")
+        assert count == 2
+
+        # 重复写入不覆盖已有职位，人物记录被替换后关联仍保留
+        db.save_person_emperor_relations([('ming_person_x', 'ming_emperor_003', None)], source='neo4j')
+        db.execute("INSERT OR REPLACE INTO persons (person_id, dynasty_id, name, person_type) VALUES ('ming_person_x', 'ming', '姚广孝', 'minister')")
+        row = db.fetch_one("SELECT position, source FROM person_emperor WHERE person_id = ? AND emperor_id = ?",
+                           ('ming_person_x', 'ming_emperor_003'))
+        print(f"姚广孝 → 朱棣: {tuple(row)}")
+        assert tuple(row) == ('太子少师', 'neo4j')
+
+        emperors = [r[0] for r in db.fetch_all(
+            "SELECT pe.emperor_id FROM person_emperor pe JOIN emperors e ON e.emperor_id = pe.emperor_id "
+            "WHERE pe.person_id = ? ORDER BY e.reign_start", ('ming_person_x',))]
+        assert emperors == ['ming_emperor_001', 'ming_emperor_003']
+        db.close()
+
+
+def test_entity_counters():
+    """测试触发器维护的计数表"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SQLiteManager(os.path.join(tmp_dir, 'test.db'))
+        db.initialize_database()
+        db.execute_many(
+            "INSERT OR REPLACE INTO emperors (emperor_id, dynasty_id, name, reign_start, dynasty_order) VALUES (?, 'ming', ?, ?, ?)",
+            [('ming_emperor_001', '朱元璋', '1368-01-23', 1), ('ming_emperor_003', '朱棣', '1402-07-17', 3),
+             ('ming_emperor_003', '朱棣', '1402-07-17', 3)]  # 重复写入（REPLACE）不重复计数
+        )
+        db.execute_many(
+            "INSERT OR REPLACE INTO events (event_id, dynasty_id, emperor_id, title, event_type, start_date) VALUES (?, 'ming', ?, ?, 'political', ?)",
+            [('e1', 'ming_emperor_003', '靖难之役', '1399-08-06'), ('e2', 'ming_emperor_003', '迁都北京', '1421-01-01'),
+             ('e3', None, '土木之变', '1449-09-01')]
+        )
+        db.execute("INSERT INTO persons (person_id, dynasty_id, name, person_type) VALUES ('p1', 'ming', '姚广孝', 'minister')")
+        db.execute("INSERT INTO event_person_relation (relation_id, event_id, person_id) VALUES ('e1_p1', 'e1', 'p1')")
+        db.execute("UPDATE events SET emperor_id = 'ming_emperor_001' WHERE event_id = 'e2'")
+        db.execute("DELETE FROM event_person_relation WHERE relation_id = 'e1_p1'")
+
+        print(f"全库计数: {db.get_counters('global')}")
+        assert db.get_counters('global') == {
+            'dynasty_count': 1, 'emperor_count': 2, 'event_count': 3, 'person_count': 1, 'work_count': 0
+        }
+        assert db.get_counters('dynasty', 'ming') == {'emperor_count': 2}
+        assert db.get_counters('emperor', 'ming_emperor_003') == {'event_count': 1}
+        assert db.get_counters('emperor', 'ming_emperor_001') == {'event_count': 1}
+        assert db.get_counters('event', 'e1') == {'person_count': 0}
+
+        # 重建结果与触发器维护的计数一致（分组计数不产生为 0 的记录，比较时忽略）
+        counters_sql = "SELECT * FROM entity_counters WHERE value > 0"
+        live = {row[:3]: row[3] for row in map(tuple, db.fetch_all(counters_sql))}
+        db.rebuild_counters()
+        rebuilt = {row[:3]: row[3] for row in map(tuple, db.fetch_all(counters_sql))}
+        assert live == rebuilt
+        db.close()
+
+
+def test_change_log():
+    """测试触发器写入的变更日志"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SQLiteManager(os.path.join(tmp_dir, 'test.db'))
+        db.initialize_database()
+        since = db.get_change_version()
+
+        # 重复执行初始化脚本、重新连接均不改写初始数据，不产生变更日志
+        assert since == 1
+        db.initialize_database()
+        db.close()
+        assert not db.ensure_schema()
+        assert db.get_change_version() == since
+
+        db.execute("INSERT INTO emperors (emperor_id, dynasty_id, name, reign_start, dynasty_order) VALUES ('ming_emperor_003', 'ming', '朱棣', '1402-07-17', 3)")
+        db.execute("INSERT INTO events (event_id, dynasty_id, title, event_type, start_date) VALUES ('e1', 'ming', '靖难之役', 'political', '1399-08-06')")
+        db.execute("INSERT OR REPLACE INTO events (event_id, dynasty_id, title, event_type, start_date) VALUES ('e1', 'ming', '靖难之役', 'military', '1399-08-06')")
+        db.execute("INSERT INTO persons (person_id, dynasty_id, name, person_type) VALUES ('p1', 'ming', '姚广孝', 'minister')")
+        db.execute("INSERT INTO event_person_relation (relation_id, event_id, person_id) VALUES ('e1_p1', 'e1', 'p1')")
+        db.execute("DELETE FROM emperors WHERE emperor_id = 'ming_emperor_003'")
+
+        changes, next_since, has_more = db.get_changes(since, 100)
+        summary = [(c['entity_type'], c['entity_id'], c['op']) for c in changes]
+        print(f"变更: {summary}")
+        # 同一实体只保留最后一次变更，按 version 排序
+        assert summary == [('event', 'e1', 'upsert'), ('person', 'p1', 'upsert'), ('emperor', 'ming_emperor_003', 'delete')]
+        assert next_since == db.get_change_version() and not has_more
+
+        # 分页：每页读取的日志条数受 limit 限制，next_since 递增
+        page, page_next, page_more = db.get_changes(since, 2)
+        assert page_more and page_next == since + 2
+        assert db.get_changes(next_since, 100) == ([], next_since, False)
+        assert [c['entity_type'] for c in db.get_changes(since, 100, ['person'])[0]] == ['person']
+        db.close()
+
+
+def test_change_log_unchanged_rows():
+    """测试重复写入相同数据不产生变更日志，以及变更日志压缩"""
+    from server.database.sqlite_manager import upsert_sql
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SQLiteManager(os.path.join(tmp_dir, 'test.db'))
+        db.initialize_database()
+        since = db.get_change_version()
+
+        # 按主键 upsert：内容相同的记录不改写，内容变化时记录一次 upsert
+        sql = upsert_sql('persons', 'person_id', ['person_id', 'dynasty_id', 'name', 'person_type'])
+        db.execute(sql, ('p1', 'ming', '姚广孝', 'minister'))
+        db.execute(sql, ('p1', 'ming', '姚广孝', 'minister'))
+        assert db.get_change_version() == since + 1
+        db.execute(sql, ('p1', 'ming', '姚广孝', 'monk'))
+        assert db.get_change_version() == since + 2
+
+        # 只改 updated_at 等元数据不记录
+        db.execute("UPDATE persons SET updated_at = '2000-01-01 00:00:00' WHERE person_id = 'p1'")
+        db.execute("UPDATE dynasties SET updated_at = '2000-01-01 00:00:00'")
+        assert db.get_change_version() == since + 2
+
+        # 已有数据库的旧触发器（无条件记录）在升级表结构版本时替换
+        db.execute("DROP TRIGGER trg_persons_change_update")
+        db.execute(
+            "CREATE TRIGGER trg_persons_change_update AFTER UPDATE ON persons BEGIN "
+            "INSERT INTO change_log (entity_type, entity_id, op) VALUES ('person', NEW.person_id, 'upsert'); END"
+        )
+        db.execute("PRAGMA user_version = 1")
+        db.close()
+        assert db.ensure_schema()
+        db.execute("UPDATE persons SET name = name WHERE person_id = 'p1'")
+        assert db.get_change_version() == since + 2
+
+        # 压缩：同一实体只保留最新一条，同步结果和最新版本号不变
+        db.execute("DELETE FROM persons WHERE person_id = 'p1'")
+        latest = db.get_change_version()
+        expected = db.get_changes(0, 1000)[0]
+        assert db.compact_change_log() == 2
+        assert db.get_change_version() == latest
+        assert db.get_changes(0, 1000)[0] == expected
+        assert db.get_changes(since, 1000)[0] == [{'version': latest, 'entity_type': 'person', 'entity_id': 'p1', 'op': 'delete'}]
+        db.close()
+
+
+def test_slow_query_log():
+    """测试慢查询日志（脱敏与执行计划）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = SQLiteManager(os.path.join(tmp_dir, 'test.db'))
+        db.initialize_database()
+        SQLiteManager.set_slow_query_log(SlowQueryLog(threshold_ms=0))
+        try:
+            db.fetch_all("SELECT person_id FROM persons WHERE name LIKE ?", ('%郑和%',))
+            db.fetch_one("SELECT name FROM emperors WHERE emperor_id = 'ming_emperor_001'")
+            latest, scan = SQLiteManager.slow_query_log.entries()
+        finally:
+            SQLiteManager.set_slow_query_log(None)
+        db.close()
+
+    print(f"全表扫描: {scan['sql']} -> {scan['plan']}")
+    assert scan['full_scan'] and scan['params'] == ['str']
+    assert '郑和' not in str(scan)
+    assert latest['sql'] == "SELECT name FROM emperors WHERE emperor_id = ?" and not latest['full_scan']
+
+
+def test_batch():
+    """测试批量查询：一次取回多种实体，不存在的ID列入 not_found，超出数量上限返回 400"""
+    client = _client()
+    response = client.post("/api/v1/batch", json={
+        "emperor_ids": ["ming_emperor_003", "ming_emperor_001", "ming_emperor_003"],
+        "person_ids": ["ming_person_001", "ming_person_missing"],
+        "event_ids": ["ming_event_002"],
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["emperors"]) == {"ming_emperor_001", "ming_emperor_003"}
+    assert data["emperors"]["ming_emperor_003"]["name"] == "朱棣"
+    assert data["persons"]["ming_person_001"]["name"] == "姚广孝"
+    assert data["events"]["ming_event_002"]["title"] == "迁都北京"
+    assert data["not_found"] == ["ming_person_missing"]
+
+    too_many = {"event_ids": [f"e{i}" for i in range(settings.BATCH_MAX_IDS + 1)]}
+    assert client.post("/api/v1/batch", json=too_many).status_code == 400
+
+
+def test_fields_projection():
+    """测试 fields= 投影：详情和批量接口只返回请求的字段（主键始终返回），未知字段返回 400"""
+    client = _client()
+    response = client.get("/api/v1/emperors/ming_emperor_003", params={"fields": "name, reign_start"})
+    assert response.status_code == 200
+    assert response.json() == {"emperor_id": "ming_emperor_003", "name": "朱棣", "reign_start": "1402-07-17"}
+
+    assert client.get("/api/v1/persons/ming_person_002", params={"fields": "name"}).json() == \
+        {"person_id": "ming_person_002", "name": "郑和"}
+    assert client.get("/api/v1/events/ming_event_001", params={"fields": "title,start_date"}).json() == \
+        {"event_id": "ming_event_001", "title": "靖难之役", "start_date": "1399-08-06"}
+    assert client.get("/api/v1/emperors/ming_emperor_003", params={"fields": "name,password"}).status_code == 400
+
+    # 批量接口：指定字段的实体按投影返回，其他实体仍返回完整详情
+    data = client.post("/api/v1/batch", json={
+        "emperor_ids": ["ming_emperor_001"], "person_ids": ["ming_person_001"], "person_fields": "name,position",
+    }).json()
+    assert data["persons"] == {"ming_person_001": {"person_id": "ming_person_001", "name": "姚广孝", "position": "太子少师"}}
+    assert data["emperors"]["ming_emperor_001"]["reign_title"] == "洪武"
+    assert client.post("/api/v1/batch", json={"event_fields": "nope"}).status_code == 400
+
+
+def test_response_encoding():
+    """测试响应编码：MessagePack 转码、gzip 压缩，Vary 保留内层中间件（CORS）的值"""
+    import msgpack
+    from server.middleware import merge_vary
+
+    assert merge_vary([b"Origin", b"accept"], [b"Accept", b"Accept-Encoding"]) == b"Origin, accept, Accept-Encoding"
+
+    client = _client()
+    origin = settings.ALLOWED_ORIGINS[0]
+    plain = client.get("/api/v1/events/", params={"limit": 7})
+    packed = client.get("/api/v1/events/", params={"limit": 7},
+                        headers={"Accept": "application/msgpack", "Accept-Encoding": "identity", "Origin": origin})
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content, raw=False) == plain.json()
+    vary = [token.strip() for token in packed.headers["vary"].split(",")]
+    assert sorted(vary) == ["Accept", "Accept-Encoding", "Origin"]
+
+    min_size = settings.COMPRESSION_MIN_SIZE
+    settings.COMPRESSION_MIN_SIZE = 0
+    try:
+        compressed = client.get("/api/v1/persons/", params={"limit": 9}, headers={"Accept-Encoding": "gzip"})
+    finally:
+        settings.COMPRESSION_MIN_SIZE = min_size
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert {person["name"] for person in compressed.json()} == {"姚广孝", "郑和"}
+
+    # 已压缩类型（离线数据包下载）在响应开始时判定为透传，响应体逐块转发、不缓存
+    import asyncio
+    from server.middleware import ResponseEncodingMiddleware
+
+    sent = []
+
+    async def bundle_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/gzip")]})
+        await send({"type": "http.response.body", "body": b"part1", "more_body": True})
+        # 第一块在应用继续产出响应体之前已经发出
+        assert sent[-1] == {"type": "http.response.body", "body": b"part1", "more_body": True}
+        await send({"type": "http.response.body", "body": b"part2"})
+
+    async def record(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip"), (b"accept", b"application/msgpack")]}
+    asyncio.run(ResponseEncodingMiddleware(bundle_app)(scope, None, record))
+    assert [message.get("body") for message in sent] == [None, b"part1", b"part2"]
+    assert sent[0]["headers"] == [(b"content-type", b"application/gzip")]
+
+
+def test_bundle_build_once():
+    """测试离线数据包：并发请求同一朝代的过期数据包只构建一次，接口返回最新版本"""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from server.services.bundle_service import BundleService
+
+    client = _client()
+    db = SQLiteManager(settings.SQLITE_DB_PATH)
+    builds = []
+    original_build = BundleService.build
+
+    def slow_build(self, dynasty_id):
+        builds.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return original_build(self, dynasty_id)
+
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        BundleService.build = slow_build
+        try:
+            with ThreadPoolExecutor(4) as pool:
+                versions = list(pool.map(lambda _: BundleService(db, bundle_dir).ensure_latest("ming")["version"], range(4)))
+        finally:
+            BundleService.build = original_build
+    db.close()
+    assert len(builds) == 1 and len(set(versions)) == 1
+
+    manifest = client.get("/api/v1/bundle/ming/manifest").json()
+    bundle = client.get("/api/v1/bundle/ming")
+    assert bundle.status_code == 200 and bundle.headers["x-bundle-version"] == manifest["latest"]
+    assert client.get("/api/v1/bundle/ming", headers={"If-None-Match": bundle.headers["etag"]}).status_code == 304
+
+
+def test_response_cache():
+    """测试响应缓存：命中后 CORS 响应头仍按各自的 Origin 返回，数据版本变化后缓存失效"""
+    client = _client()
+    first, second = settings.ALLOWED_ORIGINS[:2]
+    url = "/api/v1/emperors/ming_emperor_001"
+
+    miss = client.get(url, headers={"Origin": first})
+    assert miss.headers["x-cache"] == "MISS" and miss.headers["access-control-allow-origin"] == first
+    hit = client.get(url, headers={"Origin": second})
+    assert hit.headers["x-cache"] == "HIT" and hit.headers["access-control-allow-origin"] == second
+    assert "Origin" in hit.headers["vary"]
+    other = client.get(url, headers={"Origin": "https://evil.example"})
+    assert other.headers["x-cache"] == "HIT" and "access-control-allow-origin" not in other.headers
+
+    # 写库后（change_log 版本递增）缓存失效
+    interval = settings.CACHE_VERSION_CHECK_INTERVAL
+    settings.CACHE_VERSION_CHECK_INTERVAL = 0
+    db = SQLiteManager(settings.SQLITE_DB_PATH)
+    try:
+        db.execute("UPDATE emperors SET temple_name = '高皇帝' WHERE emperor_id = 'ming_emperor_001'")
+        refreshed = client.get(url)
+        assert refreshed.headers["x-cache"] == "MISS" and refreshed.json()["temple_name"] == "高皇帝"
+        db.execute("UPDATE emperors SET temple_name = '太祖' WHERE emperor_id = 'ming_emperor_001'")
+    finally:
+        db.close()
+        settings.CACHE_VERSION_CHECK_INTERVAL = interval
+
+
+def test_single_flight():
+    """测试相同请求合并：并发的相同请求只执行一次，不同参数的请求分别执行"""
+    import asyncio
+    import httpx
+    from server.cache import SingleFlightGroup, SingleFlightMiddleware
+
+    calls = []
+
+    async def slow_app(scope, receive, send):
+        calls.append(scope["query_string"])
+        await asyncio.sleep(0.05)
+        body = scope["query_string"] or b"-"
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": body})
+
+    group = SingleFlightGroup()
+    app = SingleFlightMiddleware(slow_app, group=group)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            urls = ["/api/v1/timeline/ming?b=2&a=1"] * 5 + ["/api/v1/timeline/ming?a=1&b=2", "/api/v1/timeline/ming?a=2"]
+            return await asyncio.gather(*(client.get(url) for url in urls))
+
+    responses = asyncio.run(run())
+    assert [r.text for r in responses] == ["b=2&a=1"] * 6 + ["a=2"]
+    assert len(calls) == 2
+    assert group.stats() == {"leaders": 2, "followers": 5, "in_flight": 0}
+
+
+def test_metrics_route_labels():
+    """测试请求指标的路由标签：子路由补齐挂载前缀，不同接口的同名子路由不混在一起"""
+    client = _client()
+    for url in ("/api/v1/dynasties/?skip=41", "/api/v1/dynasties/ming?m=41", "/api/v1/timeline/ming?m=41",
+                "/api/v1/emperors/?m=41", "/api/v1/emperors/ming_emperor_003/persons?m=41", "/health"):
+        client.get(url)
+    routes = set()
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith("http_requests_total{"):
+            routes.add(line.split('route="', 1)[1].split('"', 1)[0])
+    print(f"路由标签: {sorted(routes)}")
+    assert {"/api/v1/dynasties/", "/api/v1/dynasties/{dynasty_id}", "/api/v1/timeline/{dynasty_id}",
+            "/api/v1/emperors/", "/api/v1/emperors/{emperor_id}/persons", "/health"} <= routes
+    assert not {"/", "/{dynasty_id}"} & routes
+
+
+def test_admin_token():
+    """测试管理接口：未配置 ADMIN_TOKEN 时拒绝所有请求，配置后只接受一致的 X-Admin-Token"""
+    client = _client()
+    url = "/api/v1/admin/slow-queries"
+    token = settings.ADMIN_TOKEN
+    try:
+        settings.ADMIN_TOKEN = None
+        assert client.get(url).status_code == 403
+        assert client.get(url, headers={"X-Admin-Token": ""}).status_code == 403
+
+        settings.ADMIN_TOKEN = "s3cret"
+        assert client.get(url).status_code == 403
+        assert client.delete(url, headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get(url, headers={"X-Admin-Token": "s3cret"}).status_code == 200
+    finally:
+        settings.ADMIN_TOKEN = token
+
+
+def test_schema_upgrade_on_startup():
+    """测试应用启动时补建旧数据库缺少的表（计数表、人物-皇帝关联表、变更日志）"""
+    client = _client()
+    db_path = os.path.join(_TMP_DIR.name, 'legacy.db')
+    db = SQLiteManager(db_path)
+    db.initialize_database()
+    _seed(db)
+    # 模拟旧版本创建的数据库：没有新增的表，表结构版本为 0
+    db.connect().executescript("""
+        DROP TABLE entity_counters;
+        DROP TABLE person_emperor;
+        DROP TABLE change_log;
+        PRAGMA user_version = 0;
+    """)
+    db.close()
+
+    api_db_path = settings.SQLITE_DB_PATH
+    try:
+        settings.SQLITE_DB_PATH = db_path
+        with client:
+            dynasty = client.get("/api/v1/dynasties/ming?upgrade=1")
+            emperor = client.get("/api/v1/emperors/ming_emperor_003?upgrade=1")
+        assert dynasty.status_code == 200 and dynasty.json()["emperor_count"] == 2
+        assert emperor.status_code == 200
+    finally:
+        settings.SQLITE_DB_PATH = api_db_path
+
+    db = SQLiteManager(db_path)
+    assert db.connect().execute("PRAGMA user_version").fetchone()[0] >= 1
+    assert db.fetch_one("SELECT COUNT(*) AS n FROM change_log")["n"] == 0
+    db.close()
+
+
+def test_access_log_on_startup():
+    """测试访问日志文件在应用启动时打开（只导入应用不创建文件），关闭时移除处理器"""
+    import logging
+    import subprocess
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 默认的访问日志路径（logs/access.log）相对于当前目录
+        subprocess.run([sys.executable, "-c", "import server.main"], cwd=tmp_dir, check=True,
+                       env={**os.environ, "PYTHONPATH": project_root})
+        assert not os.path.exists(os.path.join(tmp_dir, "logs"))
+
+    client = _client()
+    log_path = settings.ACCESS_LOG_PATH
+    settings.ACCESS_LOG_PATH = os.path.join(_TMP_DIR.name, 'startup', 'access.log')
+    access_logger = logging.getLogger("uvicorn.access")
+    handlers = list(access_logger.handlers)
+    try:
+        with client:
+            assert os.path.exists(settings.ACCESS_LOG_PATH)
+            assert len(access_logger.handlers) == len(handlers) + 1
+        assert access_logger.handlers == handlers
+    finally:
+        settings.ACCESS_LOG_PATH = log_path
+
+if __name__ == '__main__':
+    test_person_emperor_relation()
+    test_entity_counters()
+    test_change_log()
+    test_change_log_unchanged_rows()
+    test_slow_query_log()
+    test_batch()
+    test_fields_projection()
+    test_response_encoding()
+    test_bundle_build_once()
+    test_response_cache()
+    test_single_flight()
+    test_metrics_route_labels()
+    test_admin_token()
+    test_schema_upgrade_on_startup()
+    test_access_log_on_startup()